@@ -27,12 +27,13 @@ class ArduinoActuator:
     ):
         from engine.explain import format_light_command
 
+        tracking = trigger == "slider"      # drag stream: retarget the running ramp
         if name in self._cfg.rgb_lights:
-            self._arduino.set_rgb_bug_light(name, brightness, mode or "white", ramp_ms)
+            self._arduino.set_rgb_bug_light(name, brightness, mode or "white", ramp_ms, tracking=tracking)
         elif name in self._cfg.pwm_lights:
             pin = self._cfg.pwm_lights[name]
-            pwm = brightness_to_pwm(brightness)
-            self._arduino.send_command(f"RAMP {pin} {pwm} {ramp_ms}")
+            pwm = brightness_to_pwm(brightness, self._arduino.BRIGHTNESS_CURVE)
+            self._arduino.ramp(pin, pwm, ramp_ms, tracking=tracking)
         else:
             return
 
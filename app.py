@@ -1,9 +1,13 @@
 # app.py — PCCS bridge (desired-state architecture)
+import time
+_BOOT_STARTED = time.perf_counter()     # the startup report counts imports too
+
 from flask import Flask, render_template, request, Response
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 import threading
-import time
+import functools
+from concurrent.futures import TimeoutError as FutureTimeout
 import os
 import logging
 import sys
@@ -19,9 +23,16 @@ from modules.phases import PhaseManager
 from modules.sensors import SensorManager
 from modules.toasts import ToastManager, toast_manager
 from modules.system import SystemInfoManager
+from modules.weather import WeatherManager
+from modules.album_art import AlbumArtCache, AlbumArtError
 import modules.toasts
 
 from bridge.runtime import PCCSRuntime
+from bridge.slider import LightChangeCoalescer
+from bridge.startup import StartupPlan
+from engine.intent import IntentBatchError, parse_intent_batch
+
+_IMPORTS_DONE = time.perf_counter()
 
 # ====================== LOGGING ======================
 logger = setup_logging(config)
@@ -129,6 +140,14 @@ logger = setup_logging(config, toast_manager=toast_manager)
 shutdown_event = threading.Event()
 first_state_read_done = False
 
+# ====================== SIMULATION ======================
+# Stand-in hardware for laptops / CI; must be up before any manager touches the config
+simulation = None
+if config.getboolean('simulation', 'enabled', fallback=False):
+    from sim import Simulation
+    simulation = Simulation(config)
+    simulation.start()
+
 # ====================== RUNTIME ======================
 runtime = PCCSRuntime(config, socketio=socketio, dark_mode_config=dark_mode_config)
 
@@ -136,7 +155,28 @@ gps = None
 phase_manager = None
 sensor_manager = None
 sonos = None
+album_art = None
 victron = None
+weather = None
+
+# The web server comes up while the hardware is still starting; control waits for "engine"
+boot = StartupPlan(origin=_BOOT_STARTED)
+boot.record("imports", _BOOT_STARTED, _IMPORTS_DONE)
+STARTING = {"ok": False, "starting": True}
+
+
+def after_startup(refusal):
+    """Refuse a control handler (with `refusal`) until the engine is up."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not boot.ready("engine"):
+                logger.info(f"⏳ {fn.__name__} refused — still starting")
+                return refusal
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
 
 _ping_cache = {"ts": 0, "ms": None, "status": "fail"}
 _PING_CACHE_TTL = 35
@@ -289,6 +329,13 @@ def reed_json():
     return runtime.get_reed_diag_json()
 
 
+@app.route('/api/ready')
+def ready_json():
+    """Startup progress: per-step timings; 503 until lights can be controlled."""
+    ready = boot.ready("engine")
+    return {"ready": ready, "finished": boot.finished, "steps": boot.report()}, 200 if ready else 503
+
+
 @app.route('/api/explain')
 def explain_json():
     """Policy decision snapshot: desired vs observed, sources, drift."""
@@ -427,33 +474,47 @@ def sonos_status():
     return sonos.get_current_state() if sonos else {'enabled': False}
 
 
+@app.route('/api/victron/stats')
+def victron_stats():
+    return victron.get_stats() if victron else {'enabled': False}
+
+
+@app.route('/api/weather')
+def api_weather():
+    if not weather:
+        return {'enabled': False}, 503
+    body, etag, cache_control = weather.http_response()
+    resp = Response(body, mimetype='application/json')
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = cache_control
+    return resp.make_conditional(request)
+
+
 @app.route('/sonos-art')
 def proxy_sonos_album_art():
     art_url = request.args.get('url')
     if not art_url:
         return "Missing url", 400
+    if not album_art:
+        return "Unavailable", 503
+    webp = 'image/webp' in request.headers.get('Accept', '')
     try:
-        from urllib.parse import urlparse
-        import requests
-        parsed = urlparse(art_url)
-        if parsed.port != 1400:
-            return "Invalid", 403
-        resp = requests.get(art_url, timeout=10, stream=True)
-        if resp.status_code != 200:
-            return "Failed", resp.status_code
-        return Response(
-            resp.iter_content(8192),
-            content_type=resp.headers.get('content-type', 'image/jpeg'),
-            headers={'Cache-Control': 'public, max-age=7200'},
-        )
-    except Exception as e:
-        logger.warning(f"Sonos art proxy: {e}")
-        return "Error", 502
+        art = album_art.get(art_url, request.args.get('w', type=int), webp=webp)
+    except AlbumArtError as e:
+        if e.status >= 500:
+            logger.warning(f"Sonos art proxy: {e}")
+        return str(e), e.status
+    resp = Response(art.body, mimetype=art.mimetype)
+    resp.set_etag(art.etag)
+    resp.headers['Cache-Control'] = 'public, max-age=86400'
+    resp.vary.add('Accept')
+    return resp.make_conditional(request)
 
 
 # ====================== LIGHT INTENT ======================
-def _apply_light_change(data, *, source: str = "socket"):
-    if not data or 'name' not in data:
+def _parse_light_change(data, *, source: str = "socket"):
+    """(name, brightness, mode) from a light_change payload, or None (logged)."""
+    if not isinstance(data, dict) or 'name' not in data:
         logger.warning(f"light_change ignored ({source}) — bad payload: {data!r}")
         return None
     name = data['name']
@@ -462,15 +523,52 @@ def _apply_light_change(data, *, source: str = "socket"):
         return None
     try:
         target = max(0, min(100, int(data.get('brightness', 0))))
-    except (TypeError, ValueError):
+    except (TypeError, ValueError, OverflowError):
         logger.warning(f"light_change ignored ({source}) — invalid brightness: {data.get('brightness')!r}")
         return None
     mode = data.get('mode', 'white') if name in runtime.compiled.rgb_lights else None
-    runtime.set_light_intent(name, target, mode)
+    return name, target, mode
+
+
+def _await_reconcile(done, what: str):
+    """Wait for the reconcile that applies `what`; a slow or failed pass is logged, never raised.
+
+    The intent is already journaled and in the world by now, so the request
+    still succeeds; the state returned may just predate the outputs.
+    """
+    try:
+        done.result(timeout=5)
+    except FutureTimeout:
+        logger.warning(f"⏳ {what}: reconcile still running after 5s — replying with current state")
+    except Exception as e:
+        logger.error(f"❌ {what}: reconcile failed: {e}")
+
+
+def _apply_light_change(data, *, source: str = "socket"):
+    parsed = _parse_light_change(data, source=source)
+    if parsed is None:
+        return None
+    _await_reconcile(runtime.set_light_intent(*parsed), f"light_change ({source})")     # state after this change
     return runtime.get_ui_state()
 
 
+def _apply_coalesced_light_change(change):
+    """Apply the latest light_change of a frame; drags ("tracking") retarget the running ramp."""
+    runtime.set_light_intent(change["name"], change["brightness"], change["mode"],
+                             ramp_source="slider" if change["tracking"] else "ui")
+    return {"name": change["name"], "brightness": change["brightness"], "mode": change["mode"]}
+
+
+# Socket light_change events: latest value per light per frame, acked with what was applied
+light_changes = LightChangeCoalescer(
+    _apply_coalesced_light_change,
+    reply=lambda sid, ack: socketio.emit('light_ack', ack, to=sid),
+    frame_s=config.getint('lighting', 'slider_frame_ms', fallback=50) / 1000.0,
+)
+
+
 @app.route('/api/light', methods=['POST'])
+@after_startup((STARTING, 503))
 def api_light_change():
     state = _apply_light_change(request.get_json(silent=True) or {}, source="http")
     if state is None:
@@ -478,7 +576,31 @@ def api_light_change():
     return {"ok": True, "state": state}
 
 
+def _apply_intent_batch(items, *, source: str):
+    """(version, Future) for a batch of light/relay intents, or raises IntentBatchError (logged)."""
+    try:
+        batch = parse_intent_batch(items, runtime.compiled)
+    except IntentBatchError as e:
+        logger.warning(f"intents ignored ({source}) — {e}")
+        raise
+    return runtime.apply_intents(batch)
+
+
+@app.route('/api/intents', methods=['POST'])
+@after_startup((STARTING, 503))
+def api_set_intents():
+    # One world change, one reconcile, one state_update for the whole list
+    data = request.get_json(silent=True) or {}
+    try:
+        version, done = _apply_intent_batch(data.get('intents'), source="http")
+    except IntentBatchError as e:
+        return {"ok": False, "errors": e.errors}, 400
+    _await_reconcile(done, "intents (http)")
+    return {"ok": True, "version": version, "state": runtime.get_ui_state()}
+
+
 @app.route('/api/scene', methods=['POST'])
+@after_startup((STARTING, 503))
 def api_set_scene():
     data = request.get_json(silent=True) or {}
     scene = data.get('scene')
@@ -494,18 +616,46 @@ def api_set_scene():
 
 # ====================== SOCKETIO ======================
 @socketio.on('light_change')
+@after_startup(STARTING)
 def handle_light_change(data):
-    state = _apply_light_change(data, source="socket")
-    if state is not None:
-        emit('state_update', state)
+    # The reconcile pass broadcasts state_update; this client also gets a light_ack
+    parsed = _parse_light_change(data, source="socket")
+    if parsed is None:
+        return
+    name, target, mode = parsed
+    light_changes.push(name, {
+        "name": name,
+        "brightness": target,
+        "mode": mode,
+        "tracking": bool(data.get('tracking')),
+        "seq": data.get('seq'),
+    }, reply_to=request.sid)
 
 
 @socketio.on('relay_change')
+@after_startup(STARTING)
 def handle_relay_change(data):
-    runtime.set_relay_intent(data.get('name'), bool(data.get('on', False)))
+    name = data.get('name') if isinstance(data, dict) else None
+    if name not in runtime.compiled.relay_names:
+        logger.warning(f"relay_change ignored — unknown relay: {name!r}")
+        return
+    runtime.set_relay_intent(name, bool(data.get('on', False)))
+
+
+@socketio.on('set_intents')
+@after_startup(STARTING)
+def handle_set_intents(data):
+    # Acked with the version; the reconcile pass broadcasts state_update
+    try:
+        version, _ = _apply_intent_batch((data or {}).get('intents') if isinstance(data, dict) else None,
+                                         source="socket")
+    except IntentBatchError as e:
+        return {"ok": False, "errors": e.errors}
+    return {"ok": True, "version": version}
 
 
 @socketio.on('set_scene')
+@after_startup(STARTING)
 def handle_set_scene(data):
     scene = data.get('scene')
     if scene:
@@ -514,6 +664,7 @@ def handle_set_scene(data):
 
 
 @socketio.on('force_reed')
+@after_startup(STARTING)
 def handle_force_reed(data):
     name = data.get('name')
     if name is None:
@@ -540,6 +691,7 @@ def handle_resync_reeds():
 
 
 @socketio.on('force_phase')
+@after_startup(STARTING)
 def handle_force_phase(data):
     runtime.force_phase(data.get('phase'))
 
@@ -615,6 +767,12 @@ def handle_get_victron_state():
         emit('victron_update', {'stale': True})
 
 
+@socketio.on('victron_viewing')
+def handle_victron_viewing(data=None):
+    if victron:
+        victron.note_viewer()
+
+
 @socketio.on('get_network_status')
 def handle_get_network_status():
     emit('network_update', build_network_status())
@@ -623,15 +781,20 @@ def handle_get_network_status():
 @socketio.on('connect')
 def handle_connect(sid=None):
     global first_state_read_done
-    emit('lights_config', runtime.get_frontend_config())
+    if boot.ready("engine") and not first_state_read_done:
+        runtime.read_hardware()
+        first_state_read_done = True
+    send_initial_state(emit)
+
+
+def send_initial_state(send):
+    """Everything a fresh client needs; `send` is emit (one client) or socketio.emit (all)."""
+    send('lights_config', runtime.get_frontend_config())
 
     if runtime.screen_actuator:
-        emit('screens_init', {'screens': screen_json()['screens']})
+        send('screens_init', {'screens': screen_json()['screens']})
 
-    if not first_state_read_done:
-        runtime.reconciler.read_hardware()
-        first_state_read_done = True
-    emit('state_update', runtime.get_ui_state())
+    send('state_update', runtime.get_ui_state())
 
     if phase_manager:
         phase_data = {'phase': phase_manager.get_phase()}
@@ -639,34 +802,36 @@ def handle_connect(sid=None):
             phase_data.update(phase_manager.get_phase_times())
         except Exception:
             pass
-        emit('phase_update', phase_data)
-        emit('phase_diag_update', {'forced': phase_manager.is_forced()})
-        emit('global_dark_mode_update', {
+        send('phase_update', phase_data)
+        send('phase_diag_update', {'forced': phase_manager.is_forced()})
+        send('global_dark_mode_update', {
             'mode': phase_manager.get_current_dark_mode(),
             'manual': phase_manager.manual_dark_mode is not None,
         })
 
-    emit('reed_update', {'states': runtime.effective_reed_states()})
-    emit('reed_diag_update', runtime.get_reed_diag_json())
+    send('reed_update', {'states': runtime.effective_reed_states()})
+    send('reed_diag_update', runtime.get_reed_diag_json())
 
     if sonos and sonos.enabled:
         try:
-            emit('sonos_update', sonos.get_current_state())
-            emit('sonos_speakers', {'speakers': list(sonos.speakers.keys()), 'current': sonos.current_speaker, 'enabled': True})
+            send('sonos_update', sonos.get_current_state())
+            send('sonos_speakers', {'speakers': list(sonos.speakers.keys()), 'current': sonos.current_speaker, 'enabled': True})
         except Exception:
             pass
     else:
-        emit('sonos_update', {'enabled': False})
+        send('sonos_update', {'enabled': False})
 
     try:
-        emit('network_update', build_network_status())
+        send('network_update', build_network_status())
     except Exception:
         pass
 
+    if sensor_manager:
+        send('sensor_update', sensor_manager.get_state())
     if gps:
-        emit('gps_update', gps.get_state())
+        send('gps_update', gps.get_state())
     if victron:
-        emit('victron_update', victron.get_state())
+        send('victron_update', victron.get_state())
 
 
 def cleanup():
@@ -674,60 +839,118 @@ def cleanup():
     shutdown_event.set()
     if sonos:
         sonos.stop()
+    if weather:
+        weather.stop()
+    if album_art:
+        album_art.close()
+    light_changes.stop()
     runtime.stop()
+    if simulation:
+        simulation.stop()
     logger.info("🌙💤 Pissmole has left the campsite, goodbye!")
 
 
-if __name__ == "__main__":
-    logger.info("✅ System starting (desired-state engine)...")
+# ====================== STARTUP ======================
+# Independent subsystems come up in parallel; `after` is what each one needs first
+def _start_gps():
+    global gps
+    module = GPSModule(config, socketio)
+    module.init_gps()
+    module.init_geolocator()
+    runtime.gps = gps = module
 
-    app._start_time = datetime.now()
-    runtime.start_hardware()
 
-    gps = GPSModule(config, socketio)
-    phase_manager = PhaseManager(config, gps, socketio, dark_mode_config)
-    phase_manager.on_phase_change = lambda p, f, inv: runtime.on_phase_change(p, f, inv)
-    runtime.phase_manager = phase_manager
-    runtime.gps = gps
+def _start_phase_manager():
+    global phase_manager
+    manager = PhaseManager(config, gps, socketio, dark_mode_config, clock=runtime.clock)
+    manager.on_phase_change = lambda p, f, inv: runtime.on_phase_change(p, f, inv)
+    runtime.phase_manager = phase_manager = manager
 
-    sensor_manager = SensorManager(config, runtime.arduino.send_command, socketio)
-    runtime.sensor_manager = sensor_manager
-
-    gps.init_gps()
-    gps.init_geolocator()
 
+def _start_engine():
     # Phase before first reconcile — avoids guessing Evening on open reeds at boot
-    runtime.bootstrap_phase()
     runtime.finish_startup()
-
-    sensor_manager.start()
-    phase_manager.start()
-
     runtime.start_background_threads()
-    threading.Thread(target=network_status_broadcaster, daemon=True).start()
 
+
+def _start_phase_loop():
+    phase_manager.start()
     if getattr(gps, 'serial', None):
         gps.start_reader()
 
+
+def _start_sensors():
+    global sensor_manager
+    manager = SensorManager(config, runtime.arduino.send_command, socketio)
+    manager.start()
+    runtime.sensor_manager = sensor_manager = manager
+
+
+def _start_weather():
+    global weather
+    manager = WeatherManager(config, socketio, gps)
+    manager.start()
+    weather = manager
+
+
+def _start_sonos():
+    global sonos, album_art
+    from modules.sonos import SonosManager
+    manager = SonosManager(socketio, config)
+    if simulation:
+        simulation.attach_sonos(manager)
+    if manager.enabled:
+        album_art = AlbumArtCache(config)
+    manager.start()
+    sonos = manager
+
+
+def _start_victron():
+    global victron
+    from modules.victron import VictronManager
+    manager = VictronManager(socketio, config, phase_manager=phase_manager)
+    if simulation:
+        simulation.attach_victron(manager)
+    manager.start()
+    phase_manager.register_night_listener(manager.reset_daily_generation)
+    victron = manager
+
+
+def _start_network():
+    threading.Thread(target=network_status_broadcaster, daemon=True).start()
     system_manager.get_dhcp_clients()
-    logger.info("🎉🎉🎉 The Pissmole Camper Control System lives! 🎉🎉🎉")
 
-    try:
-        from modules.sonos import SonosManager
-        sonos = SonosManager(socketio, config)
-        sonos.start()
-    except Exception as e:
-        logger.error(f"Sonos init failed: {e}")
-        sonos = None
 
-    try:
-        from modules.victron import VictronManager
-        victron = VictronManager(socketio, config, phase_manager=phase_manager)
-        victron.start()
-        phase_manager.register_night_listener(victron.reset_daily_generation)
-    except Exception as e:
-        logger.error(f"Victron init failed: {e}")
-        victron = None
+def _startup_finished():
+    if boot.ready("engine"):
+        logger.info("🎉🎉🎉 The Pissmole Camper Control System lives! 🎉🎉🎉")
+    else:
+        logger.critical("💥 Light control never came up — see the startup report above")
+    # Clients that connected while we were starting only got placeholders
+    send_initial_state(socketio.emit)
+
+
+boot.step("arduino", runtime.arduino.init_serial)
+boot.step("gpio", runtime.gpio.init_devices)
+boot.step("world", runtime.load_world, after=("arduino", "gpio"))
+boot.step("gps", _start_gps)
+boot.step("phase_manager", _start_phase_manager, after=("gps",))
+boot.step("phase", runtime.bootstrap_phase, after=("world", "phase_manager"))
+boot.step("engine", _start_engine, after=("phase",))
+boot.step("phase_loop", _start_phase_loop, after=("engine",))
+boot.step("sensors", _start_sensors, after=("arduino",))
+boot.step("weather", _start_weather, after=("gps",))
+boot.step("sonos", _start_sonos)
+boot.step("victron", _start_victron, after=("phase_manager",))
+boot.step("network", _start_network)
+
+
+if __name__ == "__main__":
+    logger.info("✅ System starting (desired-state engine)...")
+
+    app._start_time = datetime.now()
+    boot.record("app", _IMPORTS_DONE, time.perf_counter())
+    boot.start(on_finished=_startup_finished)
 
     try:
         socketio.run(
@@ -1,134 +1,316 @@
 // arduino.cpp
 
 #include <avr/io.h>
+#include <avr/pgmspace.h>
 #include <avr/sleep.h>
 
+// ====================== RAMPS ======================
+// Ramps run in 16.16 fixed point: RAMP works out a per-tick step once, and each
+// tick is an add and a shift (no float division per pin). A trailing "C" on
+// RAMP eases through CIE_PWM, i.e. in equal steps of perceived brightness
+// rather than of duty cycle. A trailing "T" (tracking, for slider drags) makes
+// the duration the time for a full 0-255 sweep, so a retarget carries on from
+// where the ramp is at the same rate instead of taking the whole duration again.
+#define RAMP_TICK_MS 1
+
 struct PWMState {
-  int current_value;
-  int start_value;
-  int target;
-  unsigned long start_time;
-  unsigned long duration;
+  int current_value;      // duty currently written (what GET reports)
+  uint8_t target;         // duty at the end of the ramp
+  bool curve;             // position is a CIE_PWM level rather than a duty
+  uint32_t position;      // 16.16 fixed point
+  int32_t step;           // per tick, 16.16 fixed point
+  unsigned long ticks_left;
 };
 PWMState pwm_states[14]; // Indices 1-13 for pins 1-13 (but skipping pin 1 to avoid TX conflict)
+unsigned long ramp_last_tick = 0;
+
+// CIE 1931 lightness (level 0-255) -> PWM duty. Generated by modules/brightness.py
+// (CIE_PWM there must stay identical; tests/test_firmware.py checks it).
+const uint8_t CIE_PWM[256] PROGMEM = {
+0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2,
+  2, 2, 2, 2, 2, 2, 2, 3, 3, 3, 3, 3, 3, 3, 3, 4,
+  4, 4, 4, 4, 4, 5, 5, 5, 5, 5, 6, 6, 6, 6, 6, 7,
+  7, 7, 7, 8, 8, 8, 8, 9, 9, 9, 10, 10, 10, 10, 11, 11,
+  11, 12, 12, 12, 13, 13, 13, 14, 14, 15, 15, 15, 16, 16, 17, 17,
+  17, 18, 18, 19, 19, 20, 20, 21, 21, 22, 22, 23, 23, 24, 24, 25,
+  25, 26, 26, 27, 28, 28, 29, 29, 30, 31, 31, 32, 32, 33, 34, 34,
+  35, 36, 37, 37, 38, 39, 39, 40, 41, 42, 43, 43, 44, 45, 46, 47,
+  47, 48, 49, 50, 51, 52, 53, 54, 54, 55, 56, 57, 58, 59, 60, 61,
+  62, 63, 64, 65, 66, 67, 68, 70, 71, 72, 73, 74, 75, 76, 77, 79,
+  80, 81, 82, 83, 85, 86, 87, 88, 90, 91, 92, 94, 95, 96, 98, 99,
+  100, 102, 103, 105, 106, 108, 109, 110, 112, 113, 115, 116, 118, 120, 121, 123,
+  124, 126, 128, 129, 131, 132, 134, 136, 138, 139, 141, 143, 145, 146, 148, 150,
+  152, 154, 155, 157, 159, 161, 163, 165, 167, 169, 171, 173, 175, 177, 179, 181,
+  183, 185, 187, 189, 191, 193, 196, 198, 200, 202, 204, 207, 209, 211, 214, 216,
+  218, 220, 223, 225, 228, 230, 232, 235, 237, 240, 242, 245, 247, 250, 252, 255
+};
+
+// ====================== COMMAND INPUT ======================
+// Bytes are assembled into a fixed buffer as they arrive; nothing waits for the
+// rest of a line, and no heap Strings are created. At most SERIAL_RX_BUDGET
+// bytes are consumed per loop() pass and ramps are ticked after every command,
+// so a burst of RAMPs from a scene can't hold back the ramp tick.
+#define CMD_BUF_SIZE 48
+#define SERIAL_RX_BUDGET 64
+
+char cmd_buf[CMD_BUF_SIZE];
+uint8_t cmd_len = 0;
+bool cmd_overflow = false;
+
+void updateRamps();
+void processCommand(const char *line);
+void processSet(const char *args);
+void processRamp(const char *args);
+void processGet(const char *args);
+void processAnalog(const char *args);
+void processGetVcc();
+void processGetAll();
+
+// ====================== BACKGROUND ADC ======================
+// The ADC free-runs under interrupt, round-robin over A0-A5 and the internal
+// 1.1V bandgap (for VCC). Each channel keeps a rolling average of the last
+// ADC_BLOCKS x ADC_BLOCK_SAMPLES conversions, so ANALOG/GETVCC reply from the
+// cache instantly instead of stalling ramps and the serial parser.
+#define ADC_ANALOG_CHANNELS 6
+#define ADC_VCC_CHANNEL ADC_ANALOG_CHANNELS
+#define ADC_CHANNELS (ADC_ANALOG_CHANNELS + 1)
+#define ADC_BLOCK_SAMPLES 16
+#define ADC_BLOCKS 4
+#define ADC_SETTLE_ANALOG 2   // free-running: the first result after a mux switch is still the old channel
+#define ADC_SETTLE_VCC 12     // bandgap needs ~1ms to settle after switching to it
+
+volatile uint16_t adc_blocks[ADC_CHANNELS][ADC_BLOCKS];
+volatile uint8_t adc_filled[ADC_CHANNELS];
+volatile uint8_t adc_head[ADC_CHANNELS];
+volatile uint8_t adc_channel = 0;
+volatile uint8_t adc_count = 0;
+volatile uint16_t adc_sum = 0;
+
+void adcSelect(uint8_t channel) {
+  if (channel == ADC_VCC_CHANNEL) {
+    // AVcc reference, measure the internal 1.1V bandgap
+    ADMUX = (1 << REFS0) | (1 << MUX4) | (1 << MUX3) | (1 << MUX2) | (1 << MUX1);
+  } else {
+    ADMUX = (1 << REFS0) | channel;
+  }
+  ADCSRB &= ~(1 << MUX5);
+}
 
 ISR(ADC_vect) {
-  // Empty ISR just to wake from sleep
+  uint16_t sample = ADC;
+  uint8_t settle = (adc_channel == ADC_VCC_CHANNEL) ? ADC_SETTLE_VCC : ADC_SETTLE_ANALOG;
+
+  adc_count++;
+  if (adc_count <= settle) return;
+  adc_sum += sample;
+  if (adc_count < settle + ADC_BLOCK_SAMPLES) return;
+
+  uint8_t ch = adc_channel;
+  adc_blocks[ch][adc_head[ch]] = adc_sum;
+  adc_head[ch] = (adc_head[ch] + 1) % ADC_BLOCKS;
+  if (adc_filled[ch] < ADC_BLOCKS) adc_filled[ch]++;
+
+  adc_sum = 0;
+  adc_count = 0;
+  adc_channel = (ch + 1) % ADC_CHANNELS;
+  adcSelect(adc_channel);
+}
+
+void startAdcSampler() {
+  adc_channel = 0;
+  adcSelect(0);
+  // Enable, auto-trigger (free running, ADTS = 0), interrupt, prescaler 128 (~9.6 kHz)
+  ADCSRB &= ~((1 << ADTS2) | (1 << ADTS1) | (1 << ADTS0));
+  ADCSRA = (1 << ADEN) | (1 << ADATE) | (1 << ADIE) | (1 << ADPS2) | (1 << ADPS1) | (1 << ADPS0);
+  ADCSRA |= (1 << ADSC);
+}
+
+// Returns the number of samples summed into *sum (0 if the channel has no data yet)
+uint16_t adcAverage(uint8_t ch, uint32_t *sum) {
+  uint32_t total = 0;
+  uint8_t blocks;
+  noInterrupts();
+  blocks = adc_filled[ch];
+  for (uint8_t i = 0; i < blocks; i++) total += adc_blocks[ch][i];
+  interrupts();
+  *sum = total;
+  return (uint16_t)blocks * ADC_BLOCK_SAMPLES;
 }
 
 long readVcc() {
-  ADMUX = (0 << REFS1) | (1 << REFS0) | (0 << ADLAR) | (1 << MUX4) | (1 << MUX3) | (1 << MUX2) | (1 << MUX1) | (0 << MUX0);
-  ADCSRB &= ~(1 << MUX5);
-  delay(2);
-  for (int i = 0; i < 10; i++) {
-    ADCSRA |= (1 << ADSC);
-    while (ADCSRA & (1 << ADSC));
-    (void)ADCL;
-    (void)ADCH;
-  }
-  long sum = 0;
-  int num = 64;
-  for (int i = 0; i < num; i++) {
-    ADCSRA |= (1 << ADSC);
-    while (ADCSRA & (1 << ADSC));
-    uint8_t low = ADCL;
-    uint8_t high = ADCH;
-    sum += (high << 8) | low;
-  }
-  long result = sum / num;
-  if (result == 0) result = 1;
-  result = 1125300L / result;
-  return result;
+  uint32_t sum;
+  uint16_t n = adcAverage(ADC_VCC_CHANNEL, &sum);
+  if (n == 0 || sum == 0) return 0;
+  // 1.1V * 1023 * 1000 = 1125300, scaled by the sample count
+  return (long)((1125300UL * n) / sum);
 }
 
 void setup() {
   Serial.begin(500000);
-  ADCSRA = (1 << ADEN) | (1 << ADPS2) | (1 << ADPS1) | (1 << ADPS0);
+  startAdcSampler();
   for (int i = 2; i <= 13; i++) {
     pinMode(i, OUTPUT);
     pwm_states[i].current_value = 0;
     pwm_states[i].target = 0;
-    pwm_states[i].duration = 0;
+    pwm_states[i].ticks_left = 0;
     analogWrite(i, 0);
   }
+  // Let every channel fill its rolling window before the first command (~60ms)
+  unsigned long wait_start = millis();
+  while (adc_filled[ADC_VCC_CHANNEL] < ADC_BLOCKS && millis() - wait_start < 200);
+  // The bridge waits for this instead of sleeping a fixed init_delay after opening the port
+  Serial.println("READY");
 }
 
 void loop() {
-  static unsigned long last_update = 0;
-  unsigned long now = millis();
-
-  if (now - last_update >= 4) {
-    last_update = now;
-
-    for (int i = 2; i <= 13; i++) {
-      if (pwm_states[i].duration > 0) {
-        unsigned long elapsed = now - pwm_states[i].start_time;
-        if (elapsed >= pwm_states[i].duration) {
-          pwm_states[i].current_value = pwm_states[i].target;
-          pwm_states[i].duration = 0;
-        } else {
-          float progress = static_cast<float>(elapsed) / pwm_states[i].duration;
-          pwm_states[i].current_value = pwm_states[i].start_value +
-            static_cast<int>((pwm_states[i].target - pwm_states[i].start_value) * progress);
-        }
-        analogWrite(i, pwm_states[i].current_value);
+  updateRamps();
+
+  int budget = SERIAL_RX_BUDGET;
+  while (budget-- > 0 && Serial.available() > 0) {
+    char c = Serial.read();
+    if (c == '\n' || c == '\r') {
+      if (cmd_len > 0 && !cmd_overflow) {
+        cmd_buf[cmd_len] = '\0';
+        processCommand(cmd_buf);
+        updateRamps();
       }
+      cmd_len = 0;
+      cmd_overflow = false;
+    } else if (cmd_len < CMD_BUF_SIZE - 1) {
+      cmd_buf[cmd_len++] = c;
+    } else {
+      cmd_overflow = true;  // over-long line: drop it whole
     }
   }
+}
+
+void updateRamps() {
+  unsigned long elapsed = millis() - ramp_last_tick;
+  if (elapsed < RAMP_TICK_MS) return;
+  // A slow pass (e.g. a serial reply) catches up in one go, so ramp timing holds
+  unsigned long ticks = elapsed / RAMP_TICK_MS;
+  ramp_last_tick += ticks * RAMP_TICK_MS;
 
-    while (Serial.available() > 0) {
-    String command = Serial.readStringUntil('\n');
-    command.trim();
-    if (command.length() == 0) continue;
-
-    if (command.startsWith("SET ")) {
-      processSet(command.substring(4));
-    } else if (command.startsWith("RAMP ")) {
-      processRamp(command.substring(5));
-    } else if (command.startsWith("GET ")) {
-      processGet(command.substring(4));
-    } else if (command.startsWith("ANALOG ")) {
-      processAnalog(command.substring(7));
-    } else if (command.startsWith("GETVCC")) {
-      processGetVcc();
-    } else if (command == "GETALL") {
-      processGetAll();
+  for (int i = 2; i <= 13; i++) {
+    PWMState &s = pwm_states[i];
+    if (s.ticks_left == 0) continue;
+    int value;
+    if (ticks >= s.ticks_left) {
+      s.ticks_left = 0;
+      value = s.target;
+    } else {
+      s.ticks_left -= ticks;
+      s.position += s.step * (int32_t)ticks;
+      uint8_t level = s.position >> 16;
+      value = s.curve ? pgm_read_byte(&CIE_PWM[level]) : level;
     }
+    if (value != s.current_value) {
+      s.current_value = value;
+      analogWrite(i, value);
+    }
+  }
+}
+
+// Lowest CIE level whose duty is at least `pwm`
+uint8_t cieLevel(uint8_t pwm) {
+  uint16_t lo = 0, hi = 255;
+  while (lo < hi) {
+    uint16_t mid = (lo + hi) / 2;
+    if (pgm_read_byte(&CIE_PWM[mid]) < pwm) lo = mid + 1;
+    else hi = mid;
+  }
+  return lo;
+}
+
+// ====================== TOKENIZER ======================
+
+const char *skipSpaces(const char *p) {
+  while (*p == ' ' || *p == '\t') p++;
+  return p;
+}
+
+// "WORD" followed by a space or end of line; advances p past it
+bool matchWord(const char *&p, const char *word) {
+  size_t n = strlen(word);
+  if (strncmp(p, word, n) != 0) return false;
+  if (p[n] != '\0' && p[n] != ' ' && p[n] != '\t') return false;
+  p = skipSpaces(p + n);
+  return true;
+}
+
+// Next whitespace-separated integer; false if there isn't one
+bool nextInt(const char *&p, long &out) {
+  p = skipSpaces(p);
+  bool negative = (*p == '-');
+  const char *digits = negative ? p + 1 : p;
+  if (*digits < '0' || *digits > '9') return false;
+  long value = 0;
+  while (*digits >= '0' && *digits <= '9') {
+    value = value * 10 + (*digits - '0');
+    digits++;
   }
+  out = negative ? -value : value;
+  p = digits;
+  return true;
 }
 
-void processSet(String args) {
-  int space_pos = args.indexOf(' ');
-  if (space_pos != -1) {
-    int pin = args.substring(0, space_pos).toInt();
-    int value = args.substring(space_pos + 1).toInt();
+void processCommand(const char *line) {
+  const char *p = skipSpaces(line);
+  if (matchWord(p, "SET")) {
+    processSet(p);
+  } else if (matchWord(p, "RAMP")) {
+    processRamp(p);
+  } else if (matchWord(p, "GET")) {
+    processGet(p);
+  } else if (matchWord(p, "ANALOG")) {
+    processAnalog(p);
+  } else if (strncmp(p, "GETVCC", 6) == 0) {
+    processGetVcc();
+  } else if (matchWord(p, "GETALL")) {
+    processGetAll();
+  }
+}
+
+void processSet(const char *args) {
+  long pin, value;
+  if (nextInt(args, pin) && nextInt(args, value)) {
     if (pin >= 2 && pin <= 13 && value >= 0 && value <= 255) {
       pwm_states[pin].current_value = value;
       pwm_states[pin].target = value;
-      pwm_states[pin].duration = 0;
+      pwm_states[pin].ticks_left = 0;
       analogWrite(pin, value);
     }
   }
 }
 
-void processRamp(String args) {
-  int first_space = args.indexOf(' ');
-  int second_space = args.indexOf(' ', first_space + 1);
-  if (first_space != -1 && second_space != -1) {
-    int pin = args.substring(0, first_space).toInt();
-    int target = args.substring(first_space + 1, second_space).toInt();
-    unsigned long duration = args.substring(second_space + 1).toInt();
+void processRamp(const char *args) {
+  long pin, target, duration;
+  if (nextInt(args, pin) && nextInt(args, target) && nextInt(args, duration)) {
     if (pin >= 2 && pin <= 13 && target >= 0 && target <= 255 && duration > 0) {
-      pwm_states[pin].start_value = pwm_states[pin].current_value;
-      pwm_states[pin].target = target;
-      pwm_states[pin].start_time = millis();
-      pwm_states[pin].duration = duration;
+      PWMState &s = pwm_states[pin];
+      bool curve = false, tracking = false;
+      for (args = skipSpaces(args); *args; args = skipSpaces(args + 1)) {
+        if (*args == 'C' || *args == 'c') curve = true;
+        else if (*args == 'T' || *args == 't') tracking = true;
+        else break;
+      }
+      s.curve = curve;
+      uint8_t from = s.curve ? cieLevel(s.current_value) : s.current_value;
+      uint8_t to = s.curve ? cieLevel(target) : target;
+      unsigned long ticks = duration / RAMP_TICK_MS;
+      if (tracking) ticks = ticks * (unsigned long)(to > from ? to - from : from - to) / 255;
+      if (ticks == 0) ticks = 1;
+      s.target = target;
+      s.position = (uint32_t)from << 16;
+      s.step = ((int32_t)to - from) * 65536L / (long)ticks;
+      s.ticks_left = ticks;
     }
   }
 }
 
-void processGet(String args) {
-  int pin = args.toInt();
+void processGet(const char *args) {
+  long pin;
+  if (!nextInt(args, pin)) return;
   if (pin >= 2 && pin <= 13) {
     Serial.print("VALUE ");
     Serial.print(pin);
@@ -137,10 +319,13 @@ void processGet(String args) {
   }
 }
 
-void processAnalog(String args) {
-  int pin = args.toInt();
+void processAnalog(const char *args) {
+  long pin;
+  if (!nextInt(args, pin)) return;
   if (pin >= 0 && pin <= 5) {
-    float value = getAnalogAvg(pin);
+    uint32_t sum;
+    uint16_t n = adcAverage(pin, &sum);
+    float value = n ? static_cast<float>(sum) / n : 0.0;
     Serial.print("ANALOG ");
     Serial.print(pin);
     Serial.print(" ");
@@ -163,14 +348,4 @@ void processGetAll() {
     Serial.print(pwm_states[i].current_value);
   }
   Serial.println();
-}
-
-float getAnalogAvg(int pin) {
-  long sum = 0;
-  int num_reads = 64;
-  for (int i = 0; i < num_reads; i++) {
-    sum += analogRead(A0 + pin);
-    delayMicroseconds(50);
-  }
-  return static_cast<float>(sum) / num_reads;
 }
\ No newline at end of file
@@ -0,0 +1,86 @@
+// Host-side stand-in for the Arduino core, just enough to compile arduino.ino
+// with g++ and drive it against a simulated clock, serial port and ADC.
+#pragma once
+
+#include <math.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <string>
+
+#include "avr/io.h"
+
+#define OUTPUT 1
+#define INPUT 0
+#define ISR(vector) void vector(void)
+
+unsigned long millis();
+unsigned long micros();
+void delay(unsigned long ms);
+void delayMicroseconds(unsigned int us);
+void pinMode(uint8_t pin, uint8_t mode);
+void analogWrite(uint8_t pin, int value);
+void noInterrupts();
+void interrupts();
+
+class HostSerial {
+ public:
+  void begin(unsigned long baud);
+  int available();
+  int read();
+  void print(const char *s);
+  void print(char c);
+  void print(int v);
+  void print(long v);
+  void print(unsigned long v);
+  void print(double v, int digits = 2);
+  void println();
+  void println(const char *s);
+  void println(int v);
+  void println(long v);
+  void println(unsigned long v);
+  void println(double v, int digits = 2);
+};
+extern HostSerial Serial;
+
+// ====================== HOST CONTROLS ======================
+
+// Simulated time; every core call costs a few microseconds of it
+uint64_t hostNowMicros();
+void hostAdvance(unsigned long us);
+// Queue bytes on the RX line, arriving at `bytes_per_ms` from now (500000 baud = 50)
+void hostSerialFeed(const char *data, unsigned bytes_per_ms = 50);
+// Everything the sketch has printed since the last call
+std::string hostSerialTake();
+// Raw conversion result for an ADC input (0-5) and for the 1.1V bandgap
+void hostSetAdc(uint8_t channel, uint16_t value);
+void hostSetBandgap(uint16_t value);
+// Called on every analogWrite (pin, value, time in us)
+extern void (*hostOnAnalogWrite)(uint8_t pin, int value, uint64_t at_us);
+extern int hostPwm[16];
+
+// ====================== REAL-TIME MODE (fwhost) ======================
+
+// Follow the wall clock instead of charging simulated per-call costs
+void hostUseRealClock();
+// Bytes that have just arrived on the RX line
+void hostSerialReceive(const char *data, size_t len);
+// Where printed output goes (default: buffered for hostSerialTake)
+extern void (*hostOnSerialWrite)(const char *data, size_t len);
+
+struct HostStats {
+  uint64_t loops;
+  uint64_t loop_us_total;
+  uint64_t loop_us_max;
+  uint32_t loop_us_hist[2048];     // 1 us buckets, last one collects the tail
+  uint64_t commands;               // lines consumed by the sketch
+  uint64_t command_wait_us_total;  // newline arrival -> consumed by the parser
+  uint64_t command_wait_us_max;
+  uint64_t ramps_done;             // RAMPs that reached their target
+  uint64_t ramp_error_us_total;    // |finish - requested duration|
+  uint64_t ramp_error_us_max;
+};
+extern HostStats hostStats;
+void hostRecordLoop(uint64_t us);
+uint64_t hostLoopPercentile(double p);
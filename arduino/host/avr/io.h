@@ -0,0 +1,32 @@
+// Host-side ADC registers for arduino.ino (see host.cpp for the simulation)
+#pragma once
+
+#include <stdint.h>
+
+extern volatile uint8_t ADMUX;
+extern volatile uint8_t ADCSRA;
+extern volatile uint8_t ADCSRB;
+extern volatile uint16_t ADC;
+
+#define MUX0 0
+#define MUX1 1
+#define MUX2 2
+#define MUX3 3
+#define MUX4 4
+#define ADLAR 5
+#define REFS0 6
+#define REFS1 7
+
+#define ADPS0 0
+#define ADPS1 1
+#define ADPS2 2
+#define ADIE 3
+#define ADIF 4
+#define ADATE 5
+#define ADSC 6
+#define ADEN 7
+
+#define ADTS0 0
+#define ADTS1 1
+#define ADTS2 2
+#define MUX5 3
@@ -0,0 +1,7 @@
+// Host builds keep "flash" tables in ordinary memory
+#pragma once
+
+#include <stdint.h>
+
+#define PROGMEM
+#define pgm_read_byte(addr) (*(const uint8_t *)(addr))
@@ -0,0 +1,145 @@
+// Runs arduino.ino in real time behind a pseudo-terminal, so ArduinoManager
+// (or anything else that speaks the serial protocol) can talk to it like a
+// board on /dev/ttyACM0.
+//
+//   make fwhost && ./fwhost --link /tmp/pccs-arduino --stats /tmp/fwhost.json
+//
+// Prints "PTY <slave path>" once the sketch has run setup(). SIGUSR1 writes
+// loop timing, command throughput and ramp accuracy to the --stats file
+// (also written on exit); SIGINT/SIGTERM stop it.
+#include "Arduino.h"
+
+#include "../arduino.ino"
+
+#include <errno.h>
+#include <fcntl.h>
+#include <signal.h>
+#include <termios.h>
+#include <time.h>
+#include <unistd.h>
+
+static volatile sig_atomic_t stop_requested = 0;
+static volatile sig_atomic_t stats_requested = 0;
+static int master_fd = -1;
+
+static void onStop(int) { stop_requested = 1; }
+static void onStats(int) { stats_requested = 1; }
+
+static uint64_t wallMicros() {
+  struct timespec ts;
+  clock_gettime(CLOCK_MONOTONIC, &ts);
+  return (uint64_t)ts.tv_sec * 1000000ULL + ts.tv_nsec / 1000;
+}
+
+static void writeMaster(const char *data, size_t len) {
+  while (len > 0) {
+    ssize_t n = write(master_fd, data, len);
+    if (n <= 0) return;  // nobody reading and the queue is full: drop, like a real UART
+    data += n;
+    len -= n;
+  }
+}
+
+static void writeStats(const char *path, uint64_t started_us) {
+  if (!path) return;
+  std::string tmp = std::string(path) + ".tmp";
+  FILE *f = fopen(tmp.c_str(), "w");
+  if (!f) return;
+  const HostStats &s = hostStats;
+  double uptime = (wallMicros() - started_us) / 1e6;
+  fprintf(f, "{\n");
+  fprintf(f, "  \"uptime_s\": %.3f,\n", uptime);
+  fprintf(f, "  \"loops\": %llu,\n", (unsigned long long)s.loops);
+  fprintf(f, "  \"loop_us_mean\": %.2f,\n", s.loops ? (double)s.loop_us_total / s.loops : 0.0);
+  fprintf(f, "  \"loop_us_p99\": %llu,\n", (unsigned long long)hostLoopPercentile(0.99));
+  fprintf(f, "  \"loop_us_max\": %llu,\n", (unsigned long long)s.loop_us_max);
+  fprintf(f, "  \"commands\": %llu,\n", (unsigned long long)s.commands);
+  fprintf(f, "  \"commands_per_s\": %.1f,\n", uptime > 0 ? s.commands / uptime : 0.0);
+  fprintf(f, "  \"command_wait_us_mean\": %.2f,\n",
+          s.commands ? (double)s.command_wait_us_total / s.commands : 0.0);
+  fprintf(f, "  \"command_wait_us_max\": %llu,\n", (unsigned long long)s.command_wait_us_max);
+  fprintf(f, "  \"ramps_done\": %llu,\n", (unsigned long long)s.ramps_done);
+  fprintf(f, "  \"ramp_error_ms_mean\": %.3f,\n",
+          s.ramps_done ? s.ramp_error_us_total / 1000.0 / s.ramps_done : 0.0);
+  fprintf(f, "  \"ramp_error_ms_max\": %.3f\n", s.ramp_error_us_max / 1000.0);
+  fprintf(f, "}\n");
+  fclose(f);
+  rename(tmp.c_str(), path);
+}
+
+int main(int argc, char **argv) {
+  const char *link_path = 0;
+  const char *stats_path = 0;
+  long idle_us = 50;  // nap when the line is quiet; 0 = spin
+  for (int i = 1; i < argc; i++) {
+    if (!strcmp(argv[i], "--link") && i + 1 < argc) link_path = argv[++i];
+    else if (!strcmp(argv[i], "--stats") && i + 1 < argc) stats_path = argv[++i];
+    else if (!strcmp(argv[i], "--idle-us") && i + 1 < argc) idle_us = atol(argv[++i]);
+    else {
+      fprintf(stderr, "usage: %s [--link PATH] [--stats PATH] [--idle-us N]\n", argv[0]);
+      return 2;
+    }
+  }
+
+  master_fd = posix_openpt(O_RDWR | O_NOCTTY);
+  if (master_fd < 0 || grantpt(master_fd) || unlockpt(master_fd)) {
+    perror("posix_openpt");
+    return 1;
+  }
+  const char *slave = ptsname(master_fd);
+  // Holding the slave open keeps the line up between clients (no EIO on the master)
+  int keep_fd = open(slave, O_RDWR | O_NOCTTY);
+  struct termios tio;
+  if (keep_fd < 0 || tcgetattr(keep_fd, &tio)) {
+    perror(slave);
+    return 1;
+  }
+  cfmakeraw(&tio);
+  tcsetattr(keep_fd, TCSANOW, &tio);
+  fcntl(master_fd, F_SETFL, fcntl(master_fd, F_GETFL) | O_NONBLOCK);
+
+  if (link_path) {
+    unlink(link_path);
+    if (symlink(slave, link_path)) {
+      perror(link_path);
+      return 1;
+    }
+  }
+
+  signal(SIGINT, onStop);
+  signal(SIGTERM, onStop);
+  signal(SIGUSR1, onStats);
+  signal(SIGPIPE, SIG_IGN);
+
+  hostUseRealClock();
+  hostOnSerialWrite = writeMaster;
+  setup();
+  uint64_t started = wallMicros();
+  printf("PTY %s\n", slave);
+  fflush(stdout);
+
+  char buf[256];
+  while (!stop_requested) {
+    ssize_t n = read(master_fd, buf, sizeof buf);
+    if (n > 0) {
+      hostAdvance(0);
+      hostSerialReceive(buf, n);
+    }
+
+    uint64_t t0 = wallMicros();
+    loop();
+    hostRecordLoop(wallMicros() - t0);
+
+    if (stats_requested) {
+      stats_requested = 0;
+      writeStats(stats_path, started);
+    }
+    if (n <= 0 && idle_us > 0 && !Serial.available()) usleep(idle_us);
+  }
+
+  writeStats(stats_path, started);
+  if (link_path) unlink(link_path);
+  close(keep_fd);
+  close(master_fd);
+  return 0;
+}
@@ -0,0 +1,235 @@
+// Simulated clock, serial line and free-running ADC for host builds of arduino.ino.
+#include "Arduino.h"
+
+#include <deque>
+#include <time.h>
+
+void ADC_vect(void);  // defined by the sketch
+
+volatile uint8_t ADMUX = 0;
+volatile uint8_t ADCSRA = 0;
+volatile uint8_t ADCSRB = 0;
+volatile uint16_t ADC = 0;
+
+HostSerial Serial;
+void (*hostOnAnalogWrite)(uint8_t pin, int value, uint64_t at_us) = 0;
+void (*hostOnSerialWrite)(const char *data, size_t len) = 0;
+int hostPwm[16];
+HostStats hostStats;
+
+// Rough per-call costs on a 16 MHz Mega, so a busy loop still moves the clock
+static const unsigned COST_CLOCK_US = 1;
+static const unsigned COST_READ_US = 2;
+static const unsigned COST_WRITE_US = 6;
+static const unsigned COST_PRINT_US = 10;
+static const unsigned ADC_CONVERSION_US = 104;  // 13 ADC clocks at 16 MHz / 128
+
+static uint64_t now_us = 0;
+static uint64_t next_conversion_us = 0;
+static bool irq_enabled = true;
+static bool irq_pending = false;
+static uint16_t adc_inputs[6];
+static uint16_t bandgap = 225;  // 1.1V against a 5.0V supply
+static bool realtime = false;
+static uint64_t epoch_us = 0;
+
+// RAMPs seen on the wire, to time how long they take to land
+struct PendingRamp {
+  bool active;
+  int target;
+  uint64_t started_us;
+  uint64_t duration_us;
+};
+static PendingRamp pending[16];
+static std::string rx_line;
+
+struct RxByte {
+  uint64_t at_us;
+  char c;
+};
+static std::deque<RxByte> rx;
+static std::string tx;
+
+static bool adcRunning() {
+  return (ADCSRA & (1 << ADEN)) && (ADCSRA & (1 << ADATE)) && (ADCSRA & (1 << ADIE));
+}
+
+static uint16_t sampleMux() {
+  uint8_t mux = ADMUX & 0x1F;
+  if (mux == 0x1E) return bandgap;
+  return mux < 6 ? adc_inputs[mux] : 0;
+}
+
+static void runIsr() {
+  if (irq_enabled && irq_pending) {
+    irq_pending = false;
+    ADC_vect();
+  }
+}
+
+uint64_t hostNowMicros() { return now_us; }
+
+static uint64_t monotonicMicros() {
+  struct timespec ts;
+  clock_gettime(CLOCK_MONOTONIC, &ts);
+  return (uint64_t)ts.tv_sec * 1000000ULL + ts.tv_nsec / 1000;
+}
+
+void hostUseRealClock() {
+  realtime = true;
+  epoch_us = monotonicMicros() - now_us;
+}
+
+void hostAdvance(unsigned long us) {
+  uint64_t target = realtime ? monotonicMicros() - epoch_us : now_us + us;
+  if (target < now_us) target = now_us;
+  while (adcRunning() && next_conversion_us <= target) {
+    if (next_conversion_us > now_us) now_us = next_conversion_us;
+    // Free-running: the result reflects the mux as it was when this conversion started
+    ADC = sampleMux();
+    irq_pending = true;
+    runIsr();
+    next_conversion_us += ADC_CONVERSION_US;
+  }
+  if (!adcRunning()) next_conversion_us = target + ADC_CONVERSION_US;
+  now_us = target;
+}
+
+void hostSerialFeed(const char *data, unsigned bytes_per_ms) {
+  uint64_t at = rx.empty() ? now_us : rx.back().at_us;
+  uint64_t gap = 1000 / (bytes_per_ms ? bytes_per_ms : 1);
+  for (const char *p = data; *p; p++) {
+    at += gap;
+    rx.push_back({at, *p});
+  }
+}
+
+void hostSerialReceive(const char *data, size_t len) {
+  for (size_t i = 0; i < len; i++) rx.push_back({now_us, data[i]});
+}
+
+std::string hostSerialTake() {
+  std::string out;
+  out.swap(tx);
+  return out;
+}
+
+void hostSetAdc(uint8_t channel, uint16_t value) {
+  if (channel < 6) adc_inputs[channel] = value;
+}
+
+void hostSetBandgap(uint16_t value) { bandgap = value; }
+
+unsigned long millis() {
+  hostAdvance(COST_CLOCK_US);
+  return (unsigned long)(now_us / 1000);
+}
+
+unsigned long micros() {
+  hostAdvance(COST_CLOCK_US);
+  return (unsigned long)now_us;
+}
+
+void delay(unsigned long ms) { hostAdvance(ms * 1000); }
+void delayMicroseconds(unsigned int us) { hostAdvance(us); }
+void pinMode(uint8_t, uint8_t) {}
+
+void analogWrite(uint8_t pin, int value) {
+  hostAdvance(COST_WRITE_US);
+  if (pin < 16) {
+    hostPwm[pin] = value;
+    PendingRamp &r = pending[pin];
+    if (r.active && value == r.target) {
+      uint64_t took = now_us - r.started_us;
+      uint64_t error = took > r.duration_us ? took - r.duration_us : r.duration_us - took;
+      r.active = false;
+      hostStats.ramps_done++;
+      hostStats.ramp_error_us_total += error;
+      if (error > hostStats.ramp_error_us_max) hostStats.ramp_error_us_max = error;
+    }
+  }
+  if (hostOnAnalogWrite) hostOnAnalogWrite(pin, value, now_us);
+}
+
+void noInterrupts() { irq_enabled = false; }
+
+void interrupts() {
+  irq_enabled = true;
+  runIsr();
+}
+
+// ====================== SERIAL ======================
+
+void HostSerial::begin(unsigned long) {}
+
+int HostSerial::available() {
+  int n = 0;
+  for (size_t i = 0; i < rx.size() && rx[i].at_us <= now_us; i++) n++;
+  return n;
+}
+
+// Watch the command stream the sketch consumes, for HostStats
+static void observeLine(const std::string &line) {
+  int pin, target;
+  unsigned long duration;
+  if (sscanf(line.c_str(), "RAMP %d %d %lu", &pin, &target, &duration) == 3) {
+    if (pin >= 0 && pin < 16) pending[pin] = {true, target, now_us, duration * 1000ULL};
+  } else if (sscanf(line.c_str(), "SET %d", &pin) == 1 && pin >= 0 && pin < 16) {
+    pending[pin].active = false;
+  }
+}
+
+int HostSerial::read() {
+  hostAdvance(COST_READ_US);
+  if (rx.empty() || rx.front().at_us > now_us) return -1;
+  RxByte b = rx.front();
+  rx.pop_front();
+  if (b.c == '\n') {
+    uint64_t wait = now_us - b.at_us;
+    hostStats.commands++;
+    hostStats.command_wait_us_total += wait;
+    if (wait > hostStats.command_wait_us_max) hostStats.command_wait_us_max = wait;
+    observeLine(rx_line);
+    rx_line.clear();
+  } else if (b.c != '\r' && rx_line.size() < 256) {
+    rx_line += b.c;
+  }
+  return (unsigned char)b.c;
+}
+
+void hostRecordLoop(uint64_t us) {
+  hostStats.loops++;
+  hostStats.loop_us_total += us;
+  if (us > hostStats.loop_us_max) hostStats.loop_us_max = us;
+  const size_t last = sizeof hostStats.loop_us_hist / sizeof hostStats.loop_us_hist[0] - 1;
+  hostStats.loop_us_hist[us < last ? us : last]++;
+}
+
+uint64_t hostLoopPercentile(double p) {
+  const size_t buckets = sizeof hostStats.loop_us_hist / sizeof hostStats.loop_us_hist[0];
+  uint64_t wanted = (uint64_t)(hostStats.loops * p), seen = 0;
+  for (size_t us = 0; us < buckets; us++) {
+    seen += hostStats.loop_us_hist[us];
+    if (seen > wanted) return us;
+  }
+  return buckets - 1;
+}
+
+static void emit(const char *s) {
+  hostAdvance(COST_PRINT_US);
+  if (hostOnSerialWrite) hostOnSerialWrite(s, strlen(s));
+  else tx += s;
+}
+
+void HostSerial::print(const char *s) { emit(s); }
+void HostSerial::print(char c) { char s[2] = {c, 0}; emit(s); }
+void HostSerial::print(int v) { print((long)v); }
+void HostSerial::print(long v) { char s[24]; snprintf(s, sizeof s, "%ld", v); emit(s); }
+void HostSerial::print(unsigned long v) { char s[24]; snprintf(s, sizeof s, "%lu", v); emit(s); }
+void HostSerial::print(double v, int digits) { char s[48]; snprintf(s, sizeof s, "%.*f", digits, v); emit(s); }
+void HostSerial::println() { emit("\r\n"); }
+void HostSerial::println(const char *s) { print(s); println(); }
+void HostSerial::println(int v) { print(v); println(); }
+void HostSerial::println(long v) { print(v); println(); }
+void HostSerial::println(unsigned long v) { print(v); println(); }
+void HostSerial::println(double v, int digits) { print(v, digits); println(); }
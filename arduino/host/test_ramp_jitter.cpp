@@ -0,0 +1,149 @@
+// Replays a scene's worth of RAMP commands into the sketch on the host and
+// checks the ramp tick keeps its cadence while the parser drains the burst.
+//
+//   make test
+#include "Arduino.h"
+
+#include "../arduino.ino"
+
+#include <vector>
+
+static int failures = 0;
+
+#define CHECK(cond, ...)                           \
+  do {                                             \
+    if (!(cond)) {                                 \
+      failures++;                                  \
+      printf("FAIL %s:%d: ", __FILE__, __LINE__);  \
+      printf(__VA_ARGS__);                         \
+      printf("\n");                                \
+    }                                              \
+  } while (0)
+
+static std::vector<uint64_t> ticks;  // when each ramp tick actually ran
+static bool recording = false;
+
+static void runFor(unsigned long ms) {
+  uint64_t end = hostNowMicros() + (uint64_t)ms * 1000;
+  while (hostNowMicros() < end) {
+    unsigned long before = ramp_last_tick;
+    loop();
+    if (recording && ramp_last_tick != before) ticks.push_back(hostNowMicros());
+  }
+}
+
+static std::string command(const char *cmd, unsigned long settle_ms = 5) {
+  hostSerialTake();
+  hostSerialFeed(cmd);
+  runFor(settle_ms);
+  return hostSerialTake();
+}
+
+static void testCachedAnalogAndVcc() {
+  hostSetAdc(1, 512);
+  hostSetBandgap(225);
+  runFor(100);  // let the sampler refill its windows with the new inputs
+  std::string analog = command("ANALOG 1\n");
+  CHECK(analog == "ANALOG 1 512.000\r\n", "ANALOG reply was '%s'", analog.c_str());
+  std::string vcc = command("GETVCC\n");
+  CHECK(vcc == "VCC 5001\r\n", "GETVCC reply was '%s'", vcc.c_str());
+}
+
+static void testBurstKeepsTickCadence() {
+  char line[CMD_BUF_SIZE];
+  std::string burst;
+  for (int round = 0; round < 4; round++) {
+    for (int pin = 2; pin <= 13; pin++) {
+      snprintf(line, sizeof line, "RAMP %d %d 400\n", pin, round % 2 ? 0 : 255);
+      burst += line;
+    }
+  }
+  burst += "RAMP 5 1";  // the rest of this line arrives much later
+
+  ticks.clear();
+  recording = true;
+  hostSerialFeed(burst.c_str());
+  runFor(60);
+  hostSerialFeed("00 200\n", 1);  // trickles in over ~7 ms
+  runFor(400);
+  recording = false;
+
+  uint64_t worst = 0;
+  for (size_t i = 1; i < ticks.size(); i++) {
+    uint64_t gap = ticks[i] - ticks[i - 1];
+    if (gap > worst) worst = gap;
+  }
+  const uint64_t budget_us = (RAMP_TICK_MS + 1) * 1000;
+  printf("ramp ticks: %u, worst gap %.2f ms (budget %.2f ms)\n",
+         (unsigned)ticks.size(), worst / 1000.0, budget_us / 1000.0);
+  CHECK(ticks.size() > 300, "only %u ramp ticks recorded", (unsigned)ticks.size());
+  CHECK(worst <= budget_us, "ramp tick gap %.2f ms exceeds budget", worst / 1000.0);
+
+  CHECK(hostPwm[2] == 0 && hostPwm[13] == 0, "last RAMP round not applied (%d, %d)", hostPwm[2], hostPwm[13]);
+  CHECK(hostPwm[5] == 100, "split RAMP line not applied (pin 5 = %d)", hostPwm[5]);
+}
+
+// Samples a pin's duty every millisecond for the length of a ramp
+static std::vector<int> traceRamp(const char *cmd, int pin, unsigned long ms) {
+  std::vector<int> trace;
+  hostSerialFeed(cmd);
+  while (Serial.available()) loop();  // apply the command
+  for (unsigned long t = 0; t <= ms + 2; t++) {
+    runFor(1);
+    trace.push_back(hostPwm[pin]);
+  }
+  return trace;
+}
+
+static void testLinearRampSteps() {
+  command("SET 6 0\n");
+  std::vector<int> trace = traceRamp("RAMP 6 200 100\n", 6, 100);
+  int mid = trace[49];
+  CHECK(mid >= 96 && mid <= 104, "linear ramp midpoint %d, expected ~100", mid);
+  for (size_t i = 1; i < trace.size(); i++) {
+    CHECK(trace[i] >= trace[i - 1] && trace[i] - trace[i - 1] <= 3,
+          "linear ramp stepped %d -> %d at %u ms", trace[i - 1], trace[i], (unsigned)i);
+  }
+  CHECK(trace.back() == 200, "linear ramp ended at %d", trace.back());
+}
+
+static void testCieRampEasesThroughTable() {
+  command("SET 7 0\n");
+  std::vector<int> trace = traceRamp("RAMP 7 255 256 C\n", 7, 256);
+  // Halfway through in perceived brightness is level ~128, far below half duty
+  int mid = trace[127];
+  int expected = pgm_read_byte(&CIE_PWM[127]);
+  CHECK(abs(mid - expected) <= 2, "CIE ramp midpoint %d, table says %d", mid, expected);
+  CHECK(trace.back() == 255, "CIE ramp ended at %d", trace.back());
+
+  // Ramping down from an arbitrary duty starts where the light already is
+  command("SET 7 90\n");
+  trace = traceRamp("RAMP 7 0 200 C\n", 7, 200);
+  CHECK(trace[0] >= 85 && trace[0] <= 90, "CIE ramp down jumped to %d", trace[0]);
+  CHECK(trace.back() == 0, "CIE ramp down ended at %d", trace.back());
+}
+
+static void testOverlongLineIsDropped() {
+  std::string junk(CMD_BUF_SIZE * 2, 'X');
+  junk += "\nSET 3 7\n";
+  hostSerialFeed(junk.c_str());
+  runFor(10);
+  CHECK(hostPwm[3] == 7, "command after an over-long line was lost (pin 3 = %d)", hostPwm[3]);
+  std::string get = command("GET 3\n");
+  CHECK(get == "VALUE 3 7\r\n", "GET reply was '%s'", get.c_str());
+}
+
+int main() {
+  setup();
+  testCachedAnalogAndVcc();
+  testBurstKeepsTickCadence();
+  testLinearRampSteps();
+  testCieRampEasesThroughTable();
+  testOverlongLineIsDropped();
+  if (failures) {
+    printf("%d check(s) failed\n", failures);
+    return 1;
+  }
+  printf("OK\n");
+  return 0;
+}
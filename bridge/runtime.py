@@ -2,15 +2,20 @@ from __future__ import annotations
 
 import logging
 import threading
-import time
-from typing import Optional
+from concurrent.futures import Future
+from typing import Optional, Tuple
 
 from actuators.arduino import ArduinoActuator
 from actuators.relays import RelayActuator
 from actuators.screens import ScreenActuator
-from engine.config_compile import compile_config
-from engine.reconcile import Reconciler
-from engine.world import WorldStore
+from bridge.scheduler import ReconcileScheduler
+from bridge.state_file import open_state_file
+from engine.clock import REAL_CLOCK, Clock
+from engine.config_cache import load_compiled
+from engine.intent import IntentBatch
+from engine.journal import open_journal
+from engine.reconcile import Reconciler, ramp_ms_for_source
+from engine.world import WorldStore, WorldTransactionError
 from inputs.reeds import ReedInput
 from modules.arduino import ArduinoManager
 from modules.gpio import GPIODeviceManager
@@ -21,19 +26,22 @@ logger = logging.getLogger("pccs")
 class PCCSRuntime:
     """Central runtime: world store, policy reconcile, inputs."""
 
-    def __init__(self, config, socketio=None, dark_mode_config=None):
+    def __init__(self, config, socketio=None, dark_mode_config=None, clock: Clock = REAL_CLOCK):
         self.config = config
+        self.clock = clock
         self.socketio = socketio
-        self.compiled = compile_config(config)
+        # Compiled once (or loaded from [config_cache]); the Arduino and GPIO managers share it
+        self.compiled = load_compiled(config)
         self.dark_mode_config = dark_mode_config
 
-        self.arduino = ArduinoManager(config)
-        self.gpio = GPIODeviceManager(config)
+        self.arduino = ArduinoManager(config, self.compiled)
+        self.gpio = GPIODeviceManager(config, self.compiled)
 
         self.world = WorldStore(
             self.compiled.reed_names,
             self.compiled.light_names,
             self.compiled.relay_names,
+            clock=clock,
         )
         self.world.set_light_to_reed_map(self.compiled.light_to_reed)
 
@@ -50,6 +58,7 @@ class PCCSRuntime:
             on_state_emit=self._emit_state,
             ramp_ms_for_source=self._ramp_ms_for_source,
             on_drift=self._on_hardware_drift,
+            clock=clock,
         )
 
         self.reed_input: Optional[ReedInput] = None
@@ -57,19 +66,34 @@ class PCCSRuntime:
         self.gps = None
         self.sensor_manager = None
         self._shutdown = threading.Event()
-        self._reconcile_lock = threading.Lock()
+        self._scene_lock = threading.Lock()
+        # Every reconcile goes through one worker (inline until start_background_threads)
+        self.scheduler = ReconcileScheduler(self._run_reconcile)
+
+        # Input journal for offline replay (engine.replay); None when [journal] is off
+        self.journal = open_journal(config)
+        if self.journal:
+            self.journal.snapshot = self.world.snapshot
+
+        # Warm-start state file (bridge.state_file); None when [warm_start] is off
+        self.state_file = open_state_file(config)
+        self._warm: Optional[dict] = None
+        if self.state_file:
+            self.state_file.collect = self._warm_state
+            self._warm = self.state_file.load()
 
     def _ramp_ms_for_source(self, source: str) -> int:
-        return {
-            "ui": self.compiled.ui_ramp_ms,
-            "scene": self.compiled.scene_ramp_ms,
-            "phase": self.compiled.phase_ramp_ms,
-            "reed": self.compiled.reed_ramp_ms,
-        }.get(source, self.compiled.reed_ramp_ms)
+        return ramp_ms_for_source(self.compiled, source)
+
+    def reconcile(self, ramp_source: str = "auto") -> Future:
+        """Request a reconcile pass; the returned Future resolves once a pass has run."""
+        return self.scheduler.submit(ramp_source)
 
-    def reconcile(self, ramp_source: str = "auto"):
-        with self._reconcile_lock:
-            self.reconciler.reconcile(ramp_source=ramp_source)
+    def _run_reconcile(self, ramp_source: str):
+        timing = self.reconciler.reconcile(ramp_source=ramp_source)
+        if self.state_file:
+            self.state_file.mark_dirty()
+        return timing
 
     def _emit_state(self, state: dict):
         if not self.socketio:
@@ -99,7 +123,9 @@ class PCCSRuntime:
             )
 
     def get_explain_json(self) -> dict:
-        return self.reconciler.explain_snapshot()
+        snap = self.reconciler.explain_snapshot()
+        snap["reconcile_stats"] = self.scheduler.stats()
+        return snap
 
     def effective_reed_states(self) -> dict:
         """Authoritative reed map for the main UI (forces override hardware)."""
@@ -116,22 +142,43 @@ class PCCSRuntime:
         self.socketio.emit("reed_diag_update", self.get_reed_diag_json())
 
     def on_reeds_updated(self, reeds: dict, closed_transitions: list):
-        self.world.update_reeds(reeds, transition_closed=closed_transitions)
+        if self.journal:
+            self.journal.reeds(reeds, closed_transitions)
+        if not self.world.update_reeds(reeds, transition_closed=closed_transitions):
+            return
         self._emit_reeds()
         self.reconcile(ramp_source="reed")
 
     def on_phase_change(self, phase: str, forced: Optional[str], invalidate: bool):
+        if self.journal:
+            self.journal.phase(phase, forced, invalidate)
         self.world.set_phase(phase, forced, invalidate=invalidate)
         self.reconcile(ramp_source="phase")
 
-    def set_light_intent(self, name: str, brightness: int, mode: Optional[str] = None):
+    def set_light_intent(self, name: str, brightness: int, mode: Optional[str] = None,
+                         ramp_source: str = "ui") -> Future:
+        """ramp_source "slider" for a coalesced drag stream (tracking ramps, see bridge.slider)."""
+        if self.journal:
+            self.journal.light_intent(name, brightness, mode, "until_reed_close", slider=ramp_source == "slider")
         self.world.set_light_intent(name, brightness, mode, expires="until_reed_close")
-        self.reconcile(ramp_source="ui")
+        return self.reconcile(ramp_source=ramp_source)
 
     def set_relay_intent(self, name: str, on: bool):
+        if self.journal:
+            self.journal.relay_intent(name, on)
         self.world.set_relay_intent(name, on)
         self.reconcile(ramp_source="ui")
 
+    def apply_intents(self, batch: IntentBatch) -> Tuple[int, Future]:
+        """Apply a parsed /api/intents batch as one world change and one reconcile (one state_update).
+
+        Returns the world version the batch produced and the reconcile's Future.
+        """
+        if self.journal:
+            self.journal.intents(batch.lights, batch.relays)
+        version = self.world.apply_intents(batch.lights, batch.relays)
+        return version, self.reconcile(ramp_source="ui")
+
     def set_scene(self, scene_key: str):
         scene = self.compiled.scenes.get(scene_key, {})
         if not scene:
@@ -140,12 +187,17 @@ class PCCSRuntime:
 
         # One-shot: command scene levels via a transient active_scene, then release.
         # No intents are stored — reeds, automation, and manual UI take over afterward.
-        self.world.clear_all_light_intents()
-        self.world.set_active_scene(scene_key)
-        try:
-            self.reconcile(ramp_source="scene")
-        finally:
-            self.world.clear_active_scene()
+        # Waits for its pass, so the scene is still active when the worker reads the world.
+        with self._scene_lock:
+            if self.journal:
+                self.journal.scene(scene_key)
+            with self.world.transaction() as tx:
+                tx.clear_all_light_intents()
+                tx.set_active_scene(scene_key)
+            try:
+                self.reconcile(ramp_source="scene").result()
+            finally:
+                self.world.clear_active_scene()
 
         from modules.toasts import toast_manager
         if toast_manager and scene.get("name"):
@@ -157,12 +209,14 @@ class PCCSRuntime:
             )
 
     def force_reed(self, name: str, closed: Optional[bool]):
+        if self.journal:
+            self.journal.reed_force(name, closed)
         if name == "all" and closed is None:
-            self.world.clear_all_reed_forces()
-        elif closed is None:
-            self.world.set_reed_force(name, None)
+            changes = self.world.clear_all_reed_forces()
         else:
-            self.world.set_reed_force(name, closed)
+            changes = self.world.set_reed_force(name, closed)
+        if not changes:
+            return
         self._emit_reeds()
         self.reconcile(ramp_source="reed")
 
@@ -174,9 +228,17 @@ class PCCSRuntime:
         else:
             self.phase_manager.force_phase(phase)
         pm = self.phase_manager
+        if self.journal:
+            self.journal.phase(pm.get_phase(), pm.forced_phase, True)
         self.world.set_phase(pm.get_phase(), pm.forced_phase, invalidate=True)
         self.reconcile(ramp_source="phase")
 
+    def read_hardware(self):
+        """Refresh observed lights/relays from the hardware (journaled when changed)."""
+        lights, modes, relays = self.reconciler.read_hardware()
+        if self.journal:
+            self.journal.observed(lights, modes, relays)
+
     def get_ui_state(self) -> dict:
         return self.reconciler.build_ui_state()
 
@@ -189,10 +251,22 @@ class PCCSRuntime:
         """Init serial/GPIO and load reed state. No reconcile yet — phase comes first."""
         self.arduino.init_serial()
         self.gpio.init_devices()
+        self.load_world()
+
+    def load_world(self):
+        """Reed state (and warm-start intents) into the world, then read back the outputs.
 
+        Needs init_serial() and init_devices() done; those two don't depend on
+        each other, so app.py runs them in parallel.
+        """
         initial_reeds = {n: self.gpio.reed_states.get(n, True) for n in self.compiled.reed_names}
-        self.world.update_reeds(initial_reeds)
-        self.reconciler.read_hardware()
+        if self._warm:
+            self._restore_world(initial_reeds)
+        else:
+            self.world.update_reeds(initial_reeds)
+        self.read_hardware()
+        if self._warm:
+            self._restore_commanded()
 
     def bootstrap_phase(self):
         """Calculate real phase and write to world before any light automation runs."""
@@ -200,9 +274,19 @@ class PCCSRuntime:
         if not pm:
             logger.warning("🌗 Phase manager not attached — automation deferred")
             return
+        warm = self._warm or {}
+        if warm:
+            sun = warm.get("phase_times") or {}
+            pm.restore_phase_times(sun.get("times"), sun.get("date"))
+            if pm.forced_phase is None and warm.get("forced_phase"):
+                pm.forced_phase = warm["forced_phase"]
         use_fallback = not pm._has_valid_gps()
         phase = pm.bootstrap_initial_phase(use_fallback=use_fallback)
-        self.world.set_phase(phase, pm.forced_phase, invalidate=False)
+        # Restored until_phase_change intents don't outlive a phase change that happened while we were down
+        invalidate = bool(warm.get("phase")) and warm["phase"] != phase
+        if self.journal:
+            self.journal.phase(phase, pm.forced_phase, invalidate, quiet=True)
+        self.world.set_phase(phase, pm.forced_phase, invalidate=invalidate)
         logger.info(f"🌗 Automation unlocked for phase: {phase}")
 
     def finish_startup(self):
@@ -212,35 +296,42 @@ class PCCSRuntime:
             reed_names=self.compiled.reed_names,
             debounce_ms=self.compiled.reed_debounce_ms,
             on_update=self.on_reeds_updated,
+            clock=self.clock,
         )
         self.reed_input.start()
+        if self.journal:
+            self.journal.reconcile("startup")
         self.reconcile(ramp_source="startup")
 
     def start_background_threads(self):
+        self.scheduler.start()
         threading.Thread(target=self._sync_loop, daemon=True, name="HardwareSync").start()
         threading.Thread(target=self._reconcile_loop, daemon=True, name="SafetyReconcile").start()
 
     def _sync_loop(self):
-        while not self._shutdown.is_set():
-            time.sleep(self.compiled.sync_interval_s)
+        while not self.clock.wait(self._shutdown, self.compiled.sync_interval_s):
             try:
                 if self.arduino.is_connected():
-                    self.reconciler.read_hardware()
+                    self.read_hardware()
                     self.reconciler.report_hardware_drift()
                     self._emit_state(self.get_ui_state())
             except Exception as e:
                 logger.debug(f"Hardware sync: {e}")
 
     def _reconcile_loop(self):
-        while not self._shutdown.is_set():
-            time.sleep(self.compiled.reconcile_interval_s)
+        while not self.clock.wait(self._shutdown, self.compiled.reconcile_interval_s):
             try:
+                if self.journal:
+                    self.journal.reconcile("auto")
                 self.reconcile(ramp_source="auto")
             except Exception as e:
                 logger.debug(f"Safety reconcile: {e}")
 
     def stop(self):
         self._shutdown.set()
+        self.scheduler.stop()
+        if self.state_file:
+            self.state_file.close()
         if self.reed_input:
             self.reed_input.stop()
         if self.phase_manager:
@@ -249,6 +340,73 @@ class PCCSRuntime:
             self.sensor_manager.stop()
         self.gpio.cleanup()
         self.arduino.cleanup()
+        if self.journal:
+            self.journal.close()
+
+    # ====================== WARM START ======================
+
+    def _warm_state(self) -> dict:
+        """Payload for the state file; only what changes when something real does."""
+        snap = self.world.snapshot()
+        pm = self.phase_manager
+        return {
+            "reeds": snap.reeds,
+            "reed_forces": snap.reed_forces,
+            "phase": snap.phase,
+            "forced_phase": pm.forced_phase if pm else snap.phase_forced,
+            "phase_times": pm.get_phase_times_state() if pm else None,
+            "light_intents": {n: [i.brightness, i.mode, i.expires] for n, i in snap.light_intents.items()},
+            "relay_intents": {n: [i.on, i.expires] for n, i in snap.relay_intents.items()},
+            "commanded": self.reconciler.commanded_outputs(),
+        }
+
+    def _restore_world(self, reeds: dict):
+        """Intents and forces from the state file, then the reeds as read now.
+
+        A reed that closed while we were down expires its until_reed_close
+        intents exactly as if the close had been seen live.
+        """
+        warm = self._warm
+        saved_reeds = warm.get("reeds") or {}
+        closed = [n for n, closed_now in reeds.items() if closed_now and saved_reeds.get(n) is False]
+        lights, relays = set(self.compiled.light_names), set(self.compiled.relay_names)
+        try:
+            with self.world.transaction() as tx:
+                for name, (brightness, mode, expires) in (warm.get("light_intents") or {}).items():
+                    if name in lights:
+                        tx.set_light_intent(name, brightness, mode, expires)
+                for name, (on, expires) in (warm.get("relay_intents") or {}).items():
+                    if name in relays:
+                        tx.set_relay_intent(name, on, expires)
+                for name, closed_forced in (warm.get("reed_forces") or {}).items():
+                    if name in reeds:
+                        tx.set_reed_force(name, closed_forced)
+                tx.update_reeds(reeds, transition_closed=closed)
+        except (WorldTransactionError, TypeError, ValueError) as e:
+            logger.warning(f"♨️ Warm start: ignoring saved world state ({e})")
+            self.world.update_reeds(reeds)
+            return
+        snap = self.world.snapshot()
+        logger.info(f"♨️ Warm start: restored {len(snap.light_intents)} light / {len(snap.relay_intents)} relay "
+                    f"intents, {len(snap.reed_forces)} reed forces")
+
+    def _restore_commanded(self):
+        """Outputs still showing what we last commanded are not re-sent (no re-ramp on restart)."""
+        commanded = (self._warm or {}).get("commanded") or {}
+        snap = self.world.snapshot()
+        rgb = self.compiled.rgb_lights
+        lights = {}
+        for name, (brightness, mode) in (commanded.get("lights") or {}).items():
+            observed = snap.observed_lights.get(name)
+            if observed != brightness:
+                continue
+            if name in rgb and brightness > 0 and snap.observed_light_modes.get(name, "white") != mode:
+                continue
+            lights[name] = (brightness, mode)
+        relays = {name: on for name, on in (commanded.get("relays") or {}).items()
+                  if snap.observed_relays.get(name) == on}
+        self.reconciler.seed_commanded(lights, relays)
+        logger.info(f"♨️ Warm start: {len(lights)} lights and {len(relays)} relays already where we left them")
 
     def get_frontend_config(self):
         return self.arduino.get_frontend_config()
\ No newline at end of file
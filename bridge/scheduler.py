@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("pccs")
+
+# Highest priority first. Anything else (unknown ramp sources) queues after these.
+LANES = ("ui", "slider", "scene", "reed", "phase", "startup", "auto")
+
+# Passes that command every light; one of these also answers a pending "auto" request
+FULL_PASSES = ("reed", "phase", "startup", "auto")
+
+
+class _Slot:
+    """Pending requests for one ramp source: one pass will answer all of them."""
+
+    __slots__ = ("futures", "since")
+
+    def __init__(self, since: float):
+        self.futures: List[Future] = []
+        self.since = since
+
+
+class ReconcileScheduler:
+    """Single reconcile worker fed by latest-wins slots, one per ramp source.
+
+    A reconcile pass reads the world as it is when the pass starts, so any
+    number of requests for the same source that arrive before then are
+    answered by one pass. The worker always takes the highest-priority lane
+    (LANES), so a slider drag is not stuck behind reed bounces or the safety
+    loop. `submit()` returns a Future that resolves once the answering pass
+    has finished (its result is the pass's (compute_s, actuate_s), or None).
+
+    Before `start()` (tests, replay, startup) and after `stop()`, submit()
+    runs the pass inline on the calling thread.
+    """
+
+    def __init__(self, run_pass: Callable[[str], Optional[Tuple[float, float]]], name: str = "Reconcile"):
+        self._run_pass = run_pass
+        self._name = name
+        self._cond = threading.Condition()
+        self._run_lock = threading.Lock()        # one pass at a time, worker or inline
+        self._pending: Dict[str, _Slot] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._stats = {
+            "requests": 0,
+            "passes": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "wait_s": 0.0,
+            "max_wait_s": 0.0,
+            "compute_s": 0.0,
+            "actuate_s": 0.0,
+            "by_source": {},
+        }
+
+    # ====================== PUBLIC API ======================
+
+    def start(self):
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._worker, daemon=True, name=self._name)
+            self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the worker; requests still queued are cancelled."""
+        with self._cond:
+            self._stopping = True
+            pending, self._pending = self._pending, {}
+            self._cond.notify_all()
+        for slot in pending.values():
+            for fut in slot.futures:
+                fut.cancel()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, ramp_source: str = "auto") -> Future:
+        fut: Future = Future()
+        with self._cond:
+            self._stats["requests"] += 1
+            if self._thread is not None and not self._stopping:
+                slot = self._pending.get(ramp_source)
+                if slot is None:
+                    slot = self._pending[ramp_source] = _Slot(time.perf_counter())
+                slot.futures.append(fut)
+                self._cond.notify()
+                return fut
+
+        slot = _Slot(time.perf_counter())
+        slot.futures.append(fut)
+        self._execute(ramp_source, [slot])
+        return fut
+
+    def stats(self) -> dict:
+        """Counters since start: requests, passes, coalesced, mean/max queue wait and compute vs actuation time (ms)."""
+        with self._cond:
+            s = self._stats
+            passes = s["passes"] or 1
+            return {
+                "requests": s["requests"],
+                "passes": s["passes"],
+                "coalesced": s["coalesced"],
+                "errors": s["errors"],
+                "pending": sorted(self._pending, key=_priority),
+                "mean_wait_ms": round(s["wait_s"] * 1000 / passes, 3),
+                "max_wait_ms": round(s["max_wait_s"] * 1000, 3),
+                "mean_compute_ms": round(s["compute_s"] * 1000 / passes, 3),
+                "mean_actuate_ms": round(s["actuate_s"] * 1000 / passes, 3),
+                "by_source": dict(s["by_source"]),
+            }
+
+    # ====================== INTERNAL ======================
+
+    def _next(self) -> Optional[Tuple[str, List[_Slot]]]:
+        with self._cond:
+            while not self._pending and not self._stopping:
+                self._cond.wait()
+            if self._stopping:
+                return None
+            source = min(self._pending, key=_priority)
+            slots = [self._pending.pop(source)]
+            if source in FULL_PASSES and "auto" in self._pending:
+                slots.append(self._pending.pop("auto"))
+            return source, slots
+
+    def _worker(self):
+        while True:
+            job = self._next()
+            if job is None:
+                return
+            self._execute(*job)
+
+    def _execute(self, source: str, slots: List[_Slot]):
+        with self._run_lock:
+            started = time.perf_counter()
+            result = error = None
+            try:
+                result = self._run_pass(source)
+            except Exception as e:
+                error = e
+                logger.error(f"❌ Reconcile ({source}) failed: {e}")
+
+        futures = [f for slot in slots for f in slot.futures]
+        wait = started - min(slot.since for slot in slots)
+        with self._cond:
+            s = self._stats
+            s["passes"] += 1
+            s["coalesced"] += len(futures) - 1
+            s["errors"] += 1 if error else 0
+            s["wait_s"] += wait
+            s["max_wait_s"] = max(s["max_wait_s"], wait)
+            if result:
+                s["compute_s"] += result[0]
+                s["actuate_s"] += result[1]
+            s["by_source"][source] = s["by_source"].get(source, 0) + 1
+        if len(futures) > 1:
+            logger.debug(f"🔁 Reconcile ({source}) answered {len(futures)} requests, waited {wait * 1000:.1f} ms")
+
+        for fut in futures:
+            if error is not None:
+                fut.set_exception(error)
+            else:
+                fut.set_result(result)
+
+
+def _priority(source: str) -> int:
+    return LANES.index(source) if source in LANES else len(LANES)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger("pccs")
+
+
+class _Pending:
+    __slots__ = ("payload", "events", "replies")
+
+    def __init__(self, payload: dict):
+        self.payload = payload
+        self.events = 0
+        self.replies: Dict[Hashable, Optional[int]] = {}     # reply_to -> last seq it sent
+
+
+class LightChangeCoalescer:
+    """Per-light latest-wins buffer for the dashboard's light_change stream.
+
+    The first event after a quiet spell opens a frame of `frame_s`; events for
+    the same light inside it replace each other. When the frame closes, the
+    latest payload per light is applied once (`apply(payload)` returns the ack
+    body, or None when it was refused) and every sender that contributed gets
+    one `reply(reply_to, ack)` carrying the applied value, the last `seq` it
+    sent and how many events the apply answered.
+    """
+
+    def __init__(self, apply: Callable[[dict], Optional[dict]],
+                 reply: Optional[Callable[[Hashable, dict], None]] = None, frame_s: float = 0.05):
+        self._apply = apply
+        self._reply = reply
+        self.frame_s = frame_s
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()     # frames apply in order, one at a time
+        self._pending: Dict[str, _Pending] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._stopped = False
+
+    # ====================== PUBLIC API ======================
+
+    def push(self, name: str, payload: dict, reply_to: Optional[Hashable] = None):
+        with self._lock:
+            if self._stopped:
+                return
+            entry = self._pending.get(name)
+            if entry is None:
+                entry = self._pending[name] = _Pending(payload)
+            entry.payload = payload
+            entry.events += 1
+            if reply_to is not None:
+                entry.replies[reply_to] = payload.get("seq")
+            if self._timer is None:
+                self._timer = threading.Timer(self.frame_s, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> int:
+        """Apply everything pending now; returns how many lights were applied."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            for name, entry in pending.items():
+                self._apply_one(name, entry)
+        return len(pending)
+
+    def stop(self):
+        """Drop anything pending and refuse further events."""
+        with self._lock:
+            self._stopped = True
+            self._pending.clear()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    # ====================== INTERNAL ======================
+
+    def _apply_one(self, name: str, entry: _Pending):
+        try:
+            ack = self._apply(entry.payload)
+        except Exception as e:
+            logger.error(f"❌ light_change {name} failed: {e}")
+            ack = None
+        if ack is None:
+            ack = {"name": name, "ok": False}
+        else:
+            ack = {**ack, "ok": True}
+        if entry.events > 1:
+            logger.debug(f"🎚️ {name}: applied 1 of {entry.events} light_change events")
+        if self._reply:
+            for reply_to, seq in entry.replies.items():
+                self._reply(reply_to, {**ack, "seq": seq, "coalesced": entry.events})
@@ -0,0 +1,204 @@
+"""Boot as a dependency graph instead of one serial chain.
+
+Each subsystem is a step with the steps it needs (`after`). Steps whose
+needs are met run at once, each on its own thread, so the Arduino handshake,
+GPS, Sonos discovery and friends overlap instead of queueing. A failed step
+skips everything that depends on it; the rest carry on. Every boot logs a
+timing report with the critical path (the chain of steps that decided when
+boot finished).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("pccs")
+
+
+class _Step:
+    __slots__ = ("name", "fn", "after", "done", "status", "started", "ended", "error")
+
+    def __init__(self, name: str, fn: Optional[Callable[[], None]], after: Tuple[str, ...]):
+        self.name = name
+        self.fn = fn
+        self.after = after
+        self.done = threading.Event()
+        self.status = "pending"       # pending → running → ok | failed | skipped
+        self.started: Optional[float] = None
+        self.ended: Optional[float] = None
+        self.error: Optional[str] = None
+
+
+class StartupPlan:
+    """Named startup steps run in parallel in dependency order.
+
+    `origin` is when boot started (a time.perf_counter() value); the report
+    is relative to it, so work done before the plan (imports, config) can be
+    added with `record()`.
+    """
+
+    def __init__(self, origin: Optional[float] = None, clock: Callable[[], float] = time.perf_counter):
+        self.clock = clock
+        self.origin = clock() if origin is None else origin
+        self._steps: Dict[str, _Step] = {}
+        self._started = False
+        self._finished = threading.Event()
+
+    # ====================== PUBLIC API ======================
+
+    def step(self, name: str, fn: Callable[[], None], after: Iterable[str] = ()):
+        """Register a step; it runs once every step in `after` has succeeded."""
+        if self._started:
+            raise RuntimeError("startup plan already running")
+        if name in self._steps:
+            raise ValueError(f"duplicate startup step: {name}")
+        self._steps[name] = _Step(name, fn, tuple(after))
+
+    def record(self, name: str, started: float, ended: float):
+        """Add something already done (timed by the caller) to the report."""
+        step = _Step(name, None, ())
+        step.status, step.started, step.ended = "ok", started, ended
+        step.done.set()
+        self._steps[name] = step
+
+    def start(self, on_finished: Optional[Callable[[], None]] = None):
+        """Run the plan on a background thread (logs the report, then calls on_finished)."""
+        def boot():
+            self.run()
+            if on_finished:
+                try:
+                    on_finished()
+                except Exception as e:
+                    logger.error(f"❌ Startup completion hook failed: {e}")
+
+        threading.Thread(target=boot, daemon=True, name="Startup").start()
+
+    def run(self) -> List[dict]:
+        """Run every step and wait for all of them; returns (and logs) the report."""
+        if self._started:
+            raise RuntimeError("startup plan already running")
+        self._started = True
+        self._check_graph()
+        threads = [threading.Thread(target=self._run_step, args=(step,), daemon=True, name=f"Startup-{step.name}")
+                   for step in self._steps.values() if step.fn is not None]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self._finished.set()
+        self.log_report()
+        return self.report()
+
+    def ready(self, name: str) -> bool:
+        """True once `name` has finished successfully."""
+        step = self._steps.get(name)
+        return bool(step and step.status == "ok")
+
+    def wait(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Block until `name` is finished (any outcome); True if it succeeded."""
+        step = self._steps.get(name)
+        if step is None:
+            return False
+        step.done.wait(timeout)
+        return step.status == "ok"
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    def report(self) -> List[dict]:
+        """One entry per step in start order: times in ms since `origin`."""
+        def ms(t):
+            return None if t is None else round((t - self.origin) * 1000.0, 1)
+
+        steps = sorted(self._steps.values(), key=lambda s: (s.started is None, s.started or 0.0))
+        return [{
+            "name": s.name,
+            "status": s.status,
+            "after": list(s.after),
+            "start_ms": ms(s.started),
+            "end_ms": ms(s.ended),
+            "ms": None if s.started is None or s.ended is None else round((s.ended - s.started) * 1000.0, 1),
+            **({"error": s.error} if s.error else {}),
+        } for s in steps]
+
+    def critical_path(self) -> List[str]:
+        """The chain of steps that decided when boot finished, first to last."""
+        ended = [s for s in self._steps.values() if s.ended is not None]
+        if not ended:
+            return []
+        step = max(ended, key=lambda s: s.ended)
+        path = [step.name]
+        while True:
+            deps = [self._steps[d] for d in step.after if self._steps[d].ended is not None]
+            if not deps:
+                break
+            step = max(deps, key=lambda s: s.ended)
+            path.append(step.name)
+        return path[::-1]
+
+    def log_report(self):
+        report = self.report()
+        total = max((r["end_ms"] for r in report if r["end_ms"] is not None), default=0.0)
+        logger.info(f"⏱️ Startup took {total / 1000.0:.2f}s — critical path: {' → '.join(self.critical_path())}")
+        width = max((len(r["name"]) for r in report), default=0)
+        for r in report:
+            if r["status"] == "skipped":
+                logger.info(f"⏱️   {r['name']:<{width}}  skipped (needs {', '.join(r['after'])})")
+                continue
+            if r["start_ms"] is None:
+                continue
+            line = (f"⏱️   {r['name']:<{width}}  {r['start_ms'] / 1000.0:6.2f}s → {r['end_ms'] / 1000.0:6.2f}s"
+                    f"  ({r['ms']:.0f} ms)")
+            if r["status"] == "failed":
+                logger.warning(f"{line}  FAILED: {r['error']}")
+            else:
+                logger.info(line)
+
+    # ====================== INTERNAL ======================
+
+    def _check_graph(self):
+        """Reject unknown dependencies and cycles before any step starts (a cycle would hang boot)."""
+        for step in self._steps.values():
+            missing = [d for d in step.after if d not in self._steps]
+            if missing:
+                raise ValueError(f"startup step {step.name} needs unknown step(s): {', '.join(missing)}")
+        # Kahn's algorithm: whatever can't be ordered is on (or behind) a cycle
+        waiting = {name: len(set(step.after)) for name, step in self._steps.items()}
+        needed_by: Dict[str, List[str]] = {name: [] for name in self._steps}
+        for step in self._steps.values():
+            for dep in set(step.after):
+                needed_by[dep].append(step.name)
+        ready = [name for name, n in waiting.items() if n == 0]
+        while ready:
+            for name in needed_by[ready.pop()]:
+                waiting[name] -= 1
+                if waiting[name] == 0:
+                    ready.append(name)
+        stuck = [name for name, n in waiting.items() if n > 0]
+        if stuck:
+            raise ValueError(f"startup steps depend on each other in a cycle: {', '.join(stuck)}")
+
+    def _run_step(self, step: _Step):
+        try:
+            for dep in step.after:
+                if not self.wait(dep):
+                    step.status = "skipped"
+                    logger.warning(f"⏭️ Startup step {step.name} skipped — {dep} did not come up")
+                    return
+            step.status = "running"
+            step.started = self.clock()
+            try:
+                step.fn()
+            except Exception as e:
+                step.ended = self.clock()
+                step.status = "failed"
+                step.error = str(e) or type(e).__name__
+                logger.error(f"❌ Startup step {step.name} failed: {e}", exc_info=True)
+            else:
+                step.ended = self.clock()
+                step.status = "ok"
+        finally:
+            step.done.set()
@@ -0,0 +1,112 @@
+"""Warm-start state file: what the runtime needs to come back up without flicker.
+
+Holds the user's intents, reed forces, the forced phase, what was last
+commanded to each light/relay and the day's phase-time cache. Writes are
+debounced (a burst of changes costs one write), skipped when nothing
+changed, and atomic (tmp + fsync + rename), so a crash or power cut leaves
+either the previous file or the new one.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger("pccs")
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FORMAT = 1
+
+
+class StateFile:
+    def __init__(self, path: str, collect: Optional[Callable[[], dict]] = None, debounce_s: float = 2.0):
+        self.path = path
+        self.collect = collect            # builds the payload at write time
+        self.debounce_s = debounce_s
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._last_written: Optional[str] = None
+        self.writes = 0
+
+    # ====================== PUBLIC API ======================
+
+    def load(self) -> Optional[dict]:
+        """The saved state, or None when there is none (or it can't be trusted)."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable warm-start state {self.path}: {e}")
+            return None
+        if not isinstance(data, dict) or data.get("format") != FORMAT:
+            logger.warning(f"Ignoring warm-start state {self.path}: unknown format")
+            return None
+        return data
+
+    def mark_dirty(self):
+        """Something changed: write within debounce_s (one write per burst)."""
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.debounce_s, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> bool:
+        """Write now if the state differs from what is on disk. Returns True if it wrote."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if self.collect is None:
+            return False
+        with self._write_lock:
+            try:
+                text = json.dumps({"format": FORMAT, **self.collect()}, sort_keys=True)
+            except Exception as e:
+                logger.error(f"Failed to collect warm-start state: {e}")
+                return False
+            if text == self._last_written:
+                return False
+            if not self._write(text):
+                return False
+            self._last_written = text
+            self.writes += 1
+            return True
+
+    def close(self):
+        """Final write on shutdown."""
+        self.flush()
+
+    # ====================== INTERNAL ======================
+
+    def _write(self, text: str) -> bool:
+        tmp = f"{self.path}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save warm-start state: {e}")
+            return False
+
+
+def open_state_file(config) -> Optional[StateFile]:
+    """StateFile from [warm_start] in pccs.conf, or None when disabled."""
+    if not config.getboolean("warm_start", "enabled", fallback=False):
+        return None
+    path = config.get("warm_start", "path", fallback="config/warm_state.json")
+    path = path if os.path.isabs(path) else os.path.join(_BASE_DIR, path)     # not the cwd
+    debounce_ms = config.getint("warm_start", "debounce_ms", fallback=2000)
+    return StateFile(path, debounce_s=debounce_ms / 1000.0)
@@ -0,0 +1,110 @@
+"""Injectable time source for the engine, inputs and phase logic.
+
+Everything that reads the time or sleeps takes a `clock` instead of calling
+`time` / `datetime` directly:
+
+  * `Clock`          — the real thing (wall time, time.monotonic, time.sleep)
+  * `MonotonicClock` — wall time carried forward from the monotonic clock, so
+                       an NTP / GPS step after boot doesn't jump timestamps
+  * `VirtualClock`   — only moves when told to (`advance`, `advance_to`);
+                       sleepers wake as virtual time passes their deadline
+
+`time()` is epoch seconds (timestamps, sun times), `monotonic()` is for
+intervals (debounce, grace periods, timeouts).
+"""
+from __future__ import annotations
+
+import datetime
+import threading
+import time
+from typing import Optional
+
+
+class Clock:
+    """Real time."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def now(self, tz: Optional[datetime.tzinfo] = None) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.time(), tz)
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """Sleep up to `timeout`, returning early (True) if `event` is set."""
+        return event.wait(timeout)
+
+
+class MonotonicClock(Clock):
+    """Real time that never steps: wall time = boot-time offset + monotonic."""
+
+    def __init__(self):
+        self._offset = time.time() - time.monotonic()
+
+    def time(self) -> float:
+        return self._offset + time.monotonic()
+
+
+class VirtualClock(Clock):
+    """Time that only moves when advanced.
+
+    With `auto_advance`, `sleep()` simply moves time forward (single-threaded
+    simulations); otherwise sleepers block until another thread advances the
+    clock past their deadline.
+    """
+
+    def __init__(self, start: float | datetime.datetime = 0.0, auto_advance: bool = False):
+        if isinstance(start, datetime.datetime):
+            start = start.timestamp()
+        self._time = float(start)
+        self._monotonic = 0.0
+        self.auto_advance = auto_advance
+        self._cond = threading.Condition()
+
+    def time(self) -> float:
+        return self._time
+
+    def monotonic(self) -> float:
+        return self._monotonic
+
+    def advance(self, seconds: float):
+        if seconds < 0:
+            raise ValueError("a virtual clock cannot go backwards")
+        with self._cond:
+            self._time += seconds
+            self._monotonic += seconds
+            self._cond.notify_all()
+
+    def advance_to(self, when: float | datetime.datetime):
+        if isinstance(when, datetime.datetime):
+            when = when.timestamp()
+        self.advance(max(0.0, when - self._time))
+
+    def sleep(self, seconds: float):
+        if self.auto_advance:
+            self.advance(max(0.0, seconds))
+            return
+        with self._cond:
+            deadline = self._monotonic + seconds
+            while self._monotonic < deadline:
+                self._cond.wait()
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        if self.auto_advance:
+            if not event.is_set():
+                self.advance(max(0.0, timeout))
+            return event.is_set()
+        with self._cond:
+            deadline = self._monotonic + timeout
+            # Event.set() doesn't notify us, so look at it a few times a (real) second
+            while self._monotonic < deadline and not event.is_set():
+                self._cond.wait(0.05)
+        return event.is_set()
+
+
+REAL_CLOCK = Clock()
@@ -0,0 +1,190 @@
+"""On-disk cache of the compiled config, keyed by a hash of the settings.
+
+compile_config() parses, validates and builds a decision table for every
+light; with hundreds of lights that dominates boot. `load_compiled()` keys
+the result by a SHA-256 of the sections compile_config reads (plus the
+compiler's own source, so a code change can't serve stale tables) and
+stores it as compact JSON. While neither changes, boot loads the tables
+instead of rebuilding them and validation doesn't run again.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+from functools import lru_cache
+from typing import Optional
+
+from .config_compile import CompiledConfig, compile_config, index_hardware
+from .config_ir import LightDef, ReedDef, RelayDef, compiled_sections
+from .decision import PHASE_KEYS, LightTable
+from .precedence import ResolvedLight
+
+logger = logging.getLogger("pccs")
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FORMAT = 1
+
+# The modules whose code decides what compile_config() produces
+_COMPILER_MODULES = ("config_ir", "config_compile", "config_validate", "decision", "precedence", "config_cache")
+
+_SETTINGS = ("all_closed_action", "ui_ramp_ms", "reed_ramp_ms", "scene_ramp_ms", "phase_ramp_ms",
+             "reed_debounce_ms", "reconcile_interval_s", "sync_interval_s")
+
+
+@lru_cache(maxsize=1)
+def _compiler_fingerprint() -> bytes:
+    digest = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in _COMPILER_MODULES:
+        with open(os.path.join(here, f"{module}.py"), "rb") as f:
+            digest.update(f.read())
+    return digest.digest()
+
+
+def config_key(cfg) -> str:
+    """Hex SHA-256 of every setting compile_config() reads, and of the compiler itself."""
+    digest = hashlib.sha256(_compiler_fingerprint())
+    for section in compiled_sections(cfg):
+        digest.update(f"[{section}]\n".encode())
+        for key, value in cfg.items(section):
+            digest.update(f"{key}={value}\n".encode())
+    return digest.hexdigest()
+
+
+# ====================== SERIALIZE ======================
+
+def dump_compiled(compiled: CompiledConfig, key: str = "") -> dict:
+    """A JSON-ready dict of `compiled`; resolved levels are stored once and referenced by index."""
+    results, index = [], {}
+
+    def ref(resolved: Optional[ResolvedLight]):
+        if resolved is None:
+            return None
+        if resolved not in index:
+            index[resolved] = len(results)
+            results.append([resolved.brightness, resolved.mode, resolved.source])
+        return index[resolved]
+
+    return {
+        "format": FORMAT,
+        "key": key,
+        "settings": {name: getattr(compiled, name) for name in _SETTINGS},
+        "lights": [[d.name, d.friendly, d.kind, list(d.pins), d.icon, d.order]
+                   for d in compiled.light_defs.values()],
+        "relays": [[d.name, d.friendly, d.pin, d.active_high, d.initial, d.icon, d.order]
+                   for d in compiled.relay_defs.values()],
+        "reeds": [[d.name, d.friendly, d.pin, d.pull_up, d.bounce_s, d.icon, d.order, list(d.controls)]
+                  for d in compiled.reed_defs.values()],
+        "interlocks": compiled.interlocks,
+        "ambient_lights": compiled.ambient_lights,
+        "reed_phase_levels": compiled.reed_phase_levels,
+        "ambient_phase_levels": compiled.ambient_phase_levels,
+        "scenes": compiled.scenes,
+        "screens": compiled.screens,
+        "light_tables": {light: [list(t.reeds), t.uses_any_open, [[ref(r) for r in t.auto[p]] for p in PHASE_KEYS]]
+                         for light, t in compiled.light_tables.items()},
+        "scene_vectors": {scene: {light: [ref(r) for r in entry] for light, entry in vector.items()}
+                          for scene, vector in compiled.scene_vectors.items()},
+        "results": results,
+        "warnings": compiled.warnings,
+    }
+
+
+def load_dumped(data: dict) -> CompiledConfig:
+    """Rebuild the CompiledConfig that dump_compiled() stored (raises on a malformed dict)."""
+    from .ids import OutputIds
+
+    out = CompiledConfig()
+    for name, value in data["settings"].items():
+        setattr(out, name, value)
+    out.light_defs = {row[0]: LightDef(row[0], row[1], row[2], tuple(row[3]), row[4], row[5])
+                      for row in data["lights"]}
+    out.relay_defs = {row[0]: RelayDef(*row) for row in data["relays"]}
+    out.reed_defs = {row[0]: ReedDef(*row[:7], controls=tuple(row[7])) for row in data["reeds"]}
+    index_hardware(out)
+
+    out.interlocks = data["interlocks"]
+    out.ambient_lights = data["ambient_lights"]
+    out.reed_phase_levels = {light: {phase: tuple(level) for phase, level in levels.items()}
+                             for light, levels in data["reed_phase_levels"].items()}
+    out.ambient_phase_levels = {light: {phase: tuple(level) for phase, level in levels.items()}
+                                for light, levels in data["ambient_phase_levels"].items()}
+    out.scenes = data["scenes"]
+    out.screens = data["screens"]
+
+    results = [ResolvedLight(*row) for row in data["results"]]
+
+    def deref(i):
+        return None if i is None else results[i]
+
+    out.light_tables = {
+        light: LightTable(tuple(reeds), any_open, {p: tuple(results[i] for i in row) for p, row in zip(PHASE_KEYS, auto)})
+        for light, (reeds, any_open, auto) in data["light_tables"].items()
+    }
+    out.scene_vectors = {scene: {light: tuple(deref(i) for i in entry) for light, entry in vector.items()}
+                         for scene, vector in data["scene_vectors"].items()}
+    out.warnings = list(data["warnings"])
+    out.ids = OutputIds(out)
+    return out
+
+
+# ====================== CACHE ======================
+
+def _read(path: str, key: str) -> Optional[CompiledConfig]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable config cache {path}: {e}")
+        return None
+    if not isinstance(data, dict) or data.get("format") != FORMAT or data.get("key") != key:
+        return None
+    try:
+        return load_dumped(data)
+    except Exception as e:
+        logger.warning(f"Ignoring malformed config cache {path}: {e}")
+        return None
+
+
+def _write(path: str, compiled: CompiledConfig, key: str):
+    tmp = f"{path}.tmp"
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dump_compiled(compiled, key), f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except Exception as e:
+        logger.warning(f"Failed to save config cache {path}: {e}")
+
+
+def load_compiled(config) -> CompiledConfig:
+    """compile_config(config), or the cached result while the settings haven't changed.
+
+    [config_cache] in pccs.conf turns the cache on and sets its path; when it
+    is off this is just compile_config(). Validation errors are never cached
+    (compile_config raises before anything is written).
+    """
+    if not config.getboolean("config_cache", "enabled", fallback=False):
+        return compile_config(config)
+    path = config.get("config_cache", "path", fallback="cache/compiled_config.json")
+    path = path if os.path.isabs(path) else os.path.join(_BASE_DIR, path)     # not the cwd
+    started = time.perf_counter()
+    key = config_key(config)
+    compiled = _read(path, key)
+    if compiled is not None:
+        for w in compiled.warnings:
+            logger.warning(f"Config: {w}")
+        logger.info(f"📋 Compiled config loaded from cache in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return compiled
+    compiled = compile_config(config)
+    _write(path, compiled, key)
+    logger.info(f"📋 Config compiled and cached in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return compiled
@@ -4,6 +4,8 @@ import logging
 from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 
+from .config_ir import LightDef, ReedDef, RelayDef, parse_lights, parse_reeds, parse_relays
+
 logger = logging.getLogger("pccs")
 
 VALID_PHASES = ("day", "evening", "night")
@@ -22,6 +24,11 @@ def _parse_level(val: str, default_mode: str = "white") -> Optional[Level]:
 
 @dataclass
 class CompiledConfig:
+    # Typed [lights] / [gpio] / [reeds] lines (engine.config_ir); the name lists and maps below follow them
+    light_defs: Dict[str, LightDef] = field(default_factory=dict)
+    relay_defs: Dict[str, RelayDef] = field(default_factory=dict)
+    reed_defs: Dict[str, ReedDef] = field(default_factory=dict)
+
     light_names: List[str] = field(default_factory=list)
     pwm_lights: Dict[str, int] = field(default_factory=dict)
     rgb_lights: Dict[str, dict] = field(default_factory=dict)
@@ -48,6 +55,14 @@ class CompiledConfig:
     reconcile_interval_s: int = 30
     sync_interval_s: int = 45
 
+    # Filled by engine.decision.compile_decision_tables(); empty = resolve by walking the stack
+    light_tables: Dict[str, object] = field(default_factory=dict)
+    scene_vectors: Dict[str, Dict[str, tuple]] = field(default_factory=dict)
+    # engine.ids.OutputIds; None = built on first use (engine.ids.output_ids)
+    ids: Optional[object] = None
+    # Parse + validation warnings (logged at compile time, kept for the config cache)
+    warnings: List[str] = field(default_factory=list)
+
 
 def compile_config(cfg) -> CompiledConfig:
     """Compile pccs.conf into typed lookup tables for the policy engine."""
@@ -64,54 +79,11 @@ def compile_config(cfg) -> CompiledConfig:
     if cfg.has_section("ambient"):
         out.all_closed_action = cfg.get("ambient", "all_closed_action", fallback="off").strip().lower()
 
-    # Lights
-    if cfg.has_section("lights"):
-        for name, line in cfg.items("lights"):
-            parts = [p.strip() for p in str(line).split("|")]
-            if len(parts) < 4:
-                continue
-            out.light_names.append(name)
-            ltype = parts[1].lower()
-            if ltype == "pwm":
-                try:
-                    out.pwm_lights[name] = int(parts[2])
-                except ValueError:
-                    logger.warning(f"Bad PWM pin for {name}")
-            elif ltype == "rgb_bug" and len(parts) >= 5:
-                out.rgb_lights[name] = {
-                    "white": int(parts[2]),
-                    "red": int(parts[3]),
-                    "green": int(parts[4]),
-                }
-
-    # Relays
-    if cfg.has_section("gpio"):
-        for name, line in cfg.items("gpio"):
-            if str(line).strip().startswith("#"):
-                continue
-            parts = [p.strip() for p in str(line).split("|")]
-            if len(parts) >= 2:
-                out.relay_names.append(name)
-
-    # Reeds
-    if cfg.has_section("reeds"):
-        for name, line in cfg.items("reeds"):
-            parts = [p.strip() for p in str(line).split("|")]
-            if len(parts) < 2:
-                continue
-            out.reed_names.append(name)
-            controls = [name]
-            if len(parts) > 6:
-                last = parts[6].strip()
-                if last.startswith("controls:"):
-                    cl = last[9:].strip()
-                    if cl:
-                        controls = [x.strip() for x in cl.split(",") if x.strip()]
-                elif last:
-                    controls = [last]
-            out.reed_to_lights[name] = controls
-            for light in controls:
-                out.light_to_reed[light] = name
+    # Lights, relays, reeds
+    out.light_defs = parse_lights(cfg, out.warnings)
+    out.relay_defs = parse_relays(cfg, out.warnings)
+    out.reed_defs = parse_reeds(cfg, out.warnings)
+    index_hardware(out)
 
     # Interlocks
     if cfg.has_section("reeds.interlocks"):
@@ -175,10 +147,29 @@ def compile_config(cfg) -> CompiledConfig:
 
     from .config_validate import validate_compiled_config
 
-    warnings = validate_compiled_config(cfg, out)
-    for w in warnings:
+    out.warnings += validate_compiled_config(cfg, out)
+    for w in out.warnings:
         logger.warning(f"Config: {w}")
 
+    from .decision import compile_decision_tables
+    from .ids import OutputIds
+
+    out.ids = OutputIds(out)
+    return compile_decision_tables(out)
+
+
+def index_hardware(out: CompiledConfig) -> CompiledConfig:
+    """Fill the name lists and pin / reed maps from out.light_defs, relay_defs and reed_defs."""
+    out.light_names = list(out.light_defs)
+    out.pwm_lights = {n: d.pins[0] for n, d in out.light_defs.items() if d.kind == "pwm"}
+    out.rgb_lights = {n: d.rgb_pins for n, d in out.light_defs.items() if d.kind == "rgb_bug"}
+    out.relay_names = list(out.relay_defs)
+    out.reed_names = list(out.reed_defs)
+    out.reed_to_lights = {n: list(d.controls) for n, d in out.reed_defs.items()}
+    out.light_to_reed = {}
+    for reed, controls in out.reed_to_lights.items():
+        for light in controls:
+            out.light_to_reed[light] = reed
     return out
 
 
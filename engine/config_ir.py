@@ -0,0 +1,196 @@
+"""Typed definitions for the pipe-delimited hardware lines in pccs.conf.
+
+[lights], [gpio] and [reeds] are parsed here, once, into LightDef / RelayDef
+/ ReedDef. compile_config() keeps them on CompiledConfig, and everything that
+needs pins, icons, order or reed controls (policy engine, ArduinoManager,
+GPIODeviceManager, the frontend control list, the simulator) reads them from
+there instead of splitting the lines again.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_ICON = "fa-lightbulb"
+DEFAULT_ORDER = 999
+RGB_CHANNELS = ("white", "red", "green")
+
+# Sections compile_config() reads (exact names, then prefixes); nothing else affects CompiledConfig
+COMPILED_SECTIONS = ("lighting", "reed_monitor", "background_sync", "ambient",
+                     "lights", "gpio", "reeds", "reeds.interlocks", "screens")
+COMPILED_PREFIXES = ("reed_phases.", "ambient.", "scenes.")
+
+
+@dataclass(frozen=True, slots=True)
+class LightDef:
+    name: str
+    friendly: str
+    kind: str                         # "pwm" or "rgb_bug"
+    pins: Tuple[int, ...]             # pwm: (pin,); rgb_bug: (white, red, green)
+    icon: str = DEFAULT_ICON
+    order: int = DEFAULT_ORDER
+
+    @property
+    def rgb_pins(self) -> Dict[str, int]:
+        return dict(zip(RGB_CHANNELS, self.pins))
+
+
+@dataclass(frozen=True, slots=True)
+class RelayDef:
+    name: str
+    friendly: str
+    pin: int
+    active_high: bool = False
+    initial: bool = False
+    icon: str = DEFAULT_ICON
+    order: int = DEFAULT_ORDER
+
+
+@dataclass(frozen=True, slots=True)
+class ReedDef:
+    name: str
+    friendly: str
+    pin: int
+    pull_up: bool = False
+    bounce_s: float = 0.05
+    icon: str = DEFAULT_ICON
+    order: int = DEFAULT_ORDER
+    controls: Tuple[str, ...] = ()    # lights this reed drives (defaults to the light with its name)
+
+
+def _fields(line) -> List[str]:
+    return [p.strip() for p in str(line).split("|")]
+
+
+def _order(value: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_ORDER
+
+
+def _icon(value: Optional[str]) -> str:
+    return value if value and value.startswith("fa-") else DEFAULT_ICON
+
+
+def _controls(name: str, field: str) -> Tuple[str, ...]:
+    """`controls:a,b` / a bare light name / empty (= the light named like the reed)."""
+    field = field.strip()
+    if field.startswith("controls:"):
+        lights = tuple(x.strip() for x in field[9:].split(",") if x.strip())
+        return lights or (name,)
+    return (field,) if field else (name,)
+
+
+def parse_lights(cfg, warnings: Optional[List[str]] = None) -> Dict[str, LightDef]:
+    """[lights]: name = Friendly | type | pin(s) | icon | order."""
+    warnings = [] if warnings is None else warnings
+    lights: Dict[str, LightDef] = {}
+    if not cfg.has_section("lights"):
+        return lights
+    for name, line in cfg.items("lights"):
+        parts = _fields(line)
+        if len(parts) < 4:
+            warnings.append(f"Invalid light '{name}' (expected Friendly | type | pin(s) | icon | order)")
+            continue
+        kind = parts[1].lower()
+        try:
+            if kind == "pwm":
+                pins = (int(parts[2]),)
+            elif kind == "rgb_bug" and len(parts) >= 5:
+                pins = tuple(int(p) for p in parts[2:5])
+            else:
+                warnings.append(f"Light '{name}' has unknown type '{parts[1]}' or too few pins")
+                continue
+        except ValueError:
+            warnings.append(f"Bad pin for light '{name}'")
+            continue
+        lights[name] = LightDef(name, parts[0], kind, pins, _icon(parts[-2]), _order(parts[-1]))
+    return lights
+
+
+def parse_relays(cfg, warnings: Optional[List[str]] = None) -> Dict[str, RelayDef]:
+    """[gpio]: name = Friendly | pin | active_high | initial_state | icon | order."""
+    warnings = [] if warnings is None else warnings
+    relays: Dict[str, RelayDef] = {}
+    if not cfg.has_section("gpio"):
+        return relays
+    for name, line in cfg.items("gpio"):
+        if name.endswith(("_pin", "_pull_up", "_bounce_time")) or str(line).strip().startswith("#"):
+            continue  # old-style reed lines
+        parts = _fields(line)
+        if len(parts) < 2:
+            continue
+        try:
+            pin = int(parts[1])
+        except ValueError:
+            warnings.append(f"Bad GPIO pin for relay '{name}'")
+            continue
+        relays[name] = RelayDef(
+            name, parts[0], pin,
+            active_high=len(parts) > 2 and parts[2].lower() == "true",
+            initial=len(parts) > 3 and parts[3].lower() == "true",
+            icon=_icon(parts[4] if len(parts) > 4 else None),
+            order=_order(parts[5] if len(parts) > 5 else None),
+        )
+    return relays
+
+
+def parse_reeds(cfg, warnings: Optional[List[str]] = None) -> Dict[str, ReedDef]:
+    """[reeds]: name = Friendly | pin | pull_up | bounce_time | icon | order | controls."""
+    warnings = [] if warnings is None else warnings
+    reeds: Dict[str, ReedDef] = {}
+    if not cfg.has_section("reeds"):
+        return reeds
+    for name, line in cfg.items("reeds"):
+        parts = _fields(line)
+        if len(parts) < 2:
+            continue
+        try:
+            pin = int(parts[1])
+        except ValueError:
+            warnings.append(f"Bad GPIO pin for reed '{name}'")
+            continue
+        try:
+            bounce = float(parts[3]) if len(parts) > 3 and parts[3] else 0.05
+        except ValueError:
+            warnings.append(f"Bad bounce_time for reed '{name}' (using 0.05)")
+            bounce = 0.05
+        reeds[name] = ReedDef(
+            name, parts[0], pin,
+            pull_up=len(parts) > 2 and parts[2].lower() != "false",
+            bounce_s=bounce,
+            icon=_icon(parts[4] if len(parts) > 4 else None),
+            order=_order(parts[5] if len(parts) > 5 else None),
+            controls=_controls(name, parts[6] if len(parts) > 6 else ""),
+        )
+    return reeds
+
+
+def frontend_controls(lights: Dict[str, LightDef], relays: Dict[str, RelayDef]) -> List[dict]:
+    """Dimmers and relays in one list, in the user's order (ties keep config order)."""
+    controls = [{
+        "name": light.name,
+        "label": light.friendly,
+        "type": "dimmer",
+        "icon": light.icon,
+        "has_mode": light.kind == "rgb_bug",
+        "order": light.order,
+    } for light in lights.values()]
+    controls += [{
+        "name": relay.name,
+        "label": relay.friendly,
+        "type": "relay",
+        "icon": relay.icon,
+        "has_mode": False,
+        "order": relay.order,
+    } for relay in relays.values()]
+    controls.sort(key=lambda c: c["order"])
+    return controls
+
+
+def compiled_sections(cfg) -> Iterator[str]:
+    """The sections of `cfg` that compile_config() reads, in file order."""
+    for section in cfg.sections():
+        if section in COMPILED_SECTIONS or section.startswith(COMPILED_PREFIXES):
+            yield section
@@ -17,25 +17,19 @@ class ConfigValidationError(Exception):
         super().__init__(msg)
 
 
-def _reed_pins(raw_cfg) -> dict:
+def _reed_pins(compiled: CompiledConfig) -> dict:
     pins = {}
-    if not raw_cfg.has_section("reeds"):
-        return pins
-    for name, line in raw_cfg.items("reeds"):
-        parts = [p.strip() for p in str(line).split("|")]
-        if len(parts) < 2:
-            continue
-        try:
-            pin = int(parts[1])
-        except ValueError:
-            continue
-        pins.setdefault(pin, []).append(name)
+    for name, reed in compiled.reed_defs.items():
+        pins.setdefault(reed.pin, []).append(name)
     return pins
 
 
 def validate_compiled_config(raw_cfg, compiled: CompiledConfig) -> List[str]:
     """
     Validate compiled config. Returns warnings; raises ConfigValidationError on errors.
+
+    Everything is checked against `compiled` (pins come from its reed_defs);
+    raw_cfg is kept for callers.
     """
     errors: List[str] = []
     warnings: List[str] = []
@@ -105,7 +99,7 @@ def validate_compiled_config(raw_cfg, compiled: CompiledConfig) -> List[str]:
                 )
 
     # Duplicate reed GPIO pins
-    for pin, names in _reed_pins(raw_cfg).items():
+    for pin, names in _reed_pins(compiled).items():
         if len(names) > 1:
             errors.append(
                 f"Duplicate reed GPIO pin {pin}: {', '.join(names)}"
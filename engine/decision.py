@@ -0,0 +1,118 @@
+"""Per-light decision tables, precompiled from the precedence stack.
+
+Without a user intent, a light's resolved level depends only on:
+
+  * the phase key (None / day / evening / night),
+  * a few reed bits: its own reed closed, its safety reed closed (rooftop
+    tent) and, for ambient lights, whether any reed is open,
+  * the active scene.
+
+`compile_decision_tables()` evaluates `precedence.resolve_stack` once for
+every combination, so `resolve_light` becomes: work out the light's bits,
+check the active scene's output vector, else index the automation table.
+Entries come from the resolver's own functions, so the rules live in one place.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from .config_compile import CompiledConfig
+from .precedence import ResolvedLight, resolve_stack, safety_reed, scene_layer
+
+PHASE_KEYS = (None, "day", "evening", "night")
+
+
+@dataclass(frozen=True)
+class LightTable:
+    reeds: Tuple[str, ...]              # bit i = reeds[i] effectively closed
+    uses_any_open: bool                 # next bit = any reed open (ambient lights)
+    auto: Dict[Optional[str], Tuple[ResolvedLight, ...]]    # phase key -> result by bits
+
+    def bits(self, view) -> int:
+        bits = 0
+        for i, reed in enumerate(self.reeds):
+            if view.reed_closed(reed):
+                bits |= 1 << i
+        if self.uses_any_open and view.any_open():
+            bits |= 1 << len(self.reeds)
+        return bits
+
+    @property
+    def width(self) -> int:
+        return len(self.reeds) + (1 if self.uses_any_open else 0)
+
+
+class _FixedFacts:
+    """WorldView stand-in with the answers fixed by one combination of bits."""
+
+    def __init__(self, table: LightTable, phase: Optional[str], bits: int):
+        self.phase = phase
+        self._closed = {reed: bool(bits >> i & 1) for i, reed in enumerate(table.reeds)}
+        self._any_open = bool(bits >> len(table.reeds) & 1)
+        self._uses_any_open = table.uses_any_open
+
+    def reed_closed(self, reed: str) -> bool:
+        return self._closed[reed]           # KeyError = the table is missing an input
+
+    def any_open(self) -> bool:
+        if not self._uses_any_open:
+            raise KeyError("any_open")
+        return self._any_open
+
+
+def _light_table(light: str, cfg: CompiledConfig, intern: dict) -> LightTable:
+    reeds = []
+    for reed in (cfg.light_to_reed.get(light), safety_reed(light, cfg)):
+        if reed and reed not in reeds:
+            reeds.append(reed)
+    shape = LightTable(tuple(reeds), light in cfg.ambient_lights, {})
+    auto = {}
+    for phase in PHASE_KEYS:
+        auto[phase] = tuple(
+            _intern(intern, resolve_stack(light, None, None, _FixedFacts(shape, phase, bits), cfg))
+            for bits in range(1 << shape.width)
+        )
+    return LightTable(shape.reeds, shape.uses_any_open, auto)
+
+
+def _scene_vector(scene_key: str, cfg: CompiledConfig, tables: Dict[str, LightTable],
+                  intern: dict) -> Dict[str, tuple]:
+    """light -> result by bits while `scene_key` is active; None entries fall through to automation."""
+    vector = {}
+    for light, table in tables.items():
+        own_reed = cfg.light_to_reed.get(light)
+        entry = []
+        for bits in range(1 << table.width):
+            facts = _FixedFacts(table, None, bits)
+            if own_reed and facts.reed_closed(own_reed):
+                entry.append(None)          # reed closed outranks the scene (step 2 of resolve_stack)
+                continue
+            # The scene layer never looks at the phase
+            hit = scene_layer(light, scene_key, facts, cfg)
+            entry.append(_intern(intern, hit) if hit is not None else None)
+        if any(e is not None for e in entry):
+            vector[light] = tuple(entry)
+    return vector
+
+
+def _intern(seen: dict, resolved: ResolvedLight) -> ResolvedLight:
+    """One shared instance per distinct result (most lights resolve to a handful)."""
+    return seen.setdefault(resolved, resolved)
+
+
+def compile_decision_tables(cfg: CompiledConfig) -> CompiledConfig:
+    """Fill cfg.light_tables and cfg.scene_vectors (in place; returns cfg)."""
+    intern: Dict[ResolvedLight, ResolvedLight] = {}
+    tables = {light: _light_table(light, cfg, intern) for light in cfg.light_names}
+    cfg.light_tables = tables
+    cfg.scene_vectors = {key: _scene_vector(key, cfg, tables, intern) for key in cfg.scenes}
+    return cfg
+
+
+def invalidate_decision_tables(cfg: CompiledConfig) -> CompiledConfig:
+    """Drop the tables (resolution falls back to walking the stack) and output IDs after editing cfg by hand."""
+    cfg.light_tables = {}
+    cfg.scene_vectors = {}
+    cfg.ids = None
+    return cfg
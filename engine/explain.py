@@ -78,10 +78,13 @@ def build_explain_snapshot(
     lights_out: Dict[str, Any] = {}
     drifts: List[dict] = []
 
+    ids = desired.ids
     for light in cfg.light_names:
-        target_b, target_m = desired.lights.get(light, (0, "white"))
-        target_m = target_m or "white"
-        source = desired.light_sources.get(light, "fallback")
+        i = ids.light.get(light)
+        if i is None:
+            target_b, target_m, source = 0, "white", "fallback"
+        else:
+            target_b, target_m, source = desired.brightness[i], desired.modes[i] or "white", desired.sources[i]
         observed_b = world.observed_lights.get(light)
         observed_m = world.observed_light_modes.get(light, "white")
         intent = world.light_intents.get(light)
@@ -132,7 +135,8 @@ def build_explain_snapshot(
 
     relays_out = {}
     for relay in cfg.relay_names:
-        target = desired.relays.get(relay, False)
+        i = ids.relay.get(relay)
+        target = bool(desired.relay_on[i]) if i is not None else False
         observed = world.observed_relays.get(relay)
         rdrift = observed is not None and bool(observed) != bool(target)
         if rdrift:
@@ -0,0 +1,38 @@
+"""Dense integer IDs for the engine's lights, relays, reeds and screens.
+
+The policy and reconcile loops keep per-output state in flat vectors indexed
+by these IDs (see DesiredOutputs and Reconciler); names only come back at the
+UI, explain and log boundary.
+"""
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+from .config_compile import CompiledConfig
+
+
+class OutputIds:
+    """Name <-> index maps for one compiled config, in config order."""
+
+    __slots__ = ("lights", "relays", "reeds", "screens",
+                 "light", "relay", "reed", "screen", "rgb", "rgb_lights")
+
+    def __init__(self, cfg: CompiledConfig):
+        self.lights: Tuple[str, ...] = tuple(cfg.light_names)
+        self.relays: Tuple[str, ...] = tuple(cfg.relay_names)
+        self.reeds: Tuple[str, ...] = tuple(cfg.reed_names)
+        self.screens: Tuple[str, ...] = tuple(cfg.screens)
+        self.light: Dict[str, int] = {n: i for i, n in enumerate(self.lights)}
+        self.relay: Dict[str, int] = {n: i for i, n in enumerate(self.relays)}
+        self.reed: Dict[str, int] = {n: i for i, n in enumerate(self.reeds)}
+        self.screen: Dict[str, int] = {n: i for i, n in enumerate(self.screens)}
+        self.rgb = bytes(1 if n in cfg.rgb_lights else 0 for n in self.lights)    # by light ID
+        self.rgb_lights: Tuple[int, ...] = tuple(i for i, flag in enumerate(self.rgb) if flag)
+
+
+def output_ids(cfg: CompiledConfig) -> OutputIds:
+    """cfg.ids, built on first use for configs assembled by hand (tests, replay)."""
+    ids = cfg.ids
+    if ids is None:
+        ids = cfg.ids = OutputIds(cfg)
+    return ids
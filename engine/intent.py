@@ -2,12 +2,16 @@ from __future__ import annotations
 
 import time
 from dataclasses import dataclass
-from typing import Literal, Optional
+from typing import Dict, List, Literal, Optional, Tuple, get_args
 
 IntentExpiry = Literal["until_reed_close", "until_phase_change", "until_scene_clear", "manual"]
+EXPIRY_TYPES: Tuple[str, ...] = get_args(IntentExpiry)
 
+# A relay has no linked reed, so it can't expire on one closing
+RELAY_EXPIRY_TYPES: Tuple[str, ...] = ("until_phase_change", "until_scene_clear", "manual")
 
-@dataclass
+
+@dataclass(slots=True)
 class LightIntent:
     brightness: int
     mode: Optional[str] = None
@@ -21,8 +25,12 @@ class LightIntent:
         if not self.set_at:
             self.set_at = time.time()
 
+    def __deepcopy__(self, memo):
+        # Every field is immutable; much cheaper than deepcopy's generic path for slotted classes
+        return LightIntent(self.brightness, self.mode, self.expires, self.set_at)
+
 
-@dataclass
+@dataclass(slots=True)
 class RelayIntent:
     on: bool
     expires: IntentExpiry = "manual"
@@ -30,4 +38,80 @@ class RelayIntent:
 
     def __post_init__(self):
         if not self.set_at:
-            self.set_at = time.time()
\ No newline at end of file
+            self.set_at = time.time()
+
+    def __deepcopy__(self, memo):
+        return RelayIntent(self.on, self.expires, self.set_at)
+
+
+class IntentBatchError(ValueError):
+    """A batch with at least one bad item; nothing in it was applied."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+@dataclass(slots=True)
+class IntentBatch:
+    lights: Dict[str, Tuple[int, Optional[str], str]]      # name -> (brightness, mode, expires)
+    relays: Dict[str, Tuple[bool, str]]                     # name -> (on, expires)
+
+
+def parse_intent_batch(items, cfg) -> IntentBatch:
+    """Validate a list of intents against the compiled config.
+
+    Items are {"light": name, "brightness": 0-100, "mode"?: str, "expires"?: str}
+    or {"relay": name, "on": bool, "expires"?: str}. A later item for the same
+    output replaces an earlier one. Any bad item rejects the whole batch.
+    """
+    if not isinstance(items, list) or not items:
+        raise IntentBatchError(["intents must be a non-empty list"])
+
+    errors: List[str] = []
+    batch = IntentBatch({}, {})
+    for n, item in enumerate(items):
+        where = f"intents[{n}]"
+        if not isinstance(item, dict) or ("light" in item) == ("relay" in item):
+            errors.append(f"{where}: needs exactly one of 'light' or 'relay'")
+            continue
+
+        if "light" in item:
+            name = item["light"]
+            if name not in cfg.light_names:
+                errors.append(f"{where}: unknown light {name!r}")
+                continue
+            try:
+                brightness = max(0, min(100, int(item.get("brightness"))))
+            except (TypeError, ValueError, OverflowError):
+                errors.append(f"{where}: invalid brightness {item.get('brightness')!r}")
+                continue
+            mode = None
+            if name in cfg.rgb_lights:
+                mode = str(item.get("mode") or "white").lower()
+                if mode not in cfg.rgb_lights[name]:
+                    errors.append(f"{where}: {name} has no mode {mode!r}")
+                    continue
+            expires = item.get("expires", "until_reed_close")
+            if expires not in EXPIRY_TYPES:
+                errors.append(f"{where}: expires must be one of {', '.join(EXPIRY_TYPES)}")
+                continue
+            batch.lights[name] = (brightness, mode, expires)
+        else:
+            name = item["relay"]
+            if name not in cfg.relay_names:
+                errors.append(f"{where}: unknown relay {name!r}")
+                continue
+            on = item.get("on")
+            if not isinstance(on, bool):
+                errors.append(f"{where}: 'on' must be true or false")
+                continue
+            expires = item.get("expires", "manual")
+            if expires not in RELAY_EXPIRY_TYPES:
+                errors.append(f"{where}: relay expires must be one of {', '.join(RELAY_EXPIRY_TYPES)}")
+                continue
+            batch.relays[name] = (on, expires)
+
+    if errors:
+        raise IntentBatchError(errors)
+    return batch
@@ -0,0 +1,464 @@
+"""Binary journal of runtime inputs, for replaying what the engine saw.
+
+Every mutation PCCSRuntime applies to the WorldStore (reed transitions,
+phase changes, UI intents, scenes, forces, hardware reads, timer-driven
+reconciles) is appended as a small record stamped with monotonic time.
+Replaying a journal through a fresh WorldStore + Reconciler reproduces the
+commands the runtime issued (see engine.replay).
+
+File layout: 8-byte magic, then records of
+
+    kind (u8) | dt (uvarint, µs since the previous record) | payload
+
+Strings are written once per file as NAME records and referenced by id
+(uvarint, 0 = None). Each file opens with an ANCHOR (wall + monotonic ns)
+and a SNAPSHOT of the world so a rotated file replays on its own. Files
+rotate like logging's RotatingFileHandler: `path`, `path.1`, ... `path.N`.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("pccs")
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MAGIC = b"PCCSJNL1"
+
+ANCHOR = 0
+NAME = 1
+REEDS = 2
+PHASE = 3
+LIGHT = 4
+RELAY = 5
+SCENE = 6
+REED_FORCE = 7
+OBSERVED = 8
+RECONCILE = 9
+SNAPSHOT_BEGIN = 10
+SNAPSHOT_END = 11
+SLIDER = 12                         # LIGHT from a coalesced drag stream (reconciles as "slider")
+INTENTS = 13                        # several LIGHT/RELAY intents applied as one change (/api/intents)
+
+KIND_NAMES = {
+    REEDS: "reeds", PHASE: "phase", LIGHT: "light", RELAY: "relay", SCENE: "scene",
+    REED_FORCE: "reed_force", OBSERVED: "observed", RECONCILE: "reconcile", SLIDER: "slider",
+    INTENTS: "intents",
+}
+
+_ANCHOR = struct.Struct("<qq")      # wall ns, monotonic ns
+
+# PHASE flags
+PHASE_INVALIDATE = 0x01
+PHASE_QUIET = 0x02                  # applied without a reconcile (bootstrap)
+
+# REED_FORCE states
+FORCE_OPEN, FORCE_CLOSED, FORCE_CLEAR = 0, 1, 2
+
+# RELAY byte: bit 0 on, bits 1+ index into this (older files only ever wrote 0/1, i.e. "manual")
+RELAY_EXPIRES = ("manual", "until_phase_change", "until_scene_clear")
+
+
+def _relay_byte(on: bool, expires: Optional[str]) -> bytes:
+    return bytes([(1 if on else 0) | RELAY_EXPIRES.index(expires or "manual") << 1])
+
+
+def _uvarint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _read_uvarint(buf: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+@dataclass
+class JournalEvent:
+    kind: int
+    t: float                        # monotonic seconds
+    wall: float                     # wall-clock seconds (from the file's anchor)
+    data: dict = field(default_factory=dict)
+    restore: bool = False           # part of a file's opening snapshot
+
+    @property
+    def name(self) -> str:
+        return KIND_NAMES.get(self.kind, str(self.kind))
+
+
+class JournalWriter:
+    """Append-only, size-bounded input journal. Thread-safe."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 4 * 1024 * 1024,
+        backups: int = 4,
+        snapshot: Optional[Callable[[], object]] = None,
+        clock: Callable[[], int] = time.monotonic_ns,
+    ):
+        self.path = path
+        self.max_bytes = max(4096, int(max_bytes))
+        self.backups = max(0, int(backups))
+        self.snapshot = snapshot
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+        self._last_ns = 0
+        self._names: Dict[str, int] = {}
+        self._last_observed = None
+        self.records = 0
+
+    # ====================== PUBLIC API ======================
+
+    def reeds(self, reeds: Dict[str, bool], closed_transitions: Optional[List[str]] = None):
+        closed = set(closed_transitions or ())
+        with self._lock:
+            if not self._ready():
+                return
+            body = bytearray(_uvarint(len(reeds)))
+            for name, state in reeds.items():
+                body += self._ref(name)
+                body.append((1 if state else 0) | (2 if name in closed else 0))
+            self._append(REEDS, body)
+
+    def phase(self, phase: str, forced: Optional[str], invalidate: bool, quiet: bool = False):
+        with self._lock:
+            if not self._ready():
+                return
+            flags = (PHASE_INVALIDATE if invalidate else 0) | (PHASE_QUIET if quiet else 0)
+            self._append(PHASE, self._ref(phase) + self._ref(forced) + bytes([flags]))
+
+    def light_intent(self, light: str, brightness: int, mode: Optional[str], expires: str = "until_reed_close",
+                     slider: bool = False):
+        with self._lock:
+            if not self._ready():
+                return
+            self._append(SLIDER if slider else LIGHT, self._ref(light) + _uvarint(max(0, int(brightness)))
+                         + self._ref(mode) + self._ref(expires))
+
+    def relay_intent(self, relay: str, on: bool, expires: str = "manual"):
+        with self._lock:
+            if not self._ready():
+                return
+            self._append(RELAY, self._ref(relay) + _relay_byte(on, expires))
+
+    def intents(self, lights: Dict[str, tuple], relays: Dict[str, tuple]):
+        """One batch as a single record: lights {name: (brightness, mode, expires)}, relays {name: (on, expires)}."""
+        with self._lock:
+            if not self._ready():
+                return
+            body = bytearray(_uvarint(len(lights)))
+            for name, (brightness, mode, expires) in lights.items():
+                body += self._ref(name) + _uvarint(max(0, int(brightness))) + self._ref(mode) + self._ref(expires)
+            body += _uvarint(len(relays))
+            for name, (on, expires) in relays.items():
+                body += self._ref(name) + _relay_byte(on, expires)
+            self._append(INTENTS, bytes(body))
+
+    def scene(self, scene_key: str):
+        with self._lock:
+            if not self._ready():
+                return
+            self._append(SCENE, self._ref(scene_key))
+
+    def reed_force(self, reed: str, closed: Optional[bool]):
+        state = FORCE_CLEAR if closed is None else FORCE_CLOSED if closed else FORCE_OPEN
+        with self._lock:
+            if not self._ready():
+                return
+            self._append(REED_FORCE, self._ref(reed) + bytes([state]))
+
+    def observed(self, lights: Dict[str, int], modes: Dict[str, str], relays: Dict[str, bool]):
+        """Hardware read-back; skipped when nothing changed since the last one."""
+        key = (tuple(sorted(lights.items())), tuple(sorted((modes or {}).items())), tuple(sorted(relays.items())))
+        with self._lock:
+            if key == self._last_observed:
+                return
+            if not self._ready():
+                return
+            self._last_observed = key
+            self._append(OBSERVED, self._observed_body(lights, modes or {}, relays))
+
+    def reconcile(self, ramp_source: str):
+        """A reconcile not caused by one of the inputs above (startup, safety timer)."""
+        with self._lock:
+            if not self._ready():
+                return
+            self._append(RECONCILE, self._ref(ramp_source))
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # ====================== INTERNAL ======================
+
+    def _ref(self, name: Optional[str]) -> bytes:
+        """Id for `name`, emitting its NAME record first if this file hasn't seen it."""
+        if name is None:
+            return b"\x00"
+        ident = self._names.get(name)
+        if ident is None:
+            ident = len(self._names) + 1
+            self._names[name] = ident
+            raw = name.encode("utf-8")
+            self._write(NAME, _uvarint(len(raw)) + raw)
+        return _uvarint(ident)
+
+    def _observed_body(self, lights, modes, relays) -> bytes:
+        body = bytearray(_uvarint(len(lights)))
+        for name, level in lights.items():
+            body += self._ref(name) + _uvarint(max(0, int(level))) + self._ref(modes.get(name))
+        body += _uvarint(len(relays))
+        for name, on in relays.items():
+            body += self._ref(name) + bytes([1 if on else 0])
+        return bytes(body)
+
+    def _ready(self) -> bool:
+        """Open (or rotate to) a fresh file if needed, before any NAME gets written."""
+        try:
+            if self._file is None or self._size >= self.max_bytes:
+                self._open_next()
+            return True
+        except OSError as e:
+            logger.debug(f"Input journal unavailable: {e}")
+            return False
+
+    def _append(self, kind: int, body: bytes):
+        try:
+            self._write(kind, body)
+            self._file.flush()
+            self.records += 1
+        except OSError as e:
+            logger.debug(f"Input journal write failed: {e}")
+
+    def _write(self, kind: int, body: bytes):
+        # NAME records ride along with the record that needs them: no time passes
+        dt_us = 0
+        if kind != NAME:
+            dt_us = max(0, self.clock() - self._last_ns) // 1000
+            self._last_ns += dt_us * 1000       # no rounding drift over a long file
+        data = bytes([kind]) + _uvarint(dt_us) + body
+        self._file.write(data)
+        self._size += len(data)
+
+    def _open_next(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._rotate()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            # Never append to a previous run's file: it has its own name table
+            self._rotate()
+        self._file = open(self.path, "wb")
+        self._names = {}
+        self._file.write(MAGIC)
+        self._size = len(MAGIC)
+        self._last_ns = self.clock()
+        data = bytes([ANCHOR]) + _uvarint(0) + _ANCHOR.pack(time.time_ns(), self._last_ns)
+        self._file.write(data)
+        self._size += len(data)
+        self._write_snapshot()
+
+    def _rotate(self):
+        if self.backups == 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def _write_snapshot(self):
+        """World state at the top of a file, so it replays without its predecessors."""
+        if self.snapshot is None:
+            return
+        world = self.snapshot()
+        self._write(SNAPSHOT_BEGIN, b"")
+        body = bytearray(_uvarint(len(world.reeds)))
+        for name, state in world.reeds.items():
+            body += self._ref(name) + bytes([1 if state else 0])
+        self._write(REEDS, bytes(body))
+        for name, closed in world.reed_forces.items():
+            self._write(REED_FORCE, self._ref(name) + bytes([FORCE_CLOSED if closed else FORCE_OPEN]))
+        if world.phase:
+            self._write(PHASE, self._ref(world.phase) + self._ref(world.phase_forced) + bytes([PHASE_QUIET]))
+        for name, intent in world.light_intents.items():
+            self._write(LIGHT, self._ref(name) + _uvarint(intent.brightness)
+                        + self._ref(intent.mode) + self._ref(intent.expires))
+        for name, intent in world.relay_intents.items():
+            self._write(RELAY, self._ref(name) + _relay_byte(intent.on, intent.expires))
+        self._write(OBSERVED, self._observed_body(world.observed_lights, world.observed_light_modes,
+                                                  world.observed_relays))
+        self._write(SNAPSHOT_END, b"")
+
+
+# ====================== READING ======================
+
+def journal_files(path: str) -> List[str]:
+    """`path` and its rotated backups, oldest first."""
+    backups = []
+    directory = os.path.dirname(path) or "."
+    prefix = os.path.basename(path) + "."
+    if os.path.isdir(directory):
+        for entry in os.listdir(directory):
+            suffix = entry[len(prefix):] if entry.startswith(prefix) else ""
+            if suffix.isdigit():
+                backups.append((int(suffix), os.path.join(directory, entry)))
+    files = [p for _, p in sorted(backups, reverse=True)]
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_journal(path: str) -> Iterator[JournalEvent]:
+    """Decode one journal file. A record cut short by a crash ends the file."""
+    with open(path, "rb") as f:
+        buf = f.read()
+    if not buf.startswith(MAGIC):
+        raise ValueError(f"{path}: not a PCCS input journal")
+
+    names: List[Optional[str]] = [None]
+    pos = len(MAGIC)
+    mono_ns = wall_ns = 0
+    restore = False
+
+    def ref(p):
+        ident, p = _read_uvarint(buf, p)
+        return names[ident], p
+
+    while pos < len(buf):
+        try:
+            kind = buf[pos]
+            dt_us, pos = _read_uvarint(buf, pos + 1)
+            mono_ns += dt_us * 1000
+            wall_ns += dt_us * 1000
+            data = {}
+
+            if kind == ANCHOR:
+                wall_ns, mono_ns = _ANCHOR.unpack_from(buf, pos)
+                pos += _ANCHOR.size
+                continue
+            if kind == NAME:
+                length, pos = _read_uvarint(buf, pos)
+                if pos + length > len(buf):
+                    raise IndexError(pos)
+                names.append(buf[pos:pos + length].decode("utf-8"))
+                pos += length
+                continue
+            if kind in (SNAPSHOT_BEGIN, SNAPSHOT_END):
+                restore = kind == SNAPSHOT_BEGIN
+                continue
+
+            if kind == REEDS:
+                count, pos = _read_uvarint(buf, pos)
+                reeds, closed = {}, []
+                for _ in range(count):
+                    name, pos = ref(pos)
+                    flags = buf[pos]
+                    pos += 1
+                    reeds[name] = bool(flags & 1)
+                    if flags & 2:
+                        closed.append(name)
+                data = {"reeds": reeds, "closed_transitions": closed}
+            elif kind == PHASE:
+                phase, pos = ref(pos)
+                forced, pos = ref(pos)
+                flags = buf[pos]
+                pos += 1
+                data = {"phase": phase, "forced": forced,
+                        "invalidate": bool(flags & PHASE_INVALIDATE), "quiet": bool(flags & PHASE_QUIET)}
+            elif kind in (LIGHT, SLIDER):
+                light, pos = ref(pos)
+                brightness, pos = _read_uvarint(buf, pos)
+                mode, pos = ref(pos)
+                expires, pos = ref(pos)
+                data = {"light": light, "brightness": brightness, "mode": mode, "expires": expires}
+            elif kind == RELAY:
+                relay, pos = ref(pos)
+                flags = buf[pos]
+                pos += 1
+                data = {"relay": relay, "on": bool(flags & 1), "expires": RELAY_EXPIRES[flags >> 1]}
+            elif kind == INTENTS:
+                count, pos = _read_uvarint(buf, pos)
+                lights = {}
+                for _ in range(count):
+                    name, pos = ref(pos)
+                    brightness, pos = _read_uvarint(buf, pos)
+                    mode, pos = ref(pos)
+                    expires, pos = ref(pos)
+                    lights[name] = (brightness, mode, expires)
+                count, pos = _read_uvarint(buf, pos)
+                relays = {}
+                for _ in range(count):
+                    name, pos = ref(pos)
+                    flags = buf[pos]
+                    pos += 1
+                    relays[name] = (bool(flags & 1), RELAY_EXPIRES[flags >> 1])
+                data = {"lights": lights, "relays": relays}
+            elif kind in (SCENE, RECONCILE):
+                name, pos = ref(pos)
+                data = {"scene" if kind == SCENE else "ramp_source": name}
+            elif kind == REED_FORCE:
+                reed, pos = ref(pos)
+                state = buf[pos]
+                pos += 1
+                data = {"reed": reed, "closed": None if state == FORCE_CLEAR else state == FORCE_CLOSED}
+            elif kind == OBSERVED:
+                count, pos = _read_uvarint(buf, pos)
+                lights, modes = {}, {}
+                for _ in range(count):
+                    name, pos = ref(pos)
+                    lights[name], pos = _read_uvarint(buf, pos)
+                    mode, pos = ref(pos)
+                    if mode is not None:
+                        modes[name] = mode
+                count, pos = _read_uvarint(buf, pos)
+                relays = {}
+                for _ in range(count):
+                    name, pos = ref(pos)
+                    relays[name] = bool(buf[pos])
+                    pos += 1
+                data = {"lights": lights, "modes": modes, "relays": relays}
+            else:
+                raise ValueError(f"{path}: unknown record kind {kind} at byte {pos}")
+        except (IndexError, struct.error, UnicodeDecodeError):
+            logger.debug(f"{path}: truncated record at byte {pos}")
+            return
+
+        yield JournalEvent(kind, mono_ns / 1e9, wall_ns / 1e9, data, restore)
+
+
+def open_journal(config) -> Optional[JournalWriter]:
+    """JournalWriter from [journal] in pccs.conf, or None when disabled."""
+    if not config.getboolean("journal", "enabled", fallback=False):
+        return None
+    path = config.get("journal", "path", fallback="logs/input_journal.bin")
+    path = path if os.path.isabs(path) else os.path.join(_BASE_DIR, path)     # not the cwd
+    max_mb = config.getfloat("journal", "max_file_mb", fallback=4.0)
+    backups = config.getint("journal", "backup_count", fallback=4)
+    return JournalWriter(path, max_bytes=int(max_mb * 1024 * 1024), backups=backups)
@@ -1,42 +1,83 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Dict, Optional, Tuple
+from array import array
+from typing import Dict, List, Optional, Tuple
 
 from .config_compile import CompiledConfig
-from .precedence import ResolvedLight, resolve_light, resolve_screen
+from .ids import OutputIds, output_ids
+from .precedence import WorldView, resolve_light, resolve_screen
 from .world import WorldState
 
 LightOutput = Tuple[int, Optional[str]]
 
 
-@dataclass
 class DesiredOutputs:
-    lights: Dict[str, LightOutput] = field(default_factory=dict)
-    light_modes: Dict[str, str] = field(default_factory=dict)
-    light_sources: Dict[str, str] = field(default_factory=dict)
-    relays: Dict[str, bool] = field(default_factory=dict)
-    screens: Dict[str, bool] = field(default_factory=dict)
-    ramp_source: str = "auto"
+    """Desired state as vectors indexed by the IDs in `ids` (engine.ids).
+
+    `brightness`, `relays` and `screens` are arrays; `modes` and `sources` are
+    lists of (interned) strings. The name-keyed dict properties are for the UI,
+    explain and tests — build them at the boundary, not in a loop.
+    """
+
+    __slots__ = ("ids", "brightness", "modes", "sources", "relay_on", "screen_on", "ramp_source")
+
+    def __init__(self, ids: OutputIds, brightness: array, modes: List[str], sources: List[str],
+                 relay_on: array, screen_on: array, ramp_source: str = "auto"):
+        self.ids = ids
+        self.brightness = brightness        # array("h") by light ID
+        self.modes = modes
+        self.sources = sources
+        self.relay_on = relay_on            # array("b") by relay ID, 0/1
+        self.screen_on = screen_on          # array("b") by screen ID, 0/1
+        self.ramp_source = ramp_source
+
+    def set_light(self, i: int, brightness: int, mode: str, source: str):
+        self.brightness[i] = brightness
+        self.modes[i] = mode
+        self.sources[i] = source
+
+    @property
+    def lights(self) -> Dict[str, LightOutput]:
+        return {n: (b, m) for n, b, m in zip(self.ids.lights, self.brightness, self.modes)}
+
+    @property
+    def light_modes(self) -> Dict[str, str]:
+        return {self.ids.lights[i]: self.modes[i] for i in self.ids.rgb_lights}
+
+    @property
+    def light_sources(self) -> Dict[str, str]:
+        return dict(zip(self.ids.lights, self.sources))
+
+    @property
+    def relays(self) -> Dict[str, bool]:
+        return {n: bool(on) for n, on in zip(self.ids.relays, self.relay_on)}
+
+    @property
+    def screens(self) -> Dict[str, bool]:
+        return {n: bool(on) for n, on in zip(self.ids.screens, self.screen_on)}
 
 
 def desired_outputs(world: WorldState, cfg: CompiledConfig) -> DesiredOutputs:
-    out = DesiredOutputs()
+    ids = output_ids(cfg)
+    view = WorldView(world, cfg)
 
-    for light in cfg.light_names:
-        resolved: ResolvedLight = resolve_light(light, world, cfg)
-        out.lights[light] = (resolved.brightness, resolved.mode)
-        out.light_sources[light] = resolved.source
-        if light in cfg.rgb_lights:
-            out.light_modes[light] = resolved.mode
+    resolved = [resolve_light(light, world, cfg, view) for light in ids.lights]
 
-    for relay in cfg.relay_names:
+    relay_on = array("b")
+    for relay in ids.relays:
         if relay in world.relay_intents:
-            out.relays[relay] = world.relay_intents[relay].on
+            relay_on.append(bool(world.relay_intents[relay].on))
         else:
-            out.relays[relay] = world.observed_relays.get(relay, False)
+            relay_on.append(bool(world.observed_relays.get(relay, False)))
 
-    for name, screen in cfg.screens.items():
-        out.screens[name] = resolve_screen(screen["linked_reed"], world, cfg)
+    screen_on = array("b", (resolve_screen(cfg.screens[name]["linked_reed"], world, cfg, view)
+                            for name in ids.screens))
 
-    return out
\ No newline at end of file
+    return DesiredOutputs(
+        ids,
+        array("h", [r.brightness for r in resolved]),
+        [r.mode for r in resolved],
+        [r.source for r in resolved],
+        relay_on,
+        screen_on,
+    )
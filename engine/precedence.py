@@ -1,15 +1,16 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 from .config_compile import CompiledConfig, Level
+from .ids import output_ids
 from .world import WorldState
 
 LightLevel = Tuple[int, str]  # brightness, mode
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ResolvedLight:
     brightness: int
     mode: str = "white"
@@ -43,6 +44,40 @@ def any_reed_open(world: WorldState, cfg: CompiledConfig) -> bool:
     return any(not effective_reed_closed(world, r, cfg) for r in cfg.reed_names)
 
 
+class WorldView:
+    """Facts the precedence stack asks about one world snapshot, each worked out once.
+
+    desired_outputs() shares one view across every light, so the phase key,
+    effective reed states (interlocks, forces) and any_reed_open are not
+    recomputed per light.
+    """
+
+    __slots__ = ("world", "cfg", "phase", "_reed_ids", "_closed", "_any_open")
+
+    def __init__(self, world: WorldState, cfg: CompiledConfig):
+        ids = output_ids(cfg)
+        self.world = world
+        self.cfg = cfg
+        self.phase = _phase_key(world)
+        self._reed_ids = ids.reed
+        self._closed = bytearray(len(ids.reeds))     # by reed ID: 0 = not worked out, 1 = open, 2 = closed
+        self._any_open: Optional[bool] = None
+
+    def reed_closed(self, reed: str) -> bool:
+        i = self._reed_ids.get(reed)
+        if i is None:
+            return effective_reed_closed(self.world, reed, self.cfg)
+        state = self._closed[i]
+        if not state:
+            state = self._closed[i] = 2 if effective_reed_closed(self.world, reed, self.cfg) else 1
+        return state == 2
+
+    def any_open(self) -> bool:
+        if self._any_open is None:
+            self._any_open = any(not self.reed_closed(r) for r in self.cfg.reed_names)
+        return self._any_open
+
+
 def _get_phase_level(light: str, phase: str, cfg: CompiledConfig) -> Optional[Level]:
     key = phase.strip().lower()
     if light in cfg.reed_phase_levels and key in cfg.reed_phase_levels[light]:
@@ -61,22 +96,22 @@ def _scene_level(light: str, setting: dict, cfg: CompiledConfig) -> Optional[Lig
     return setting["brightness"], setting.get("mode", "white")
 
 
-def _scene_applies(light: str, world: WorldState, cfg: CompiledConfig) -> bool:
+def _scene_applies(light: str, facts: WorldView, cfg: CompiledConfig) -> bool:
     if light in cfg.ambient_lights:
-        return any_reed_open(world, cfg)
+        return facts.any_open()
     reed = cfg.light_to_reed.get(light)
     if reed:
-        return not effective_reed_closed(world, reed, cfg)
+        return not facts.reed_closed(reed)
     return True
 
 
-def _automation_default(light: str, world: WorldState, cfg: CompiledConfig) -> ResolvedLight:
-    phase = _phase_key(world)
+def _automation_default(light: str, facts: WorldView, cfg: CompiledConfig) -> ResolvedLight:
+    phase = facts.phase
     if phase is None:
         return ResolvedLight(0, "white", "phase_pending")
 
     if light in cfg.ambient_lights:
-        if not any_reed_open(world, cfg):
+        if not facts.any_open():
             if cfg.all_closed_action == "dim":
                 lvl = _get_phase_level(light, "night", cfg)
                 if lvl:
@@ -97,10 +132,11 @@ def _automation_default(light: str, world: WorldState, cfg: CompiledConfig) -> R
     return ResolvedLight(0, "white", "fallback")
 
 
-def _scene_resolve(light: str, world: WorldState, cfg: CompiledConfig) -> Optional[ResolvedLight]:
-    if not world.active_scene:
+def _scene_resolve(light: str, scene_key: Optional[str], facts: WorldView,
+                   cfg: CompiledConfig) -> Optional[ResolvedLight]:
+    if not scene_key:
         return None
-    scene = cfg.scenes.get(world.active_scene, {})
+    scene = cfg.scenes.get(scene_key, {})
     if not scene:
         return None
 
@@ -115,7 +151,7 @@ def _scene_resolve(light: str, world: WorldState, cfg: CompiledConfig) -> Option
     elif scene.get("day_levels"):
         phase_target = "day"
 
-    if not _scene_applies(light, world, cfg):
+    if not _scene_applies(light, facts, cfg):
         return None
 
     setting = scene.get("lights", {}).get(light)
@@ -137,15 +173,31 @@ def is_scene_source(source: str) -> bool:
     return source.startswith("scene")
 
 
-def _safety_clamp(light: str, resolved: ResolvedLight, world: WorldState, cfg: CompiledConfig) -> ResolvedLight:
-    if light == "rooftop_tent" and resolved.brightness > 0:
-        reed = cfg.light_to_reed.get("rooftop_tent", "rooftop_tent")
-        if effective_reed_closed(world, reed, cfg):
-            return ResolvedLight(0, "white", "safety_rooftop")
+def safety_reed(light: str, cfg: CompiledConfig) -> Optional[str]:
+    """Reed whose closed state forces `light` off regardless of source (the hard guard)."""
+    if light == "rooftop_tent":
+        return cfg.light_to_reed.get("rooftop_tent", "rooftop_tent")
+    return None
+
+
+def _safety_clamp(light: str, resolved: ResolvedLight, facts: WorldView, cfg: CompiledConfig) -> ResolvedLight:
+    reed = safety_reed(light, cfg)
+    if reed and resolved.brightness > 0 and facts.reed_closed(reed):
+        return ResolvedLight(0, "white", "safety_rooftop")
     return resolved
 
 
-def resolve_light(light: str, world: WorldState, cfg: CompiledConfig) -> ResolvedLight:
+def scene_layer(light: str, scene_key: Optional[str], facts: WorldView,
+                cfg: CompiledConfig) -> Optional[ResolvedLight]:
+    """Step 3 of resolve_stack (safety clamp included), or None if the scene doesn't set `light`."""
+    scene_result = _scene_resolve(light, scene_key, facts, cfg)
+    if scene_result is None:
+        return None
+    return _safety_clamp(light, scene_result.clamped(), facts, cfg)
+
+
+def resolve_stack(light: str, intent, scene_key: Optional[str], facts: WorldView,
+                  cfg: CompiledConfig) -> ResolvedLight:
     """Explicit precedence stack (highest wins first).
 
     1. User intent — manual UI levels (honoured even when reed reads closed)
@@ -154,30 +206,54 @@ def resolve_light(light: str, world: WorldState, cfg: CompiledConfig) -> Resolve
     4. Automation — ambient / reed phase tables
     5. Fallback — off
     6. Safety clamp — rooftop tent cannot be on when reed closed (hard guard)
+
+    `facts` is a WorldView, or anything answering the same questions
+    (engine.decision feeds fixed answers to build its tables).
     """
     reed = cfg.light_to_reed.get(light)
 
     # 1. User intent (safety clamp still applies — e.g. rooftop tent)
-    intent = world.light_intents.get(light)
     if intent is not None:
         resolved = ResolvedLight(intent.brightness, intent.mode or "white", "user_intent").clamped()
-        return _safety_clamp(light, resolved, world, cfg)
+        return _safety_clamp(light, resolved, facts, cfg)
 
     # 2. Reed closed
-    if reed and effective_reed_closed(world, reed, cfg):
+    if reed and facts.reed_closed(reed):
         return ResolvedLight(0, "white", "reed_closed")
 
     # 3. Scene
-    scene_result = _scene_resolve(light, world, cfg)
+    scene_result = scene_layer(light, scene_key, facts, cfg)
     if scene_result is not None:
-        return _safety_clamp(light, scene_result.clamped(), world, cfg)
+        return scene_result
 
     # 4. Automation
-    auto = _automation_default(light, world, cfg)
+    auto = _automation_default(light, facts, cfg)
 
     # 5–6. Fallback + safety
-    return _safety_clamp(light, auto.clamped(), world, cfg)
+    return _safety_clamp(light, auto.clamped(), facts, cfg)
 
 
-def resolve_screen(linked_reed: str, world: WorldState, cfg: CompiledConfig) -> bool:
-    return not effective_reed_closed(world, linked_reed, cfg)
\ No newline at end of file
+def resolve_light(light: str, world: WorldState, cfg: CompiledConfig,
+                  view: Optional[WorldView] = None) -> ResolvedLight:
+    """Resolve one light: a decision-table lookup when compile_config built tables
+    (see engine.decision), otherwise a walk of resolve_stack()."""
+    view = view or WorldView(world, cfg)
+    intent = world.light_intents.get(light)
+    table = cfg.light_tables.get(light) if intent is None else None
+    if table is None:
+        return resolve_stack(light, intent, world.active_scene, view, cfg)
+
+    bits = table.bits(view)
+    if world.active_scene:
+        vector = cfg.scene_vectors.get(world.active_scene)
+        entry = vector.get(light) if vector else None
+        if entry is not None and entry[bits] is not None:
+            return entry[bits]
+    return table.auto[view.phase][bits]
+
+
+def resolve_screen(linked_reed: str, world: WorldState, cfg: CompiledConfig,
+                   view: Optional[WorldView] = None) -> bool:
+    if view is not None:
+        return not view.reed_closed(linked_reed)
+    return not effective_reed_closed(world, linked_reed, cfg)
@@ -2,17 +2,38 @@ from __future__ import annotations
 
 import logging
 import time
-from typing import Callable, Dict, List, Optional, Tuple
+from array import array
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
 
+from .clock import REAL_CLOCK, Clock
 from .config_compile import CompiledConfig
 from .explain import build_explain_snapshot, source_label
+from .ids import output_ids
 from .policy import DesiredOutputs, desired_outputs
 from .precedence import is_scene_source
 from .world import WorldStore
 
 logger = logging.getLogger("pccs")
 
-CommandedLight = Tuple[int, str]
+# Passes that only command lights with a user intent. "slider" is a coalesced
+# drag stream (bridge/slider.py); its ramps retarget in place (tracking).
+UI_SOURCES = ("ui", "slider")
+
+
+class PassTiming(NamedTuple):
+    compute_s: float        # snapshot, desired outputs and diff
+    actuate_s: float        # actuator writes and the state emit
+
+
+def ramp_ms_for_source(cfg: CompiledConfig, source: str) -> int:
+    """Ramp length for a reconcile triggered by `source` (reed ramp for anything else)."""
+    return {
+        "ui": cfg.ui_ramp_ms,
+        "slider": cfg.ui_ramp_ms,
+        "scene": cfg.scene_ramp_ms,
+        "phase": cfg.phase_ramp_ms,
+        "reed": cfg.reed_ramp_ms,
+    }.get(source, cfg.reed_ramp_ms)
 
 
 class Reconciler:
@@ -28,6 +49,7 @@ class Reconciler:
         on_state_emit: Optional[Callable[[dict], None]] = None,
         ramp_ms_for_source: Optional[Callable[[str], int]] = None,
         on_drift: Optional[Callable[[List[dict]], None]] = None,
+        clock: Clock = REAL_CLOCK,
     ):
         self.world = world
         self.cfg = cfg
@@ -36,117 +58,152 @@ class Reconciler:
         self.screens = screen_actuator
         self.on_state_emit = on_state_emit
         self.on_drift = on_drift
+        self.clock = clock
         self._ramp_ms = ramp_ms_for_source or (lambda _s: cfg.reed_ramp_ms)
         self._last_desired: Optional[DesiredOutputs] = None
         self._last_ramp_source: str = "unknown"
-        self._commanded_lights: Dict[str, CommandedLight] = {}
-        self._commanded_relays: Dict[str, bool] = {}
-        self._commanded_screens: Dict[str, bool] = {}
-        self._commanded_at: Dict[str, float] = {}
+        # What was last sent to hardware, by output ID (engine.ids); -1 = never commanded
+        ids = self._ids = output_ids(cfg)
+        self._commanded_b = array("h", [-1]) * len(ids.lights)
+        self._commanded_m: List[str] = [""] * len(ids.lights)
+        self._commanded_light_at = array("d", [0.0]) * len(ids.lights)
+        self._commanded_relays = array("b", [-1]) * len(ids.relays)
+        self._commanded_relay_at = array("d", [0.0]) * len(ids.relays)
+        self._commanded_screens = array("b", [-1]) * len(ids.screens)
         self._drift_grace_s = max(3.0, cfg.reed_ramp_ms / 1000.0 + 1.0)
         self._active_drifts: Dict[str, str] = {}
 
-    def _preserve_lights_except(self, desired: DesiredOutputs, world, affected: set) -> None:
+    def _preserve_lights_except(self, desired: DesiredOutputs, world, affected: Set[int]) -> None:
         """Keep untouched lights at their prior commanded or observed levels."""
-        for light in self.cfg.light_names:
-            if light in affected:
+        last = self._last_desired
+        for i, light in enumerate(self._ids.lights):
+            if i in affected:
                 continue
-            if self._last_desired and light in self._last_desired.lights:
-                desired.lights[light] = self._last_desired.lights[light]
-                desired.light_sources[light] = self._last_desired.light_sources.get(
-                    light, "fallback"
-                )
-                if light in self.cfg.rgb_lights and light in self._last_desired.light_modes:
-                    desired.light_modes[light] = self._last_desired.light_modes[light]
+            if last is not None:
+                desired.set_light(i, last.brightness[i], last.modes[i], last.sources[i])
             elif light in world.observed_lights:
-                obs = world.observed_lights[light]
-                mode = world.observed_light_modes.get(light, "white")
-                desired.lights[light] = (obs, mode)
-                desired.light_sources[light] = "unchanged"
-                if light in self.cfg.rgb_lights:
-                    desired.light_modes[light] = mode
-
-    def reconcile(self, ramp_source: str = "auto"):
+                desired.set_light(i, world.observed_lights[light],
+                                  world.observed_light_modes.get(light, "white"), "unchanged")
+
+    def _changed_lights(self, desired: DesiredOutputs) -> List[int]:
+        """Light IDs whose desired brightness (or mode, for RGB lights) differs from the commanded one."""
+        commanded_b, commanded_m, modes = self._commanded_b, self._commanded_m, desired.modes
+        rgb = self._ids.rgb_lights
+        if desired.brightness == commanded_b and all((modes[i] or "white") == commanded_m[i] for i in rgb):
+            return []
+        flags = self._ids.rgb
+        return [
+            i for i, (b, cmd_b) in enumerate(zip(desired.brightness, commanded_b))
+            if b != cmd_b or (flags[i] and (modes[i] or "white") != commanded_m[i])
+        ]
+
+    def reconcile(self, ramp_source: str = "auto") -> PassTiming:
+        began = time.perf_counter()
         world = self.world.snapshot()
         desired = desired_outputs(world, cfg=self.cfg)
         desired.ramp_source = ramp_source
         self._last_ramp_source = ramp_source
         ramp_ms = self._ramp_ms(ramp_source)
-        now = time.time()
+        now = self.clock.monotonic()
         scene_pass = ramp_source == "scene"
-        ui_pass = ramp_source == "ui"
+        ui_pass = ramp_source in UI_SOURCES
+        ids = self._ids
+        changed = self._changed_lights(desired)
+        computed = time.perf_counter()
 
-        for light, (brightness, mode) in desired.lights.items():
-            source = desired.light_sources.get(light, "fallback")
+        for i in changed:
+            light = ids.lights[i]
+            source = desired.sources[i]
             if scene_pass and not is_scene_source(source):
                 continue
             if ui_pass and light not in world.light_intents:
                 continue
 
-            target_m = mode or "white"
-            cmd_b, cmd_m = self._commanded_lights.get(light, (-1, ""))
-            if cmd_b != brightness or (light in self.cfg.rgb_lights and cmd_m != target_m):
-                self.arduino.set_light(
-                    light,
-                    brightness,
-                    target_m if light in self.cfg.rgb_lights else None,
-                    ramp_ms,
-                    source=source,
-                    trigger=ramp_source,
-                )
-                self._commanded_lights[light] = (brightness, target_m)
-                self._commanded_at[light] = now
+            brightness = desired.brightness[i]
+            target_m = desired.modes[i] or "white"
+            self.arduino.set_light(
+                light,
+                brightness,
+                target_m if ids.rgb[i] else None,
+                ramp_ms,
+                source=source,
+                trigger=ramp_source,
+            )
+            self._commanded_b[i] = brightness
+            self._commanded_m[i] = target_m
+            self._commanded_light_at[i] = now
 
-        for relay, on in desired.relays.items():
-            if ui_pass and relay not in world.relay_intents:
-                continue
-            if self._commanded_relays.get(relay) != on:
-                rsource = "user_intent" if relay in world.relay_intents else "hardware_default"
-                self.relays.set_relay(relay, on, source=rsource, trigger=ramp_source)
-                self._commanded_relays[relay] = on
-                self._commanded_at[f"relay:{relay}"] = now
-
-        if self.screens:
-            for screen, awake in desired.screens.items():
-                if self._commanded_screens.get(screen) != awake:
-                    self.screens.set_screen(screen, awake)
-                    self._commanded_screens[screen] = awake
+        if desired.relay_on != self._commanded_relays:
+            for i, on in enumerate(desired.relay_on):
+                relay = ids.relays[i]
+                if ui_pass and relay not in world.relay_intents:
+                    continue
+                if self._commanded_relays[i] != on:
+                    rsource = "user_intent" if relay in world.relay_intents else "hardware_default"
+                    self.relays.set_relay(relay, bool(on), source=rsource, trigger=ramp_source)
+                    self._commanded_relays[i] = on
+                    self._commanded_relay_at[i] = now
+
+        if self.screens and desired.screen_on != self._commanded_screens:
+            for i, awake in enumerate(desired.screen_on):
+                if self._commanded_screens[i] != awake:
+                    self.screens.set_screen(ids.screens[i], bool(awake))
+                    self._commanded_screens[i] = awake
 
         if scene_pass:
-            scene_lights = {
-                light
-                for light in self.cfg.light_names
-                if is_scene_source(desired.light_sources.get(light, ""))
-            }
+            scene_lights = {i for i, source in enumerate(desired.sources) if is_scene_source(source)}
             self._preserve_lights_except(desired, world, scene_lights)
         elif ui_pass:
-            self._preserve_lights_except(desired, world, set(world.light_intents.keys()))
+            self._preserve_lights_except(desired, world, {ids.light[n] for n in world.light_intents if n in ids.light})
 
         self._last_desired = desired
 
         if self.on_state_emit:
             self.on_state_emit(self.build_ui_state(desired))
+        return PassTiming(computed - began, time.perf_counter() - computed)
 
     def build_ui_state(self, desired: Optional[DesiredOutputs] = None) -> dict:
         desired = desired or self._last_desired
         if not desired:
             world = self.world.snapshot()
             desired = desired_outputs(world, self.cfg)
-        state = {}
-        for name, (b, _) in desired.lights.items():
-            state[name] = b
-        for name, mode in desired.light_modes.items():
-            state[f"{name}_mode"] = mode
-        for name, on in desired.relays.items():
-            state[name] = on
+        ids = desired.ids
+        state = dict(zip(ids.lights, desired.brightness))
+        for i in ids.rgb_lights:
+            state[f"{ids.lights[i]}_mode"] = desired.modes[i]
+        for name, on in zip(ids.relays, desired.relay_on):
+            state[name] = bool(on)
         return state
 
+    def commanded_outputs(self) -> dict:
+        """What was last sent to hardware: {"lights": {name: [brightness, mode]}, "relays": {name: on}}."""
+        ids = self._ids
+        return {
+            "lights": {ids.lights[i]: [b, self._commanded_m[i]]
+                       for i, b in enumerate(self._commanded_b) if b >= 0},
+            "relays": {ids.relays[i]: bool(on) for i, on in enumerate(self._commanded_relays) if on >= 0},
+        }
+
+    def seed_commanded(self, lights: Dict[str, tuple], relays: Dict[str, bool]):
+        """Treat these outputs as already commanded (warm start: the hardware still holds them)."""
+        ids = self._ids
+        for name, (brightness, mode) in lights.items():
+            i = ids.light.get(name)
+            if i is not None:
+                self._commanded_b[i] = brightness
+                self._commanded_m[i] = mode or "white"
+        for name, on in relays.items():
+            i = ids.relay.get(name)
+            if i is not None:
+                self._commanded_relays[i] = 1 if on else 0
+
     def read_hardware(self):
-        """Refresh observed state from hardware reads."""
+        """Refresh observed state from hardware reads. Returns (lights, modes, relays)."""
         lights, modes = self.arduino.read_lights()
         relays = self.relays.read_relays()
         self.world.update_observed_lights(lights, modes)
         self.world.update_observed_relays(relays)
+        return lights, modes, relays
 
     def check_hardware_drift(self) -> List[dict]:
         """Compare desired vs observed hardware; return active drift items."""
@@ -160,15 +217,19 @@ class Reconciler:
             self._last_desired,
             last_trigger=self._last_ramp_source,
         )
-        now = time.time()
+        now = self.clock.monotonic()
         drifts: List[dict] = []
 
         for item in snap.get("drifts", []):
             key = item.get("light") or item.get("relay")
             if not key:
                 continue
-            grace_key = f"relay:{key}" if "relay" in item else key
-            commanded_at = self._commanded_at.get(grace_key, 0)
+            if "relay" in item:
+                i = self._ids.relay.get(key)
+                commanded_at = self._commanded_relay_at[i] if i is not None else 0.0
+            else:
+                i = self._ids.light.get(key)
+                commanded_at = self._commanded_light_at[i] if i is not None else 0.0
             if now - commanded_at < self._drift_grace_s:
                 continue
             drifts.append(item)
@@ -193,8 +254,9 @@ class Reconciler:
             if self._active_drifts.get(key) != detail:
                 self._active_drifts[key] = detail
                 label = source_label("fallback")
-                if self._last_desired and key in self._last_desired.light_sources:
-                    label = source_label(self._last_desired.light_sources[key])
+                i = self._ids.light.get(key)
+                if self._last_desired and i is not None:
+                    label = source_label(self._last_desired.sources[i])
                 logger.warning(
                     f"⚠️ Hardware drift · {key}: {detail} (desired via {label})"
                 )
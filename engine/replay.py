@@ -0,0 +1,221 @@
+"""Replay an input journal through a fresh WorldStore + Reconciler.
+
+The driver applies each journaled input exactly as PCCSRuntime does (same
+world mutation, same reconcile trigger) against recording actuators, with
+a virtual clock that follows the journal's timestamps instead of sleeping.
+The result is the command stream the engine would have issued plus how
+long each event's reconcile took on this machine.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from . import journal as j
+from .clock import VirtualClock
+from .config_compile import CompiledConfig
+from .reconcile import Reconciler, ramp_ms_for_source
+from .world import WorldStore, WorldTransactionError
+
+
+@dataclass
+class ReplayCommand:
+    t: float                        # journal wall-clock seconds
+    output: str                     # "light" | "relay" | "screen"
+    name: str
+    value: object
+    mode: Optional[str] = None
+    ramp_ms: int = 0
+    trigger: str = ""
+
+    def as_tuple(self):
+        return (self.output, self.name, self.value, self.mode, self.ramp_ms, self.trigger)
+
+
+@dataclass
+class ReplayReport:
+    events: Dict[str, int] = field(default_factory=dict)
+    commands: List[ReplayCommand] = field(default_factory=list)
+    latencies: List[tuple] = field(default_factory=list)      # (seconds, event name, journal wall time)
+    skipped: int = 0
+    span_s: float = 0.0             # journal time covered
+    elapsed_s: float = 0.0          # wall time the replay took
+
+    def summary(self, slowest: int = 5) -> dict:
+        ordered = sorted(s for s, _, _ in self.latencies)
+
+        def pct(p):
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1e6, 1)
+
+        worst = sorted(self.latencies, key=lambda item: item[0], reverse=True)[:slowest]
+        return {
+            "events": dict(self.events),
+            "skipped": self.skipped,
+            "commands": len(self.commands),
+            "span_s": round(self.span_s, 1),
+            "elapsed_s": round(self.elapsed_s, 3),
+            "reconcile_us": {"p50": pct(50), "p95": pct(95), "p99": pct(99), "max": pct(100)},
+            "slowest": [
+                {"event": name, "at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(wall)),
+                 "us": round(sec * 1e6, 1)}
+                for sec, name, wall in worst
+            ],
+        }
+
+
+class _RecordingArduino:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def read_lights(self):
+        return {}, {}
+
+    def set_light(self, light, brightness, mode, ramp_ms, source=None, trigger=None):
+        self.driver._command("light", light, brightness, mode, ramp_ms, trigger)
+
+
+class _RecordingRelays:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def read_relays(self):
+        return {}
+
+    def set_relay(self, relay, on, source=None, trigger=None):
+        self.driver._command("relay", relay, bool(on), None, 0, trigger)
+
+
+class _RecordingScreens:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def set_screen(self, screen, awake):
+        self.driver._command("screen", screen, bool(awake), None, 0, "")
+
+
+class ReplayDriver:
+    """Feed JournalEvents through the policy engine; see module docstring."""
+
+    def __init__(self, cfg: CompiledConfig):
+        self.cfg = cfg
+        self.clock = VirtualClock()
+        self.report = ReplayReport()
+        self.world = WorldStore(cfg.reed_names, cfg.light_names, cfg.relay_names, clock=self.clock)
+        self.world.set_light_to_reed_map(cfg.light_to_reed)
+        self.reconciler = Reconciler(
+            world=self.world,
+            cfg=cfg,
+            arduino_actuator=_RecordingArduino(self),
+            relay_actuator=_RecordingRelays(self),
+            screen_actuator=_RecordingScreens(self) if cfg.screens else None,
+            ramp_ms_for_source=lambda source: ramp_ms_for_source(cfg, source),
+            clock=self.clock,
+        )
+        self._in_restore = False
+
+    # ====================== PUBLIC API ======================
+
+    def run(self, events: Iterable[j.JournalEvent]) -> ReplayReport:
+        start = time.perf_counter()
+        first = None
+        for event in events:
+            if first is None:
+                first = event.wall
+            self.clock.advance_to(event.wall)
+            self.feed(event)
+        self.report.elapsed_s = time.perf_counter() - start
+        if first is not None:
+            self.report.span_s = self.clock.time() - first
+        return self.report
+
+    def feed(self, event: j.JournalEvent):
+        if event.restore:
+            if not self._in_restore:
+                # A file's opening snapshot replaces whatever we had built up
+                self.world.clear_all_light_intents()
+                self.world.clear_all_reed_forces()
+                self._in_restore = True
+            self._apply(event)
+            return
+        self._in_restore = False
+
+        counts = self.report.events
+        counts[event.name] = counts.get(event.name, 0) + 1
+        started = time.perf_counter()
+        source = self._apply(event)
+        if source is None:
+            return
+        self.reconciler.reconcile(ramp_source=source)
+        if event.kind == j.SCENE:
+            self.world.clear_active_scene()
+        self.report.latencies.append((time.perf_counter() - started, event.name, event.wall))
+
+    # ====================== INTERNAL ======================
+
+    def _command(self, output, name, value, mode, ramp_ms, trigger):
+        self.report.commands.append(ReplayCommand(self.clock.time(), output, name, value, mode, ramp_ms, trigger or ""))
+
+    def _apply(self, event: j.JournalEvent) -> Optional[str]:
+        """Mutate the world like PCCSRuntime; return the reconcile trigger, if any."""
+        try:
+            return self._mutate(event)
+        except WorldTransactionError:
+            # Recorded against a config with other outputs
+            self.report.skipped += 1
+            return None
+
+    def _mutate(self, event: j.JournalEvent) -> Optional[str]:
+        d = event.data
+        kind = event.kind
+        restore = event.restore
+
+        if kind == j.REEDS:
+            changes = self.world.update_reeds(d["reeds"], transition_closed=d["closed_transitions"])
+            return None if restore or not changes else "reed"
+        if kind == j.PHASE:
+            self.world.set_phase(d["phase"], d["forced"], invalidate=d["invalidate"])
+            return None if restore or d["quiet"] else "phase"
+        if kind in (j.LIGHT, j.SLIDER):
+            self.world.set_light_intent(d["light"], d["brightness"], d["mode"],
+                                        expires=d["expires"] or "until_reed_close")
+            return None if restore else ("slider" if kind == j.SLIDER else "ui")
+        if kind == j.RELAY:
+            self.world.set_relay_intent(d["relay"], d["on"], expires=d["expires"])
+            return None if restore else "ui"
+        if kind == j.INTENTS:
+            self.world.apply_intents(d["lights"], d["relays"])
+            return "ui"
+        if kind == j.REED_FORCE:
+            if d["reed"] == "all" and d["closed"] is None:
+                changes = self.world.clear_all_reed_forces()
+            else:
+                changes = self.world.set_reed_force(d["reed"], d["closed"])
+            return None if restore or not changes else "reed"
+        if kind == j.OBSERVED:
+            self.world.update_observed_lights(d["lights"], d["modes"])
+            self.world.update_observed_relays(d["relays"])
+            return None
+        if kind == j.SCENE:
+            if d["scene"] not in self.cfg.scenes:
+                self.report.skipped += 1
+                return None
+            with self.world.transaction() as tx:
+                tx.clear_all_light_intents()
+                tx.set_active_scene(d["scene"])
+            return "scene"
+        if kind == j.RECONCILE:
+            return d["ramp_source"]
+        self.report.skipped += 1
+        return None
+
+
+def replay_files(paths: Iterable[str], cfg: CompiledConfig) -> ReplayReport:
+    """Replay journal files in order (oldest first, see journal.journal_files)."""
+    def events():
+        for path in paths:
+            yield from j.read_journal(path)
+
+    return ReplayDriver(cfg).run(events())
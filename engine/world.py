@@ -1,11 +1,11 @@
 from __future__ import annotations
 
 import threading
-import time
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
-from .intent import IntentExpiry, LightIntent, RelayIntent
+from .clock import REAL_CLOCK, Clock
+from .intent import EXPIRY_TYPES, RELAY_EXPIRY_TYPES, IntentExpiry, LightIntent, RelayIntent
 
 
 @dataclass
@@ -21,18 +21,111 @@ class WorldState:
     observed_light_modes: Dict[str, str] = field(default_factory=dict)
     observed_relays: Dict[str, bool] = field(default_factory=dict)
     observed_screens: Dict[str, bool] = field(default_factory=dict)
+    version: int = 0                # bumped once per transaction that changed an input (not hardware read-back)
+
+
+@dataclass
+class ChangeSet:
+    """What one WorldStore transaction changed; empty (falsy) when it changed nothing."""
+
+    version: int = 0                                        # world version after the transaction
+    reeds: Set[str] = field(default_factory=set)            # raw state or force changed
+    closed_reeds: List[str] = field(default_factory=list)   # transitioned closed (intents invalidated)
+    lights: Set[str] = field(default_factory=set)           # light intents set, cleared or expired
+    relays: Set[str] = field(default_factory=set)           # relay intents set or expired
+    phase: bool = False                                     # phase or forced phase changed
+    scene: bool = False                                     # active scene changed
+
+    def __bool__(self) -> bool:
+        return bool(self.reeds or self.lights or self.relays or self.phase or self.scene)
+
+
+class WorldTransactionError(ValueError):
+    """A transaction with invalid mutations; none of them were applied."""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class WorldTransaction:
+    """Mutations buffered by `WorldStore.transaction()`.
+
+    Nothing is visible (not even to the code inside the `with`) until the
+    block exits: then every mutation is validated, applied under the store
+    lock in order and published as one version. `changes` holds the
+    resulting ChangeSet afterwards.
+    """
+
+    def __init__(self, store: "WorldStore"):
+        self._store = store
+        self._ops: List[tuple] = []
+        self.changes: Optional[ChangeSet] = None
+
+    def __enter__(self) -> "WorldTransaction":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.changes = self._store._commit(self._ops)
+        return False
+
+    def update_reeds(self, reeds: Dict[str, bool], *, transition_closed: Optional[List[str]] = None):
+        self._ops.append(("reeds", dict(reeds), list(transition_closed or ())))
+
+    def set_reed_force(self, reed: str, closed: Optional[bool]):
+        self._ops.append(("reed_force", reed, closed))
+
+    def clear_all_reed_forces(self):
+        self._ops.append(("clear_reed_forces",))
+
+    def set_phase(self, phase: str, forced: Optional[str] = None, *, invalidate: bool = False):
+        self._ops.append(("phase", phase, forced, invalidate))
+
+    def set_light_intent(self, light: str, brightness: int, mode: Optional[str] = None,
+                         expires: IntentExpiry = "until_reed_close"):
+        self._ops.append(("light", light, brightness, mode, expires))
+
+    def clear_light_intent(self, light: str):
+        self._ops.append(("clear_light", light))
+
+    def clear_all_light_intents(self):
+        self._ops.append(("clear_lights",))
+
+    def set_relay_intent(self, relay: str, on: bool, expires: IntentExpiry = "manual"):
+        self._ops.append(("relay", relay, on, expires))
+
+    def set_active_scene(self, scene: Optional[str]):
+        self._ops.append(("scene", scene))
+
+    def clear_active_scene(self):
+        self._ops.append(("scene", None))
 
 
 class WorldStore:
-    """Thread-safe canonical world model. Inputs write; policy reads."""
+    """Thread-safe canonical world model. Inputs write; policy reads.
 
-    def __init__(self, reed_names: List[str], light_names: List[str], relay_names: List[str]):
+    Every input mutation goes through a transaction (the single-step methods
+    below open one each), so readers never see half of a change and the
+    version moves once per transaction that changed something.
+    """
+
+    def __init__(
+        self,
+        reed_names: List[str],
+        light_names: List[str],
+        relay_names: List[str],
+        clock: Clock = REAL_CLOCK,
+    ):
+        self._clock = clock
         self._lock = threading.RLock()
         self._state = WorldState(
             reeds={n: True for n in reed_names},
             observed_lights={n: 0 for n in light_names},
             observed_relays={n: False for n in relay_names},
         )
+        self._light_names = frozenset(light_names)
+        self._relay_names = frozenset(relay_names)
         self._light_to_reed: Dict[str, str] = {}
 
     def set_light_to_reed_map(self, mapping: Dict[str, str]):
@@ -43,31 +136,39 @@ class WorldStore:
             import copy
             return copy.deepcopy(self._state)
 
-    def update_reeds(self, reeds: Dict[str, bool], *, transition_closed: Optional[List[str]] = None):
-        """Update reed raw state. Invalidate intents for reeds that transitioned closed."""
+    @property
+    def version(self) -> int:
         with self._lock:
-            transition_closed = transition_closed or []
-            self._state.reeds = dict(reeds)
-            if transition_closed:
-                self._invalidate_intents_for_reed_close(transition_closed)
+            return self._state.version
 
-    def set_reed_force(self, reed: str, closed: Optional[bool]):
-        with self._lock:
-            if closed is None:
-                self._state.reed_forces.pop(reed, None)
-            else:
-                self._state.reed_forces[reed] = closed
+    def transaction(self) -> WorldTransaction:
+        """`with store.transaction() as tx:` — buffer mutations on tx, publish them together on exit.
 
-    def clear_all_reed_forces(self):
-        with self._lock:
-            self._state.reed_forces.clear()
+        Raises WorldTransactionError (applying nothing) if any mutation is
+        invalid; an exception inside the block discards them all.
+        """
+        return WorldTransaction(self)
 
-    def set_phase(self, phase: str, forced: Optional[str] = None, *, invalidate: bool = False):
-        with self._lock:
-            self._state.phase = phase
-            self._state.phase_forced = forced
-            if invalidate:
-                self._invalidate_intents_for_phase_change()
+    def update_reeds(self, reeds: Dict[str, bool], *, transition_closed: Optional[List[str]] = None) -> ChangeSet:
+        """Update reed raw state. Invalidate intents for reeds that transitioned closed."""
+        with self.transaction() as tx:
+            tx.update_reeds(reeds, transition_closed=transition_closed)
+        return tx.changes
+
+    def set_reed_force(self, reed: str, closed: Optional[bool]) -> ChangeSet:
+        with self.transaction() as tx:
+            tx.set_reed_force(reed, closed)
+        return tx.changes
+
+    def clear_all_reed_forces(self) -> ChangeSet:
+        with self.transaction() as tx:
+            tx.clear_all_reed_forces()
+        return tx.changes
+
+    def set_phase(self, phase: str, forced: Optional[str] = None, *, invalidate: bool = False) -> ChangeSet:
+        with self.transaction() as tx:
+            tx.set_phase(phase, forced, invalidate=invalidate)
+        return tx.changes
 
     def set_light_intent(
         self,
@@ -75,36 +176,48 @@ class WorldStore:
         brightness: int,
         mode: Optional[str] = None,
         expires: IntentExpiry = "until_reed_close",
-    ):
-        with self._lock:
-            self._state.light_intents[light] = LightIntent(
-                brightness=brightness, mode=mode, expires=expires, set_at=time.time()
-            )
+    ) -> ChangeSet:
+        with self.transaction() as tx:
+            tx.set_light_intent(light, brightness, mode, expires)
+        return tx.changes
 
-    def clear_light_intent(self, light: str):
-        with self._lock:
-            self._state.light_intents.pop(light, None)
+    def clear_light_intent(self, light: str) -> ChangeSet:
+        with self.transaction() as tx:
+            tx.clear_light_intent(light)
+        return tx.changes
 
-    def clear_all_light_intents(self):
-        with self._lock:
-            self._state.light_intents.clear()
+    def clear_all_light_intents(self) -> ChangeSet:
+        with self.transaction() as tx:
+            tx.clear_all_light_intents()
+        return tx.changes
 
-    def clear_active_scene(self):
-        with self._lock:
-            self._state.active_scene = None
+    def clear_active_scene(self) -> ChangeSet:
+        with self.transaction() as tx:
+            tx.clear_active_scene()
+        return tx.changes
 
-    def set_relay_intent(self, relay: str, on: bool, expires: IntentExpiry = "manual"):
-        with self._lock:
-            self._state.relay_intents[relay] = RelayIntent(on=on, expires=expires, set_at=time.time())
+    def set_relay_intent(self, relay: str, on: bool, expires: IntentExpiry = "manual") -> ChangeSet:
+        with self.transaction() as tx:
+            tx.set_relay_intent(relay, on, expires)
+        return tx.changes
 
-    def set_active_scene(self, scene: Optional[str]):
-        with self._lock:
-            self._state.active_scene = scene
-            if scene:
-                for light in list(self._state.light_intents.keys()):
-                    intent = self._state.light_intents[light]
-                    if intent.expires == "until_scene_clear":
-                        del self._state.light_intents[light]
+    def apply_intents(
+        self,
+        lights: Dict[str, Tuple[int, Optional[str], IntentExpiry]],
+        relays: Dict[str, Tuple[bool, IntentExpiry]],
+    ) -> int:
+        """Set several light/relay intents as one transaction; returns the new version."""
+        with self.transaction() as tx:
+            for light, (brightness, mode, expires) in lights.items():
+                tx.set_light_intent(light, brightness, mode, expires)
+            for relay, (on, expires) in relays.items():
+                tx.set_relay_intent(relay, on, expires)
+        return tx.changes.version
+
+    def set_active_scene(self, scene: Optional[str]) -> ChangeSet:
+        with self.transaction() as tx:
+            tx.set_active_scene(scene)
+        return tx.changes
 
     def update_observed_lights(self, lights: Dict[str, int], modes: Optional[Dict[str, str]] = None):
         with self._lock:
@@ -120,7 +233,107 @@ class WorldStore:
         with self._lock:
             self._state.observed_screens.update(screens)
 
-    def _invalidate_intents_for_reed_close(self, closed_reeds: List[str]):
+    # ====================== INTERNAL ======================
+
+    def _commit(self, ops: List[tuple]) -> ChangeSet:
+        errors = self._validate(ops)
+        if errors:
+            raise WorldTransactionError(errors)
+        with self._lock:
+            changes = ChangeSet()
+            for op in ops:
+                getattr(self, f"_op_{op[0]}")(changes, *op[1:])
+            if changes:
+                self._state.version += 1
+            changes.version = self._state.version
+            return changes
+
+    def _validate(self, ops: List[tuple]) -> List[str]:
+        errors = []
+        for op in ops:
+            kind = op[0]
+            if kind == "light":
+                _, light, brightness, _, expires = op
+                if light not in self._light_names:
+                    errors.append(f"unknown light {light!r}")
+                if expires not in EXPIRY_TYPES:
+                    errors.append(f"{light}: unknown expiry {expires!r}")
+                try:
+                    int(brightness)
+                except (TypeError, ValueError, OverflowError):
+                    errors.append(f"{light}: invalid brightness {brightness!r}")
+            elif kind == "relay":
+                _, relay, _, expires = op
+                if relay not in self._relay_names:
+                    errors.append(f"unknown relay {relay!r}")
+                if expires not in RELAY_EXPIRY_TYPES:
+                    errors.append(f"{relay}: expiry {expires!r} does not apply to relays")
+        return errors
+
+    def _op_reeds(self, changes: ChangeSet, reeds: Dict[str, bool], transition_closed: List[str]):
+        old = self._state.reeds
+        changes.reeds.update(n for n in old.keys() | reeds.keys() if old.get(n) != reeds.get(n))
+        self._state.reeds = reeds
+        if transition_closed:
+            changes.closed_reeds.extend(transition_closed)
+            self._invalidate_intents_for_reed_close(changes, transition_closed)
+
+    def _op_reed_force(self, changes: ChangeSet, reed: str, closed: Optional[bool]):
+        forces = self._state.reed_forces
+        if forces.get(reed) == closed:
+            return
+        if closed is None:
+            del forces[reed]
+        else:
+            forces[reed] = closed
+        changes.reeds.add(reed)
+
+    def _op_clear_reed_forces(self, changes: ChangeSet):
+        changes.reeds.update(self._state.reed_forces)
+        self._state.reed_forces.clear()
+
+    def _op_phase(self, changes: ChangeSet, phase: str, forced: Optional[str], invalidate: bool):
+        if (phase, forced) != (self._state.phase, self._state.phase_forced):
+            changes.phase = True
+        self._state.phase = phase
+        self._state.phase_forced = forced
+        if invalidate:
+            self._invalidate_intents_for_phase_change(changes)
+
+    def _op_light(self, changes: ChangeSet, light: str, brightness: int, mode: Optional[str],
+                  expires: IntentExpiry):
+        self._state.light_intents[light] = LightIntent(
+            brightness=brightness, mode=mode, expires=expires, set_at=self._clock.time()
+        )
+        changes.lights.add(light)
+
+    def _op_clear_light(self, changes: ChangeSet, light: str):
+        if self._state.light_intents.pop(light, None) is not None:
+            changes.lights.add(light)
+
+    def _op_clear_lights(self, changes: ChangeSet):
+        changes.lights.update(self._state.light_intents)
+        self._state.light_intents.clear()
+
+    def _op_relay(self, changes: ChangeSet, relay: str, on: bool, expires: IntentExpiry):
+        self._state.relay_intents[relay] = RelayIntent(on=on, expires=expires, set_at=self._clock.time())
+        changes.relays.add(relay)
+
+    def _op_scene(self, changes: ChangeSet, scene: Optional[str]):
+        if scene != self._state.active_scene:
+            changes.scene = True
+        self._state.active_scene = scene
+        if scene:
+            for light, intent in list(self._state.light_intents.items()):
+                if intent.expires == "until_scene_clear":
+                    del self._state.light_intents[light]
+                    changes.lights.add(light)
+            for relay, intent in list(self._state.relay_intents.items()):
+                if intent.expires == "until_scene_clear":
+                    del self._state.relay_intents[relay]
+                    changes.relays.add(relay)
+
+    def _invalidate_intents_for_reed_close(self, changes: ChangeSet, closed_reeds: List[str]):
         closed_set = set(closed_reeds)
         for light, intent in list(self._state.light_intents.items()):
             if intent.expires != "until_reed_close":
@@ -128,10 +341,15 @@ class WorldStore:
             reed = self._light_to_reed.get(light)
             if reed and reed in closed_set:
                 del self._state.light_intents[light]
-            elif not reed and intent.expires == "until_reed_close":
-                pass
+                changes.lights.add(light)
 
-    def _invalidate_intents_for_phase_change(self):
+    def _invalidate_intents_for_phase_change(self, changes: ChangeSet):
         for light, intent in list(self._state.light_intents.items()):
             if intent.expires == "until_phase_change":
-                del self._state.light_intents[light]
\ No newline at end of file
+                del self._state.light_intents[light]
+                changes.lights.add(light)
+        for relay, intent in list(self._state.relay_intents.items()):
+            if intent.expires == "until_phase_change":
+                del self._state.relay_intents[relay]
+                changes.relays.add(relay)
+
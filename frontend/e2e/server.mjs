@@ -33,6 +33,14 @@ const API_FIXTURES = {
     wlan: { connected: true, ssid: 'test-wifi' },
   },
   '/api/current-dark-mode': { mode: 'dark' },
+  '/api/weather': {
+    data: {
+      daily: { temperature_2m_max: [24], temperature_2m_min: [11], weathercode: [1] },
+      current_weather: { weathercode: 1, is_day: 1 },
+    },
+    cell: [-37.2, 145.7],
+    fetched_at: 1767225600,
+  },
   '/api/system_info': {
     hostname: 'pccs-test',
     uptime: '1h',
@@ -2,9 +2,10 @@ from __future__ import annotations
 
 import logging
 import threading
-import time
 from typing import Callable, Dict, List, Optional
 
+from engine.clock import REAL_CLOCK, Clock
+
 logger = logging.getLogger("pccs")
 
 
@@ -18,12 +19,14 @@ class ReedInput:
         debounce_ms: int,
         on_update: Callable[[Dict[str, bool], List[str]], None],
         poll_interval_s: float = 0.2,
+        clock: Clock = REAL_CLOCK,
     ):
         self._gpio = gpio_manager
         self._reed_names = reed_names
         self._debounce_ms = debounce_ms
         self._on_update = on_update
         self._poll_interval = poll_interval_s
+        self._clock = clock
         self._running = False
         self._thread: Optional[threading.Thread] = None
         self._last_change: Dict[str, float] = {}
@@ -58,29 +61,33 @@ class ReedInput:
             self._on_update(dict(self._stable), changed)
         return changed
 
+    def poll(self):
+        """Sample every reed once and publish debounced changes."""
+        pending: Dict[str, bool] = {}
+        for name in self._reed_names:
+            button = self._gpio.reeds.get(name)
+            if button is None:
+                continue
+            current = bool(button.is_pressed)
+            self._gpio.reed_states[name] = current
+            if self._stable.get(name) != current:
+                now = self._clock.monotonic()
+                last = self._last_change.get(name)
+                if last is None or (now - last) * 1000 >= self._debounce_ms:
+                    pending[name] = current
+                    self._last_change[name] = now
+        if pending:
+            closed_transitions = [n for n, v in pending.items() if v]
+            for name, val in pending.items():
+                self._stable[name] = val
+                action = "CLOSED" if val else "OPEN"
+                logger.info(f"🚪 Reed {name} → {action}")
+            self._on_update(dict(self._stable), closed_transitions)
+
     def _loop(self):
         while self._running:
             try:
-                pending: Dict[str, bool] = {}
-                for name in self._reed_names:
-                    button = self._gpio.reeds.get(name)
-                    if button is None:
-                        continue
-                    current = bool(button.is_pressed)
-                    self._gpio.reed_states[name] = current
-                    if self._stable.get(name) != current:
-                        now = time.time()
-                        last = self._last_change.get(name, 0)
-                        if (now - last) * 1000 >= self._debounce_ms:
-                            pending[name] = current
-                            self._last_change[name] = now
-                if pending:
-                    closed_transitions = [n for n, v in pending.items() if v]
-                    for name, val in pending.items():
-                        self._stable[name] = val
-                        action = "CLOSED" if val else "OPEN"
-                        logger.info(f"🚪 Reed {name} → {action}")
-                    self._on_update(dict(self._stable), closed_transitions)
+                self.poll()
             except Exception as e:
                 logger.debug(f"ReedInput loop error: {e}")
-            time.sleep(self._poll_interval)
\ No newline at end of file
+            self._clock.sleep(self._poll_interval)
\ No newline at end of file
@@ -0,0 +1,262 @@
+# modules/album_art.py
+"""
+Disk cache behind /sonos-art.
+
+Art is fetched once per upstream URL over a pooled keep-alive session to the
+speakers, then resized to the widths the dashboard actually renders and
+re-encoded as WebP (or JPEG for clients that don't accept WebP). Variants are
+served with strong ETags so repeat loads are a 304. The cache directory is
+bounded by size with least-recently-used eviction, and concurrent requests for
+the same art share a single upstream fetch / encode.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+logger = logging.getLogger("pccs")
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SONOS_PORT = 1400
+MIMETYPES = {'webp': 'image/webp', 'jpg': 'image/jpeg'}
+
+
+class AlbumArtError(Exception):
+    """Upstream art could not be served; `status` is the HTTP code to return."""
+
+    def __init__(self, message: str, status: int = 502):
+        super().__init__(message)
+        self.status = status
+
+
+class AlbumArt:
+    __slots__ = ('body', 'etag', 'mimetype')
+
+    def __init__(self, body: bytes, etag: str, mimetype: str):
+        self.body = body
+        self.etag = etag
+        self.mimetype = mimetype
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class AlbumArtCache:
+    def __init__(self, config):
+        # ====================== CONFIG ======================
+        sizes = config.get('sonos', 'art_sizes', fallback='320, 640')
+        self.sizes = sorted({int(s) for s in str(sizes).split(',') if s.strip()}) or [640]
+        self.quality = config.getint('sonos', 'art_quality', fallback=80)
+        self.max_bytes = config.getint('sonos', 'art_cache_max_mb', fallback=32) * 1024 * 1024
+        self.timeout = config.getfloat('sonos', 'art_timeout', fallback=10.0)
+
+        cache_dir = config.get('sonos', 'art_cache_dir', fallback='cache/album_art')
+        self.cache_dir = cache_dir if os.path.isabs(cache_dir) else os.path.join(_BASE_DIR, cache_dir)
+
+        # Internal
+        self._session = None
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._files = OrderedDict()     # filename -> size, least recently used first
+        self._etags = {}                # filename -> strong ETag of its bytes
+        self._total = 0
+
+        self._scan()
+        logger.info(
+            "🖼️ Album art cache ready (%d file(s), %.1f MB, sizes=%s)",
+            len(self._files), self._total / 1048576, ",".join(map(str, self.sizes)),
+        )
+
+    # ====================== PUBLIC API ======================
+
+    def get(self, url: str, width: int | None = None, webp: bool = True) -> AlbumArt:
+        """Return a resized variant of the art at `url` (fetching it at most once)."""
+        parsed = urlparse(url or '')
+        if parsed.scheme != 'http' or parsed.port != SONOS_PORT:
+            raise AlbumArtError("Invalid", 403)
+
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        size = self.snap_width(width)
+        ext = 'webp' if webp else 'jpg'
+        name = f"{key}_{size}.{ext}"
+
+        cached = self._read(name)
+        if cached is None:
+            cached = self._single_flight(name, lambda: self._render(url, key, size, ext, name))
+        body, etag = cached
+        return AlbumArt(body, etag, MIMETYPES[ext])
+
+    def snap_width(self, width: int | None) -> int:
+        """Smallest configured size that covers `width` (largest if none does)."""
+        if width:
+            for size in self.sizes:
+                if size >= width:
+                    return size
+        return self.sizes[-1]
+
+    def close(self):
+        if self._session is not None:
+            try:
+                self._session.close()
+            except Exception:
+                pass
+
+    # ====================== INTERNAL ======================
+
+    def _render(self, url, key, size, ext, name) -> tuple[bytes, str]:
+        cached = self._read(f"{key}.src")
+        if cached is not None:
+            source = cached[0]
+        else:
+            source = self._single_flight(f"{key}.src", lambda: self._fetch_source(url, key))
+        body = self._encode(source, size, ext)
+        return body, self._write(name, body)
+
+    def _fetch_source(self, url, key) -> bytes:
+        try:
+            resp = self._get_session().get(url, timeout=self.timeout)
+        except Exception as e:
+            raise AlbumArtError(f"Fetch failed: {e}") from e
+        if resp.status_code != 200:
+            raise AlbumArtError("Failed", resp.status_code)
+        self._write(f"{key}.src", resp.content)
+        return resp.content
+
+    def _encode(self, source: bytes, size: int, ext: str) -> bytes:
+        from PIL import Image
+
+        try:
+            with Image.open(io.BytesIO(source)) as img:
+                img = img.convert('RGB')
+                img.thumbnail((size, size), Image.LANCZOS)
+                out = io.BytesIO()
+                if ext == 'webp':
+                    img.save(out, 'WEBP', quality=self.quality, method=4)
+                else:
+                    img.save(out, 'JPEG', quality=self.quality, optimize=True, progressive=True)
+        except Exception as e:
+            raise AlbumArtError(f"Unreadable image: {e}") from e
+        return out.getvalue()
+
+    def _single_flight(self, name, fn):
+        """Run fn once per name; concurrent callers wait for and share the result."""
+        with self._lock:
+            flight = self._flights.get(name)
+            leader = flight is None
+            if leader:
+                flight = self._flights[name] = _Flight()
+
+        if not leader:
+            if not flight.done.wait(self.timeout + 5):
+                raise AlbumArtError("Timed out waiting for upstream", 504)
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except AlbumArtError as e:
+            flight.error = e
+            raise
+        except Exception as e:
+            flight.error = AlbumArtError(str(e))
+            raise flight.error from e
+        finally:
+            with self._lock:
+                self._flights.pop(name, None)
+            flight.done.set()
+
+    def _get_session(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            # One keep-alive connection per speaker is plenty
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=4, max_retries=1)
+            session.mount('http://', adapter)
+            self._session = session
+        return self._session
+
+    # ---------------------- disk + LRU ----------------------
+
+    def _scan(self):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, entry.name, st.st_size))
+        except OSError as e:
+            logger.warning(f"Album art cache dir unavailable ({self.cache_dir}): {e}")
+            return
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+            self._total += size
+
+    def _read(self, name) -> tuple[bytes, str] | None:
+        """(body, ETag) of a cached file, or None if it isn't cached (or vanished)."""
+        with self._lock:
+            if name not in self._files:
+                return None
+            self._files.move_to_end(name)
+        path = os.path.join(self.cache_dir, name)
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+            os.utime(path)  # recency survives restarts
+        except OSError:
+            with self._lock:
+                self._total -= self._files.pop(name, 0)
+            return None
+        with self._lock:
+            etag = self._etags.get(name)
+        if etag is None:
+            etag = hashlib.sha1(body).hexdigest()
+            with self._lock:
+                if name in self._files:         # not evicted meanwhile
+                    self._etags[name] = etag
+        return body, etag
+
+    def _write(self, name, body: bytes) -> str:
+        """Store `body` and return its ETag; a failed write is served but not cached."""
+        etag = hashlib.sha1(body).hexdigest()
+        path = os.path.join(self.cache_dir, name)
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(body)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.debug(f"Album art cache write failed for {name}: {e}")
+            return etag
+        with self._lock:
+            self._total += len(body) - self._files.pop(name, 0)
+            self._files[name] = len(body)
+            self._etags[name] = etag
+            self._evict()
+        return etag
+
+    def _evict(self):
+        # Caller holds self._lock
+        while self._total > self.max_bytes and len(self._files) > 1:
+            name, size = self._files.popitem(last=False)
+            self._total -= size
+            self._etags.pop(name, None)
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
@@ -5,21 +5,15 @@ import time
 import os
 import logging
 
-logger = logging.getLogger("pccs")
-
-
-def brightness_to_pwm(brightness: int) -> int:
-    """Convert 0-100 brightness percent to 0-255 PWM value for Arduino."""
-    return int(max(0, min(100, brightness)) * 2.55)
+from engine.config_compile import compile_config
+from engine.config_ir import frontend_controls
+from modules.brightness import BRIGHTNESS_CURVES, brightness_to_pwm, pwm_to_brightness
 
-
-def pwm_to_brightness(pwm: int) -> int:
-    """Convert 0-255 PWM to nearest 0-100 brightness percent (for state reads)."""
-    return round(max(0, min(255, pwm)) / 2.55)
+logger = logging.getLogger("pccs")
 
 
 class ArduinoManager:
-    def __init__(self, config):
+    def __init__(self, config, compiled=None):
         self.config = config
         self.ser = None
         self.serial_lock = threading.Lock()
@@ -34,110 +28,32 @@ class ArduinoManager:
 
         self._frontend_controls = []   # Unified ordered list for frontend
 
-        self._load_all_controls()
+        # PCCSRuntime passes the config it compiled; standalone users (scripts, tests) compile their own
+        self._load_all_controls(compiled if compiled is not None else compile_config(config))
 
         self.COMMAND_DELAY = config.getfloat('arduino', 'command_delay', 0.08)
         self.RESPONSE_DELAY = config.getfloat('arduino', 'response_delay', 0.04)
+        self._getall_supported = None     # learned on the first read_all_states
+        self.READY_PROBE_AFTER = 1.0      # seconds of silence before probing a board that didn't reset
         self.RGB_RED_SWITCH_RAMP = config.getint('arduino', 'rgb_red_switch_ramp_ms', 180)
         self.RGB_MODE_SWITCH_RAMP = config.getint('arduino', 'rgb_mode_switch_ramp_ms', 250)
 
-    def _load_all_controls(self):
-        """Load PWM, RGB, and Relay controls with custom ordering"""
-        # Safely clear all collections
-        self.LIGHT_MAP.clear()
-        self.RGB_BUG_LIGHTS.clear()
-        
-        if not hasattr(self, 'RGB_LIGHTS'):
-            self.RGB_LIGHTS = set()
-        else:
-            self.RGB_LIGHTS.clear()
-        
-        self.LIGHT_ICONS.clear()
-        self._frontend_controls.clear()
-
-        logger.debug("=== LOADING ALL CONTROLS WITH ORDER ===")
-
-        # ====================== LIGHTS (PWM + RGB) ======================
-        if self.config.has_section('lights'):
-            for name, line in self.config.items('lights'):
-                parts = [p.strip() for p in str(line).split('|')]
-                if len(parts) < 4:
-                    logger.warning(f"Invalid light: {name}")
-                    continue
-
-                friendly = parts[0]
-                light_type = parts[1].lower()
-                icon = parts[-2] if len(parts) > 2 and parts[-2].startswith('fa-') else "fa-lightbulb"
-                try:
-                    order = int(parts[-1])
-                except:
-                    order = 999
-
-                self.LIGHT_ICONS[name] = icon
-
-                if light_type == "pwm":
-                    try:
-                        pin = int(parts[2])
-                        self.LIGHT_MAP[name] = pin
-                        self._frontend_controls.append({
-                            "name": name,
-                            "label": friendly,
-                            "type": "dimmer",
-                            "icon": icon,
-                            "has_mode": False,
-                            "order": order
-                        })
-                        logger.debug(f"✓ PWM: {name} | order {order}")
-                    except:
-                        logger.error(f"Bad PWM pin for {name}")
-
-                elif light_type == "rgb_bug":
-                    try:
-                        if len(parts) < 5:
-                            continue
-                        self.RGB_BUG_LIGHTS[name] = {
-                            "white": int(parts[2]),
-                            "red":   int(parts[3]),
-                            "green": int(parts[4])
-                        }
-                        self.RGB_LIGHTS.add(name)
-                        self._frontend_controls.append({
-                            "name": name,
-                            "label": friendly,
-                            "type": "dimmer",
-                            "icon": icon,
-                            "has_mode": True,
-                            "order": order
-                        })
-                        logger.debug(f"✓ RGB: {name} | order {order}")
-                    except Exception as e:
-                        logger.error(f"RGB parse error {name}: {e}")
-
-        # ====================== RELAYS ======================
-        if self.config.has_section('gpio'):
-            for name, line in self.config.items('gpio'):
-                parts = [p.strip() for p in str(line).split('|')]
-                if len(parts) < 5 or line.strip().startswith('#'):
-                    continue
-
-                friendly = parts[0]
-                icon = parts[4] if len(parts) > 4 and parts[4].startswith('fa-') else "fa-lightbulb"
-                try:
-                    order = int(parts[5])
-                except:
-                    order = 999
-
-                self._frontend_controls.append({
-                    "name": name,
-                    "label": friendly,
-                    "type": "relay",
-                    "icon": icon,
-                    "has_mode": False,
-                    "order": order
-                })
-                logger.debug(f"✓ Relay: {name} | order {order}")
-
-        self._frontend_controls.sort(key=lambda x: x['order'])
+        # 'cie' maps brightness through the same perceptual table the firmware eases ramps with
+        curve = (config.get('arduino', 'brightness_curve', 'linear') or 'linear').strip().lower()
+        if curve not in BRIGHTNESS_CURVES:
+            logger.warning(f"Unknown brightness_curve '{curve}' — using linear")
+            curve = 'linear'
+        self.BRIGHTNESS_CURVE = curve
+
+    def _load_all_controls(self, compiled):
+        """Pins, icons and the frontend control list from the compiled config's light/relay definitions"""
+        self.LIGHT_MAP = dict(compiled.pwm_lights)
+        self.RGB_BUG_LIGHTS = {name: dict(pins) for name, pins in compiled.rgb_lights.items()}
+        self.RGB_LIGHTS = set(compiled.rgb_lights)
+        self.LIGHT_ICONS = {name: light.icon for name, light in compiled.light_defs.items()}
+        self._frontend_controls = frontend_controls(compiled.light_defs, compiled.relay_defs)
+        logger.debug(f"✓ {len(self.LIGHT_MAP)} PWM + {len(self.RGB_BUG_LIGHTS)} RGB light(s), "
+                     f"{len(compiled.relay_defs)} relay(s)")
 
     # ====================== FRONTEND ======================
     def get_frontend_config(self):
@@ -154,9 +70,14 @@ class ArduinoManager:
             if os.path.exists(port):
                 try:
                     self.ser = serial.Serial(port, baud_rate, timeout=self.config.getfloat('arduino', 'timeout'))
-                    time.sleep(init_delay)
+                    started = time.monotonic()
+                    ready = init_delay <= 0 or self._await_ready(init_delay)     # 0: don't wait (simulator)
                     self.ser.reset_input_buffer()
-                    logger.info(f"📟 Arduino initialized on {port}")
+                    waited = time.monotonic() - started
+                    if ready:
+                        logger.info(f"📟 Arduino initialized on {port} (ready after {waited:.2f}s)")
+                    else:
+                        logger.warning(f"📟 Arduino on {port} never said READY — carrying on after {waited:.1f}s")
                     return True
                 except Exception as e:
                     logger.error(f"❌ Failed to open {port}: {e}")
@@ -164,6 +85,26 @@ class ArduinoManager:
         logger.warning("⚠️ No Arduino hardware found")
         return False
 
+    def _await_ready(self, timeout: float) -> bool:
+        """Wait (up to `timeout`, the old fixed init_delay) for the sketch to be listening.
+
+        Opening the port resets the board; setup() ends by printing READY. A
+        board that didn't reset never prints it, so after a quiet spell it is
+        probed with GETVCC and any VCC reply counts as ready.
+        """
+        now = time.monotonic()
+        deadline = now + timeout
+        probe_at = now + self.READY_PROBE_AFTER
+        while time.monotonic() < deadline:
+            line = self.ser.readline().decode('utf-8', errors='ignore').strip()     # bounded by the port timeout
+            if 'READY' in line or line.startswith('VCC'):
+                return True
+            if time.monotonic() >= probe_at:
+                self.ser.write(b'GETVCC\n')
+                self.ser.flush()
+                probe_at = time.monotonic() + self.READY_PROBE_AFTER
+        return False
+
     def send_command(self, cmd: str, expect: str = None) -> str | None:
         """Send cmd, optionally wait for a response line starting with `expect`."""
         if not self.ser or not self.ser.is_open:
@@ -233,41 +174,67 @@ class ArduinoManager:
         if not self.ser or not self.ser.is_open:
             return
 
+        # One GETALL round trip instead of a GET (and a command delay) per pin
+        values = self._read_all_pwm()
+        if values is None:
+            values = {}
+            pins = list(self.LIGHT_MAP.values())
+            for rgb in self.RGB_BUG_LIGHTS.values():
+                pins += [rgb['red'], rgb['white']]
+            for pin in pins:
+                resp = self.send_command(f"GET {pin}", expect="VALUE")
+                if resp and resp.startswith("VALUE"):
+                    try:
+                        values[pin] = int(resp.split()[2])
+                    except (IndexError, ValueError):
+                        pass
+
         for name, pin in self.LIGHT_MAP.items():
             if self.should_ignore_for_optimistic(name):
                 continue
-            resp = self.send_command(f"GET {pin}", expect="VALUE")
-            if resp and resp.startswith("VALUE"):
-                try:
-                    pwm = int(resp.split()[2])
-                    self.state[name] = pwm_to_brightness(pwm)
-                except:
-                    pass
+            if pin in values:
+                self.state[name] = pwm_to_brightness(values[pin], self.BRIGHTNESS_CURVE)
 
         for name, pins in self.RGB_BUG_LIGHTS.items():
             if self.should_ignore_for_optimistic(name):
                 continue
+            red_pwm = values.get(pins['red'], 0)
+            white_pwm = values.get(pins['white'], 0)
+
+            if red_pwm > white_pwm:
+                self.state[name] = pwm_to_brightness(red_pwm, self.BRIGHTNESS_CURVE)
+                self.state[f"{name}_mode"] = "red"
+            else:
+                self.state[name] = pwm_to_brightness(white_pwm, self.BRIGHTNESS_CURVE)
+                self.state[f"{name}_mode"] = "white"
+
+    def _read_all_pwm(self) -> dict | None:
+        """{pin: pwm} from GETALL, or None when the firmware doesn't answer it (older sketches)."""
+        if self._getall_supported is False:
+            return None
+        resp = self.send_command("GETALL", expect="VALUES")
+        if not resp or not resp.startswith("VALUES"):
+            if self._getall_supported is None:
+                logger.info("📟 Arduino did not answer GETALL — reading pins one by one")
+                self._getall_supported = False
+            return None
+        self._getall_supported = True
+        values = {}
+        for field in resp.split()[1:]:
+            pin, _, pwm = field.partition(':')
             try:
-                red_resp = self.send_command(f"GET {pins['red']}", expect="VALUE")
-                white_resp = self.send_command(f"GET {pins['white']}", expect="VALUE")
-                red_pwm = int(red_resp.split()[2]) if red_resp and red_resp.startswith("VALUE") else 0
-                white_pwm = int(white_resp.split()[2]) if white_resp and white_resp.startswith("VALUE") else 0
-
-                if red_pwm > white_pwm:
-                    self.state[name] = pwm_to_brightness(red_pwm)
-                    self.state[f"{name}_mode"] = "red"
-                else:
-                    self.state[name] = pwm_to_brightness(white_pwm)
-                    self.state[f"{name}_mode"] = "white"
-            except:
-                pass
-
-    def set_rgb_bug_light(self, name: str, brightness: int, mode: str = 'white', ramp_ms: int | None = None) -> bool:
+                values[int(pin)] = int(pwm)
+            except ValueError:
+                continue
+        return values
+
+    def set_rgb_bug_light(self, name: str, brightness: int, mode: str = 'white', ramp_ms: int | None = None,
+                          tracking: bool = False) -> bool:
         config = self.RGB_BUG_LIGHTS.get(name)
         if not config:
             return False
 
-        pwm = brightness_to_pwm(brightness)
+        pwm = brightness_to_pwm(brightness, self.BRIGHTNESS_CURVE)
         if ramp_ms is not None:
             red_ramp = ramp_ms
             mode_ramp = ramp_ms
@@ -285,18 +252,30 @@ class ArduinoManager:
         if mode == 'red':
             # Send "in" channels first so the bug color starts appearing while white is still up,
             # then kill the white. With same duration this gives crossfade.
-            self.send_command(f"RAMP {config['red']} {pwm} {xfade_ramp}")
-            self.send_command(f"RAMP {config['green']} {int(pwm * 0.05)} {xfade_ramp}")
-            self.send_command(f"RAMP {config['white']} 0 {xfade_ramp}")
+            self.ramp(config['red'], pwm, xfade_ramp, tracking)
+            self.ramp(config['green'], int(pwm * 0.05), xfade_ramp, tracking)
+            self.ramp(config['white'], 0, xfade_ramp, tracking)
         else:
             # Kill the bug color first, then bring white up. Same duration → clean crossfade.
-            self.send_command(f"RAMP {config['red']} 0 {xfade_ramp}")
-            self.send_command(f"RAMP {config['green']} 0 {xfade_ramp}")
-            self.send_command(f"RAMP {config['white']} {pwm} {xfade_ramp}")
+            self.ramp(config['red'], 0, xfade_ramp, tracking)
+            self.ramp(config['green'], 0, xfade_ramp, tracking)
+            self.ramp(config['white'], pwm, xfade_ramp, tracking)
 
         self.OPTIMISTIC_LOCK[name] = time.time() + self.OPTIMISTIC_LOCK_DURATION
         return True
 
+    def ramp(self, pin: int, pwm: int, ramp_ms: int, tracking: bool = False):
+        """RAMP a pin to a PWM value; CIE ramps ask the firmware to ease perceptually.
+
+        With `tracking` (slider drags) ramp_ms is the time for a full sweep, so
+        a retarget mid-ramp keeps moving at the same rate rather than starting
+        a fresh ramp_ms ramp.
+        """
+        flags = " C" if self.BRIGHTNESS_CURVE == 'cie' else ""
+        if tracking:
+            flags += " T"
+        self.send_command(f"RAMP {pin} {pwm} {ramp_ms}{flags}")
+
     def cleanup(self):
         if self.ser and self.ser.is_open:
             try:
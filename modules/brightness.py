@@ -0,0 +1,79 @@
+# modules/brightness.py
+"""
+Brightness percent <-> Arduino PWM mapping (no serial import, so it is testable
+on its own).
+
+'linear' is the original 0-100 -> 0-255 scaling. 'cie' maps brightness through
+the CIE 1931 lightness curve, the same table (CIE_PWM) the firmware uses to
+ease "RAMP pin pwm ms C" ramps, so what the Pi commands, what the firmware
+ramps through and what GET reads back all agree.
+"""
+
+BRIGHTNESS_CURVES = ('linear', 'cie')
+
+
+def _cie_pwm(level: int) -> int:
+    """Perceptual level 0-255 (CIE 1931 lightness L*) to 0-255 PWM duty."""
+    lightness = level * 100 / 255
+    if lightness <= 8:
+        luminance = lightness / 903.3
+    else:
+        luminance = ((lightness + 16) / 116) ** 3
+    return round(luminance * 255)
+
+
+# Must match CIE_PWM[] in arduino/arduino.ino, which eases "RAMP ... C" through it
+CIE_PWM = tuple(_cie_pwm(level) for level in range(256))
+
+
+def _cie_pwm_by_percent() -> tuple:
+    """Brightness percent -> PWM on the CIE curve, lifted to be strictly increasing.
+
+    The bottom of the curve is flat (0-7% would give 0,0,1,1,1,1,2,2), so a
+    low nonzero percent could switch a light off and two percents could share
+    a duty, which no read-back can undo. Each step gets at least one PWM more
+    than the last; the curve only climbs faster than that above ~52%, so below
+    it this is one PWM per percent (still far dimmer than linear's 2.55).
+    """
+    table = [0]
+    for pct in range(1, 101):
+        table.append(max(CIE_PWM[round(pct * 2.55)], table[-1] + 1))
+    return tuple(table)
+
+
+_CIE_PWM_BY_PERCENT = _cie_pwm_by_percent()
+
+
+def _cie_brightness_table() -> tuple:
+    """PWM -> brightness percent: exact for every PWM brightness_to_pwm() produces, else nearest."""
+    exact = {pwm: pct for pct, pwm in enumerate(_CIE_PWM_BY_PERCENT)}
+    return tuple(
+        exact[pwm] if pwm in exact
+        else min(range(1, 101), key=lambda pct: abs(_CIE_PWM_BY_PERCENT[pct] - pwm))
+        for pwm in range(256)
+    )
+
+
+_CIE_BRIGHTNESS = _cie_brightness_table()
+
+
+def brightness_to_pwm(brightness: int, curve: str = 'linear') -> int:
+    """Convert 0-100 brightness percent to 0-255 PWM value for Arduino (0 only for 0%)."""
+    brightness = max(0, min(100, int(brightness)))
+    if curve == 'cie':
+        return _CIE_PWM_BY_PERCENT[brightness]
+    return int(brightness * 2.55)
+
+
+def pwm_to_brightness(pwm: int, curve: str = 'linear') -> int:
+    """Convert 0-255 PWM to 0-100 brightness percent (for state reads).
+
+    Exact inverse of brightness_to_pwm() for the duties it produces; other
+    duties read as the nearest percent, and only PWM 0 reads as 0%.
+    """
+    pwm = max(0, min(255, int(pwm)))
+    if curve == 'cie':
+        return _CIE_BRIGHTNESS[pwm]
+    if pwm == 0:
+        return 0
+    return max(1, round(pwm / 2.55))        # any duty at all reads as on
@@ -7,13 +7,13 @@ logger = logging.getLogger("pccs.config")
 
 
 class PccsConfig:
-    def __init__(self):
+    def __init__(self, path=None):
         self._config = configparser.ConfigParser()
         self._config.optionxform = str
 
-        # Path to pccs.conf
+        # Path to pccs.conf (the repo's config/pccs.conf unless given)
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.path = os.path.join(base_dir, 'config', 'pccs.conf')
+        self.path = path or os.path.join(base_dir, 'config', 'pccs.conf')
 
         if os.path.exists(self.path):
             self._config.read(self.path, encoding='utf-8')
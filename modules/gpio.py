@@ -1,14 +1,17 @@
 # modules/gpio.py
 from gpiozero import OutputDevice, Button, Device
-from gpiozero.pins.lgpio import LGPIOFactory
 import logging
 
+from engine.config_compile import compile_config
+
 logger = logging.getLogger("pccs")
 
 
 class GPIODeviceManager:
-    def __init__(self, config):
+    def __init__(self, config, compiled=None):
         self.config = config
+        # Relay/reed definitions; PCCSRuntime passes the config it compiled
+        self.compiled = compiled if compiled is not None else compile_config(config)
         self.devices = {}
         self.reeds = {}
         self.relays = {}
@@ -21,6 +24,8 @@ class GPIODeviceManager:
     def _setup_pin_factory(self):
         try:
             if Device.pin_factory is None:
+                # Imported here: the simulator installs a mock factory and has no lgpio
+                from gpiozero.pins.lgpio import LGPIOFactory
                 Device.pin_factory = LGPIOFactory()
                 logger.debug("🏭 LGPIOFactory initialized")
         except Exception as e:
@@ -30,97 +35,48 @@ class GPIODeviceManager:
         logger.debug("🔧 Initializing GPIO relays and reeds...")
 
         # ====================== RELAYS (from [gpio]) ======================
-        if self.config.has_section('gpio'):
-            gpio_section = self.config.get_section('gpio')
-            for name, line in gpio_section.items():
-                if name.endswith(('_pin', '_pull_up', '_bounce_time')):
-                    continue  # skip old reed config lines
-
-                parts = [p.strip() for p in str(line).split('|')]
-                if len(parts) < 2:
-                    continue
-
-                friendly = parts[0]
-                try:
-                    pin = int(parts[1])
-                except ValueError:
-                    continue
-
-                active_high = len(parts) > 2 and parts[2].lower() == 'true'
-                initial = len(parts) > 3 and parts[3].lower() == 'true'
-                icon = parts[4] if len(parts) > 4 and parts[4].startswith('fa-') else "fa-lightbulb"
-
-                try:
-                    dev = OutputDevice(pin, active_high=active_high, initial_value=initial)
-                    self.devices[name] = dev
-                    self.relays[name] = dev
-                    self.relay_initial_states[name] = initial
-
-                    logger.debug(f"📟 Relay: {name} → {friendly} (GPIO {pin}, initial={'ON' if initial else 'OFF'})")
-                except Exception as e:
-                    logger.error(f"Failed to create relay {name}: {e}")
+        for name, relay in self.compiled.relay_defs.items():
+            try:
+                dev = OutputDevice(relay.pin, active_high=relay.active_high, initial_value=relay.initial)
+                self.devices[name] = dev
+                self.relays[name] = dev
+                self.relay_initial_states[name] = relay.initial
+
+                logger.debug(f"📟 Relay: {name} → {relay.friendly} "
+                             f"(GPIO {relay.pin}, initial={'ON' if relay.initial else 'OFF'})")
+            except Exception as e:
+                logger.error(f"Failed to create relay {name}: {e}")
 
         # ====================== REEDS (from new [reeds] section) ======================
-        if self.config.has_section('reeds'):
-            reed_section = self.config.get_section('reeds')
-            for name, line in reed_section.items():
-                parts = [p.strip() for p in str(line).split('|')]
-                if len(parts) < 2:
-                    continue
-
-                friendly = parts[0]
-                try:
-                    pin = int(parts[1])
-                except ValueError:
-                    continue
-
-                pull_up = len(parts) > 2 and parts[2].lower() != 'false'
-                # Default bounce_time reduced from 0.5s (was too long; could make a reed appear "stuck"
+        probed = {}
+        for name, reed in self.compiled.reed_defs.items():
+            pin = reed.pin
+            controls = list(reed.controls)
+
+            # Always populate the logical reed (state + light map) from config.
+            # Default to closed (safe for lights off + interlocks). This ensures
+            # reed-driven lights, force_reed, and phase sync work even if the
+            # hardware Button() fails (common with lgpio "GPIO busy" after unclean
+            # kills / multiple instances). Physical events only work for successful
+            # hardware reeds.
+            self.reed_to_light_map[name] = controls
+            self.reed_states[name] = True  # conservative default
+
+            try:
+                # Default bounce_time is 0.05s (0.5s was too long; could make a reed appear "stuck"
                 # after seeing a release edge, even if the line later goes active again). The per-reed
                 # software debounce (reed_debounce_ms=50) still coalesces logs/rapid reactions.
-                bounce = float(parts[3]) if len(parts) > 3 else 0.05
-
-                # ==================== CONTROLS FIELD PARSING ====================
-                controls = [name]
-                if len(parts) > 6:
-                    last_field = parts[6].strip()
-                    if last_field.startswith("controls:"):
-                        light_list = last_field[9:].strip()
-                        if light_list:
-                            controls = [x.strip() for x in light_list.split(',') if x.strip()]
-                    elif last_field:
-                        controls = [last_field]
-
-                # Always populate the logical reed (state + light map) from config.
-                # Default to closed (safe for lights off + interlocks). This ensures
-                # reed-driven lights, force_reed, and phase sync work even if the
-                # hardware Button() fails (common with lgpio "GPIO busy" after unclean
-                # kills / multiple instances). Physical events only work for successful
-                # hardware reeds.
-                self.reed_to_light_map[name] = controls
-                self.reed_states[name] = True  # conservative default
-
-                try:
-                    button = Button(pin, pull_up=pull_up, bounce_time=bounce)
-                    self.devices[name] = button
-                    self.reeds[name] = button
-                    self.reed_states[name] = button.is_pressed  # real hardware state at creation
-                    logger.debug(f"🚪 Reed: {name} → {friendly} controls {controls} (GPIO {pin})")
-
-                    # Diagnostics: log the kernel's view of the pin (via pinctrl) alongside gpiozero's reading.
-                    # Useful to confirm the electrical level on the pin matches the logical state.
-                    try:
-                        import subprocess
-                        pinfo = subprocess.check_output(
-                            ['pinctrl', 'get', str(pin)],
-                            text=True, stderr=subprocess.DEVNULL, timeout=0.8
-                        ).strip().splitlines()[0]
-                        logger.info(f"🚪 Reed {name} (GPIO{pin}) pinctrl: {pinfo} | is_pressed={button.is_pressed}")
-                    except Exception:
-                        logger.info(f"🚪 Reed {name} (GPIO{pin}) is_pressed={button.is_pressed} (pinctrl not available for diagnostics)")
-                except Exception as e:
-                    logger.error(f"Failed to create reed {name}: {e} "
-                                 "(using default closed; physical events disabled until GPIO freed)")
+                button = Button(pin, pull_up=reed.pull_up, bounce_time=reed.bounce_s)
+                self.devices[name] = button
+                self.reeds[name] = button
+                self.reed_states[name] = button.is_pressed  # real hardware state at creation
+                logger.debug(f"🚪 Reed: {name} → {reed.friendly} controls {controls} (GPIO {pin})")
+                probed[name] = pin
+            except Exception as e:
+                logger.error(f"Failed to create reed {name}: {e} "
+                             "(using default closed; physical events disabled until GPIO freed)")
+
+        self._log_pinctrl(probed)
 
         configured_reeds = len(self.reed_states)
         hardware_reeds = len(self.reeds)
@@ -131,6 +87,35 @@ class GPIODeviceManager:
                            "They will default to closed (lights off) and support force/UI control, "
                            "but physical open/close events won't work until the GPIO chip is free.")
 
+    def _log_pinctrl(self, reed_pins: dict) -> None:
+        """Diagnostics: log the kernel's view of each reed pin (via pinctrl) alongside gpiozero's reading.
+
+        Useful to confirm the electrical level on the pin matches the logical state.
+        One pinctrl call covers every pin — a subprocess per reed was a
+        noticeable slice of boot.
+        """
+        if not reed_pins:
+            return
+        lines = {}
+        try:
+            import subprocess
+            out = subprocess.check_output(
+                ['pinctrl', 'get', ','.join(str(p) for p in reed_pins.values())],
+                text=True, stderr=subprocess.DEVNULL, timeout=0.8
+            )
+            for line in out.splitlines():
+                head, _, _ = line.partition(':')
+                if head.strip().isdigit():
+                    lines[int(head)] = line.strip()
+        except Exception:
+            pass
+        for name, pin in reed_pins.items():
+            pressed = self.reeds[name].is_pressed
+            if pin in lines:
+                logger.info(f"🚪 Reed {name} (GPIO{pin}) pinctrl: {lines[pin]} | is_pressed={pressed}")
+            else:
+                logger.info(f"🚪 Reed {name} (GPIO{pin}) is_pressed={pressed} (pinctrl not available for diagnostics)")
+
     def get_device(self, name: str):
         return self.devices.get(name)
 
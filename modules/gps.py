@@ -10,13 +10,13 @@ import math
 import logging
 from datetime import date
 import zoneinfo
-from typing import Tuple, Optional
+from typing import TYPE_CHECKING, Tuple, Optional
 
-import pynmea2
-from geopy.geocoders import Nominatim
-from astral import LocationInfo
-from astral.sun import sun
-from flask_socketio import SocketIO
+# pynmea2, geopy and astral are imported where they're used: geopy alone costs
+# more at boot than the rest of this module, and the reader/geocoder start late
+if TYPE_CHECKING:
+    from flask_socketio import SocketIO
+    from geopy.geocoders import Nominatim
 
 logger = logging.getLogger("pccs")
 
@@ -44,11 +44,11 @@ def _send_gps_toast(message: str, title: str = "GPS", toast_type: str = "info",
 class GPSModule:
     """Manages GPS hardware interface, position tracking, time, location naming, and solar data."""
 
-    def __init__(self, config, socketio: SocketIO):
+    def __init__(self, config, socketio: "SocketIO"):
         self.config = config
         self.socketio = socketio
         self.serial: Optional[serial.Serial] = None
-        self.geolocator: Optional[Nominatim] = None
+        self.geolocator: Optional["Nominatim"] = None
         self._serial_lock = threading.Lock()
 
         self.fallback_timezone = self.config.get(
@@ -159,6 +159,7 @@ class GPSModule:
         if self.geolocator is not None:
             return True
         try:
+            from geopy.geocoders import Nominatim
             self.geolocator = Nominatim(user_agent="pccs-rv-control-system", timeout=12)
             logger.info("🌍 Nominatim geolocator initialised")
             return True
@@ -172,6 +173,7 @@ class GPSModule:
         threading.Thread(target=self._sun_refresh_loop, daemon=True, name="SunRefresh").start()
 
     def _reader_loop(self) -> None:
+        import pynmea2
         while True:
             if not self.serial or not getattr(self.serial, 'is_open', False):
                 time.sleep(0.5)
@@ -296,6 +298,8 @@ class GPSModule:
         if not lat or not lon:
             return False
         try:
+            from astral import LocationInfo
+            from astral.sun import sun
             location = LocationInfo(latitude=lat, longitude=lon)
             s = sun(location.observer, date=date.today())
             local_tz = zoneinfo.ZoneInfo(self.state["timezone"])
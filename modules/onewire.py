@@ -0,0 +1,161 @@
+# modules/onewire.py
+"""
+DS18B20 temperature probes on the kernel 1-Wire bus (w1-gpio + w1-therm).
+
+Instead of reading each probe's `w1_slave` (one ~750 ms conversion per probe,
+back to back), every bus master is asked for one simultaneous conversion via
+`therm_bulk_read`, and the per-device `temperature` files are then read in
+parallel. Device paths are resolved once and cached.
+
+`root` can point at any directory laid out like /sys/bus/w1/devices, which is
+how the tests drive it.
+"""
+
+import glob
+import logging
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("pccs")
+
+W1_ROOT = '/sys/bus/w1/devices'
+DS18B20_FAMILY = '28-'
+POWER_ON_RESET_C = 85.0
+
+
+class OneWireBus:
+    def __init__(self, root: str = W1_ROOT, conversion_timeout: float = 1.0, rescan_interval: float = 60.0):
+        self.root = root
+        self.conversion_timeout = conversion_timeout
+        self.rescan_interval = rescan_interval
+
+        self._modules_loaded = root != W1_ROOT   # only modprobe for the real sysfs
+        self._paths = {}            # sensor id (None = first probe) -> device dir
+        self._last_scan = {}        # sensor id -> when its path was last looked up
+        self._pool = None
+
+    # ====================== PUBLIC API ======================
+
+    def read_temperatures(self, sensor_ids) -> dict:
+        """One bulk conversion, then parallel reads. Returns {sensor_id: °C or None}."""
+        self._ensure_modules()
+        devices = {sid: self._resolve(sid) for sid in sensor_ids}
+        present = {sid: path for sid, path in devices.items() if path}
+        results = {sid: None for sid in sensor_ids}
+        if not present:
+            return results
+
+        if not self._bulk_convert():
+            logger.debug("   🌡️ therm_bulk_read unavailable — probes convert individually (in parallel)")
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="w1")
+        futures = {sid: self._pool.submit(self._read_device, path) for sid, path in present.items()}
+        for sid, future in futures.items():
+            try:
+                results[sid] = future.result(timeout=self.conversion_timeout + 2)
+            except Exception as e:
+                logger.debug("   🌡️ 1-Wire read failed [%s]: %s", sid or 'auto', e)
+                self._paths.pop(sid, None)  # re-resolve next time (probe unplugged?)
+        return results
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    # ====================== INTERNAL ======================
+
+    def _ensure_modules(self):
+        if self._modules_loaded:
+            return
+        self._modules_loaded = True
+        for module in ('w1-gpio', 'w1-therm'):
+            try:
+                subprocess.run(['modprobe', module], check=False, timeout=5,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            except Exception as e:
+                logger.debug("modprobe %s failed: %s", module, e)
+
+    def _resolve(self, sensor_id):
+        path = self._paths.get(sensor_id)
+        if path and os.path.isdir(path):
+            return path
+
+        now = time.time()
+        if sensor_id in self._paths and now - self._last_scan.get(sensor_id, 0.0) < self.rescan_interval:
+            return None  # known missing — don't hit sysfs every cycle
+        self._last_scan[sensor_id] = now
+
+        if sensor_id:
+            path = os.path.join(self.root, sensor_id)
+            if not os.path.isdir(path):
+                logger.warning("   🌡️ Configured 1-Wire sensor not present: %s", sensor_id)
+                path = None
+        else:
+            found = sorted(glob.glob(os.path.join(self.root, DS18B20_FAMILY + '*')))
+            path = found[0] if found else None
+            if not path:
+                logger.warning("No 1-Wire DS18B20 sensor found")
+        self._paths[sensor_id] = path
+        return path
+
+    def _bulk_convert(self) -> bool:
+        """Start one conversion on every probe; True once all masters report done."""
+        masters = glob.glob(os.path.join(self.root, 'w1_bus_master*', 'therm_bulk_read'))
+        if not masters:
+            return False
+        try:
+            for path in masters:
+                with open(path, 'w') as f:
+                    f.write('trigger\n')
+        except OSError as e:
+            logger.debug("therm_bulk_read trigger failed: %s", e)
+            return False
+
+        # -1 = conversion in progress; anything else means the values are ready
+        deadline = time.time() + self.conversion_timeout
+        pending = list(masters)
+        while pending and time.time() < deadline:
+            pending = [p for p in pending if self._read_text(p) == '-1']
+            if pending:
+                time.sleep(0.05)
+        return not pending
+
+    def _read_device(self, path: str):
+        temp_file = os.path.join(path, 'temperature')
+        if os.path.exists(temp_file):
+            # After a bulk conversion this is just a scratchpad read (no new conversion)
+            text = self._read_text(temp_file)
+            if text is None or not text.lstrip('-').isdigit():
+                return None
+            return self._validate(int(text) / 1000.0, path)
+
+        # Older kernels: w1_slave only ("... YES\n... t=21375")
+        text = self._read_text(os.path.join(path, 'w1_slave')) or ''
+        lines = text.splitlines()
+        if len(lines) < 2 or 'YES' not in lines[0] or 't=' not in lines[1]:
+            logger.warning("   🌡️ CRC check failed [%s]", os.path.basename(path))
+            return None
+        return self._validate(float(lines[1].split('t=', 1)[1]) / 1000.0, path)
+
+    @staticmethod
+    def _validate(temp_c: float, path: str):
+        name = os.path.basename(path)
+        if temp_c == POWER_ON_RESET_C:
+            logger.info("   🌡️ Sensor returned power-on reset value (85°C) — invalid [%s]", name)
+            return None
+        if abs(temp_c) < 0.1:
+            logger.warning("   🌡️ Sensor returned near-zero — possibly bad read [%s]", name)
+            return None
+        logger.debug("   🌡️ Temperature = %.1f°C [%s]", temp_c, name)
+        return round(temp_c, 1)
+
+    @staticmethod
+    def _read_text(path):
+        try:
+            with open(path, 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return None
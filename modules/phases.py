@@ -7,6 +7,8 @@ import zoneinfo
 from typing import Callable
 from suntime import Sun
 
+from engine.clock import REAL_CLOCK
+
 logger = logging.getLogger("pccs")
 
 
@@ -28,8 +30,9 @@ def _send_phase_toast(message: str, toast_type: str = "info"):
 class PhaseManager:
     """Manages Day/Evening/Night phases based on GPS sun times or fallback."""
 
-    def __init__(self, config, gps_module, socketio, dark_mode_config=None):
+    def __init__(self, config, gps_module, socketio, dark_mode_config=None, clock=REAL_CLOCK):
         self.config = config
+        self.clock = clock
         self.gps = gps_module
         self.socketio = socketio
         self.on_phase_change = None  # optional callback(phase, forced_phase, invalidate)
@@ -44,6 +47,7 @@ class PhaseManager:
         self.force_timer = None
         self._last_broadcast_phase = None
         self._cached_phase_times = {}
+        self._cached_phase_date = None      # ISO date the cache was calculated for
 
         self.running = False
         self.thread = None
@@ -62,7 +66,7 @@ class PhaseManager:
         self.current_dark_mode = 'dark'
         self.manual_dark_mode = None        # User manually set override
 
-        self.startup_time = time.time()
+        self.startup_time = clock.monotonic()
 
         # Night phase listeners (used by VictronManager for daily solar reset, etc.)
         self._night_listeners: list[Callable[[], None]] = []
@@ -77,7 +81,7 @@ class PhaseManager:
         )
 
         self._using_fallback = False
-        self._last_good_gps_time = time.time()
+        self._last_good_gps_time = clock.monotonic()
 
         self.load_manual_dark_mode()
 
@@ -86,7 +90,8 @@ class PhaseManager:
 
     def bootstrap_initial_phase(self, use_fallback: bool = False) -> str:
         """Calculate phase at startup without reconcile callbacks (world sync is separate)."""
-        self._calculate_and_cache_times()
+        if self._cached_phase_date != self.clock.now(self.fallback_tz).date().isoformat():
+            self._calculate_and_cache_times()
         if self.forced_phase is not None:
             new_phase = self.forced_phase
         else:
@@ -126,26 +131,27 @@ class PhaseManager:
     def _phase_loop(self):
         while self.running:
             try:
-                has_real_fix = self._has_valid_gps()
-
-                if has_real_fix:
-                    self._last_good_gps_time = time.time()
-                    if self._using_fallback:
-                        logger.info("🌍 GPS fix restored - returning to live sun data")
-                        self._using_fallback = False
-                    self._update_phase(use_fallback=False)
-                else:
-                    now = time.time()
-                    if now - self.startup_time > self.GPS_STARTUP_TIMEOUT:
-                        if not self._using_fallback:
-                            logger.warning(f"🌗 No GPS fix for {int(now - self.startup_time)}s → using fallback")
-                            self._using_fallback = True
-                        self._update_phase(use_fallback=True)
-
-                time.sleep(5)
+                self.tick()
+                self.clock.sleep(5)
             except Exception as e:
                 logger.error(f"🌗 Phase loop error: {e}", exc_info=True)
-                time.sleep(10)
+                self.clock.sleep(10)
+
+    def tick(self):
+        """One pass of the phase loop: pick live or fallback sun data and update the phase."""
+        if self._has_valid_gps():
+            self._last_good_gps_time = self.clock.monotonic()
+            if self._using_fallback:
+                logger.info("🌍 GPS fix restored - returning to live sun data")
+                self._using_fallback = False
+            self._update_phase(use_fallback=False)
+        else:
+            now = self.clock.monotonic()
+            if now - self.startup_time > self.GPS_STARTUP_TIMEOUT:
+                if not self._using_fallback:
+                    logger.warning(f"🌗 No GPS fix for {int(now - self.startup_time)}s → using fallback")
+                    self._using_fallback = True
+                self._update_phase(use_fallback=True)
 
     # ====================== CORE LOGIC ======================
     def _update_phase(self, use_fallback: bool = False):
@@ -200,12 +206,12 @@ class PhaseManager:
 
     def _get_sun_times(self, use_fallback: bool):
         tz = self.fallback_tz
-        now = datetime.datetime.now(tz)
+        now = self.clock.now(tz)
 
         if not use_fallback and self._has_valid_gps():
             state = self.gps.get_state()
             tz = zoneinfo.ZoneInfo(state.get("timezone", "Australia/Melbourne"))
-            now = datetime.datetime.now(tz)
+            now = self.clock.now(tz)
 
             sunrise = self._parse_sun_time(state.get("sunrise"), tz, now)
             sunset = self._parse_sun_time(state.get("sunset"), tz, now)
@@ -341,7 +347,7 @@ class PhaseManager:
         raise ValueError(f"Could not parse sun time: {time_str}")
 
     def _calculate_and_cache_times(self):
-        start_time = time.time()
+        start_time = time.perf_counter()
         logger.debug("🌗 [CACHE] Starting phase times calculation")
 
         try:
@@ -352,6 +358,7 @@ class PhaseManager:
             night_start_today = now.replace(hour=self.night_start_hour, minute=0, second=0, microsecond=0)
             effective_night_start = max(evening_start, night_start_today)
 
+            self._cached_phase_date = now.date().isoformat()
             self._cached_phase_times = {
                 "day_start": day_start.strftime("%I:%M %p"),
                 "evening_start": evening_start.strftime("%I:%M %p"),
@@ -363,7 +370,7 @@ class PhaseManager:
                 "night_fixed_hour": self.night_start_hour,
             }
 
-            duration = (time.time() - start_time) * 1000
+            duration = (time.perf_counter() - start_time) * 1000
             logger.debug(f"🌗 [CACHE] SUCCESS in {duration:.1f}ms")
 
         except Exception as e:
@@ -432,6 +439,16 @@ class PhaseManager:
         if callback in self._night_listeners:
             self._night_listeners.remove(callback)
 
+    def restore_phase_times(self, times: dict, date: str):
+        """Seed the phase-time cache from a warm start (used while `date` is still today)."""
+        if times and len(times) >= 3:
+            self._cached_phase_times = dict(times)
+            self._cached_phase_date = date
+
+    def get_phase_times_state(self) -> dict:
+        """Phase-time cache for the warm-start file."""
+        return {"times": self._cached_phase_times.copy(), "date": self._cached_phase_date}
+
     def get_phase_times(self) -> dict:
         if not self._cached_phase_times or len(self._cached_phase_times) < 3:
             self._calculate_and_cache_times()
@@ -0,0 +1,90 @@
+# modules/sampling.py
+"""
+Per-sensor sampling channels for SensorManager.
+
+Each channel has its own sampling interval that adapts between
+`interval_min` (value moving) and `interval_max` (value stable), smooths raw
+readings with a short median window followed by an EMA, and only reports a
+change worth broadcasting when the smoothed value moves by at least
+`deadband` from what was last emitted (or becomes valid/invalid).
+"""
+
+from collections import deque
+from statistics import median
+
+
+class MedianEmaFilter:
+    """Median of the last `window` samples (spike rejection), then an EMA."""
+
+    def __init__(self, window: int = 5, alpha: float = 0.4):
+        self.window = deque(maxlen=max(1, window))
+        self.alpha = min(1.0, max(0.01, alpha))
+        self.value = None
+
+    def update(self, sample: float) -> float:
+        self.window.append(sample)
+        m = median(self.window)
+        self.value = m if self.value is None else self.value + self.alpha * (m - self.value)
+        return self.value
+
+    def reset(self):
+        self.window.clear()
+        self.value = None
+
+
+class SensorChannel:
+    def __init__(self, name: str, interval_min: float, interval_max: float, deadband: float,
+                 window: int = 5, alpha: float = 0.4, digits: int = 1, max_failures: int = 3):
+        self.name = name
+        self.interval_min = max(0.1, interval_min)
+        self.interval_max = max(self.interval_min, interval_max)
+        self.deadband = deadband
+        self.digits = digits
+        self.max_failures = max_failures
+
+        self.filter = MedianEmaFilter(window, alpha)
+        self.interval = self.interval_min
+        self.next_due = 0.0
+        self.failures = 0
+        self.emitted = None         # last value broadcast (rounded)
+        self.samples = 0
+
+    @property
+    def value(self):
+        """Smoothed value, or None while invalid."""
+        if self.filter.value is None:
+            return None
+        return round(self.filter.value, self.digits) if self.digits else int(round(self.filter.value))
+
+    def due(self, now: float) -> bool:
+        return now >= self.next_due
+
+    def record(self, sample, now: float) -> bool:
+        """Feed one raw reading (None = failed read). Returns True if it should be emitted."""
+        self.samples += 1
+        if sample is None:
+            self.failures += 1
+            if self.failures >= self.max_failures:
+                self.filter.reset()
+            # Retry soon after a failed read
+            self.interval = self.interval_min
+        else:
+            self.failures = 0
+            previous = self.filter.value
+            current = self.filter.update(float(sample))
+            moving = previous is not None and abs(current - previous) >= self.deadband / 2
+            if moving or previous is None:
+                self.interval = self.interval_min
+            else:
+                self.interval = min(self.interval_max, self.interval * 1.5)
+        self.next_due = now + self.interval
+        return self._should_emit()
+
+    def _should_emit(self) -> bool:
+        value = self.value
+        if (value is None) != (self.emitted is None):
+            return True
+        return value is not None and abs(value - self.emitted) >= self.deadband
+
+    def mark_emitted(self):
+        self.emitted = self.value
@@ -2,8 +2,9 @@
 import threading
 import time
 import logging
-import glob
-import os
+
+from modules.onewire import OneWireBus, W1_ROOT
+from modules.sampling import SensorChannel
 
 logger = logging.getLogger("pccs")
 logger.propagate = True
@@ -16,10 +17,7 @@ class SensorManager:
         self.socketio = socketio
         self.running = False
         self.thread = None
-
-        os.system('modprobe w1-gpio')
-        os.system('modprobe w1-therm')
-        time.sleep(0.5)
+        self._stop_event = threading.Event()
 
         # ====================== CALIBRATION FROM CONFIG ======================
         self.WATER_R_EMPTY = config.getfloat('sensors', 'water_resistance_empty')
@@ -34,96 +32,53 @@ class SensorManager:
         self.FRIDGE_TEMP_ID  = (config.get('sensors', 'fridge_temp_sensor', fallback='') or '').strip() or None
         # ========================================================
 
+        # Kernel modules are loaded and probes resolved lazily on the sensor thread
+        self.onewire = OneWireBus(config.get('sensors', 'w1_root', fallback=W1_ROOT))
+
         self._last_analog_warn = 0.0
         self._last_vcc_warn = 0.0
 
+        # ====================== SAMPLING ======================
+        # Each sensor is sampled on its own adaptive interval and only broadcast when
+        # its smoothed value moves by more than its deadband (see modules/sampling.py)
+        self.channels = {
+            # Supply voltage only feeds the water calculation; it barely moves
+            'vcc':     self._channel('vcc', interval=60, interval_max=600, deadband=0.02, digits=3),
+            'water':   self._channel('water', interval=None, interval_max=120, deadband=2, digits=0),
+            'outside': self._channel('outside_temp', interval=None, interval_max=120, deadband=0.2, digits=1),
+        }
+        if self.FRIDGE_TEMP_ID:
+            self.channels['fridge'] = self._channel('fridge_temp', interval=None, interval_max=120, deadband=0.3, digits=1)
+        self.heartbeat = config.getfloat('sensors', 'heartbeat', fallback=300.0)
+        self._last_emit = 0.0
+        self.emits = 0
+
         outside_mode = "auto" if not self.OUTSIDE_TEMP_ID else "configured"
         fridge_mode = "configured" if self.FRIDGE_TEMP_ID else "not configured"
         logger.info("🔋 SensorManager initialized (water + 1-wire temps only — solar CT + battery voltage divider fully removed: outside=%s, fridge=%s)",
                     outside_mode, fridge_mode)
 
-    def _read_ds18b20(self, sensor_id=None):
-        """Read DS18B20. If sensor_id given (e.g. '28-xxx'), read that exact device; else first 28* found."""
-        try:
-            base_dir = '/sys/bus/w1/devices/'
-
-            if sensor_id:
-                device_folder = os.path.join(base_dir, sensor_id)
-                if not os.path.isdir(device_folder):
-                    logger.warning("   🌡️ Configured 1-Wire sensor not present: %s", sensor_id)
-                    return None
-                device_folders = [device_folder]
-            else:
-                device_folders = glob.glob(base_dir + '28*')
-                if not device_folders:
-                    logger.warning("No 1-Wire DS18B20 sensor found")
-                    return None
-
-            device_file = device_folders[0] + '/w1_slave'
-            sensor_name = device_folders[0].split('/')[-1]
-            logger.debug("   🌡️ Reading sensor: %s", sensor_name)
-            
-            # Read twice for reliability
-            for i in range(2):
-                with open(device_file, 'r') as f:
-                    lines = f.readlines()
-                
-                if len(lines) < 2:
-                    time.sleep(0.2)
-                    continue
-                    
-                if "YES" not in lines[0]:
-                    logger.warning("   🌡️ CRC check failed, retrying...")
-                    time.sleep(0.25)
-                    continue
-                
-                equals_pos = lines[1].find('t=')
-                if equals_pos != -1:
-                    temp_string = lines[1][equals_pos + 2:].strip()
-                    temp_c = float(temp_string) / 1000.0
-                    
-                    if temp_c == 85.0:
-                        logger.info("   🌡️ Sensor returned power-on reset value (85°C) — invalid")
-                        time.sleep(0.3)
-                        continue
-                    if abs(temp_c) < 0.1:
-                        logger.warning("   🌡️ Sensor returned near-zero — possibly bad read")
-                        time.sleep(0.3)
-                        continue
-                        
-                    logger.debug("   🌡️ Temperature = %.1f°C [%s]", temp_c, sensor_name)
-                    return round(temp_c, 1)
-
-            logger.error("   ⚠️ DS18B20 read failed after retries [%s]", sensor_name)
-            return None
-
-        except Exception as e:
-            logger.error("DS18B20 read error: %s", e)
-            return None
-
     def start(self):
         if self.running:
             return
         self.running = True
+        self._stop_event.clear()
+        # First update happens on the sensor thread — nothing here blocks boot
         self.thread = threading.Thread(target=self._loop, daemon=True)
         self.thread.start()
         
         logger.debug("✅ SensorManager started")
-        
-        time.sleep(0.5)
-        self.update_sensors()
 
     def _read_analog(self, pin):
-        for attempt in range(3):
-            resp = self.send_command(f"ANALOG {pin}", expect="ANALOG")
-            if resp and resp.startswith("ANALOG"):
-                try:
-                    value = float(resp.split()[2])
-                    logger.debug("   ADC A%d = %.1f", pin, value)
-                    return value
-                except:
-                    pass
-            time.sleep(0.05)
+        # The Arduino replies from its background-sampled average, so one request is enough
+        resp = self.send_command(f"ANALOG {pin}", expect="ANALOG")
+        if resp and resp.startswith("ANALOG"):
+            try:
+                value = float(resp.split()[2])
+                logger.debug("   ADC A%d = %.1f", pin, value)
+                return value
+            except (IndexError, ValueError):
+                pass
         now = time.time()
         if now - self._last_analog_warn > 60:
             logger.warning("   ⚠️ Failed to read ANALOG %d", pin)
@@ -131,21 +86,21 @@ class SensorManager:
         return None
 
     def _read_vcc(self):
-        for attempt in range(3):
-            resp = self.send_command("GETVCC", expect="VCC")
-            if resp and resp.startswith("VCC"):
-                try:
-                    v = float(resp.split()[1]) / 1000.0
+        resp = self.send_command("GETVCC", expect="VCC")
+        if resp and resp.startswith("VCC"):
+            try:
+                mv = float(resp.split()[1])
+                if mv > 0:
+                    v = mv / 1000.0
                     logger.debug("   VCC = %.3fV", v)
                     return v
-                except:
-                    pass
-            time.sleep(0.05)
+            except (IndexError, ValueError):
+                pass
         now = time.time()
         if now - self._last_vcc_warn > 60:
             logger.warning("   ⚠️ Failed to read VCC")
             self._last_vcc_warn = now
-        return 5.0
+        return None
 
     def _calculate_water(self, adc, vcc):
         if adc is None or vcc is None:
@@ -157,36 +112,89 @@ class SensorManager:
         pct = (self.WATER_R_EMPTY - sensor_r) / (self.WATER_R_EMPTY - self.WATER_R_FULL) * 100
         return round(max(0, min(100, pct)))
 
-    def update_sensors(self):
-        logger.debug("🔄 Updating sensors (water + temperature)...")
-        
-        adc_water   = self._read_analog(self.WATER_PIN)
-        vcc         = self._read_vcc()
-        outside_temp = self._read_ds18b20(self.OUTSIDE_TEMP_ID)
-        fridge_temp  = self._read_ds18b20(self.FRIDGE_TEMP_ID) if self.FRIDGE_TEMP_ID else None
-
-        water_pct = self._calculate_water(adc_water, vcc)
-
-        sensor_data = {
-            "water_percent": water_pct,
-            "temp_c": outside_temp if outside_temp is not None else None,  # legacy key
+    def _channel(self, name, interval, interval_max, deadband, digits):
+        fallback = interval if interval is not None else self.config.getfloat('sensors', 'update_interval', fallback=5.0)
+        return SensorChannel(
+            name,
+            interval_min=self.config.getfloat('sensors', f'{name}_interval', fallback=fallback),
+            interval_max=self.config.getfloat('sensors', f'{name}_interval_max', fallback=interval_max),
+            deadband=self.config.getfloat('sensors', f'{name}_deadband', fallback=deadband),
+            window=self.config.getint('sensors', 'filter_window', fallback=5),
+            alpha=self.config.getfloat('sensors', 'filter_alpha', fallback=0.4),
+            digits=digits,
+        )
+
+    def get_state(self):
+        """Latest smoothed readings in the sensor_update shape (no hardware access)."""
+        water = self.channels['water'].value
+        outside_temp = self.channels['outside'].value
+        fridge = self.channels.get('fridge')
+        return {
+            "water_percent": water if water is not None else 0,
+            "temp_c": outside_temp,  # legacy key
             "outside_temp_c": outside_temp,
-            "fridge_temp_c": fridge_temp,
+            "fridge_temp_c": fridge.value if fridge else None,
             "temp_valid": outside_temp is not None
         }
 
+    def update_sensors(self, now=None, force=False):
+        """Sample every channel that is due; emit once if any crossed its deadband."""
+        now = time.monotonic() if now is None else now
+        due = {name for name, ch in self.channels.items() if force or ch.due(now)}
+        if due:
+            logger.debug("🔄 Sampling sensors: %s", ", ".join(sorted(due)))
+        changed = set()
+
+        if 'vcc' in due or ('water' in due and self.channels['vcc'].value is None):
+            self.channels['vcc'].record(self._read_vcc(), now)
+        if 'water' in due:
+            vcc = self.channels['vcc'].value or 5.0
+            adc = self._read_analog(self.WATER_PIN)
+            pct = self._calculate_water(adc, vcc) if adc is not None else None
+            if self.channels['water'].record(pct, now):
+                changed.add('water')
+
+        # Due temperature probes share one bulk conversion
+        probes = {name: self.OUTSIDE_TEMP_ID if name == 'outside' else self.FRIDGE_TEMP_ID
+                  for name in ('outside', 'fridge') if name in due and name in self.channels}
+        if probes:
+            temps = self.onewire.read_temperatures(list(probes.values()))
+            for name, sensor_id in probes.items():
+                if self.channels[name].record(temps.get(sensor_id), now):
+                    changed.add(name)
+
+        # Heartbeat: a full snapshot now and then even when nothing moved
+        if changed or force or now - self._last_emit >= self.heartbeat:
+            self._emit(now)
+        return bool(changed)
+
+    def _emit(self, now):
+        for name in ('water', 'outside', 'fridge'):
+            if name in self.channels:
+                self.channels[name].mark_emitted()
+        self._last_emit = now
+        self.emits += 1
+        sensor_data = self.get_state()
         logger.debug("📤 Emitting sensor data: %s", sensor_data)
         self.socketio.emit('sensor_update', sensor_data)
 
+    def _next_due(self):
+        return min(ch.next_due for ch in self.channels.values())
+
     def _loop(self):
+        first = True
         while self.running:
             try:
-                self.update_sensors()
+                self.update_sensors(force=first)
             except Exception as e:
                 logger.error("❌ Sensor loop error: %s", e)
-            time.sleep(self.config.getfloat('sensors', 'update_interval', fallback=5.0))
+            first = False
+            wait = min(self._next_due(), self._last_emit + self.heartbeat) - time.monotonic()
+            self._stop_event.wait(max(0.05, wait))
 
     def stop(self):
         self.running = False
+        self._stop_event.set()
         if self.thread and self.thread.is_alive():
-            self.thread.join(timeout=2)
\ No newline at end of file
+            self.thread.join(timeout=2)
+        self.onewire.close()
\ No newline at end of file
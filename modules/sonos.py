@@ -1,14 +1,30 @@
 # modules/sonos.py
+"""
+Sonos control via SoCo, driven by UPnP event subscriptions.
+
+Every discovered speaker gets AVTransport + RenderingControl subscriptions
+(auto-renewed); pushed changes are folded into per-speaker state by
+modules.sonos_state and broadcast as 'sonos_update'. SOAP polling is only a
+fallback for speakers whose subscriptions failed ("degraded").
+
+Speakers themselves come from modules.sonos_registry, which listens for SSDP
+announcements and remembers known speakers across restarts instead of
+re-running discovery on a timer.
+"""
 import logging
+import queue
 import time
 import threading
 import socket
 from urllib.parse import quote
 
 import soco
-from soco.discovery import discover
+from soco import config as soco_config
 from soco.exceptions import SoCoException
 
+from modules import sonos_state
+from modules.sonos_registry import SpeakerRegistry
+
 logger = logging.getLogger("pccs")
 
 
@@ -28,24 +44,39 @@ class SonosManager:
 
         self._manual_override = False
         self.poll_interval = config.getint('sonos', 'poll_interval', fallback=3)
-        self.discovery_interval = config.getint('sonos', 'discovery_interval', fallback=30)
-        self.discovery_timeout = config.getint('sonos', 'discovery_timeout', fallback=8)
+        self.subscription_timeout = config.getint('sonos', 'subscription_timeout', fallback=1800)
+        self.resubscribe_interval = config.getint('sonos', 'resubscribe_interval', fallback=60)
         self.default_volume = config.getint('sonos', 'default_volume', fallback=-1)
+        self.device_factory = soco.SoCo     # ip -> speaker handle (sim.sonos swaps in fake speakers)
 
         # Internal state
         self.speakers = {}
         self.current_speaker = None
         self._running = False
-        self._discovery_thread = None
+        self._registry = None
         self._poll_thread = None
-        self._last_state = {}
+        self._event_thread = None
         self._last_speaker_count = 0
         self._initial_discovery_done = False
 
+        # Event-driven state
+        self._lock = threading.RLock()
+        self._states = {}           # speaker name -> folded state (sonos_state)
+        self._emitted = {}          # speaker name -> last state broadcast
+        self._events = queue.Queue()
+        self._subs = {}             # speaker name -> [avTransport sub, renderingControl sub]
+        self._ip_to_name = {}
+        self._degraded = set()      # speakers without working subscriptions → polled
+        self._last_resubscribe = 0.0
+
         if not self.enabled:
             logger.info("🎵 Sonos integration is disabled in config")
             return
 
+        if self.interface_addr:
+            # Event callbacks must arrive on the same interface the speakers live on
+            soco_config.EVENT_LISTENER_IP = self.interface_addr
+
         logger.info(f"🎵 SonosManager initialized (preferred: '{self.preferred_name}', interface: {self.interface_addr or 'auto'})")
 
     def start(self):
@@ -54,12 +85,13 @@ class SonosManager:
 
         self._running = True
 
-        # Initial discovery (always logged)
-        self._discover_speakers(initial=True)
-        self._initial_discovery_done = True
+        self._event_thread = threading.Thread(target=self._event_loop, daemon=True)
+        self._event_thread.start()
 
-        self._discovery_thread = threading.Thread(target=self._discovery_loop, daemon=True)
-        self._discovery_thread.start()
+        # Known speakers come back immediately from disk; an M-SEARCH confirms them,
+        # after which only SSDP announcements (or a speaker vanishing) cause changes
+        self._registry = SpeakerRegistry(self.config, on_change=self._on_registry_change)
+        self._registry.start()
 
         self._poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
         self._poll_thread.start()
@@ -68,35 +100,45 @@ class SonosManager:
 
     def stop(self):
         self._running = False
+        if self._registry:
+            self._registry.stop()
+        for name in list(self._subs):
+            self._unsubscribe(name)
+        self._events.put(None)
         logger.debug("🎵 SonosManager stopped")
 
-    def _discover_speakers(self, initial: bool = False):
-        """Discover speakers using the correct network interface"""
-        if not self.enabled:
+    def _on_registry_change(self, entries: list):
+        """Registry thread: the set of reachable speakers (or an IP) changed"""
+        if not self.enabled or not self._running:
             return
 
+        initial = not self._initial_discovery_done
+        self._initial_discovery_done = True
         try:
-            logger.debug(f"[Discovery] Running on interface {self.interface_addr or 'auto'}")
-
-            discovered = discover(
-                timeout=self.discovery_timeout, 
-                include_invisible=False,
-                interface_addr=self.interface_addr
-            )
-            devices = list(discovered) if discovered else []
-
             new_speakers = {}
-            for device in devices:
-                try:
-                    name = device.player_name
-                    if name:
-                        new_speakers[name] = device
-                except:
-                    continue
+            for entry in entries:
+                device = self.device_factory(entry['ip'])
+                name, visible = entry.get('name'), entry.get('visible')
+                if not name or visible is None:
+                    # Resolved once per speaker, then remembered by the registry
+                    try:
+                        name, visible = device.player_name, device.is_visible
+                    except Exception as e:
+                        logger.debug(f"Could not identify Sonos speaker at {entry['ip']}: {e}")
+                        continue
+                    self._registry.annotate(entry['uid'], name=name, visible=visible)
+                if name and visible:
+                    new_speakers[name] = device
+
+            for name in list(self._subs):
+                old = self.speakers.get(name)
+                if old is not None and name in new_speakers and new_speakers[name].ip_address != old.ip_address:
+                    self._unsubscribe(name)  # moved to a new IP — resubscribe there
 
             old_count = len(self.speakers)
             self.speakers = new_speakers
             new_count = len(self.speakers)
+            self._sync_subscriptions()
 
             if initial or new_count != old_count:
                 if new_count == 0:
@@ -119,9 +161,9 @@ class SonosManager:
         except Exception as e:
             # Downgrade to debug when no devices are present/expected to avoid
             # spamming warning toasts for users with no Sonos on the network.
-            logger.debug(f"Sonos discovery failed: {e}")
+            logger.debug(f"Sonos speaker update failed: {e}")
             if initial:
-                logger.info("🎵 0 Sonos speaker(s) detected (discovery error)")
+                logger.info("🎵 0 Sonos speaker(s) detected (registry error)")
 
     def _select_best_speaker(self):
         if not self.speakers:
@@ -157,150 +199,199 @@ class SonosManager:
             except Exception as e:
                 logger.warning(f"Failed to set default volume: {e}")
 
-    def _discovery_loop(self):
-        """Background loop — only logs when speaker count changes"""
-        while self._running and self.enabled:
-            time.sleep(self.discovery_interval)
-            if self._running:
-                self._discover_speakers(initial=False)
-
-    def _poll_loop(self):
-        """Poll ALL speakers (not just the active one) for diag page"""
-        while self._running and self.enabled:
-            try:
-                self._poll_all_speakers()
-            except Exception as e:
-                logger.debug(f"Sonos poll error: {e}")
-            time.sleep(self.poll_interval)
-
-    def _poll_all_speakers(self):
-        """Poll every speaker (for diag) but only emit full state for the ACTIVE one to everyone"""
+    # ====================== EVENTS ======================
+
+    def _sync_subscriptions(self):
+        """Subscribe newly discovered speakers, drop the ones that vanished."""
+        for name in list(self._subs):
+            if name not in self.speakers:
+                self._unsubscribe(name)
+        with self._lock:
+            for name in list(self._states):
+                if name not in self.speakers:
+                    self._states.pop(name, None)
+                    self._emitted.pop(name, None)
+            self._degraded.intersection_update(self.speakers)
         for name, device in list(self.speakers.items()):
-            try:
-                state = self._get_single_speaker_state(name, device)
-                
-                if state != self._last_state.get(name):
-                    self._last_state[name] = state.copy()
-                    
-                    self.socketio.emit('sonos_update', state)
-                    
-                    if name == self.current_speaker:
-                        current_state = state.copy()
-                        current_state['is_current_active'] = True
-                        self.socketio.emit('sonos_update', current_state)  # main UI listens to this too
-                        
-            except Exception as e:
-                logger.debug(f"Failed to poll {name}: {e}")
-
-    def _get_single_speaker_state(self, name: str, device) -> dict:
-        """Get full state for one speaker"""
-        state = {
-            'speaker': name,
-            'volume': device.volume,
-            'mute': device.mute,
-            'is_playing': False,
-            'track': 'Nothing playing',
-            'artist': '',
-            'album': '',
-            'album_art': None,
-            'position': 0,
-            'duration': 0,
-        }
+            if name not in self._subs and name not in self._degraded:
+                self._subscribe(name, device)
 
-        try:
-            # Transport state
-            transport = device.get_current_transport_info()
-            state['is_playing'] = transport.get('current_transport_state') == 'PLAYING'
-
-            # Track info
-            track = device.get_current_track_info()
-            state.update({
-                'track': track.get('title') or 'Nothing playing',
-                'artist': track.get('artist') or '',
-                'album': track.get('album') or '',
-                'position': self._time_to_seconds(track.get('position')),
-                'duration': self._time_to_seconds(track.get('duration')),
-            })
-
-            # Album art
-            raw_art = track.get('album_art')
-            if raw_art:
-                state['album_art'] = self._make_album_art_proxy_url(raw_art)
+    def _subscribe(self, name: str, device):
+        self._ip_to_name[device.ip_address] = name
+        with self._lock:
+            self._states.setdefault(name, sonos_state.new_speaker_state(name))
 
+        subs = []
+        try:
+            for service in (device.avTransport, device.renderingControl):
+                sub = service.subscribe(
+                    requested_timeout=self.subscription_timeout,
+                    auto_renew=True,
+                    event_queue=self._events,
+                )
+                sub.auto_renew_fail = lambda exc, n=name: self._on_renew_fail(n, exc)
+                subs.append(sub)
         except Exception as e:
-            logger.debug(f"Partial state for {name}: {e}")
+            for sub in subs:
+                self._safe_unsubscribe(sub)
+            with self._lock:
+                self._degraded.add(name)
+            logger.info(f"🎵 Event subscription failed for {name} — falling back to polling ({e})")
+            self._poll_speaker(name, device)
+            return
 
-        return state
+        self._subs[name] = subs
+        with self._lock:
+            self._degraded.discard(name)
+        logger.debug(f"🎵 Subscribed to {name} events")
 
-    def _poll_current_state(self):
-        if not self.current_speaker or self.current_speaker not in self.speakers:
-            return
-        device = self.speakers[self.current_speaker]
+        # Events carry no playback position — take one sample to anchor it
+        self._poll_speaker(name, device)
 
-        try:
-            state = {
-                'speaker': self.current_speaker,
-                'speakers': list(self.speakers.keys()),
-                'volume': device.volume,
-                'mute': device.mute,
-                'is_playing': False,
-                'track': 'Nothing playing',
-                'artist': None,
-                'album': None,
-                'album_art': None,
-                'position': 0,
-                'duration': 0,
-            }
-
-            # Transport state (playing/paused)
-            transport = device.get_current_transport_info()
-            state['is_playing'] = transport.get('current_transport_state') == 'PLAYING'
+    def _unsubscribe(self, name: str):
+        for sub in self._subs.pop(name, []):
+            self._safe_unsubscribe(sub)
 
-            # Track info
+    @staticmethod
+    def _safe_unsubscribe(sub):
+        try:
+            sub.unsubscribe()
+        except Exception:
+            pass
+
+    def _on_renew_fail(self, name: str, exc):
+        # Called from SoCo's renewal thread
+        logger.info(f"🎵 Event subscription renewal failed for {name} — polling until it recovers ({exc})")
+        self._subs.pop(name, None)
+        with self._lock:
+            self._degraded.add(name)
+
+    def _event_loop(self):
+        """Fold pushed UPnP events into per-speaker state."""
+        while self._running:
+            try:
+                event = self._events.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if event is None:
+                break
             try:
-                track = device.get_current_track_info()
+                self._handle_event(event)
+            except Exception as e:
+                logger.debug(f"Sonos event error: {e}")
 
-                state.update({
-                    'track': track.get('title') or 'Nothing playing',
-                    'artist': track.get('artist') or '',
-                    'album': track.get('album') or '',
-                })
+    def _handle_event(self, event):
+        service = event.service
+        ip = getattr(service.soco, 'ip_address', None)
+        name = self._ip_to_name.get(ip)
+        if not name or name not in self.speakers:
+            return
 
-                # Convert position and duration to seconds
-                state['position'] = self._time_to_seconds(track.get('position'))
-                state['duration'] = self._time_to_seconds(track.get('duration'))
+        now = time.time()
+        resync = False
+        with self._lock:
+            state = self._states.setdefault(name, sonos_state.new_speaker_state(name))
+            if service.service_type == 'AVTransport':
+                previous_uri = state.get('track_uri')
+                changed = sonos_state.fold_transport_event(
+                    state, event.variables, now, art_url=lambda raw: self._art_url(ip, raw),
+                )
+                # New track or play/pause: re-anchor position with one SOAP sample
+                resync = changed and (state.get('track_uri') != previous_uri or 'transport_state' in event.variables)
+            elif service.service_type == 'RenderingControl':
+                changed = sonos_state.fold_rendering_event(state, event.variables)
+            else:
+                return
 
-                # Album art
-                raw_art = track.get('album_art')
-                state['album_art'] = self._make_album_art_proxy_url(raw_art)
+        if resync:
+            self._resync_position(name)
+        if changed:
+            self._emit_state(name)
 
-            except Exception as e:
-                logger.debug(f"Failed to get track info: {e}")
+    def _resync_position(self, name: str):
+        device = self.speakers.get(name)
+        if device is None:
+            return
+        try:
+            track = device.get_current_track_info()
+        except Exception as e:
+            logger.debug(f"Position resync failed for {name}: {e}")
+            return
+        with self._lock:
+            state = self._states.get(name)
+            if state is not None:
+                sonos_state.fold_poll(state, time.time(), track=track, art_url=self._art_url_for(device))
 
-            # Only emit if something meaningful changed
-            if state != self._last_state:
-                self._last_state = state.copy()
-                self.socketio.emit('sonos_update', state)
+    # ====================== POLLING (degraded fallback) ======================
 
+    def _poll_loop(self):
+        """Poll only speakers without working event subscriptions"""
+        while self._running and self.enabled:
+            try:
+                with self._lock:
+                    degraded = [n for n in self._degraded if n in self.speakers]
+                for name in degraded:
+                    self._poll_speaker(name, self.speakers[name])
+
+                now = time.time()
+                if degraded and now - self._last_resubscribe >= self.resubscribe_interval:
+                    self._last_resubscribe = now
+                    for name in degraded:
+                        if name in self.speakers:
+                            with self._lock:
+                                self._degraded.discard(name)
+                            self._subscribe(name, self.speakers[name])
+            except Exception as e:
+                logger.debug(f"Sonos poll error: {e}")
+            time.sleep(self.poll_interval)
+
+    def _poll_speaker(self, name: str, device):
+        """Full SOAP read of one speaker, folded into its state"""
+        try:
+            volume, mute = device.volume, device.mute
+            transport = device.get_current_transport_info()
+            track = device.get_current_track_info()
         except Exception as e:
-            logger.debug(f"SoCo error on {self.current_speaker}: {e}")
+            logger.debug(f"Failed to poll {name}: {e}")
+            return
+
+        with self._lock:
+            state = self._states.setdefault(name, sonos_state.new_speaker_state(name))
+            changed = sonos_state.fold_poll(
+                state, time.time(), volume=volume, mute=mute, transport=transport, track=track,
+                art_url=self._art_url_for(device),
+            )
+        if changed:
+            self._emit_state(name)
+
+    # ====================== STATE OUT ======================
+
+    def _emit_state(self, name: str):
+        with self._lock:
+            state = self._states.get(name)
+            if state is None:
+                return
+            payload = sonos_state.public_state(state, time.time())
+            comparable = {k: v for k, v in payload.items() if k != 'server_ts'}
+            if comparable == self._emitted.get(name):
+                return
+            self._emitted[name] = comparable
+        if name == self.current_speaker:
+            payload['is_current_active'] = True
+        self.socketio.emit('sonos_update', payload)
+
+    def _art_url(self, ip: str, raw_art: str | None) -> str | None:
+        if raw_art and raw_art.startswith('/'):
+            raw_art = f"http://{ip}:1400{raw_art}"
+        return self._make_album_art_proxy_url(raw_art)
+
+    def _art_url_for(self, device):
+        ip = getattr(device, 'ip_address', '')
+        return lambda raw: self._art_url(ip, raw)
 
     def _time_to_seconds(self, time_str: str | None) -> int:
         """Convert SoCo time string (e.g. '0:03:45' or '2:15:30') to seconds"""
-        if not time_str or time_str == '0:00':
-            return 0
-        try:
-            parts = time_str.split(':')
-            if len(parts) == 3:
-                h, m, s = map(int, parts)
-                return h * 3600 + m * 60 + s
-            elif len(parts) == 2:
-                m, s = map(int, parts)
-                return m * 60 + s
-            else:
-                return int(parts[0])
-        except:
-            return 0
+        return sonos_state.time_to_seconds(time_str)
 
     def _make_album_art_proxy_url(self, original_url: str | None) -> str | None:
         if not original_url:
@@ -345,13 +436,21 @@ class SonosManager:
         if not cmd:
             return {'error': 'No command provided'}
 
+        with self._lock:
+            state = self._states.setdefault(target_speaker, sonos_state.new_speaker_state(target_speaker))
+            known = state.get('position_ts') is not None
+
         try:
             if cmd == 'playpause':
-                transport = device.get_current_transport_info()
-                if transport.get('current_transport_state') == 'PLAYING':
+                if known:
+                    playing = state.get('is_playing')
+                else:
+                    playing = device.get_current_transport_info().get('current_transport_state') == 'PLAYING'
+                if playing:
                     device.pause()
                 else:
                     device.play()
+                cmd = 'pause' if playing else 'play'
 
             elif cmd == 'play':
                 device.play()
@@ -362,34 +461,40 @@ class SonosManager:
             elif cmd == 'previous':
                 device.previous()
             elif cmd == 'volume':
-                if isinstance(value, (int, float)):
-                    device.volume = max(0, min(100, int(value)))
+                if not isinstance(value, (int, float)):
+                    return {'success': True}
+                value = max(0, min(100, int(value)))
+                device.volume = value
             elif cmd == 'mute':
                 if value is None:
-                    device.mute = not device.mute
-                else:
-                    device.mute = bool(value)
+                    value = not (state.get('mute') if known else device.mute)
+                device.mute = bool(value)
             elif cmd == 'seek':
-                if value is not None and 0 <= float(value) <= 1:
+                if value is None or not 0 <= float(value) <= 1:
+                    return {'success': True}
+                duration = state.get('duration') or 0
+                if duration <= 0:
                     track = device.get_current_track_info()
                     duration = self._time_to_seconds(track.get('duration'))
-                    if duration > 0:
-                        # Convert percentage to seconds
-                        position_seconds = int(duration * float(value))
-                        # Convert to SoCo required HH:MM:SS format
-                        hours = position_seconds // 3600
-                        minutes = (position_seconds % 3600) // 60
-                        seconds = position_seconds % 60
-                        timestamp = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                        
-                        logger.debug(f"🎵 Seeking to {timestamp} ({position_seconds}s)")
-                        device.seek(timestamp)
+                if duration <= 0:
+                    return {'success': True}
+                # Convert percentage to seconds
+                value = int(duration * float(value))
+                timestamp = sonos_state.seconds_to_time(value)
+                logger.debug(f"🎵 Seeking to {timestamp} ({value}s)")
+                device.seek(timestamp)
             else:
                 return {'error': f'Unknown command: {cmd}'}
 
-            # Refresh state after command
-            time.sleep(0.4)
-            self._poll_current_state()
+            # Optimistic update — the UPnP event that follows confirms or corrects it
+            with self._lock:
+                sonos_state.apply_command(state, cmd, value, time.time())
+            self._emit_state(target_speaker)
+
+            with self._lock:
+                degraded = target_speaker in self._degraded
+            if degraded:
+                threading.Thread(target=self._poll_speaker, args=(target_speaker, device), daemon=True).start()
             return {'success': True}
 
         except SoCoException as e:
@@ -401,27 +506,16 @@ class SonosManager:
             
     def request_state(self):
         """Called when frontend requests current state"""
-        if self.current_speaker and self.current_speaker in self.speakers:
-            self._poll_current_state()
-        else:
-            empty_state = {
-                'speaker': self.current_speaker,
-                'track': 'Nothing playing',
-                'artist': '',
-                'is_playing': False,
-                'volume': None,
-                'mute': False,
-                'enabled': self.enabled
-            }
-            self.socketio.emit('sonos_update', empty_state)
+        self.socketio.emit('sonos_update', self.get_current_state())
 
     def get_current_state(self) -> dict:
-        if self.current_speaker and self.current_speaker in self.speakers:
-            try:
-                self._poll_current_state()
-                return self._last_state
-            except:
-                pass
+        """Folded state of the active speaker — never touches the network"""
+        with self._lock:
+            state = self._states.get(self.current_speaker) if self.current_speaker in self.speakers else None
+            if state is not None:
+                out = sonos_state.public_state(state, time.time())
+                out.update(speakers=list(self.speakers.keys()), enabled=self.enabled)
+                return out
         return {
             'speaker': self.current_speaker,
             'speakers': list(self.speakers.keys()),
@@ -0,0 +1,357 @@
+# modules/sonos_registry.py
+"""
+Passive Sonos speaker registry (SSDP, no SoCo import).
+
+Speakers announce themselves with SSDP NOTIFY (ssdp:alive every few minutes,
+ssdp:byebye on shutdown). The registry listens for those on the multicast
+group instead of re-running discovery on a timer, and only sends an active
+M-SEARCH at startup or when a speaker it knew about stops announcing.
+
+Known speakers (UID, IP, model, plus the name/visibility SonosManager
+resolves once) are persisted to `registry_file`, so a restart can bring the
+dashboard up with the last known speakers before anything answers on the
+network.
+"""
+
+import ipaddress
+import json
+import logging
+import os
+import re
+import socket
+import struct
+import threading
+import time
+
+logger = logging.getLogger("pccs")
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SSDP_GROUP = '239.255.255.250'
+SSDP_PORT = 1900
+ZONE_PLAYER_ST = 'urn:schemas-upnp-org:device:ZonePlayer:1'
+
+_UID_RE = re.compile(r'uuid:(RINCON_[0-9A-Fa-f]+)')
+_MODEL_RE = re.compile(r'\(([^)]+)\)')
+_MAX_AGE_RE = re.compile(r'max-age\s*=\s*(\d+)', re.I)
+
+
+def parse_ssdp(data: bytes) -> dict | None:
+    """Parse a NOTIFY or M-SEARCH response into {kind, uid, ip, model, ...}.
+
+    Returns None for anything that isn't a Sonos ZonePlayer root announcement.
+    """
+    try:
+        text = data.decode('utf-8', errors='replace')
+    except Exception:
+        return None
+    lines = text.split('\r\n')
+    start = lines[0].upper()
+    if start.startswith('NOTIFY'):
+        kind = 'notify'
+    elif start.startswith('HTTP/1.1 200'):
+        kind = 'response'
+    else:
+        return None
+
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            key, _, value = line.partition(':')
+            headers[key.strip().upper()] = value.strip()
+
+    target = headers.get('NT') or headers.get('ST') or ''
+    if target != ZONE_PLAYER_ST:
+        return None
+    uid_match = _UID_RE.search(headers.get('USN', ''))
+    location = headers.get('LOCATION', '')
+    host = re.match(r'https?://([^:/]+)', location)
+    if not uid_match or not host:
+        return None
+
+    model = _MODEL_RE.search(headers.get('SERVER', ''))
+    max_age = _MAX_AGE_RE.search(headers.get('CACHE-CONTROL', ''))
+    return {
+        'kind': kind,
+        'alive': headers.get('NTS', 'ssdp:alive').lower() != 'ssdp:byebye',
+        'uid': uid_match.group(1),
+        'ip': host.group(1),
+        'model': model.group(1) if model else '',
+        'household': headers.get('X-RINCON-HOUSEHOLD', ''),
+        'max_age': int(max_age.group(1)) if max_age else 1800,
+    }
+
+
+def build_msearch(group: str, port: int, mx: int) -> bytes:
+    return (
+        'M-SEARCH * HTTP/1.1\r\n'
+        f'HOST: {group}:{port}\r\n'
+        'MAN: "ssdp:discover"\r\n'
+        f'MX: {max(1, mx)}\r\n'
+        f'ST: {ZONE_PLAYER_ST}\r\n'
+        '\r\n'
+    ).encode('ascii')
+
+
+class SpeakerRegistry:
+    def __init__(self, config, on_change=None):
+        self.on_change = on_change
+
+        # ====================== CONFIG ======================
+        interface = config.get('sonos', 'interface_addr', fallback=None)
+        self.interface_addr = interface or None
+        self.group = config.get('sonos', 'ssdp_group', fallback=SSDP_GROUP)
+        self.port = config.getint('sonos', 'ssdp_port', fallback=SSDP_PORT)
+        self.search_port = self.port    # where M-SEARCH goes (same port on a real network)
+        self.search_timeout = config.getfloat('sonos', 'discovery_timeout', fallback=8)
+        self.search_min_interval = config.getfloat('sonos', 'discovery_interval', fallback=300)
+        self.vanish_grace = config.getfloat('sonos', 'vanish_grace', fallback=60)
+
+        registry_file = config.get('sonos', 'registry_file', fallback='config/sonos_speakers.json')
+        self.path = registry_file if os.path.isabs(registry_file) else os.path.join(_BASE_DIR, registry_file)
+
+        # Internal
+        self._lock = threading.RLock()
+        self._known = {}            # uid -> entry (persisted)
+        self._present = set()       # uids currently believed reachable
+        self._last_search = 0.0
+        self._search_wanted = False
+        self._running = False
+        self._thread = None
+        self._sock = None
+
+        self._load()
+        # Warm start: trust the last known set until the startup search says otherwise
+        self._present = {uid for uid in self._known}
+
+    # ====================== PUBLIC API ======================
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._sock = self._open_listener()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="SonosSSDP")
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def speakers(self) -> list[dict]:
+        """Entries for speakers currently believed reachable."""
+        with self._lock:
+            return [dict(self._known[uid]) for uid in sorted(self._present) if uid in self._known]
+
+    def annotate(self, uid: str, **fields):
+        """Store details resolved elsewhere (e.g. name / visibility via SoCo)."""
+        with self._lock:
+            entry = self._known.get(uid)
+            if entry is None:
+                return
+            if all(entry.get(k) == v for k, v in fields.items()):
+                return
+            entry.update(fields)
+        self._save()
+
+    def search(self) -> int:
+        """Active M-SEARCH; returns the number of ZonePlayers that answered."""
+        started = self._last_search = time.time()
+        self._search_wanted = False
+        found = set()
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        except OSError as e:
+            logger.debug(f"SSDP search socket failed: {e}")
+            return 0
+        try:
+            if self.interface_addr:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(self.interface_addr))
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+            sock.settimeout(0.25)
+            message = build_msearch(self.group, self.search_port, int(self.search_timeout))
+            sock.sendto(message, (self.group, self.search_port))
+
+            deadline = time.time() + self.search_timeout
+            while time.time() < deadline and self._running_or_starting():
+                try:
+                    data, _ = sock.recvfrom(4096)
+                except socket.timeout:
+                    continue
+                info = parse_ssdp(data)
+                if info and info['kind'] == 'response':
+                    found.add(info['uid'])
+                    self._observe(info)
+        except OSError as e:
+            logger.debug(f"SSDP search failed: {e}")
+        finally:
+            sock.close()
+
+        # Anything we knew about that neither answered nor announced itself is gone for now
+        with self._lock:
+            before = set(self._present)
+            self._present = {
+                uid for uid in self._present
+                if uid in found or self._known[uid].get('last_seen', 0) > started
+            }
+            changed = self._present != before
+        if changed:
+            self._notify()
+        logger.debug(f"🎵 SSDP search found {len(found)} speaker(s)")
+        return len(found)
+
+    def handle_datagram(self, data: bytes):
+        """Fold one received SSDP packet (listener thread, or tests)."""
+        info = parse_ssdp(data)
+        if info and info['kind'] == 'notify':
+            self._observe(info)
+
+    def check_vanished(self):
+        """Drop speakers whose announcements lapsed; request a search to re-find them."""
+        now = time.time()
+        with self._lock:
+            lapsed = {
+                uid for uid in self._present
+                if now - self._known[uid].get('last_seen', 0) > self._known[uid].get('max_age', 1800) + self.vanish_grace
+            }
+            self._present -= lapsed
+        if lapsed:
+            logger.info(f"🎵 Sonos speaker(s) stopped announcing: {', '.join(self._label(u) for u in lapsed)}")
+            self._search_wanted = True
+            self._notify()
+
+    # ====================== INTERNAL ======================
+
+    def _running_or_starting(self):
+        return self._running or self._thread is None
+
+    def _label(self, uid):
+        entry = self._known.get(uid, {})
+        return entry.get('name') or entry.get('ip') or uid
+
+    def _observe(self, info: dict):
+        uid = info['uid']
+        now = time.time()
+        with self._lock:
+            entry = self._known.get(uid)
+            if not info['alive']:
+                if uid in self._present:
+                    self._present.discard(uid)
+                    gone = True
+                else:
+                    gone = False
+                if entry is not None:
+                    entry['last_seen'] = 0
+            else:
+                gone = False
+                new_speaker = entry is None
+                if new_speaker:
+                    entry = self._known[uid] = {'uid': uid}
+                moved = entry.get('ip') != info['ip']
+                entry.update(ip=info['ip'], model=info['model'] or entry.get('model', ''),
+                             household=info['household'] or entry.get('household', ''),
+                             max_age=info['max_age'], last_seen=now)
+                if moved and not new_speaker:
+                    # IP changed: name/visibility are still valid, the SoCo handle isn't
+                    logger.info(f"🎵 Sonos speaker {self._label(uid)} moved to {info['ip']}")
+                appeared = uid not in self._present
+                self._present.add(uid)
+
+        if not info['alive']:
+            if gone:
+                logger.info(f"🎵 Sonos speaker {self._label(uid)} said goodbye")
+                self._search_wanted = True
+                self._save()
+                self._notify()
+            return
+        if new_speaker or moved:
+            self._save()
+        if new_speaker or moved or appeared:
+            self._notify()
+
+    def _notify(self):
+        if self.on_change:
+            try:
+                self.on_change(self.speakers())
+            except Exception as e:
+                logger.debug(f"Sonos registry listener failed: {e}")
+
+    def _open_listener(self):
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if hasattr(socket, 'SO_REUSEPORT'):
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                except OSError:
+                    pass
+            sock.bind(('', self.port))
+            if ipaddress.ip_address(self.group).is_multicast:
+                iface = socket.inet_aton(self.interface_addr or '0.0.0.0')
+                mreq = struct.pack('4s4s', socket.inet_aton(self.group), iface)
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+            sock.settimeout(1.0)
+            return sock
+        except OSError as e:
+            logger.warning(f"🎵 SSDP listener unavailable ({e}) — relying on periodic searches")
+            return None
+
+    def _loop(self):
+        if self._present:
+            self._notify()  # warm start from the persisted registry
+        self.search()
+        self._notify()      # startup search settled (also reports "none found")
+        while self._running:
+            sock = self._sock
+            if sock is None:
+                # No passive listener: fall back to rate-limited searches
+                time.sleep(1.0)
+                if time.time() - self._last_search >= self.search_min_interval:
+                    self.search()
+                continue
+            try:
+                data, _ = sock.recvfrom(4096)
+                self.handle_datagram(data)
+            except socket.timeout:
+                pass
+            except OSError:
+                if self._running:
+                    time.sleep(1.0)
+                continue
+
+            self.check_vanished()
+            if self._search_wanted and time.time() - self._last_search >= self.search_min_interval:
+                self.search()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for entry in data.get('speakers', []):
+                if entry.get('uid') and entry.get('ip'):
+                    entry['last_seen'] = time.time()  # give every warm entry a full max-age
+                    self._known[entry['uid']] = entry
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable Sonos registry {self.path}: {e}")
+
+    def _save(self):
+        with self._lock:
+            speakers = [
+                {k: v for k, v in entry.items() if k != 'last_seen'}
+                for _, entry in sorted(self._known.items())
+            ]
+        tmp = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'speakers': speakers}, f, indent=2)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.error(f"Failed to save Sonos registry: {e}")
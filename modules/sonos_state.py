@@ -0,0 +1,199 @@
+# modules/sonos_state.py
+"""
+Per-speaker Sonos state folding (no SoCo import, so it is testable anywhere).
+
+SonosManager feeds this from three sources:
+  - UPnP events: AVTransport (transport state, track metadata) and
+    RenderingControl (volume, mute) LastChange variables
+  - SOAP polls: only for degraded speakers and the occasional position resync
+  - Commands: optimistic updates applied before the speaker confirms them
+
+Position is never ticked on the server. Each state carries `position`
+(seconds) sampled at `position_ts` (epoch); clients extrapolate while
+`is_playing` using `server_ts` to cancel out clock skew.
+"""
+
+NOTHING_PLAYING = 'Nothing playing'
+
+PLAYING_STATES = ('PLAYING', 'TRANSITIONING')
+
+
+def new_speaker_state(name: str) -> dict:
+    return {
+        'speaker': name,
+        'volume': None,
+        'mute': False,
+        'is_playing': False,
+        'track': NOTHING_PLAYING,
+        'artist': '',
+        'album': '',
+        'album_art': None,
+        'track_uri': None,
+        'position': 0,
+        'position_ts': None,
+        'duration': 0,
+    }
+
+
+def time_to_seconds(time_str) -> int:
+    """Convert SoCo time string (e.g. '0:03:45' or '2:15:30') to seconds"""
+    if not time_str or time_str in ('0:00', 'NOT_IMPLEMENTED'):
+        return 0
+    try:
+        parts = str(time_str).split(':')
+        if len(parts) == 3:
+            h, m, s = map(int, parts)
+            return h * 3600 + m * 60 + s
+        elif len(parts) == 2:
+            m, s = map(int, parts)
+            return m * 60 + s
+        else:
+            return int(parts[0])
+    except (TypeError, ValueError):
+        return 0
+
+
+def seconds_to_time(seconds: int) -> str:
+    seconds = max(0, int(seconds))
+    return f"{seconds // 3600:02d}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+
+def playback_position(state: dict, now: float) -> float:
+    """Position extrapolated to `now` (what the speaker is playing right now)."""
+    pos = state.get('position') or 0
+    ts = state.get('position_ts')
+    if state.get('is_playing') and ts is not None:
+        pos += max(0.0, now - ts)
+    duration = state.get('duration') or 0
+    return min(pos, duration) if duration > 0 else pos
+
+
+def _set(state: dict, key, value) -> bool:
+    if state.get(key) == value:
+        return False
+    state[key] = value
+    return True
+
+
+def _set_position(state: dict, position: float, now: float) -> bool:
+    # Re-anchoring the timestamp alone is not a visible change
+    state['position_ts'] = now
+    return _set(state, 'position', int(position))
+
+
+def _set_playing(state: dict, playing: bool, now: float) -> bool:
+    if state.get('is_playing') == playing:
+        return False
+    # Freeze/resume from wherever playback actually is
+    _set_position(state, playback_position(state, now), now)
+    state['is_playing'] = playing
+    return True
+
+
+def _master(value):
+    """RenderingControl values arrive as {'Master': '25', 'LF': ...} dicts."""
+    if isinstance(value, dict):
+        value = value.get('Master')
+    return value
+
+
+def fold_transport_event(state: dict, variables: dict, now: float, art_url=None) -> bool:
+    """Fold AVTransport LastChange variables. Returns True if anything visible changed."""
+    changed = False
+
+    transport = variables.get('transport_state')
+    if transport:
+        changed |= _set_playing(state, transport in PLAYING_STATES, now)
+
+    uri = variables.get('current_track_uri')
+    if uri is not None and uri != state.get('track_uri'):
+        state['track_uri'] = uri
+        changed |= _set_position(state, 0, now)
+
+    if 'current_track_duration' in variables:
+        changed |= _set(state, 'duration', time_to_seconds(variables.get('current_track_duration')))
+
+    if 'current_track_meta_data' in variables:
+        meta = variables.get('current_track_meta_data')
+        if isinstance(meta, str):
+            meta = None  # SoCo hands over '' when nothing is loaded
+        title = getattr(meta, 'title', None) or getattr(meta, 'stream_content', None)
+        changed |= _set(state, 'track', title or NOTHING_PLAYING)
+        changed |= _set(state, 'artist', getattr(meta, 'creator', None) or '')
+        changed |= _set(state, 'album', getattr(meta, 'album', None) or '')
+        raw_art = getattr(meta, 'album_art_uri', None)
+        changed |= _set(state, 'album_art', art_url(raw_art) if (art_url and raw_art) else raw_art or None)
+
+    return changed
+
+
+def fold_rendering_event(state: dict, variables: dict) -> bool:
+    """Fold RenderingControl LastChange variables (volume / mute)."""
+    changed = False
+    volume = _master(variables.get('volume'))
+    if volume is not None:
+        try:
+            changed |= _set(state, 'volume', int(volume))
+        except (TypeError, ValueError):
+            pass
+    mute = _master(variables.get('mute'))
+    if mute is not None:
+        changed |= _set(state, 'mute', str(mute) in ('1', 'True', 'true'))
+    return changed
+
+
+def fold_poll(state: dict, now: float, volume=None, mute=None, transport=None, track=None, art_url=None) -> bool:
+    """Fold the result of SOAP calls (any subset) into state."""
+    changed = False
+    if volume is not None:
+        changed |= _set(state, 'volume', int(volume))
+    if mute is not None:
+        changed |= _set(state, 'mute', bool(mute))
+    if transport is not None:
+        playing = transport.get('current_transport_state') in PLAYING_STATES
+        if state.get('is_playing') != playing:
+            state['is_playing'] = playing
+            changed = True
+    if track is not None:
+        changed |= _set(state, 'track', track.get('title') or NOTHING_PLAYING)
+        changed |= _set(state, 'artist', track.get('artist') or '')
+        changed |= _set(state, 'album', track.get('album') or '')
+        changed |= _set(state, 'duration', time_to_seconds(track.get('duration')))
+        raw_art = track.get('album_art')
+        changed |= _set(state, 'album_art', art_url(raw_art) if (art_url and raw_art) else raw_art or None)
+        if track.get('uri') is not None:
+            state['track_uri'] = track.get('uri')
+        # A fresh sample only counts as a change if it disagrees with our extrapolation
+        sampled = time_to_seconds(track.get('position'))
+        if state.get('position_ts') is None or abs(playback_position(state, now) - sampled) > 2:
+            changed = True
+        state['position'] = sampled
+        state['position_ts'] = now
+    return changed
+
+
+def apply_command(state: dict, cmd: str, value, now: float) -> bool:
+    """Optimistically apply a command the speaker has just accepted."""
+    if cmd == 'play':
+        return _set_playing(state, True, now)
+    if cmd == 'pause':
+        return _set_playing(state, False, now)
+    if cmd == 'playpause':
+        return _set_playing(state, not state.get('is_playing'), now)
+    if cmd in ('next', 'previous'):
+        # New track metadata follows via the AVTransport event
+        return _set_position(state, 0, now)
+    if cmd == 'volume':
+        return _set(state, 'volume', max(0, min(100, int(value))))
+    if cmd == 'mute':
+        return _set(state, 'mute', (not state.get('mute')) if value is None else bool(value))
+    if cmd == 'seek':
+        return _set_position(state, value, now)
+    return False
+
+
+def public_state(state: dict, now: float) -> dict:
+    """Copy for socket / API consumers, stamped with the server clock."""
+    out = {k: v for k, v in state.items() if k != 'track_uri'}
+    out['server_ts'] = now
+    return out
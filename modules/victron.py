@@ -16,6 +16,16 @@ explicitly asked for:
   - Yield today kWh ("total generated for the day" from MPPT)
 
 Emits: 'victron_update' (same event name used by the old fallback shim).
+
+Advertisements are filtered as early as possible: BlueZ only forwards
+Victron manufacturer data (passive scan + or-pattern when supported), the
+detection callback drops unknown addresses before touching the payload, and
+byte-identical repeats inside `dedupe_window` never reach decryption.
+
+The radio is duty-cycled (_ScanScheduler): each cycle scans only until every
+configured device has been heard, then idles for `scan_idle`. Missed devices
+or stale data widen the next window; a dashboard viewing the power tile
+('victron_viewing' heartbeat) shortens the idle gap to `scan_idle_viewing`.
 """
 
 import logging
@@ -26,6 +36,59 @@ from datetime import datetime, timezone
 
 logger = logging.getLogger("pccs")
 
+VICTRON_MANUFACTURER_ID = 0x02E1
+# Manufacturer data as it appears on air: company ID (LE) + "product advertisement" record
+VICTRON_ADV_PREFIX = b"\xe1\x02\x10"
+
+
+class _ScanScheduler:
+    """Duty-cycle plan for the BLE scanner (pure bookkeeping, no I/O)."""
+
+    def __init__(self, window, window_max, idle, viewing_idle, viewer_lease, clock=time.monotonic):
+        self.base_window = max(0.5, window)
+        self.window_max = max(self.base_window, window_max)
+        self.idle = max(0.0, idle)
+        self.viewing_idle = min(max(0.0, viewing_idle), self.idle)
+        self.viewer_lease = viewer_lease
+        self._clock = clock
+
+        self.window = self.base_window
+        self._viewer_until = 0.0
+        self.cycles = 0
+        self.incomplete = 0
+
+    def note_viewer(self):
+        """Extend the viewer lease; returns True if this starts a new lease."""
+        starting = not self.viewing()
+        self._viewer_until = self._clock() + self.viewer_lease
+        return starting
+
+    def viewing(self):
+        return self._clock() < self._viewer_until
+
+    def end_window(self, complete, stale):
+        """Size the next window from how this one went."""
+        self.cycles += 1
+        if not complete:
+            self.incomplete += 1
+        if stale:
+            self.window = self.window_max
+        elif complete:
+            self.window = self.base_window
+        else:
+            self.window = min(self.window * 2, self.window_max)
+
+    def idle_interval(self):
+        return self.viewing_idle if self.viewing() else self.idle
+
+    def stale_after(self, floor):
+        """Seconds without data before it counts as stale.
+
+        A device is allowed to miss one whole unviewed cycle at the widest
+        window before the tile flags it, so idling never reads as an outage.
+        """
+        return max(floor, 2 * self.idle + self.window_max)
+
 
 class VictronManager:
     def __init__(self, socketio, config, phase_manager=None):
@@ -42,6 +105,15 @@ class VictronManager:
 
         self.scan_interval = config.getfloat('victron', 'scan_interval', fallback=2.0)
         self.stale_timeout = config.getfloat('victron', 'stale_timeout', fallback=45.0)
+        self.dedupe_window = config.getfloat('victron', 'dedupe_window', fallback=5.0)
+
+        self._scheduler = _ScanScheduler(
+            window=config.getfloat('victron', 'scan_window', fallback=4.0),
+            window_max=config.getfloat('victron', 'scan_window_max', fallback=20.0),
+            idle=config.getfloat('victron', 'scan_idle', fallback=30.0),
+            viewing_idle=config.getfloat('victron', 'scan_idle_viewing', fallback=2.0),
+            viewer_lease=config.getfloat('victron', 'viewer_lease', fallback=45.0),
+        )
 
         # Internal
         self._running = False
@@ -50,6 +122,22 @@ class VictronManager:
         self._last_emit_ts = 0.0
         self._last_data_ts = 0.0
 
+        # Radio / decoder seams (sim.victron swaps in fake advertisements); None = bleak / victron_ble
+        self.scanner_factory = None     # callback -> object with async start() / stop()
+        self.parser_factory = None      # (address, raw) -> parser with parse(raw)
+
+        self._parsers = {}          # address -> victron_ble parser (built once per device)
+        self._accessor_plans = {}   # parsed data class -> resolved getter names
+        self._recent = {}           # address -> (hash(raw advertisement), ts)
+        self.stats = {"seen": 0, "deduped": 0, "decoded": 0}
+
+        # Scan window bookkeeping (owned by the BLE event loop)
+        self._loop = None
+        self._wake = None           # asyncio.Event: cut the idle gap short
+        self._window_done = None    # asyncio.Event: every device heard this window
+        self._window_seen = set()
+        self._dirty = False
+
         self.state = {
             "stale": True,
             "soc": None,
@@ -69,16 +157,19 @@ class VictronManager:
             self.device_keys[self.shunt_address] = self.shunt_key
         if self.mppt_address and self.mppt_key:
             self.device_keys[self.mppt_address] = self.mppt_key
+        self._addresses = frozenset(self.device_keys)
 
         if not self.device_keys:
             logger.warning("🔋 Victron: no shunt or mppt keys configured — tile will stay stale until devices are added")
         else:
             logger.info(
-                "🔋 VictronManager initialized (shunt=%s, mppt=%s, scan=%.1fs, stale=%.0fs)",
+                "🔋 VictronManager initialized (shunt=%s, mppt=%s, window=%.1f-%.1fs, idle=%.0fs, stale=%.0fs)",
                 "yes" if self.shunt_address else "no",
                 "yes" if self.mppt_address else "no",
-                self.scan_interval,
-                self.stale_timeout,
+                self._scheduler.base_window,
+                self._scheduler.window_max,
+                self._scheduler.idle,
+                self._scheduler.stale_after(self.stale_timeout),
             )
 
     # ====================== PUBLIC API ======================
@@ -104,6 +195,7 @@ class VictronManager:
         logger.info("🔋 VictronManager stopping...")
         self._running = False
         self._stop_event.set()
+        self._wake_loop()
 
         if self._ble_thread and self._ble_thread.is_alive():
             self._ble_thread.join(timeout=3.0)
@@ -118,6 +210,24 @@ class VictronManager:
             s["last_update"] = self.state["last_update"]
         return s
 
+    def get_stats(self):
+        """Advertisement counters: seen (after address filter), deduped, decoded."""
+        stats = dict(self.stats)
+        stats.update(
+            cycles=self._scheduler.cycles,
+            incomplete_windows=self._scheduler.incomplete,
+            window_s=self._scheduler.window,
+            idle_s=self._scheduler.idle_interval(),
+            viewing=self._scheduler.viewing(),
+        )
+        return stats
+
+    def note_viewer(self):
+        """A dashboard is looking at the power tile — scan near-continuously for a while."""
+        if self._scheduler.note_viewer():
+            logger.debug("🔋 Power tile in view — shortening BLE idle to %.1fs", self._scheduler.viewing_idle)
+            self._wake_loop()
+
     def reset_daily_generation(self):
         """Called by PhaseManager when entering Night phase.
         With real Victron MPPT we just rely on its native yield_today — no-op here.
@@ -129,7 +239,19 @@ class VictronManager:
     def _is_stale(self):
         if not self._last_data_ts:
             return True
-        return (time.time() - self._last_data_ts) > self.stale_timeout
+        return (time.time() - self._last_data_ts) > self._scheduler.stale_after(self.stale_timeout)
+
+    def _wake_loop(self):
+        """Thread-safe: end the current idle gap / scan window early."""
+        loop, wake = self._loop, self._wake
+        if loop is None or wake is None:
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+            if self._window_done is not None and not self._running:
+                loop.call_soon_threadsafe(self._window_done.set)
+        except RuntimeError:
+            pass  # loop already closed
 
     def _ble_thread_target(self):
         """Dedicated thread with its own asyncio loop (required for BLE + Flask)."""
@@ -146,72 +268,200 @@ class VictronManager:
                 pass
 
     async def _ble_loop(self, loop):
-        """Main scanning loop using victron_ble.Scanner."""
-        try:
-            from victron_ble.scanner import Scanner
-        except ImportError as e:
-            logger.error("🔋 victron_ble (or bleak) not importable: %s — BLE scanning unavailable", e)
-            return
-
-        scanner = Scanner()
-
-        # Supply keys for the devices we care about
-        for addr, key in self.device_keys.items():
+        """Main scanning loop: filtered BLE scanner feeding _handle_advertisement."""
+        if self.scanner_factory is None:
             try:
-                scanner.add_device_key(addr, key)
-            except Exception as ex:
-                logger.warning("🔋 Failed to add key for %s: %s", addr, ex)
+                from bleak import BleakScanner  # noqa: F401 — availability check
+            except ImportError as e:
+                logger.error("🔋 bleak not importable: %s — BLE scanning unavailable", e)
+                return
 
-        def _on_advertisement(ble_device, advertisement):
-            # This callback runs in the BLE thread / event loop
+        def _on_detection(ble_device, advertisement):
+            # Runs in the BLE event loop for every advertisement BlueZ forwards —
+            # keep the reject path to a set lookup.
+            addr = (ble_device.address or "").lower()
+            if addr not in self._addresses:
+                return
+            raw = advertisement.manufacturer_data.get(VICTRON_MANUFACTURER_ID)
+            if not raw:
+                return
             try:
-                self._handle_advertisement(ble_device, advertisement)
+                self._handle_advertisement(addr, raw)
             except Exception as ex:
-                logger.debug("🔋 Victron parse error for %s: %s", getattr(ble_device, 'address', '?'), ex)
+                logger.debug("🔋 Victron parse error for %s: %s", addr, ex)
+
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._window_done = asyncio.Event()
+        scanner = None
 
         try:
-            await scanner.start(callback=_on_advertisement)
             logger.info("🔋 Victron BLE scanner active — listening for %s device(s)", len(self.device_keys))
 
-            # Keep the scanner alive until stop is requested
             while self._running and not self._stop_event.is_set():
-                await asyncio.sleep(0.5)
-                # Opportunistic staleness + emit check (cheap)
-                self._emit_if_needed()
+                window = self._scheduler.window
+                self._window_seen = set()
+                self._window_done.clear()
+
+                scanner = await self._start_scanner(_on_detection, scanner)
+                try:
+                    await asyncio.wait_for(self._window_done.wait(), timeout=window)
+                except asyncio.TimeoutError:
+                    pass
+                await scanner.stop()
+
+                complete = self._window_seen >= self._addresses
+                self._scheduler.end_window(complete, self._is_stale())
+                if not complete:
+                    logger.debug(
+                        "🔋 Victron window %.1fs missed %s — next window %.1fs",
+                        window, ", ".join(sorted(self._addresses - self._window_seen)), self._scheduler.window,
+                    )
+
+                # One emit per cycle: fresh values, staleness flips, or heartbeat
+                self._emit_if_needed(force=self._dirty)
+                self._dirty = False
+
+                if not self._running:
+                    break
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self._scheduler.idle_interval())
+                except asyncio.TimeoutError:
+                    pass
 
-            await scanner.stop()
-            logger.debug("🔋 Victron scanner stopped cleanly")
+            logger.debug(
+                "🔋 Victron scanner stopped cleanly (seen=%d deduped=%d decoded=%d)",
+                self.stats["seen"], self.stats["deduped"], self.stats["decoded"],
+            )
 
         except Exception as e:
             logger.error("🔋 Victron scanner error: %s", e, exc_info=True)
 
-    def _handle_advertisement(self, ble_device, advertisement):
-        """Parse one Victron advertisement and fold it into self.state."""
-        addr = (ble_device.address or "").lower()
+    async def _start_scanner(self, callback, scanner=None):
+        """Start a BleakScanner, preferring a BlueZ passive scan that only forwards
+        Victron manufacturer data. Falls back to a plain active scan.
+        An existing scanner is simply restarted for the next window."""
+        if scanner is not None:
+            await scanner.start()
+            return scanner
+
+        if self.scanner_factory is not None:
+            scanner = self.scanner_factory(callback)
+            await scanner.start()
+            return scanner
+
+        from bleak import BleakScanner
+
+        try:
+            from bleak.assigned_numbers import AdvertisementDataType
+            from bleak.backends.bluezdbus.advertisement_monitor import OrPattern
+
+            pattern = OrPattern(0, AdvertisementDataType.MANUFACTURER_SPECIFIC_DATA, VICTRON_ADV_PREFIX)
+            scanner = BleakScanner(
+                detection_callback=callback,
+                scanning_mode="passive",
+                bluez={"or_patterns": [pattern]},
+            )
+            await scanner.start()
+            logger.debug("🔋 Victron BLE passive scan with manufacturer filter")
+            return scanner
+        except Exception as e:
+            logger.debug("🔋 Passive BLE scan unavailable (%s) — using active scan", e)
+
+        scanner = BleakScanner(detection_callback=callback)
+        await scanner.start()
+        return scanner
+
+    def _parser_for(self, addr, raw):
+        """Per-address parser cache — device type detection and key setup run once."""
+        parser = self._parsers.get(addr)
+        if parser is None:
+            if self.parser_factory is not None:
+                parser = self.parser_factory(addr, raw)
+            else:
+                from victron_ble.devices import detect_device_type
+
+                device_type = detect_device_type(raw)
+                parser = device_type(self.device_keys[addr]) if device_type is not None else None
+            if parser is None:
+                return None
+            self._parsers[addr] = parser
+        return parser
+
+    def _accessor_plan(self, parsed):
+        """Resolve which getters a parsed data class offers (once per class).
+
+        Each value is the ordered tuple of getters the class has; _call() takes
+        the first that returns a value, since a getter can exist and still
+        return None for a given device.
+        """
+        cls = type(parsed)
+        plan = self._accessor_plans.get(cls)
+        if plan is None:
+            def present(*names):
+                return tuple(n for n in names if hasattr(parsed, n))
+
+            plan = {
+                "battery": hasattr(parsed, "get_soc"),
+                "solar": hasattr(parsed, "get_battery_voltage") or hasattr(parsed, "get_pv_power"),
+                "battery_voltage": present("get_battery_voltage"),
+                "solar_current": present("get_battery_current", "get_pv_current", "get_current"),
+                "yield_today": present("get_yield_today", "get_yield_today_kwh"),
+                "charge_state": present("get_charge_state"),
+                "solar_power": present("get_solar_power"),
+            }
+            self._accessor_plans[cls] = plan
+        return plan
+
+    @staticmethod
+    def _call(parsed, names):
+        """First non-None result of the getters in `names` (failing getters are skipped)."""
+        for name in names:
+            try:
+                value = getattr(parsed, name)()
+            except Exception:
+                continue
+            if value is not None:
+                return value
+        return None
+
+    def _handle_advertisement(self, addr, raw):
+        """Decode one Victron advertisement (raw manufacturer data) into self.state."""
         if addr not in self.device_keys:
             return
+        self.stats["seen"] += 1
+        self._window_seen.add(addr)
+        if self._window_done is not None and self._window_seen >= self._addresses:
+            self._window_done.set()
+
+        now = time.time()
+        digest = hash(raw)
+        last = self._recent.get(addr)
+        if last is not None and last[0] == digest and (now - last[1]) < self.dedupe_window:
+            # Byte-identical repeat: device is alive, values unchanged — skip decryption
+            self.stats["deduped"] += 1
+            self._last_data_ts = now
+            return
+        self._recent[addr] = (digest, now)
 
         try:
-            from victron_ble.devices import detect_device_type
-            device_type = detect_device_type(advertisement)
-            if device_type is None:
+            parser = self._parser_for(addr, raw)
+            if parser is None:
                 return
-
-            # Instantiate parser with the correct key
-            key = self.device_keys[addr]
-            parser = device_type(key)
-            parsed = parser.parse(advertisement)
-
+            parsed = parser.parse(raw)
         except Exception as e:
             logger.debug("🔋 Victron advertisement handling failed for %s: %s", addr, e)
             return
 
-        now = time.time()
+        self.stats["decoded"] += 1
+        plan = self._accessor_plan(parsed)
+
         self._last_data_ts = now
         changed = False
 
         # --- SmartShunt / BMV (battery monitor) ---
-        if hasattr(parsed, "get_soc"):
+        if plan["battery"]:
             soc = parsed.get_soc()
             if soc is not None and soc != self.state.get("soc"):
                 self.state["soc"] = round(float(soc), 1)
@@ -241,9 +491,9 @@ class VictronManager:
                 changed = True
 
         # --- MPPT SmartSolar / BlueSolar ---
-        if hasattr(parsed, "get_battery_voltage") or hasattr(parsed, "get_pv_power"):
+        if plan["solar"]:
             # Prefer battery side values when available
-            bv = getattr(parsed, "get_battery_voltage", lambda: None)()
+            bv = self._call(parsed, plan["battery_voltage"])
             if bv is not None:
                 # Only overwrite if we don't already have a fresher shunt voltage
                 if self.state.get("voltage") is None:
@@ -252,30 +502,15 @@ class VictronManager:
 
             # Solar current (this is the "current generated" the user wants)
             # Many MPPT parsers expose get_battery_current() for the charge current
-            sc = None
-            for meth in ("get_battery_current", "get_pv_current", "get_current"):
-                if hasattr(parsed, meth):
-                    try:
-                        val = getattr(parsed, meth)()
-                        if val is not None:
-                            sc = float(val)
-                            break
-                    except:
-                        pass
-            if sc is not None and sc != self.state.get("solar_current_a"):
-                self.state["solar_current_a"] = round(sc, 2)
-                changed = True
+            sc = self._call(parsed, plan["solar_current"])
+            if sc is not None:
+                sc = float(sc)
+                if sc != self.state.get("solar_current_a"):
+                    self.state["solar_current_a"] = round(sc, 2)
+                    changed = True
 
             # Yield today — authoritative "total generated for the day"
-            y = None
-            for meth in ("get_yield_today", "get_yield_today_kwh"):
-                if hasattr(parsed, meth):
-                    try:
-                        y = getattr(parsed, meth)()
-                        if y is not None:
-                            break
-                    except:
-                        pass
+            y = self._call(parsed, plan["yield_today"])
             if y is not None:
                 kwh = float(y) / 1000.0 if y > 10 else float(y)  # library sometimes returns Wh
                 if kwh != self.state.get("yield_today_kwh"):
@@ -283,12 +518,7 @@ class VictronManager:
                     changed = True
 
             # Charge state (0-9 or enum in newer parsers)
-            cs = None
-            if hasattr(parsed, "get_charge_state"):
-                try:
-                    cs = parsed.get_charge_state()
-                except:
-                    pass
+            cs = self._call(parsed, plan["charge_state"])
             if cs is not None:
                 mapped = self._map_charge_state(cs)
                 if mapped != self.state.get("charge_state"):
@@ -296,20 +526,16 @@ class VictronManager:
                     changed = True
 
             # Also capture raw solar power if present (nice for future)
-            sp = None
-            if hasattr(parsed, "get_solar_power"):
-                try:
-                    sp = parsed.get_solar_power()
-                except:
-                    pass
+            sp = self._call(parsed, plan["solar_power"])
             if sp is not None and sp != self.state.get("solar_power_w"):
                 self.state["solar_power_w"] = round(float(sp), 0)
                 changed = True
 
         self.state["last_update"] = datetime.now(timezone.utc).isoformat()
 
-        if changed or (now - self._last_emit_ts) > (self.scan_interval * 3):
-            self._emit_if_needed(force=True)
+        # Emitted at the end of the scan window, not per advertisement
+        if changed:
+            self._dirty = True
 
     def _map_charge_state(self, raw):
         """Map Victron charge state numbers / enums to friendly strings."""
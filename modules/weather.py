@@ -0,0 +1,278 @@
+# modules/weather.py
+"""
+Server-side weather cache shared by every dashboard client.
+
+The Pi fetches one open-meteo forecast per location cell (lat/lon rounded to
+`cell_size_deg`) and refresh interval over a pooled keep-alive session, keeps
+the last good response on disk so a cold boot without internet still has
+something to show, and hands it out to clients via:
+
+  - GET /api/weather  (ETag + Cache-Control stale-while-revalidate)
+  - 'weather_update'  Socket.IO push whenever a new forecast lands
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("pccs")
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FORECAST_PARAMS = {
+    "daily": "temperature_2m_max,temperature_2m_min,weathercode",
+    "current_weather": "true",
+    "timezone": "auto",
+}
+
+
+def _encode_body(entry) -> bytes:
+    """The /api/weather body: the forecast and where/when it is from, nothing time-dependent."""
+    return json.dumps(
+        {"data": entry["data"], "cell": entry["cell"], "fetched_at": entry["fetched_at"]},
+        separators=(',', ':'),
+    ).encode('utf-8')
+
+
+class WeatherManager:
+    def __init__(self, config, socketio, gps=None):
+        self.config = config
+        self.socketio = socketio
+        self.gps = gps
+
+        # ====================== CONFIG ======================
+        self.enabled = config.getboolean('weather', 'enabled', fallback=True)
+        self.base_url = config.get('weather', 'base_url', fallback='https://api.open-meteo.com/v1/forecast')
+        self.refresh_interval = config.getint('weather', 'refresh_interval', fallback=3600)
+        self.retry_interval = config.getint('weather', 'retry_interval', fallback=300)
+        self.stale_while_revalidate = config.getint('weather', 'stale_while_revalidate', fallback=86400)
+        self.cell_size = config.getfloat('weather', 'cell_size_deg', fallback=0.1)
+        self.timeout = config.getfloat('weather', 'timeout', fallback=10.0)
+        self.check_interval = config.getfloat('weather', 'check_interval', fallback=60.0)
+
+        cache_file = config.get('weather', 'cache_file', fallback='config/weather_cache.json')
+        self.cache_path = cache_file if os.path.isabs(cache_file) else os.path.join(_BASE_DIR, cache_file)
+
+        # Internal
+        self._session = None
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        self._entry = None          # {"cell": [lat, lon], "fetched_at": ts, "data": {...}}
+        self._body = b""
+        self._etag = ""
+        self._last_attempt = 0.0
+        self._last_error = None
+
+        self._load_cache()
+
+        logger.info(
+            "🌦️ WeatherManager initialized (refresh=%ds, cell=%.2f°, cache=%s)",
+            self.refresh_interval, self.cell_size, "warm" if self._entry else "cold",
+        )
+
+    # ====================== PUBLIC API ======================
+
+    def start(self):
+        if not self.enabled or self._running:
+            return
+        self._running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="Weather")
+        self._thread.start()
+        logger.debug("🌦️ Weather refresh thread started")
+
+    def stop(self):
+        self._running = False
+        self._stop_event.set()
+        if self._session is not None:
+            try:
+                self._session.close()
+            except Exception:
+                pass
+
+    def get_payload(self) -> dict:
+        """Cached forecast plus freshness metadata (never touches the network)."""
+        with self._lock:
+            entry = self._entry
+        if not entry:
+            return {"data": None, "cell": None, "fetched_at": None, "age_s": None, "stale": True}
+        age = max(0.0, time.time() - entry["fetched_at"])
+        return {
+            "data": entry["data"],
+            "cell": entry["cell"],
+            "fetched_at": entry["fetched_at"],
+            "age_s": int(age),
+            "stale": age >= self.refresh_interval or entry["cell"] != self._current_cell(),
+        }
+
+    def http_response(self):
+        """Return (body, etag, cache_control) for /api/weather.
+
+        A stale entry is still served immediately; revalidation happens in the
+        background so a slow or dead uplink never blocks the dashboard. The body
+        is always data/cell/fetched_at (no forecast yet: all null); freshness is
+        left to the Cache-Control header.
+        """
+        payload = self.get_payload()
+        if payload["stale"]:
+            self.revalidate_async()
+
+        with self._lock:
+            body, etag = self._body, self._etag
+        if not body:
+            body = _encode_body(payload)
+            etag = hashlib.sha1(body).hexdigest()
+
+        max_age = 0
+        if payload["age_s"] is not None and not payload["stale"]:
+            max_age = max(0, self.refresh_interval - payload["age_s"])
+        cache_control = f"public, max-age={max_age}, stale-while-revalidate={self.stale_while_revalidate}"
+        return body, etag, cache_control
+
+    def revalidate_async(self):
+        if not self.enabled or self._fetch_lock.locked():
+            return
+        threading.Thread(target=self.refresh, daemon=True, name="WeatherRevalidate").start()
+
+    def refresh(self, force: bool = False) -> bool:
+        """Fetch a new forecast if the cached one is old or for another cell.
+
+        Single-flight: concurrent callers return immediately while a fetch is
+        in progress. Returns True when a new forecast was stored.
+        """
+        if not self._fetch_lock.acquire(blocking=False):
+            return False
+        try:
+            cell = self._current_cell()
+            if cell is None:
+                return False
+            if not force and not self._needs_fetch(cell):
+                return False
+
+            self._last_attempt = time.time()
+            data = self._fetch(cell)
+            if data is None:
+                return False
+
+            entry = {"cell": cell, "fetched_at": time.time(), "data": data}
+            self._store(entry)
+            self._save_cache(entry)
+            logger.info("🌦️ Weather updated for cell %.2f, %.2f", cell[0], cell[1])
+            self._emit()
+            return True
+        finally:
+            self._fetch_lock.release()
+
+    # ====================== INTERNAL ======================
+
+    def _loop(self):
+        while self._running and not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.debug(f"Weather refresh error: {e}")
+            self._stop_event.wait(self.check_interval)
+
+    def _needs_fetch(self, cell) -> bool:
+        now = time.time()
+        with self._lock:
+            entry = self._entry
+        if entry and entry["cell"] == cell and now - entry["fetched_at"] < self.refresh_interval:
+            return False
+        # Back off after a failure so an offline campsite doesn't hammer the uplink
+        if self._last_error and now - self._last_attempt < self.retry_interval:
+            return False
+        return True
+
+    def _current_cell(self):
+        lat = lon = None
+        if self.gps is not None:
+            try:
+                state = self.gps.get_state()
+                if state.get("fix_quality", 0) >= 1:
+                    lat, lon = state.get("latitude"), state.get("longitude")
+            except Exception:
+                pass
+            if lat is None or lon is None:
+                try:
+                    lat, lon = self.gps.get_fallback_coords()
+                except Exception:
+                    pass
+        if lat is None or lon is None:
+            lat = self.config.getfloat('gps', 'fallback_latitude', fallback=None)
+            lon = self.config.getfloat('gps', 'fallback_longitude', fallback=None)
+        if lat is None or lon is None:
+            return None
+        size = self.cell_size if self.cell_size and self.cell_size > 0 else 0.1
+        return [round(round(float(lat) / size) * size, 4), round(round(float(lon) / size) * size, 4)]
+
+    def _get_session(self):
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=1)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session = session
+        return self._session
+
+    def _fetch(self, cell):
+        params = dict(FORECAST_PARAMS, latitude=cell[0], longitude=cell[1])
+        try:
+            resp = self._get_session().get(self.base_url, params=params, timeout=self.timeout)
+            if resp.status_code != 200:
+                raise RuntimeError(f"HTTP {resp.status_code}")
+            data = resp.json()
+            self._last_error = None
+            return data
+        except Exception as e:
+            if self._last_error is None:
+                logger.info(f"🌦️ Weather fetch failed (serving cached forecast): {e}")
+            self._last_error = str(e)
+            return None
+
+    def _store(self, entry):
+        body = _encode_body(entry)
+        with self._lock:
+            self._entry = entry
+            self._body = body
+            self._etag = hashlib.sha1(body).hexdigest()
+
+    def _emit(self):
+        if not self.socketio:
+            return
+        try:
+            self.socketio.emit('weather_update', self.get_payload())
+        except Exception as e:
+            logger.debug(f"weather_update emit failed: {e}")
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if isinstance(entry, dict) and entry.get("data") and entry.get("cell"):
+                entry["fetched_at"] = float(entry.get("fetched_at", 0))
+                self._store(entry)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable weather cache {self.cache_path}: {e}")
+
+    def _save_cache(self, entry):
+        tmp = f"{self.cache_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp, self.cache_path)
+        except Exception as e:
+            logger.error(f"Failed to save weather cache: {e}")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Run arduino.ino on this machine behind a pseudo-terminal.
+
+Builds arduino/host/fwhost (the sketch compiled against the stub core) and
+starts it; `path` is then usable anywhere a serial port is, including
+ArduinoManager's serial_ports. `stats()` returns the harness's loop timing,
+command throughput and ramp accuracy counters.
+
+    python scripts/firmware_host.py bench         # end-to-end latency via ArduinoManager
+    python scripts/firmware_host.py serve --link /tmp/pccs-arduino
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+HOST_DIR = ROOT / "arduino" / "host"
+CXXFLAGS = ["-std=gnu++11", "-O2", "-Wall", "-Wno-unused-function"]
+
+
+def find_compiler() -> str | None:
+    return os.environ.get("CXX") or shutil.which("g++") or shutil.which("clang++")
+
+
+def build(output: Path | None = None) -> Path:
+    """Compile fwhost (skipped when the binary is newer than its sources)."""
+    cxx = find_compiler()
+    if not cxx:
+        raise RuntimeError("no C++ compiler found (set CXX)")
+    output = output or HOST_DIR / "fwhost"
+    sources = [HOST_DIR / n for n in ("fwhost.cpp", "host.cpp", "Arduino.h")] + [ROOT / "arduino" / "arduino.ino"]
+    if output.exists() and all(output.stat().st_mtime >= s.stat().st_mtime for s in sources):
+        return output
+    subprocess.run([cxx, "-I.", *CXXFLAGS, "-o", str(output), "fwhost.cpp", "host.cpp"],
+                   cwd=HOST_DIR, check=True, capture_output=True, text=True)
+    return output
+
+
+class FirmwareHost:
+    def __init__(self, link: str | None = None, binary: Path | None = None, idle_us: int = 50):
+        self.link = link
+        self.binary = binary
+        self.idle_us = idle_us
+        self.path = None
+        self._proc = None
+        self._tmp = None
+        self._stats_path = None
+
+    def start(self) -> str:
+        binary = self.binary or build()
+        self._tmp = tempfile.TemporaryDirectory(prefix="fwhost-")
+        self._stats_path = os.path.join(self._tmp.name, "stats.json")
+        cmd = [str(binary), "--stats", self._stats_path, "--idle-us", str(self.idle_us)]
+        if self.link:
+            cmd += ["--link", self.link]
+        self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+        line = self._proc.stdout.readline().strip()
+        if not line.startswith("PTY "):
+            self.stop()
+            raise RuntimeError(f"fwhost did not start: {line!r}")
+        self.path = self.link or line[4:]
+        return self.path
+
+    def stats(self, timeout: float = 2.0) -> dict:
+        before = os.path.getmtime(self._stats_path) if os.path.exists(self._stats_path) else 0
+        if self._proc.poll() is not None:
+            before = None  # exited: it wrote stats on the way out
+        else:
+            self._proc.send_signal(signal.SIGUSR1)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if os.path.exists(self._stats_path) and os.path.getmtime(self._stats_path) != before:
+                with open(self._stats_path) as f:
+                    return json.load(f)
+            time.sleep(0.01)
+        raise TimeoutError("fwhost did not write stats")
+
+    def wait(self, timeout: float | None = None):
+        self._proc.wait(timeout)
+
+    def stop(self):
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                self._proc.terminate()
+                try:
+                    self._proc.wait(2)
+                except subprocess.TimeoutExpired:
+                    self._proc.kill()
+            self._proc.stdout.close()
+            self._proc = None
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    return f"p50 {pick(0.5):.2f} ms · p99 {pick(0.99):.2f} ms · max {samples[-1]:.2f} ms"
+
+
+def bench(rounds: int, command_delay: float | None):
+    sys.path.insert(0, str(ROOT))
+    from modules.arduino import ArduinoManager
+    from modules.config import PccsConfig
+
+    with FirmwareHost() as host:
+        cfg = PccsConfig()
+        cfg.config.set("arduino", "serial_ports", host.path)
+        cfg.config.set("arduino", "init_delay", "0")
+        if command_delay is not None:
+            cfg.config.set("arduino", "command_delay", str(command_delay))
+        arduino = ArduinoManager(cfg)
+        if not arduino.init_serial():
+            raise SystemExit("ArduinoManager could not open the harness")
+
+        latencies = []
+        for i in range(rounds):
+            t0 = time.perf_counter()
+            reply = arduino.send_command(f"GET {2 + i % 12}", expect="VALUE")
+            latencies.append((time.perf_counter() - t0) * 1000)
+            if not reply:
+                print(f"round {i}: no reply")
+        print(f"GET round trip ({rounds}x, command_delay {arduino.COMMAND_DELAY}s): {_percentiles(latencies)}")
+
+        t0 = time.perf_counter()
+        for pin in range(2, 14):
+            arduino.ramp(pin, 255, 200)
+        print(f"12 RAMPs sent in {(time.perf_counter() - t0) * 1000:.1f} ms")
+        time.sleep(0.5)
+        arduino.cleanup()
+        print(json.dumps(host.stats(), indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    serve = sub.add_parser("serve", help="run the harness until interrupted")
+    serve.add_argument("--link", help="symlink to create for the PTY (e.g. /tmp/pccs-arduino)")
+    b = sub.add_parser("bench", help="end-to-end latency through ArduinoManager (needs pyserial)")
+    b.add_argument("--rounds", type=int, default=100)
+    b.add_argument("--command-delay", type=float, default=None,
+                   help="override [arduino] command_delay for the run")
+    args = parser.parse_args()
+
+    if args.cmd == "bench":
+        bench(args.rounds, args.command_delay)
+        return
+    with FirmwareHost(link=args.link) as host:
+        print(f"Firmware running on {host.path} (Ctrl-C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            try:
+                host.wait(0.5)  # a terminal Ctrl-C reaches fwhost too
+            except subprocess.TimeoutExpired:
+                pass
+            print(json.dumps(host.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Replay the runtime's input journal and report what the engine did with it.
+
+Reads `path` plus its rotated backups (oldest first), feeds every event
+through a fresh WorldStore + Reconciler compiled from the current
+pccs.conf, and prints per-event reconcile latency. Nothing touches the
+hardware; a week of events replays in seconds.
+
+    python scripts/replay_journal.py                          # [journal] path from pccs.conf
+    python scripts/replay_journal.py logs/input_journal.bin --commands
+    python scripts/replay_journal.py --json > replay.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", help="journal file (default: [journal] path)")
+    parser.add_argument("--only", action="store_true", help="replay just this file, not its backups")
+    parser.add_argument("--commands", action="store_true", help="print every command issued")
+    parser.add_argument("--slowest", type=int, default=5, help="how many of the slowest events to list")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(ROOT))
+    from engine.config_compile import compile_config
+    from engine.journal import journal_files
+    from engine.replay import replay_files
+    from modules.config import PccsConfig
+
+    config = PccsConfig()
+    path = args.path or str(ROOT / config.get("journal", "path", fallback="logs/input_journal.bin"))
+    files = [path] if args.only else journal_files(path)
+    if not files:
+        sys.exit(f"no journal at {path}")
+
+    report = replay_files(files, compile_config(config))
+    summary = report.summary(slowest=args.slowest)
+
+    if args.commands:
+        for cmd in report.commands:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(cmd.t))
+            mode = f" {cmd.mode}" if cmd.mode else ""
+            ramp = f" over {cmd.ramp_ms} ms" if cmd.ramp_ms else ""
+            print(f"{stamp}  {cmd.output:<6} {cmd.name} → {cmd.value}{mode}{ramp}  [{cmd.trigger}]")
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    lat = summary["reconcile_us"]
+    events = ", ".join(f"{n} {k}" for k, n in sorted(summary["events"].items()))
+    print(f"{len(files)} file(s), {summary['span_s'] / 3600:.1f} h of inputs replayed in {summary['elapsed_s']:.2f} s")
+    print(f"events: {events or 'none'}" + (f" ({summary['skipped']} skipped)" if summary["skipped"] else ""))
+    print(f"commands: {summary['commands']}")
+    print(f"reconcile: p50 {lat['p50']} µs · p95 {lat['p95']} µs · p99 {lat['p99']} µs · max {lat['max']} µs")
+    for item in summary["slowest"]:
+        print(f"  {item['us']:>9} µs  {item['event']:<10} {item['at']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# sim/__init__.py
+"""
+Headless hardware simulator: run the whole PCCS stack without the camper.
+
+With `[simulation] enabled = true`, app.py starts a `Simulation` before any
+manager is built. It brings up stand-ins for every piece of hardware and
+points the loaded config at them (in memory only, pccs.conf is untouched):
+
+  * Arduino   — sim.arduino.ArduinoEmulator on a pseudo-terminal
+  * GPS       — sim.nmea.NmeaFeeder playing a GPX track on a pseudo-terminal
+  * GPIO      — sim.gpio.GpioSim: gpiozero MockFactory for relays and reeds
+  * 1-Wire    — sim.onewire.FakeW1Bus: a sysfs-shaped temp directory
+  * Victron   — sim.victron.VictronSim: advertisements via VictronManager's scanner seam
+  * Sonos     — sim.sonos.SonosSim: SSDP announcements + fake speaker handles
+
+The serial devices and 1-Wire bus are reached through the normal code paths
+(pyserial, OneWireBus); Victron and Sonos need `attach_victron()` /
+`attach_sonos()` on their managers before `start()`.
+"""
+
+import logging
+import os
+import socket
+import tempfile
+
+logger = logging.getLogger("pccs")
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TRACK = os.path.join(_BASE_DIR, 'sim', 'tracks', 'sample.gpx')
+DEFAULT_OUTSIDE_PROBE = '28-000000000a01'
+WATER_DIVIDER_OHMS = 100.0    # fixed resistor under the tank sender (see SensorManager._calculate_water)
+
+
+def _free_udp_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class Simulation:
+    def __init__(self, config):
+        self.config = config
+
+        # ====================== CONFIG ======================
+        self.track_path = config.get('simulation', 'gpx_track', fallback='') or DEFAULT_TRACK
+        if not os.path.isabs(self.track_path):
+            self.track_path = os.path.join(_BASE_DIR, self.track_path)
+        self.track_speed = config.getfloat('simulation', 'track_speed', fallback=1.0)
+        self.arduino_link = config.get('simulation', 'arduino_link', fallback='') or None
+        self.gps_link = config.get('simulation', 'gps_link', fallback='') or None
+        self.reed_activity = config.getfloat('simulation', 'reed_activity', fallback=0.0)
+        self.water_percent = config.getfloat('simulation', 'water_percent', fallback=70.0)
+        self.sonos_names = config.getlist('simulation', 'sonos_speakers', fallback='Kitchen, Awning')
+        self.sonos_latency = config.getfloat('simulation', 'sonos_latency', fallback=0.03)
+
+        self.arduino = None
+        self.gps = None
+        self.gpio = None
+        self.onewire = None
+        self.victron = None
+        self.sonos = None
+        self._ports = []
+        self._tmp = None
+
+    # ====================== PUBLIC API ======================
+
+    def start(self):
+        from sim.arduino import ArduinoEmulator
+        from sim.nmea import GpxTrack, NmeaFeeder
+        from sim.onewire import FakeW1Bus
+        from sim.sonos import SonosSim
+        from sim.victron import SIM_KEY, VictronSim
+
+        logger.warning("🧪 SIMULATION MODE — no real hardware will be touched")
+        self._tmp = tempfile.TemporaryDirectory(prefix="pccs-sim-")
+
+        # Arduino on a PTY; the emulator is ready at once, so no reset wait
+        port = self._open_port(self.arduino_link)
+        self.arduino = ArduinoEmulator(port, baud=self.config.getint('arduino', 'baud_rate', fallback=500000))
+        self.arduino.set_analog(self.config.getint('arduino analog', 'water_pin', fallback=1),
+                                self._water_adc(self.water_percent))
+        self.arduino.start()
+        self._override('arduino', serial_ports=port.path, init_delay='0')
+
+        port = self._open_port(self.gps_link)
+        self.gps = NmeaFeeder(port, GpxTrack.load(self.track_path),
+                              baud=self.config.getint('gps', 'baud_rate', fallback=9600), speed=self.track_speed)
+        self.gps.start()
+        self._override('gps', serial_ports=port.path)
+
+        try:
+            from sim.gpio import GpioSim
+        except ImportError as e:
+            logger.error(f"🧪 gpiozero not importable ({e}) — relays and reeds stay unavailable")
+        else:
+            self.gpio = GpioSim(self.config, activity=self.reed_activity)
+            self.gpio.install()
+            self.gpio.start()
+
+        outside = (self.config.get('sensors', 'outside_temp_sensor', fallback='') or '').strip() or DEFAULT_OUTSIDE_PROBE
+        probes = {outside: 16.0}
+        fridge = (self.config.get('sensors', 'fridge_temp_sensor', fallback='') or '').strip()
+        if fridge:
+            probes[fridge] = 3.5
+        self.onewire = FakeW1Bus(probes, root=os.path.join(self._tmp.name, 'w1'))
+        self.onewire.start()
+        self._override('sensors', w1_root=self.onewire.root)
+
+        shunt = (self.config.get('victron', 'shunt_address', fallback='') or '').strip()
+        mppt = (self.config.get('victron', 'mppt_address', fallback='') or '').strip()
+        self.victron = VictronSim(**{k: v for k, v in (('shunt_address', shunt), ('mppt_address', mppt)) if v})
+        self._override('victron', shunt_address=self.victron.shunt_address, shunt_key=SIM_KEY,
+                       mppt_address=self.victron.mppt_address, mppt_key=SIM_KEY)
+
+        ssdp_port = _free_udp_port()
+        self.sonos = SonosSim(self.sonos_names, group='127.0.0.1', port=ssdp_port, latency=self.sonos_latency)
+        self._override('sonos', interface_addr='', ssdp_group='127.0.0.1', ssdp_port=str(ssdp_port),
+                       discovery_timeout='1', registry_file=os.path.join(self._tmp.name, 'sonos_speakers.json'))
+        self.sonos.start()
+
+    def attach_victron(self, victron):
+        if self.victron is not None:
+            self.victron.attach(victron)
+
+    def attach_sonos(self, sonos):
+        if self.sonos is not None:
+            self.sonos.attach(sonos)
+
+    def stop(self):
+        for part in (self.sonos, self.gpio, self.gps, self.arduino, self.onewire):
+            if part is not None:
+                try:
+                    part.stop()
+                except Exception as e:
+                    logger.debug(f"Simulation stop: {e}")
+        for port in self._ports:
+            port.close()
+        self._ports.clear()
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
+
+    # ====================== INTERNAL ======================
+
+    def _open_port(self, link):
+        from sim.serialport import PtyPort
+        port = PtyPort(link)
+        port.open()
+        self._ports.append(port)
+        return port
+
+    def _override(self, section: str, **values):
+        raw = self.config.config
+        if not raw.has_section(section):
+            raw.add_section(section)
+        for key, value in values.items():
+            raw.set(section, key, value)
+
+    def _water_adc(self, percent: float) -> float:
+        """ADC reading for a tank `percent` full, inverting SensorManager's conversion."""
+        r_empty = self.config.getfloat('sensors', 'water_resistance_empty', fallback=240.0)
+        r_full = self.config.getfloat('sensors', 'water_resistance_full', fallback=33.0)
+        sender = r_empty - (r_empty - r_full) * max(0.0, min(100.0, percent)) / 100
+        return 1023.0 * sender / (WATER_DIVIDER_OHMS + sender)
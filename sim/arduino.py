@@ -0,0 +1,250 @@
+# sim/arduino.py
+"""
+Python stand-in for arduino/arduino.ino on a pseudo-terminal.
+
+Speaks the same line protocol (SET / RAMP [C] [T] / GET / GETALL / ANALOG /
+GETVCC) with the sketch's parsing rules, and reproduces its timing:
+
+  * ramps use the firmware's 16.16 fixed-point steps on a 1 ms tick (and the
+    CIE table for a trailing "C"), evaluated lazily from the command's
+    arrival time, so GET mid-ramp reads what the board would report;
+  * every command and reply costs its bytes on the wire at `baud`, so a
+    host round trip takes as long as it does over USB serial;
+  * ANALOG / GETVCC answer from a rolling average with a little ADC noise.
+
+scripts/firmware_host.py runs the real sketch instead, when a C++ compiler
+is around and byte-exact firmware behaviour matters more than convenience.
+"""
+
+import logging
+import random
+import threading
+import time
+
+from modules.brightness import CIE_PWM
+
+logger = logging.getLogger("pccs")
+
+PWM_PINS = range(2, 14)
+ANALOG_PINS = range(0, 6)
+CMD_BUF_SIZE = 48
+RAMP_TICK_MS = 1
+LOOP_LATENCY_S = 30e-6     # one pass of loop() between the last byte and the reply
+
+
+def _cie_level(pwm: int) -> int:
+    """Lowest CIE level whose duty is at least `pwm` (cieLevel in the sketch)."""
+    lo, hi = 0, 255
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if CIE_PWM[mid] < pwm:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _c_div(a: int, b: int) -> int:
+    """Integer division truncating toward zero, like C."""
+    q = abs(a) // abs(b)
+    return q if (a >= 0) == (b >= 0) else -q
+
+
+def _skip_spaces(text: str, i: int) -> int:
+    while i < len(text) and text[i] in ' \t':
+        i += 1
+    return i
+
+
+def _match_word(text: str, i: int, word: str):
+    if not text.startswith(word, i):
+        return None
+    end = i + len(word)
+    if end < len(text) and text[end] not in ' \t':
+        return None
+    return _skip_spaces(text, end)
+
+
+def _next_int(text: str, i: int):
+    i = _skip_spaces(text, i)
+    j = i + 1 if text[i:i + 1] == '-' else i
+    start = j
+    while j < len(text) and text[j].isdigit():
+        j += 1
+    if j == start:
+        return None, i
+    return int(text[i:j]), j
+
+
+class _Ramp:
+    __slots__ = ('start', 'target', 'curve', 'position', 'step', 'ticks')
+
+    def __init__(self, start, target, curve, position, step, ticks):
+        self.start = start
+        self.target = target
+        self.curve = curve
+        self.position = position
+        self.step = step
+        self.ticks = ticks
+
+
+class ArduinoEmulator:
+    def __init__(self, port, baud: int = 500000, clock=time.monotonic):
+        self.port = port
+        self.baud = max(1200, baud)
+        self.clock = clock
+
+        self.values = {pin: 0 for pin in PWM_PINS}
+        self.analog = {pin: 512.0 for pin in ANALOG_PINS}
+        self.vcc_mv = 5020
+        self.adc_noise = 0.15
+
+        self.stats = {"commands": 0, "replies": 0, "dropped": 0}
+        self._ramps = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    # ====================== PUBLIC API ======================
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="SimArduino")
+        self._thread.start()
+        logger.info(f"📟 Simulated Arduino on {self.port.path} ({self.baud} baud)")
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+
+    def set_analog(self, pin: int, raw: float):
+        with self._lock:
+            self.analog[pin] = max(0.0, min(1023.0, float(raw)))
+
+    def value(self, pin: int, now: float | None = None) -> int:
+        """Duty the pin is at (what GET would answer at `now`)."""
+        with self._lock:
+            return self._value(pin, self.clock() if now is None else now)
+
+    def handle_line(self, line: str, now: float | None = None) -> str | None:
+        """Run one command line; returns the reply line (without CRLF) if it has one."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            self.stats["commands"] += 1
+            i = _skip_spaces(line, 0)
+            for word, handler in (('SET', self._set), ('RAMP', self._ramp), ('GET', self._get),
+                                  ('ANALOG', self._analog)):
+                j = _match_word(line, i, word)
+                if j is not None:
+                    return handler(line, j, now)
+            if line.startswith('GETVCC', i):
+                return self._getvcc()
+            if _match_word(line, i, 'GETALL') is not None:
+                return 'VALUES ' + ' '.join(f"{pin}:{self._value(pin, now)}" for pin in PWM_PINS)
+        return None
+
+    # ====================== COMMANDS ======================
+
+    def _set(self, line, i, now):
+        pin, i = _next_int(line, i)
+        value, i = _next_int(line, i) if pin is not None else (None, i)
+        if pin in self.values and value is not None and 0 <= value <= 255:
+            self._ramps.pop(pin, None)
+            self.values[pin] = value
+        return None
+
+    def _ramp(self, line, i, now):
+        pin, i = _next_int(line, i)
+        target, i = _next_int(line, i) if pin is not None else (None, i)
+        duration, i = _next_int(line, i) if target is not None else (None, i)
+        if pin not in self.values or target is None or duration is None:
+            return None
+        if not (0 <= target <= 255 and duration > 0):
+            return None
+        curve = tracking = False
+        i = _skip_spaces(line, i)
+        while i < len(line) and line[i] in 'CcTt':
+            if line[i] in 'Cc':
+                curve = True
+            else:
+                tracking = True
+            i = _skip_spaces(line, i + 1)
+        current = self._value(pin, now)
+        self.values[pin] = current
+        start = _cie_level(current) if curve else current
+        end = _cie_level(target) if curve else target
+        ticks = duration // RAMP_TICK_MS
+        if tracking:
+            ticks = ticks * abs(end - start) // 255
+        ticks = max(1, ticks)
+        step = _c_div((end - start) * 65536, ticks)
+        self._ramps[pin] = _Ramp(now, target, curve, start << 16, step, ticks)
+        return None
+
+    def _get(self, line, i, now):
+        pin, _ = _next_int(line, i)
+        if pin in self.values:
+            return f"VALUE {pin} {self._value(pin, now)}"
+        return None
+
+    def _analog(self, line, i, now):
+        pin, _ = _next_int(line, i)
+        if pin in self.analog:
+            value = min(1023.0, max(0.0, self.analog[pin] + random.gauss(0, self.adc_noise)))
+            return f"ANALOG {pin} {value:.3f}"
+        return None
+
+    def _getvcc(self):
+        if self.vcc_mv <= 0:
+            return "VCC 0"
+        return f"VCC {int(round(self.vcc_mv + random.gauss(0, 3)))}"
+
+    # ====================== INTERNAL ======================
+
+    def _value(self, pin, now):
+        ramp = self._ramps.get(pin)
+        if ramp is None:
+            return self.values.get(pin, 0)
+        ticks = int((now - ramp.start) * 1000) // RAMP_TICK_MS
+        if ticks >= ramp.ticks:
+            del self._ramps[pin]
+            self.values[pin] = ramp.target
+            return ramp.target
+        if ticks <= 0:
+            return self.values[pin]
+        level = ((ramp.position + ramp.step * ticks) >> 16) & 0xFF
+        return CIE_PWM[level] if ramp.curve else level
+
+    def _wire_time(self, nbytes: int) -> float:
+        return nbytes * 10 / self.baud   # 8N1: ten bits a byte
+
+    def _loop(self):
+        buf = bytearray()
+        overflow = False
+        while self._running:
+            data = self.port.read(0.05)
+            if not data:
+                continue
+            for byte in data:
+                if byte in (10, 13):
+                    if buf and not overflow:
+                        line = buf.decode('ascii', errors='ignore')
+                        # The command has only fully arrived once its last byte is on the wire
+                        time.sleep(self._wire_time(len(buf) + 1) + LOOP_LATENCY_S)
+                        reply = self.handle_line(line)
+                        if reply is not None:
+                            out = (reply + '\r\n').encode('ascii')
+                            time.sleep(self._wire_time(len(out)))
+                            self.port.write(out)
+                            self.stats["replies"] += 1
+                    elif overflow:
+                        self.stats["dropped"] += 1
+                    buf.clear()
+                    overflow = False
+                elif len(buf) < CMD_BUF_SIZE - 1:
+                    buf.append(byte)
+                else:
+                    overflow = True
@@ -0,0 +1,99 @@
+# sim/gpio.py
+"""
+Relays and reeds on gpiozero's mock pin factory.
+
+`install()` makes MockFactory the default pin factory before
+GPIODeviceManager creates its OutputDevice/Button objects, so the normal
+GPIO code runs unchanged and no lgpio chip is needed. Reed pins are driven
+the way the magnet would drive them (a closed reed reads `is_pressed`), and
+`activity` > 0 opens a random reed every so often to keep the reed → light
+path busy during load runs.
+"""
+
+import logging
+import random
+import threading
+
+from gpiozero import Device
+from gpiozero.pins.mock import MockFactory, MockPin
+
+from engine.config_ir import parse_reeds as ir_parse_reeds
+
+logger = logging.getLogger("pccs")
+
+
+class _SimPin(MockPin):
+    """MockPin that holds its simulated level when a Button applies its pull."""
+
+    level = None
+
+    def _set_pull(self, value):
+        super()._set_pull(value)
+        if self.level is not None:
+            self.drive_high() if self.level else self.drive_low()
+
+
+def parse_reeds(config) -> dict:
+    """{reed name: (pin, pull_up)} from [reeds], the same definitions GPIODeviceManager uses."""
+    return {name: (reed.pin, reed.pull_up) for name, reed in ir_parse_reeds(config).items()}
+
+
+class GpioSim:
+    def __init__(self, config, activity: float = 0.0, open_for: float = 20.0):
+        self.reeds = parse_reeds(config)
+        self.activity = activity
+        self.open_for = open_for
+        self.factory = None
+
+        self._closed = {}
+        self._running = False
+        self._stop_event = threading.Event()
+
+    # ====================== PUBLIC API ======================
+
+    def install(self):
+        if Device.pin_factory is not None:
+            Device.pin_factory.close()
+        self.factory = Device.pin_factory = MockFactory(pin_class=_SimPin)
+        for name in self.reeds:
+            self.set_reed(name, True)   # everything shut, like a parked camper
+        logger.info(f"🏭 Simulated GPIO (MockFactory, {len(self.reeds)} reed(s))")
+
+    def start(self):
+        if self.activity <= 0 or not self.reeds or self._running:
+            return
+        self._running = True
+        self._stop_event.clear()
+        threading.Thread(target=self._activity_loop, daemon=True, name="SimReeds").start()
+
+    def stop(self):
+        self._running = False
+        self._stop_event.set()
+
+    def set_reed(self, name: str, closed: bool):
+        pin_number, pull_up = self.reeds[name]
+        pin = self.factory.pin(pin_number)
+        # Pull-up reeds read low (pressed) while the magnet holds the switch closed
+        pin.level = (not closed) if pull_up else closed
+        pin.drive_high() if pin.level else pin.drive_low()
+        self._closed[name] = closed
+
+    def reed_closed(self, name: str) -> bool:
+        return self._closed.get(name, True)
+
+    def pin_state(self, pin: int) -> bool:
+        """Electrical level of any pin (relay outputs included)."""
+        return bool(self.factory.pin(pin).state)
+
+    # ====================== INTERNAL ======================
+
+    def _activity_loop(self):
+        while self._running:
+            if self._stop_event.wait(random.expovariate(1.0 / self.activity)):
+                return
+            name = random.choice(list(self.reeds))
+            logger.debug(f"🚪 Simulation opens {name}")
+            self.set_reed(name, False)
+            if self._stop_event.wait(self.open_for):
+                return
+            self.set_reed(name, True)
@@ -0,0 +1,181 @@
+# sim/nmea.py
+"""
+NMEA 0183 GPS receiver fed from a GPX track.
+
+`GpxTrack` loads the track points (timestamps optional) and interpolates a
+position, speed and course at any point along it. `NmeaFeeder` plays the
+track in a loop on a pseudo-terminal at the receiver's usual 1 Hz, one
+GGA + RMC pair per fix, paced by the configured baud rate like a real
+UART. `speed` scales playback (10 = ten seconds of track per second).
+"""
+
+import logging
+import math
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+
+logger = logging.getLogger("pccs")
+
+EARTH_RADIUS_M = 6371000.0
+DEFAULT_SPEED_MS = 16.7    # ~60 km/h for tracks without timestamps
+KNOTS_PER_MS = 1.943844
+
+
+def checksum(body: str) -> str:
+    value = 0
+    for ch in body:
+        value ^= ord(ch)
+    return f"{value:02X}"
+
+
+def sentence(body: str) -> str:
+    return f"${body}*{checksum(body)}"
+
+
+def _distance_m(a, b) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(h))
+
+
+def _bearing(a, b) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    y = math.sin(lon2 - lon1) * math.cos(lat2)
+    x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(lon2 - lon1)
+    return (math.degrees(math.atan2(y, x)) + 360) % 360
+
+
+def _parse_time(text):
+    if not text:
+        return None
+    try:
+        return datetime.fromisoformat(text.strip().replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def _ddmm(value: float, degree_digits: int) -> str:
+    value = abs(value)
+    degrees = int(value)
+    minutes = (value - degrees) * 60
+    return f"{degrees:0{degree_digits}d}{minutes:07.4f}"
+
+
+class GpxTrack:
+    def __init__(self, points):
+        """points: [(lat, lon, ele, unix_time or None), ...] in track order."""
+        if not points:
+            raise ValueError("GPX track has no points")
+        self.points = [(lat, lon, ele or 0.0) for lat, lon, ele, _ in points]
+
+        # Seconds from the start to each point: GPX timestamps when every point
+        # has one, otherwise distance at DEFAULT_SPEED_MS
+        times = [t for *_, t in points]
+        self.offsets = [0.0]
+        for i in range(1, len(points)):
+            if all(t is not None for t in times):
+                step = max(0.0, times[i] - times[i - 1])
+            else:
+                step = _distance_m(self.points[i - 1], self.points[i]) / DEFAULT_SPEED_MS
+            self.offsets.append(self.offsets[-1] + step)
+        self.duration = self.offsets[-1]
+
+    @classmethod
+    def load(cls, path: str) -> 'GpxTrack':
+        root = ET.parse(path).getroot()
+        points = []
+        for element in root.iter():
+            if element.tag.rsplit('}', 1)[-1] not in ('trkpt', 'rtept'):
+                continue
+            fields = {child.tag.rsplit('}', 1)[-1]: child.text for child in element}
+            points.append((
+                float(element.get('lat')),
+                float(element.get('lon')),
+                float(fields['ele']) if fields.get('ele') else None,
+                _parse_time(fields.get('time')),
+            ))
+        return cls(points)
+
+    def position(self, t: float) -> dict:
+        """Fix `t` seconds into the track (wraps around; a parked camper for one point)."""
+        if len(self.points) == 1 or self.duration <= 0:
+            lat, lon, ele = self.points[0]
+            return {"lat": lat, "lon": lon, "ele": ele, "speed_ms": 0.0, "course": 0.0}
+        t %= self.duration
+        i = 1
+        while i < len(self.offsets) - 1 and self.offsets[i] < t:
+            i += 1
+        a, b = self.points[i - 1], self.points[i]
+        span = self.offsets[i] - self.offsets[i - 1]
+        f = (t - self.offsets[i - 1]) / span if span > 0 else 1.0
+        return {
+            "lat": a[0] + (b[0] - a[0]) * f,
+            "lon": a[1] + (b[1] - a[1]) * f,
+            "ele": a[2] + (b[2] - a[2]) * f,
+            "speed_ms": _distance_m(a, b) / span if span > 0 else 0.0,
+            "course": _bearing(a, b),
+        }
+
+
+def fix_sentences(fix: dict, when: datetime, satellites: int = 9) -> list[str]:
+    """GGA + RMC for one fix."""
+    hms = when.strftime('%H%M%S') + f".{when.microsecond // 10000:02d}"
+    lat = f"{_ddmm(fix['lat'], 2)},{'N' if fix['lat'] >= 0 else 'S'}"
+    lon = f"{_ddmm(fix['lon'], 3)},{'E' if fix['lon'] >= 0 else 'W'}"
+    knots = fix['speed_ms'] * KNOTS_PER_MS
+    return [
+        sentence(f"GPGGA,{hms},{lat},{lon},1,{satellites:02d},0.9,{fix['ele']:.1f},M,-1.0,M,,"),
+        sentence(f"GPRMC,{hms},A,{lat},{lon},{knots:.1f},{fix['course']:.1f},{when.strftime('%d%m%y')},,,A"),
+    ]
+
+
+class NmeaFeeder:
+    def __init__(self, port, track: GpxTrack, baud: int = 9600, speed: float = 1.0, interval: float = 1.0):
+        self.port = port
+        self.track = track
+        self.baud = max(1200, baud)
+        self.speed = speed
+        self.interval = interval
+        self.fix = True             # False: receiver lost the sky (GGA quality 0, RMC void)
+
+        self._running = False
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._started = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._stop_event.clear()
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="SimGPS")
+        self._thread.start()
+        logger.info(f"🛰️ Simulated GPS on {self.port.path} ({len(self.track.points)} track points, x{self.speed:g})")
+
+    def stop(self):
+        self._running = False
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+
+    def sentences(self, elapsed: float, when: datetime | None = None) -> list[str]:
+        when = when or datetime.now(timezone.utc)
+        if not self.fix:
+            hms = when.strftime('%H%M%S') + ".00"
+            return [sentence(f"GPGGA,{hms},,,,,0,00,99.9,,M,,M,,"),
+                    sentence(f"GPRMC,{hms},V,,,,,,,{when.strftime('%d%m%y')},,,N")]
+        return fix_sentences(self.track.position(elapsed * self.speed), when)
+
+    def _loop(self):
+        while self._running:
+            elapsed = time.monotonic() - self._started
+            for line in self.sentences(elapsed):
+                data = (line + '\r\n').encode('ascii')
+                self.port.write(data)
+                # A 9600 baud receiver spends ~70 ms on each sentence
+                if self._stop_event.wait(len(data) * 10 / self.baud):
+                    return
+            self._stop_event.wait(max(0.0, self.interval - (time.monotonic() - self._started - elapsed)))
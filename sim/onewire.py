@@ -0,0 +1,93 @@
+# sim/onewire.py
+"""
+DS18B20 probes behind a fake /sys/bus/w1/devices tree.
+
+Each probe gets a `temperature` file (millidegrees, as w1-therm writes it)
+and the bus master a `therm_bulk_read`, so modules.onewire.OneWireBus takes
+the same bulk-conversion path it does on the Pi. Temperatures follow a
+slow day/night swing around each probe's base value.
+"""
+
+import logging
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger("pccs")
+
+DAY_S = 86400.0
+
+
+class FakeW1Bus:
+    def __init__(self, probes: dict, root: str | None = None, swing: float = 6.0, interval: float = 10.0):
+        """probes: {sensor id: base °C}. `swing` is the peak-to-peak daily range."""
+        self.probes = dict(probes)
+        self.swing = swing
+        self.interval = interval
+        self._tmp = None
+        if root is None:
+            self._tmp = tempfile.TemporaryDirectory(prefix="pccs-w1-")
+            root = self._tmp.name
+        self.root = root
+        self.overrides = {}         # sensor id -> fixed °C (None = unplugged)
+
+        self._running = False
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        master = os.path.join(self.root, 'w1_bus_master1')
+        os.makedirs(master, exist_ok=True)
+        with open(os.path.join(master, 'therm_bulk_read'), 'w') as f:
+            f.write('0\n')
+        self.update()
+        self._running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="SimOneWire")
+        self._thread.start()
+        logger.info(f"🌡️ Simulated 1-Wire bus at {self.root} ({len(self.probes)} probe(s))")
+
+    def stop(self):
+        self._running = False
+        self._stop_event.set()
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
+
+    def temperature(self, sensor_id: str, now: float | None = None):
+        if sensor_id in self.overrides:
+            return self.overrides[sensor_id]
+        now = time.time() if now is None else now
+        local = time.localtime(now)
+        seconds = local.tm_hour * 3600 + local.tm_min * 60 + local.tm_sec
+        # Coldest around 05:00, warmest around 15:00
+        phase = 2 * math.pi * (seconds - 15 * 3600) / DAY_S
+        return self.probes[sensor_id] + self.swing / 2 * math.cos(phase) + random.gauss(0, 0.05)
+
+    def update(self, now: float | None = None):
+        for sensor_id in self.probes:
+            path = os.path.join(self.root, sensor_id)
+            temp = self.temperature(sensor_id, now)
+            if temp is None:
+                if os.path.isdir(path):
+                    for name in os.listdir(path):
+                        os.unlink(os.path.join(path, name))
+                    os.rmdir(path)
+                continue
+            os.makedirs(path, exist_ok=True)
+            target = os.path.join(path, 'temperature')
+            with open(target + '.tmp', 'w') as f:
+                f.write(f"{int(round(temp * 1000))}\n")
+            os.replace(target + '.tmp', target)
+
+    def _loop(self):
+        while self._running:
+            if self._stop_event.wait(self.interval):
+                return
+            try:
+                self.update()
+            except OSError as e:
+                logger.debug(f"Simulated 1-Wire update failed: {e}")
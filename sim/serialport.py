@@ -0,0 +1,72 @@
+# sim/serialport.py
+"""
+Pseudo-terminal standing in for a USB/UART serial device.
+
+The simulated device owns the master side; `path` (the slave, or `link` if
+given) is what goes into `serial_ports`, so pyserial opens it exactly like
+/dev/ttyACM0. The slave stays open here as well, which keeps the master from
+seeing a hang-up between a client closing the port and opening it again.
+"""
+
+import logging
+import os
+import select
+import tty
+
+logger = logging.getLogger("pccs")
+
+
+class PtyPort:
+    def __init__(self, link: str | None = None):
+        self.link = link
+        self.master = None
+        self._slave = None
+        self.path = None
+
+    def open(self) -> str:
+        self.master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        os.set_blocking(self.master, False)
+        self.path = os.ttyname(self._slave)
+        if self.link:
+            if os.path.islink(self.link):
+                os.unlink(self.link)
+            os.symlink(self.path, self.link)
+            self.path = self.link
+        return self.path
+
+    def read(self, timeout: float) -> bytes:
+        """Whatever the client has written so far (b'' after `timeout`)."""
+        if self.master is None:
+            return b''
+        ready, _, _ = select.select([self.master], [], [], timeout)
+        if not ready:
+            return b''
+        try:
+            return os.read(self.master, 4096)
+        except (BlockingIOError, OSError):
+            return b''
+
+    def write(self, data: bytes):
+        view = memoryview(data)
+        while view and self.master is not None:
+            try:
+                written = os.write(self.master, view)
+            except BlockingIOError:
+                select.select([], [self.master], [], 0.1)
+                continue
+            except OSError as e:
+                logger.debug(f"PTY write failed on {self.path}: {e}")
+                return
+            view = view[written:]
+
+    def close(self):
+        for fd in (self.master, self._slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self.master = self._slave = None
+        if self.link and os.path.islink(self.link):
+            os.unlink(self.link)
@@ -0,0 +1,275 @@
+# sim/sonos.py
+"""
+Fake Sonos speakers.
+
+Discovery goes over the network like the real thing: `SonosSim` sends
+ZonePlayer SSDP NOTIFYs (alive every `announce_interval`, byebye on stop)
+to the registry's group/port, each speaker on its own 127.0.0.x address.
+The speaker handles SonosManager gets back are `FakeSpeaker`s instead of
+SoCo objects (`attach()` sets its device_factory): the SoCo surface PCCS
+uses, a playlist that really advances, SOAP-ish latency on every call, and
+AVTransport / RenderingControl "subscriptions" that push LastChange-style
+events into SonosManager's event queue.
+"""
+
+import logging
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+from modules.sonos_registry import SSDP_GROUP, SSDP_PORT, ZONE_PLAYER_ST
+from modules.sonos_state import seconds_to_time, time_to_seconds
+
+logger = logging.getLogger("pccs")
+
+PLAYLIST = [
+    ("Thunderstruck", "AC/DC", "The Razors Edge", 292),
+    ("Down Under", "Men at Work", "Business as Usual", 222),
+    ("Khe Sanh", "Cold Chisel", "Cold Chisel", 253),
+    ("Great Southern Land", "Icehouse", "Primitive Man", 316),
+    ("Am I Ever Gonna See Your Face Again", "The Angels", "The Angels", 214),
+]
+
+
+def notify(uid: str, ip: str, alive: bool = True, max_age: int = 60) -> bytes:
+    return (
+        "NOTIFY * HTTP/1.1\r\n"
+        f"HOST: {SSDP_GROUP}:{SSDP_PORT}\r\n"
+        f"CACHE-CONTROL: max-age = {max_age}\r\n"
+        f"LOCATION: http://{ip}:1400/xml/device_description.xml\r\n"
+        "SERVER: Linux UPnP/1.0 Sonos/79.1-56030 (ZPS23)\r\n"
+        f"NT: {ZONE_PLAYER_ST}\r\n"
+        f"NTS: {'ssdp:alive' if alive else 'ssdp:byebye'}\r\n"
+        f"USN: uuid:{uid}::{ZONE_PLAYER_ST}\r\n"
+        "X-RINCON-HOUSEHOLD: Sonos_pccs_sim\r\n"
+        "\r\n"
+    ).encode('ascii')
+
+
+class _Subscription:
+    def __init__(self, service, event_queue):
+        self.service = service
+        self.event_queue = event_queue
+        self.auto_renew_fail = None
+
+    def unsubscribe(self):
+        self.service.subscriptions.discard(self)
+
+
+class _Service:
+    def __init__(self, speaker, service_type):
+        self.soco = speaker
+        self.service_type = service_type
+        self.subscriptions = set()
+
+    def subscribe(self, requested_timeout=None, auto_renew=False, event_queue=None):
+        self.soco._call()
+        sub = _Subscription(self, event_queue)
+        self.subscriptions.add(sub)
+        return sub
+
+    def push(self, variables: dict):
+        for sub in list(self.subscriptions):
+            if sub.event_queue is not None:
+                sub.event_queue.put(SimpleNamespace(service=self, variables=dict(variables)))
+
+
+class FakeSpeaker:
+    def __init__(self, name: str, ip: str, uid: str, latency: float = 0.03, clock=time.time):
+        self.player_name = name
+        self.ip_address = ip
+        self.uid = uid
+        self.is_visible = True
+        self.latency = latency
+        self.clock = clock
+
+        self.avTransport = _Service(self, 'AVTransport')
+        self.renderingControl = _Service(self, 'RenderingControl')
+
+        self._lock = threading.RLock()
+        self._volume = 25
+        self._mute = False
+        self._playing = False
+        self._index = 0
+        self._position = 0.0        # seconds, as of _position_ts
+        self._position_ts = clock()
+
+    # ====================== SoCo SURFACE ======================
+
+    @property
+    def volume(self):
+        self._call()
+        return self._volume
+
+    @volume.setter
+    def volume(self, value):
+        self._call()
+        with self._lock:
+            self._volume = max(0, min(100, int(value)))
+        self.renderingControl.push({'volume': {'Master': str(self._volume)}})
+
+    @property
+    def mute(self):
+        self._call()
+        return self._mute
+
+    @mute.setter
+    def mute(self, value):
+        self._call()
+        with self._lock:
+            self._mute = bool(value)
+        self.renderingControl.push({'mute': {'Master': '1' if self._mute else '0'}})
+
+    def get_current_transport_info(self) -> dict:
+        self._call()
+        state = 'PLAYING' if self._playing else 'PAUSED_PLAYBACK'
+        return {'current_transport_state': state, 'current_transport_status': 'OK', 'current_transport_speed': '1'}
+
+    def get_current_track_info(self) -> dict:
+        self._call()
+        with self._lock:
+            title, artist, album, duration = PLAYLIST[self._index]
+            return {
+                'title': title, 'artist': artist, 'album': album, 'album_art': '',
+                'position': seconds_to_time(int(self._now_position())),
+                'duration': seconds_to_time(duration),
+                'uri': self._uri(), 'playlist_position': str(self._index + 1),
+            }
+
+    def play(self):
+        self._call()
+        self._set_playing(True)
+
+    def pause(self):
+        self._call()
+        self._set_playing(False)
+
+    def stop(self):
+        self.pause()
+
+    def next(self):
+        self._call()
+        self._load(self._index + 1)
+
+    def previous(self):
+        self._call()
+        self._load(self._index - 1)
+
+    def seek(self, timestamp: str):
+        self._call()
+        with self._lock:
+            self._position = float(time_to_seconds(timestamp))
+            self._position_ts = self.clock()
+
+    # ====================== SIMULATION ======================
+
+    def tick(self):
+        """Move to the next track when the current one has played out."""
+        with self._lock:
+            ended = self._playing and self._now_position() >= PLAYLIST[self._index][3]
+        if ended:
+            self._load(self._index + 1)
+
+    def _call(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _uri(self):
+        return f"x-file-cifs://camper/music/{self._index:02d}.flac"
+
+    def _now_position(self):
+        if not self._playing:
+            return self._position
+        return self._position + (self.clock() - self._position_ts)
+
+    def _set_playing(self, playing: bool):
+        with self._lock:
+            if playing == self._playing:
+                return
+            self._position = self._now_position()
+            self._position_ts = self.clock()
+            self._playing = playing
+        self.avTransport.push({'transport_state': 'PLAYING' if playing else 'PAUSED_PLAYBACK'})
+
+    def _load(self, index: int):
+        with self._lock:
+            self._index = index % len(PLAYLIST)
+            self._position = 0.0
+            self._position_ts = self.clock()
+            title, artist, album, duration = PLAYLIST[self._index]
+            variables = {
+                'transport_state': 'PLAYING' if self._playing else 'PAUSED_PLAYBACK',
+                'current_track_uri': self._uri(),
+                'current_track_duration': seconds_to_time(duration),
+                'current_track_meta_data': SimpleNamespace(title=title, creator=artist, album=album,
+                                                           album_art_uri=None),
+            }
+        self.avTransport.push(variables)
+
+
+class SonosSim:
+    def __init__(self, names, group: str = '127.0.0.1', port: int = SSDP_PORT,
+                 announce_interval: float = 5.0, latency: float = 0.03):
+        self.group = group
+        self.port = port
+        self.announce_interval = announce_interval
+        self.speakers = {}
+        for i, name in enumerate(names):
+            ip = f"127.0.0.{i + 2}"
+            uid = f"RINCON_5CAAFD{i + 1:06X}01400"
+            self.speakers[ip] = FakeSpeaker(name, ip, uid, latency=latency)
+
+        self._running = False
+        self._stop_event = threading.Event()
+        self._sock = None
+
+    # ====================== PUBLIC API ======================
+
+    def attach(self, sonos):
+        sonos.device_factory = self.device
+
+    def device(self, ip: str) -> FakeSpeaker:
+        if ip not in self.speakers:
+            raise ConnectionError(f"no simulated speaker at {ip}")
+        return self.speakers[ip]
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._stop_event.clear()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        threading.Thread(target=self._loop, daemon=True, name="SimSonos").start()
+        logger.info(f"🎵 Simulated Sonos: {', '.join(s.player_name for s in self.speakers.values())} "
+                    f"(SSDP to {self.group}:{self.port})")
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._stop_event.set()
+        self.announce(alive=False)
+        self._sock.close()
+
+    def announce(self, alive: bool = True):
+        max_age = int(self.announce_interval * 6)
+        for speaker in self.speakers.values():
+            try:
+                self._sock.sendto(notify(speaker.uid, speaker.ip_address, alive, max_age), (self.group, self.port))
+            except OSError as e:
+                logger.debug(f"Simulated SSDP announce failed: {e}")
+
+    # ====================== INTERNAL ======================
+
+    def _loop(self):
+        last_announce = 0.0
+        while self._running:
+            now = time.monotonic()
+            if now - last_announce >= self.announce_interval:
+                self.announce()
+                last_announce = now
+            for speaker in self.speakers.values():
+                speaker.tick()
+            if self._stop_event.wait(1.0):
+                return
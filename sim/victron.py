@@ -0,0 +1,192 @@
+# sim/victron.py
+"""
+Fake Victron SmartShunt + SmartSolar advertisements.
+
+`VictronSim` models a house battery charged by a panel (solar follows the
+time of day, the load wanders) and `attach()` points a VictronManager at it:
+a scanner that delivers advertisements through the manager's own detection
+callback, and a parser for the payloads.
+
+Frames keep the Instant Readout layout (0x10 record, model id, readout type,
+a nonce that only moves when the values do, key check byte) so the address
+filter and dedupe paths behave as on air, but the payload is plain packed
+values rather than AES-CTR ciphertext: nothing here holds a device key.
+"""
+
+import asyncio
+import logging
+import math
+import random
+import struct
+import time
+from types import SimpleNamespace
+
+from modules.victron import VICTRON_MANUFACTURER_ID
+
+logger = logging.getLogger("pccs")
+
+SHUNT_ADDRESS = "c0:ff:ee:00:00:01"
+MPPT_ADDRESS = "c0:ff:ee:00:00:02"
+SIM_KEY = "00" * 16
+
+BATTERY_MONITOR = 0x02
+SOLAR_CHARGER = 0x01
+_HEADER = struct.Struct("<BHBHB")               # record, model, readout type, nonce, key byte
+_SHUNT = struct.Struct("<HhiHf")                # mV, 10 mA, remaining min, 0.1 %, consumed Ah
+_SOLAR = struct.Struct("<HhHHB")                # mV, 10 mA, yield Wh, W, charge state
+
+
+class _ShuntData:
+    def __init__(self, mv, ma10, remaining, soc10, consumed):
+        self.consumed_ah = round(consumed, 1)
+        self._values = (mv / 1000, ma10 / 100, remaining, soc10 / 10)
+
+    def get_voltage(self):
+        return self._values[0]
+
+    def get_current(self):
+        return self._values[1]
+
+    def get_remaining_mins(self):
+        return self._values[2]
+
+    def get_soc(self):
+        return self._values[3]
+
+
+class _SolarData:
+    def __init__(self, mv, ma10, yield_wh, watts, charge_state):
+        self._values = (mv / 1000, ma10 / 100, yield_wh, watts, charge_state)
+
+    def get_battery_voltage(self):
+        return self._values[0]
+
+    def get_battery_current(self):
+        return self._values[1]
+
+    def get_yield_today(self):
+        return self._values[2]
+
+    def get_solar_power(self):
+        return self._values[3]
+
+    def get_charge_state(self):
+        return self._values[4]
+
+
+class SimParser:
+    def parse(self, raw: bytes):
+        _, _, readout, _, _ = _HEADER.unpack_from(raw)
+        body = raw[_HEADER.size:]
+        if readout == BATTERY_MONITOR:
+            return _ShuntData(*_SHUNT.unpack(body))
+        if readout == SOLAR_CHARGER:
+            return _SolarData(*_SOLAR.unpack(body))
+        raise ValueError(f"unknown readout type {readout:#x}")
+
+
+class FakeScanner:
+    """BleakScanner stand-in: while started, advertises every device each `interval`."""
+
+    def __init__(self, sim, callback):
+        self.sim = sim
+        self.callback = callback
+        self._task = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._advertise())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _advertise(self):
+        while True:
+            for address, raw in self.sim.advertisements():
+                device = SimpleNamespace(address=address.upper())
+                advertisement = SimpleNamespace(manufacturer_data={VICTRON_MANUFACTURER_ID: raw})
+                self.callback(device, advertisement)
+            await asyncio.sleep(self.sim.interval * random.uniform(0.8, 1.2))
+
+
+class VictronSim:
+    def __init__(self, shunt_address=SHUNT_ADDRESS, mppt_address=MPPT_ADDRESS, capacity_ah: float = 200.0,
+                 panel_w: float = 300.0, interval: float = 1.0, clock=time.time):
+        self.shunt_address = shunt_address.lower()
+        self.mppt_address = mppt_address.lower()
+        self.capacity_ah = capacity_ah
+        self.panel_w = panel_w
+        self.interval = interval
+        self.clock = clock
+
+        self.soc = 85.0
+        self.load_a = 4.0
+        self.yield_wh = 0.0
+        self._last = None
+        self._day = None
+        self._frames = {}           # address -> (payload, nonce)
+
+    # ====================== PUBLIC API ======================
+
+    def attach(self, victron):
+        victron.scanner_factory = lambda callback: FakeScanner(self, callback)
+        victron.parser_factory = lambda address, raw: SimParser()
+
+    def advertisements(self, now: float | None = None) -> list:
+        """[(address, manufacturer data)] for every simulated device at `now`."""
+        self.step(self.clock() if now is None else now)
+        voltage = self.voltage()
+        solar_a = self.solar_w / voltage
+        net_a = solar_a - self.load_a
+        remaining = int(self.soc / 100 * self.capacity_ah / -net_a * 60) if net_a < 0 else 0xFFFF
+        shunt = _SHUNT.pack(int(voltage * 1000), int(net_a * 100), min(remaining, 0xFFFF),
+                            int(self.soc * 10), -(100 - self.soc) / 100 * self.capacity_ah)
+        solar = _SOLAR.pack(int(voltage * 1000), int(solar_a * 100), int(self.yield_wh),
+                            int(self.solar_w), self.charge_state(solar_a))
+        return [
+            (self.shunt_address, self._frame(self.shunt_address, 0xA389, BATTERY_MONITOR, shunt)),
+            (self.mppt_address, self._frame(self.mppt_address, 0xA053, SOLAR_CHARGER, solar)),
+        ]
+
+    def step(self, now: float):
+        """Advance the battery to `now`."""
+        local = time.localtime(now)
+        if self._day != local.tm_yday:
+            self._day = local.tm_yday
+            self.yield_wh = 0.0
+        hour = local.tm_hour + local.tm_min / 60
+        # Sun up 07:00-19:00, sine-shaped, a bit of cloud
+        sun = max(0.0, math.sin(math.pi * (hour - 7) / 12))
+        self.solar_w = round(self.panel_w * sun * random.uniform(0.85, 1.0)) if sun else 0
+        self.load_a = min(12.0, max(1.0, self.load_a + random.gauss(0, 0.3)))
+
+        if self._last is not None:
+            hours = max(0.0, now - self._last) / 3600
+            self.yield_wh += self.solar_w * hours
+            amps = self.solar_w / self.voltage() - self.load_a
+            self.soc = min(100.0, max(0.0, self.soc + amps * hours / self.capacity_ah * 100))
+        self._last = now
+
+    def voltage(self) -> float:
+        """Resting LiFePO4-ish curve: 12.8 V flat, rising near full."""
+        return round(12.8 + 0.6 * (self.soc / 100) ** 6 + random.gauss(0, 0.005), 2)
+
+    def charge_state(self, solar_a: float) -> int:
+        if solar_a <= 0:
+            return 0                # off
+        return 3 if self.soc >= 99.5 else 1 if self.soc < 95 else 2
+
+    # ====================== INTERNAL ======================
+
+    def _frame(self, address, model, readout, payload):
+        previous, nonce = self._frames.get(address, (None, random.randrange(0x10000)))
+        if payload != previous:
+            nonce = (nonce + 1) & 0xFFFF
+            self._frames[address] = (payload, nonce)
+        return _HEADER.pack(0x10, model, readout, nonce, 0x00) + payload
@@ -18,6 +18,7 @@ function onConnect(sock) {
   sock.emit('get_network_status');
   sock.emit('get_victron_state');
   sock.emit('get_reeds');
+  PCCS.tiles.fetchWeather();
   PCCS.darkMode.requestInitialDarkMode();
   setTimeout(() => {
     fetch('/api/network_status').then(r => r.json()).then(PCCS.tiles.updateNetworkTile).catch(() => {});
@@ -35,12 +36,14 @@ function registerHandlers(sock) {
 
   sock.on('lights_config', c => PCCS.lighting.onLightsConfig(c));
   sock.on('state_update', s => PCCS.lighting.onStateUpdate(s));
+  sock.on('light_ack', a => PCCS.lighting.onLightAck(a));
   sock.on('reed_update', p => PCCS.lighting.onReedUpdate(p));
   sock.on('sensor_update', d => PCCS.tiles.updateSensors(d));
   sock.on('gps_update', d => PCCS.tiles.updateGPS(d));
   sock.on('phase_update', d => PCCS.tiles.updatePhaseInfo(d));
   sock.on('network_update', d => PCCS.tiles.updateNetworkTile(d));
   sock.on('victron_update', d => PCCS.victron.updatePowerTile(d));
+  sock.on('weather_update', d => PCCS.tiles.updateWeather(d));
 
   sock.on('connect', () => onConnect(sock));
 }
@@ -54,6 +57,7 @@ function initDom() {
 
   PCCS.sonos.bindProgressSeek();
   PCCS.lighting.initResize();
+  PCCS.victron.watchPowerTile(socket);
 
   globalThis.toggleFullscreen = PCCS.fullscreen.toggleFullscreen;
   globalThis.sonosCommand = PCCS.sonos.sonosCommand;
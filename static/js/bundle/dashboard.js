@@ -22,8 +22,6 @@
     sceneAnimationCancels: {},
     hasValidGPSFix: false,
     gpsStatusReceived: false,
-    lastWeatherUpdate: 0,
-    WEATHER_INTERVAL_MS: 3600 * 1e3,
     currentScenes: []
   };
 
@@ -633,7 +631,21 @@
 
   // ../static/js/lighting-controller.js
   var S2 = PCCS.state;
+  var lightSeq = 0;
+  var lastSeq = {};
+  function nextSeq(name) {
+    lightSeq += 1;
+    lastSeq[name] = lightSeq;
+    return lightSeq;
+  }
+  function emitLightTracking(payload) {
+    const socket2 = getSocket();
+    if (!socket2?.connected) return false;
+    socket2.emit("light_change", { ...payload, tracking: true, seq: nextSeq(payload.name) });
+    return true;
+  }
   function emitLightChange(payload) {
+    payload = { ...payload, seq: nextSeq(payload.name) };
     const socket2 = getSocket();
     if (socket2?.connected) {
       socket2.emit("light_change", payload);
@@ -992,6 +1004,21 @@
     let startX = 0;
     let startY = 0;
     let valueAtPointerStart = 0;
+    let lastStreamed = null;
+    function lightPayload(brightness) {
+      const light = S2.lightsConfig.find((l) => l.name === name);
+      const payload = { name, brightness };
+      if (light?.has_mode && S2.currentModes[name]) {
+        payload.mode = S2.currentModes[name];
+      }
+      return payload;
+    }
+    function streamDrag() {
+      const value = parseInt(wrapper.dataset.value) || 0;
+      if (value === lastStreamed) return;
+      lastStreamed = value;
+      emitLightTracking(lightPayload(value));
+    }
     function updatePosition(clientX) {
       const rect = inner.getBoundingClientRect();
       const percent = Math.max(0, Math.min(
@@ -1006,6 +1033,7 @@
     function startDrag() {
       if (isDragging) return;
       isDragging = true;
+      lastStreamed = null;
       wrapper.classList.add("dragging");
       S2.currentlyDragging.add(name);
       S2.userJustSet.delete(name);
@@ -1023,12 +1051,7 @@
       setTimeout(() => S2.userJustSet.delete(name), S2.JUST_SET_DURATION);
       S2.currentState[name] = final;
       updateLightUI(name, final);
-      const light = S2.lightsConfig.find((l) => l.name === name);
-      const payload = { name, brightness: final };
-      if (light?.has_mode && S2.currentModes[name]) {
-        payload.mode = S2.currentModes[name];
-      }
-      emitLightChange(payload);
+      emitLightChange(lightPayload(final));
     }
     wrapper.addEventListener("pointerdown", (e) => {
       if (e.button !== 0) return;
@@ -1044,6 +1067,7 @@
         wrapper.setPointerCapture(e.pointerId);
         startDrag();
         updatePosition(e.clientX);
+        streamDrag();
       }
     });
     wrapper.addEventListener("pointermove", (e) => {
@@ -1064,6 +1088,7 @@
       }
       e.preventDefault();
       updatePosition(e.clientX);
+      streamDrag();
     });
     wrapper.addEventListener("pointerup", (e) => {
       if (e.pointerId !== activePointerId) return;
@@ -1139,6 +1164,11 @@
       S2.sceneActivating = false;
       applyStateToUI(newState, { animate: animate3, rampMs: S2.SCENE_RAMP_MS });
     },
+    onLightAck(ack) {
+      if (!ack?.ok || ack.seq !== lastSeq[ack.name] || S2.currentlyDragging.has(ack.name)) return;
+      S2.currentState[ack.name] = ack.brightness;
+      updateLightUI(ack.name, ack.brightness);
+    },
     onReedUpdate(payload) {
       S2.currentReeds = payload.states || {};
       updateRooftopTentControls();
@@ -1178,13 +1208,6 @@
     if (window.PCCS && window.PCCS.sunCurve) {
       window.PCCS.sunCurve.updateCurveGeometry();
     }
-    if (S3.hasValidGPSFix && data.latitude && data.longitude) {
-      const now = Date.now();
-      if (now - S3.lastWeatherUpdate > S3.WEATHER_INTERVAL_MS) {
-        S3.lastWeatherUpdate = now;
-        fetchWeatherForecast(data.latitude, data.longitude);
-      }
-    }
     document.getElementById("tile-date").classList.toggle("text-amber-400", !S3.hasValidGPSFix);
     document.getElementById("tile-time").classList.toggle("text-amber-400", !S3.hasValidGPSFix);
   }
@@ -1306,26 +1329,30 @@
       window.PCCS.sunCurve.updatePhaseInfo(data);
     }
   }
-  async function fetchWeatherForecast(lat, lon) {
+  async function fetchWeather() {
     try {
-      const url = `https://api.open-meteo.com/v1/forecast?latitude=${lat}&longitude=${lon}&daily=temperature_2m_max,temperature_2m_min,weathercode&current_weather=true&timezone=auto`;
-      const res = await fetch(url, { cache: "no-store" });
-      const data = await res.json();
-      if (data.daily) {
-        const max = Math.round(data.daily.temperature_2m_max[0]);
-        const min = Math.round(data.daily.temperature_2m_min[0]);
-        document.getElementById("temp-range").textContent = `${min}\xB0 / ${max}\xB0`;
-      }
-      const weatherIcon = document.getElementById("weather-icon");
-      if (data.current_weather && weatherIcon) {
-        const code = data.current_weather.weathercode;
-        const isDay = data.current_weather.is_day === 1;
-        weatherIcon.className = `fa-solid ${getWeatherIcon(code, isDay)} text-2xl accent-sky`;
-      }
+      const res = await fetch("/api/weather", { cache: "no-cache" });
+      if (!res.ok) return;
+      updateWeather(await res.json());
     } catch (e) {
       console.warn("Weather fetch failed:", e);
     }
   }
+  function updateWeather(payload) {
+    const data = payload && payload.data;
+    if (!data) return;
+    if (data.daily) {
+      const max = Math.round(data.daily.temperature_2m_max[0]);
+      const min = Math.round(data.daily.temperature_2m_min[0]);
+      document.getElementById("temp-range").textContent = `${min}\xB0 / ${max}\xB0`;
+    }
+    const weatherIcon = document.getElementById("weather-icon");
+    if (data.current_weather && weatherIcon) {
+      const code = data.current_weather.weathercode;
+      const isDay = data.current_weather.is_day === 1;
+      weatherIcon.className = `fa-solid ${getWeatherIcon(code, isDay)} text-2xl accent-sky`;
+    }
+  }
   function getWeatherIcon(code, isDay) {
     const icons = {
       0: isDay ? "fa-sun" : "fa-moon",
@@ -1421,7 +1448,8 @@
     updatePhaseInfo,
     updateClock,
     updateTimeAndSun,
-    fetchWeatherForecast,
+    fetchWeather,
+    updateWeather,
     getWeatherIcon
   };
 
@@ -1645,8 +1673,23 @@
     const sec = Math.floor(seconds % 60);
     return `${min}:${sec.toString().padStart(2, "0")}`;
   }
+  function livePosition(state) {
+    const position = state.position || 0;
+    if (!state.is_playing || state.position_ts == null) return position;
+    const serverNow = Date.now() / 1e3 - (state.clockOffset || 0);
+    const live = position + Math.max(0, serverNow - state.position_ts);
+    return state.duration ? Math.min(live, state.duration) : live;
+  }
+  function sizedArtUrl(url, el) {
+    if (!url.startsWith("/sonos-art")) return url;
+    const width = Math.round(Math.max(el.clientWidth, el.clientHeight) * (globalThis.devicePixelRatio || 1));
+    return width > 0 ? `${url}&w=${width}` : url;
+  }
   function updateSonosUI(state) {
     currentSonosState = state || {};
+    if (state && state.server_ts != null) {
+      currentSonosState.clockOffset = Date.now() / 1e3 - state.server_ts;
+    }
     const hasSpeaker = !!(state && state.speaker);
     const isEnabled = !!(state && state.enabled !== false);
     if (!hasSpeaker || !isEnabled) {
@@ -1663,7 +1706,7 @@
     const artEl = document.getElementById("sonos-album-art");
     const overlayEl = document.getElementById("sonos-overlay");
     if (artEl) {
-      artEl.style.backgroundImage = hasAlbumArt ? `url('${state.album_art}')` : "none";
+      artEl.style.backgroundImage = hasAlbumArt ? `url('${sizedArtUrl(state.album_art, artEl)}')` : "none";
       artEl.style.backgroundColor = hasAlbumArt ? "" : "#1f2937";
     }
     if (overlayEl) {
@@ -1702,7 +1745,7 @@
     const elapsedEl = document.getElementById("sonos-time-elapsed");
     const remainingEl = document.getElementById("sonos-time-remaining");
     if (!progressBar) return;
-    const position = state.position || 0;
+    const position = livePosition(state);
     const duration = state.duration || 0;
     if (duration <= 0) {
       progressBar.style.width = "0%";
@@ -1719,10 +1762,6 @@
     if (progressInterval) clearInterval(progressInterval);
     progressInterval = setInterval(() => {
       if (currentSonosState.is_playing && currentSonosState.duration) {
-        currentSonosState.position = (currentSonosState.position || 0) + 1;
-        if (currentSonosState.position > currentSonosState.duration) {
-          currentSonosState.position = currentSonosState.duration;
-        }
         updateProgressBar(currentSonosState);
       }
     }, 1e3);
@@ -1860,7 +1899,28 @@
       csEl.textContent = data.charge_state || "";
     }
   }
-  PCCS.victron = { updatePowerTile };
+  var VIEWING_HEARTBEAT_MS = 20000;
+  function watchPowerTile(sock) {
+    const tile = document.getElementById("power-tile");
+    if (!tile) return;
+    let inView = true;
+    const beat = () => {
+      if (inView && document.visibilityState === "visible" && sock.connected) {
+        sock.emit("victron_viewing");
+      }
+    };
+    if ("IntersectionObserver" in globalThis) {
+      new IntersectionObserver((entries) => {
+        inView = entries.some((e) => e.isIntersecting);
+        beat();
+      }).observe(tile);
+    }
+    document.addEventListener("visibilitychange", beat);
+    sock.on("connect", beat);
+    setInterval(beat, VIEWING_HEARTBEAT_MS);
+    beat();
+  }
+  PCCS.victron = { updatePowerTile, watchPowerTile };
 
   // ../static/js/fullscreen.js
   function toggleFullscreen() {
@@ -1905,6 +1965,7 @@
     sock.emit("get_network_status");
     sock.emit("get_victron_state");
     sock.emit("get_reeds");
+    PCCS.tiles.fetchWeather();
     PCCS.darkMode.requestInitialDarkMode();
     setTimeout(() => {
       fetch("/api/network_status").then((r) => r.json()).then(PCCS.tiles.updateNetworkTile).catch(() => {
@@ -1921,12 +1982,14 @@
     PCCS.sonos.register(sock);
     sock.on("lights_config", (c) => PCCS.lighting.onLightsConfig(c));
     sock.on("state_update", (s) => PCCS.lighting.onStateUpdate(s));
+    sock.on("light_ack", (a) => PCCS.lighting.onLightAck(a));
     sock.on("reed_update", (p) => PCCS.lighting.onReedUpdate(p));
     sock.on("sensor_update", (d) => PCCS.tiles.updateSensors(d));
     sock.on("gps_update", (d) => PCCS.tiles.updateGPS(d));
     sock.on("phase_update", (d) => PCCS.tiles.updatePhaseInfo(d));
     sock.on("network_update", (d) => PCCS.tiles.updateNetworkTile(d));
     sock.on("victron_update", (d) => PCCS.victron.updatePowerTile(d));
+    sock.on("weather_update", (d) => PCCS.tiles.updateWeather(d));
     sock.on("connect", () => onConnect(sock));
   }
   registerHandlers(socket);
@@ -1936,6 +1999,7 @@
     }
     PCCS.sonos.bindProgressSeek();
     PCCS.lighting.initResize();
+    PCCS.victron.watchPowerTile(socket);
     globalThis.toggleFullscreen = PCCS.fullscreen.toggleFullscreen;
     globalThis.sonosCommand = PCCS.sonos.sonosCommand;
     globalThis.toggleSonosMute = PCCS.sonos.toggleSonosMute;
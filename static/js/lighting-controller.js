@@ -6,7 +6,27 @@ import { PCCS, getSocket } from './namespace.js';
 
 const S = PCCS.state;
 
+  // Every light_change carries a per-light seq; the server coalesces the socket
+  // stream per light and answers with a light_ack for the last seq it applied.
+  let lightSeq = 0;
+  const lastSeq = {};
+
+  function nextSeq(name) {
+    lightSeq += 1;
+    lastSeq[name] = lightSeq;
+    return lightSeq;
+  }
+
+  // Mid-drag values: socket only, and the ramp retargets instead of restarting
+  function emitLightTracking(payload) {
+    const socket = getSocket();
+    if (!socket?.connected) return false;
+    socket.emit('light_change', { ...payload, tracking: true, seq: nextSeq(payload.name) });
+    return true;
+  }
+
   function emitLightChange(payload) {
+    payload = { ...payload, seq: nextSeq(payload.name) };
     const socket = getSocket();
     if (socket?.connected) {
       socket.emit('light_change', payload);
@@ -454,6 +474,23 @@ function getCurrentColumns() {
 		let startX = 0;
 		let startY = 0;
 		let valueAtPointerStart = 0;
+		let lastStreamed = null;
+
+		function lightPayload(brightness) {
+			const light = S.lightsConfig.find(l => l.name === name);
+			const payload = { name, brightness };
+			if (light?.has_mode && S.currentModes[name]) {
+				payload.mode = S.currentModes[name];
+			}
+			return payload;
+		}
+
+		function streamDrag() {
+			const value = parseInt(wrapper.dataset.value) || 0;
+			if (value === lastStreamed) return;
+			lastStreamed = value;
+			emitLightTracking(lightPayload(value));
+		}
 
 		function updatePosition(clientX) {
 			const rect = inner.getBoundingClientRect();
@@ -470,6 +507,7 @@ function getCurrentColumns() {
 		function startDrag() {
 			if (isDragging) return;
 			isDragging = true;
+			lastStreamed = null;
 			wrapper.classList.add('dragging');
 			S.currentlyDragging.add(name);
 			S.userJustSet.delete(name);
@@ -491,12 +529,7 @@ function getCurrentColumns() {
 			S.currentState[name] = final;
 			updateLightUI(name, final);
 
-			const light = S.lightsConfig.find(l => l.name === name);
-			const payload = { name, brightness: final };
-			if (light?.has_mode && S.currentModes[name]) {
-				payload.mode = S.currentModes[name];
-			}
-			emitLightChange(payload);
+			emitLightChange(lightPayload(final));
 		}
 
 		wrapper.addEventListener('pointerdown', e => {
@@ -516,6 +549,7 @@ function getCurrentColumns() {
 				wrapper.setPointerCapture(e.pointerId);
 				startDrag();
 				updatePosition(e.clientX);
+				streamDrag();
 			}
 		});
 
@@ -540,6 +574,7 @@ function getCurrentColumns() {
 
 			e.preventDefault();
 			updatePosition(e.clientX);
+			streamDrag();
 		});
 
 		wrapper.addEventListener('pointerup', e => {
@@ -622,6 +657,12 @@ function getCurrentColumns() {
       S.sceneActivating = false;
       applyStateToUI(newState, { animate, rampMs: S.SCENE_RAMP_MS });
     },
+    onLightAck(ack) {
+      // Only the answer to our latest change for the light, and never under a finger
+      if (!ack?.ok || ack.seq !== lastSeq[ack.name] || S.currentlyDragging.has(ack.name)) return;
+      S.currentState[ack.name] = ack.brightness;
+      updateLightUI(ack.name, ack.brightness);
+    },
     onReedUpdate(payload) {
       S.currentReeds = payload.states || {};
       updateRooftopTentControls();
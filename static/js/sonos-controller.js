@@ -16,8 +16,28 @@ function formatTime(seconds) {
   return `${min}:${sec.toString().padStart(2, '0')}`;
 }
 
+// Where playback is now: the server sends position sampled at position_ts
+// (server clock) plus server_ts, so the local clock offset cancels out.
+function livePosition(state) {
+  const position = state.position || 0;
+  if (!state.is_playing || state.position_ts == null) return position;
+  const serverNow = Date.now() / 1000 - (state.clockOffset || 0);
+  const live = position + Math.max(0, serverNow - state.position_ts);
+  return state.duration ? Math.min(live, state.duration) : live;
+}
+
+// Ask the art proxy for a thumbnail that covers the tile at this screen density
+function sizedArtUrl(url, el) {
+  if (!url.startsWith('/sonos-art')) return url;
+  const width = Math.round(Math.max(el.clientWidth, el.clientHeight) * (globalThis.devicePixelRatio || 1));
+  return width > 0 ? `${url}&w=${width}` : url;
+}
+
 function updateSonosUI(state) {
     currentSonosState = state || {};
+    if (state && state.server_ts != null) {
+      currentSonosState.clockOffset = Date.now() / 1000 - state.server_ts;
+    }
 
     const hasSpeaker = !!(state && state.speaker);
     const isEnabled = !!(state && state.enabled !== false);
@@ -41,7 +61,7 @@ function updateSonosUI(state) {
   const overlayEl = document.getElementById('sonos-overlay');
   if (artEl) {
     artEl.style.backgroundImage = hasAlbumArt 
-      ? `url('${state.album_art}')` 
+      ? `url('${sizedArtUrl(state.album_art, artEl)}')` 
       : 'none';
     artEl.style.backgroundColor = hasAlbumArt ? '' : '#1f2937';
   }
@@ -95,7 +115,7 @@ function updateProgressBar(state) {
 
   if (!progressBar) return;
 
-  const position = state.position || 0;     // seconds elapsed
+  const position = livePosition(state);     // seconds elapsed
   const duration = state.duration || 0;     // total seconds
 
   if (duration <= 0) {
@@ -112,16 +132,12 @@ function updateProgressBar(state) {
   remainingEl.textContent = `-${formatTime(duration - position)}`;
 }
 
-// Optimistic live progress
+// Live progress, interpolated from the last server sample
 function startProgressUpdater() {
   if (progressInterval) clearInterval(progressInterval);
   
   progressInterval = setInterval(() => {
     if (currentSonosState.is_playing && currentSonosState.duration) {
-      currentSonosState.position = (currentSonosState.position || 0) + 1;
-      if (currentSonosState.position > currentSonosState.duration) {
-        currentSonosState.position = currentSonosState.duration;
-      }
       updateProgressBar(currentSonosState);
     }
   }, 1000);
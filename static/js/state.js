@@ -17,7 +17,5 @@ PCCS.state = {
   sceneAnimationCancels: {},
   hasValidGPSFix: false,
   gpsStatusReceived: false,
-  lastWeatherUpdate: 0,
-  WEATHER_INTERVAL_MS: 3600 * 1000,
   currentScenes: [],
 };
\ No newline at end of file
@@ -34,15 +34,6 @@ const S = PCCS.state;
 			window.PCCS.sunCurve.updateCurveGeometry();
 		}
 
-		// Keep weather logic
-		if (S.hasValidGPSFix && data.latitude && data.longitude) {
-			const now = Date.now();
-			if (now - S.lastWeatherUpdate > S.WEATHER_INTERVAL_MS) {
-				S.lastWeatherUpdate = now;
-				fetchWeatherForecast(data.latitude, data.longitude);
-			}
-		}
-
 		// Keep styling
 		document.getElementById('tile-date').classList.toggle('text-amber-400', !S.hasValidGPSFix);
 		document.getElementById('tile-time').classList.toggle('text-amber-400', !S.hasValidGPSFix);
@@ -206,29 +197,36 @@ const S = PCCS.state;
 		}
 	}
 
-async function fetchWeatherForecast(lat, lon) {
+// Forecast is fetched once on the Pi (modules/weather.py) and shared by all clients.
+// REST on connect (ETag revalidation → cheap 304), then 'weather_update' pushes.
+async function fetchWeather() {
         try {
-            const url = `https://api.open-meteo.com/v1/forecast?latitude=${lat}&longitude=${lon}&daily=temperature_2m_max,temperature_2m_min,weathercode&current_weather=true&timezone=auto`;
-            const res = await fetch(url, { cache: 'no-store' });
-            const data = await res.json();
-
-            if (data.daily) {
-                const max = Math.round(data.daily.temperature_2m_max[0]);
-                const min = Math.round(data.daily.temperature_2m_min[0]);
-                document.getElementById('temp-range').textContent = `${min}° / ${max}°`;
-            }
-
-            const weatherIcon = document.getElementById('weather-icon');
-            if (data.current_weather && weatherIcon) {
-                const code = data.current_weather.weathercode;
-                const isDay = data.current_weather.is_day === 1;
-                weatherIcon.className = `fa-solid ${getWeatherIcon(code, isDay)} text-2xl accent-sky`;
-            }
+            const res = await fetch('/api/weather', { cache: 'no-cache' });
+            if (!res.ok) return;
+            updateWeather(await res.json());
         } catch (e) {
             console.warn('Weather fetch failed:', e);
         }
     }
 
+    function updateWeather(payload) {
+        const data = payload && payload.data;
+        if (!data) return;
+
+        if (data.daily) {
+            const max = Math.round(data.daily.temperature_2m_max[0]);
+            const min = Math.round(data.daily.temperature_2m_min[0]);
+            document.getElementById('temp-range').textContent = `${min}° / ${max}°`;
+        }
+
+        const weatherIcon = document.getElementById('weather-icon');
+        if (data.current_weather && weatherIcon) {
+            const code = data.current_weather.weathercode;
+            const isDay = data.current_weather.is_day === 1;
+            weatherIcon.className = `fa-solid ${getWeatherIcon(code, isDay)} text-2xl accent-sky`;
+        }
+    }
+
     function getWeatherIcon(code, isDay) {
         const icons = {
             0: isDay ? 'fa-sun' : 'fa-moon',
@@ -335,6 +333,7 @@ async function fetchWeatherForecast(lat, lon) {
     updatePhaseInfo,
     updateClock,
     updateTimeAndSun,
-    fetchWeatherForecast,
+    fetchWeather,
+    updateWeather,
     getWeatherIcon,
   };
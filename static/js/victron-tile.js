@@ -84,4 +84,31 @@ function updatePowerTile(data) {
   }
 }
 
-PCCS.victron = { updatePowerTile };
\ No newline at end of file
+// Tell the server while the power tile is actually on screen so it can scan
+// the Victron devices near-continuously; otherwise it duty-cycles the radio.
+const VIEWING_HEARTBEAT_MS = 20000;
+
+function watchPowerTile(sock) {
+  const tile = document.getElementById('power-tile');
+  if (!tile) return;
+  let inView = true;
+
+  const beat = () => {
+    if (inView && document.visibilityState === 'visible' && sock.connected) {
+      sock.emit('victron_viewing');
+    }
+  };
+
+  if ('IntersectionObserver' in globalThis) {
+    new IntersectionObserver(entries => {
+      inView = entries.some(e => e.isIntersecting);
+      beat();
+    }).observe(tile);
+  }
+  document.addEventListener('visibilitychange', beat);
+  sock.on('connect', beat);
+  setInterval(beat, VIEWING_HEARTBEAT_MS);
+  beat();
+}
+
+PCCS.victron = { updatePowerTile, watchPowerTile };
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""Run the engine benchmarks.
+
+    python -m tests.bench                               # all sizes, print a table
+    python -m tests.bench --save                        # also write tests/bench/baselines/<commit>.json
+    python -m tests.bench --compare tests/bench/baselines/abc1234.json
+    python -m tests.bench --sizes small medium --only reconcile_steady
+
+With --compare the exit status is 1 when any case is slower than
+--threshold times its baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from . import harness
+from .suite import SIZES, run
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(BASELINE_DIR)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _row(key: str, m: dict):
+    print(f"{key:<34} {m['ns'] / 1000:>11.2f} µs {m['best_ns'] / 1000:>11.2f} µs "
+          f"{m['peak_b'] / 1024:>9.1f} KiB {m['kept_b']:>9.1f} B", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m tests.bench", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--only", nargs="+", default=(), help="case names to run")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent timing each case")
+    parser.add_argument("--save", nargs="?", const="", metavar="PATH",
+                        help="write results as a baseline (default: baselines/<commit>.json)")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio that counts as a regression")
+    args = parser.parse_args()
+
+    logging.getLogger("pccs").setLevel(logging.ERROR)
+    logging.getLogger("pccs.config").setLevel(logging.ERROR)
+
+    print(f"{'case':<34} {'median':>14} {'best':>14} {'peak':>13} {'kept':>11}")
+    results = run(args.sizes, min_time=args.min_time, only=tuple(args.only), report=_row)
+
+    if args.save is not None:
+        path = args.save or os.path.join(BASELINE_DIR, f"{_git_rev()}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        harness.save(results, path, meta={
+            "commit": _git_rev(), "python": platform.python_version(), "machine": platform.machine(),
+            "node": platform.node(), "when": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+        print(f"\nbaseline written to {path}")
+
+    if args.compare:
+        rows = harness.compare(results, harness.load(args.compare), args.threshold)
+        print(f"\nvs {args.compare}")
+        for case, then, now, ratio, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{case:<34} {then / 1000:>11.2f} → {now / 1000:>9.2f} µs  ×{ratio:<6}{flag}")
+        if any(r[4] for r in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
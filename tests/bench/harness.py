@@ -0,0 +1,89 @@
+"""Timing, allocation measurement and baseline comparison for the bench suite."""
+from __future__ import annotations
+
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+
+def measure(op: Callable[[], object], min_time: float = 0.2, repeat: int = 5) -> dict:
+    """Time `op` and sample its memory behaviour.
+
+    Calls are batched so each of `repeat` rounds lasts about `min_time / repeat`;
+    `ns` is the median per-call time across rounds, `best_ns` the fastest round.
+    `peak_b` is the largest transient allocation during one call and `kept_b`
+    what a call leaves allocated on average (both from tracemalloc).
+    """
+    op()                                            # warm caches, lazy imports
+    target = min_time * 1e9 / repeat
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            op()
+        took = time.perf_counter_ns() - start
+        if took >= target or number >= 1 << 20:
+            break
+        number = min(1 << 20, max(number * 2, int(number * target / max(took, 1))))
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        rounds = []
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                op()
+            rounds.append((time.perf_counter_ns() - start) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    calls = min(number, 50)
+    tracemalloc.start()
+    try:
+        op()
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        op()
+        _, peak = tracemalloc.get_traced_memory()
+        before, _ = tracemalloc.get_traced_memory()
+        for _ in range(calls):
+            op()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ns": round(statistics.median(rounds), 1),
+        "best_ns": round(min(rounds), 1),
+        "calls": number * repeat,
+        "peak_b": max(0, peak - base),
+        "kept_b": round(max(0, after - before) / calls, 1),
+    }
+
+
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], threshold: float = 1.25) -> list:
+    """[(case, baseline ns, current ns, ratio, regressed)] for cases present in both."""
+    rows = []
+    for case, now in current.items():
+        then = baseline.get(case)
+        if not then or not then.get("ns"):
+            continue
+        ratio = now["ns"] / then["ns"]
+        rows.append((case, then["ns"], now["ns"], round(ratio, 3), ratio > threshold))
+    return rows
+
+
+def save(results: Dict[str, dict], path: str, meta: dict | None = None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta or {}, "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load(path: str) -> Dict[str, dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
@@ -0,0 +1,111 @@
+"""Engine operations benchmarked at each config size.
+
+Every case is built against a synthetic config (see synth.py) with half the
+reeds open, the phase at evening, a few UI intents and the observed state
+matching what was last commanded — the shape of a busy evening at camp.
+"""
+from __future__ import annotations
+
+import json
+from typing import Callable, Dict, Iterator, Tuple
+
+from engine.config_cache import config_key, dump_compiled, load_dumped
+from engine.config_compile import compile_config
+from engine.explain import build_explain_snapshot
+from engine.policy import desired_outputs
+from engine.precedence import resolve_light
+from engine.reconcile import Reconciler
+from engine.world import WorldStore
+
+from .synth import load_conf, synth_conf
+
+# name: (lights, reeds, interlock chain length, scenes)
+SIZES = {
+    "small": (8, 5, 2, 3),
+    "medium": (64, 32, 4, 8),
+    "large": (512, 256, 8, 32),
+}
+
+
+class _NullActuator:
+    def read_lights(self):
+        return {}, {}
+
+    def read_relays(self):
+        return {}
+
+    def set_light(self, *args, **kwargs):
+        pass
+
+    def set_relay(self, *args, **kwargs):
+        pass
+
+    def set_screen(self, *args, **kwargs):
+        pass
+
+
+def build(size: str):
+    """(raw config, compiled config, WorldStore, Reconciler) for one size."""
+    raw = load_conf(synth_conf(*SIZES[size]))
+    cfg = compile_config(raw)
+    store = WorldStore(cfg.reed_names, cfg.light_names, cfg.relay_names)
+    store.set_light_to_reed_map(cfg.light_to_reed)
+    store.set_phase("evening")
+    store.update_reeds({name: i % 2 == 0 for i, name in enumerate(cfg.reed_names)})
+    for light in cfg.light_names[::5]:
+        store.set_light_intent(light, 40, "white" if light in cfg.rgb_lights else None)
+    if cfg.relay_names:
+        store.set_relay_intent(cfg.relay_names[0], True)
+    null = _NullActuator()
+    reconciler = Reconciler(store, cfg, null, null, null if cfg.screens else None)
+    reconciler.reconcile("startup")
+    desired = desired_outputs(store.snapshot(), cfg)
+    store.update_observed_lights({n: b for n, (b, _) in desired.lights.items()}, dict(desired.light_modes))
+    return raw, cfg, store, reconciler
+
+
+def cases(size: str) -> Iterator[Tuple[str, Callable[[], object]]]:
+    raw, cfg, store, reconciler = build(size)
+    world = store.snapshot()
+    desired = desired_outputs(world, cfg)
+
+    lights = cfg.light_names
+    state = {"i": 0, "phase": 0}
+
+    def resolve_one():
+        state["i"] = (state["i"] + 1) % len(lights)
+        return resolve_light(lights[state["i"]], world, cfg)
+
+    def phase_flip():
+        state["phase"] ^= 1
+        store.set_phase("night" if state["phase"] else "evening")
+        reconciler.reconcile("phase")
+
+    cached = json.dumps(dump_compiled(cfg), separators=(",", ":"))
+
+    yield "compile_config", lambda: compile_config(raw)
+    # A config-cache hit at boot: hash the settings, then rebuild from the cached JSON
+    yield "config_cache_load", lambda: (config_key(raw), load_dumped(json.loads(cached)))
+    yield "resolve_light", resolve_one
+    yield "desired_outputs", lambda: desired_outputs(world, cfg)
+    yield "world_snapshot", store.snapshot
+    yield "explain_snapshot", lambda: build_explain_snapshot(world, cfg, desired)
+    yield "reconcile_steady", lambda: reconciler.reconcile("auto")
+    yield "reconcile_phase_flip", phase_flip
+
+
+def run(sizes=("small", "medium", "large"), min_time: float = 0.2, repeat: int = 5,
+        only: Tuple[str, ...] = (), report: Callable[[str, dict], None] | None = None) -> Dict[str, dict]:
+    """{"<op>/<size>": measurement} for every case."""
+    from .harness import measure
+
+    results = {}
+    for size in sizes:
+        for name, op in cases(size):
+            if only and name not in only:
+                continue
+            key = f"{name}/{size}"
+            results[key] = measure(op, min_time=min_time, repeat=repeat)
+            if report:
+                report(key, results[key])
+    return results
@@ -0,0 +1,89 @@
+"""Synthetic pccs.conf generator for engine benchmarks.
+
+`synth_conf()` writes the lighting-related sections of a camper with
+`lights` lights (every `rgb_every`-th one a bug-mode RGB fixture), `reeds`
+reeds each linked to its own light, interlocks chained `interlock_chain`
+reeds deep, `scenes` scenes each touching every other light, one relay per
+eight lights and one screen. Lights without a reed become ambient lights.
+The result compiles and validates like the real file.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+
+from modules.config import PccsConfig
+
+PHASE_LEVELS = {"day": 100, "evening": 30, "night": 5}
+
+
+def synth_conf(lights: int = 8, reeds: int = 5, interlock_chain: int = 2, scenes: int = 3,
+               rgb_every: int = 4, screens: int = 1) -> str:
+    if reeds > lights:
+        raise ValueError("every reed needs a light of its own")
+    light_names = [f"light_{i:03d}" for i in range(lights)]
+    reed_names = [f"reed_{i:03d}" for i in range(reeds)]
+    out = [
+        "[lighting]",
+        "ui_ramp_time_ms = 1000", "reed_ramp_time_ms = 2000",
+        "scene_ramp_time_ms = 4000", "phase_ramp_time_ms = 4000",
+        "",
+        "[reed_monitor]", "reed_debounce_ms = 50",
+        "",
+        "[lights]",
+    ]
+    pin = 2
+    for i, name in enumerate(light_names):
+        if rgb_every and i % rgb_every == rgb_every - 1:
+            out.append(f"{name} = Light {i} | rgb_bug | {pin} | {pin + 1} | {pin + 2} | fa-lightbulb | {i + 1}")
+            pin += 3
+        else:
+            out.append(f"{name} = Light {i} | pwm | {pin} | fa-lightbulb | {i + 1}")
+            pin += 1
+
+    out += ["", "[gpio]"]
+    for i in range(max(1, lights // 8)):
+        out.append(f"relay_{i:03d} = Relay {i} | {100 + i} | false | false | fa-plug | {i + 1}")
+
+    out += ["", "[reeds]"]
+    for i, name in enumerate(reed_names):
+        out.append(f"{name} = Reed {i} | {1000 + i} | true | 0.05 | fa-door-open | {i + 1} | {light_names[i]}")
+
+    out += ["", "[reeds.interlocks]"]
+    if interlock_chain > 1:
+        for i, name in enumerate(reed_names):
+            if i % interlock_chain:
+                out.append(f"{name} = {reed_names[i - 1]}")
+
+    out += ["", "[screens]"]
+    for i in range(min(screens, reeds)):
+        out.append(f"screen_{i} = Screen {i} | {reed_names[i]} | 10.0.0.{i + 1} | pi | /sys/class/graphics/fb0/blank")
+
+    out += ["", "[ambient]", "all_closed_action = off"]
+    for i, name in enumerate(light_names):
+        mode = ",red" if rgb_every and i % rgb_every == rgb_every - 1 else ""
+        section = "reed_phases" if i < reeds else "ambient"
+        out += ["", f"[{section}.{name}]"]
+        out += [f"{phase} = {level}{mode if phase == 'night' else ''}" for phase, level in PHASE_LEVELS.items()]
+
+    for s in range(scenes):
+        out += ["", f"[scenes.scene_{s:03d}]", f"name = Scene {s}", f"order = {s + 1}"]
+        for i, name in enumerate(light_names):
+            if (i + s) % 2 == 0:
+                out.append(f"{name} = {(i * 7 + s) % 100},white" if rgb_every and i % rgb_every == rgb_every - 1
+                           else f"{name} = {(i * 7 + s) % 100}")
+    if scenes:
+        out += ["", "[scenes.all_off]", "name = All Off", "all_off = true"]
+
+    return "\n".join(out) + "\n"
+
+
+def load_conf(text: str, directory: str | None = None) -> PccsConfig:
+    """PccsConfig read from `text` (written under `directory`, or a throwaway temp dir)."""
+    if directory is None:
+        with tempfile.TemporaryDirectory(prefix="pccs-bench-") as tmp:
+            return load_conf(text, tmp)
+    path = os.path.join(directory, "pccs.conf")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return PccsConfig(path)
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from engine.config_compile import compile_config
+from tests.bench import harness
+from tests.bench.suite import SIZES, run
+from tests.bench.synth import load_conf, synth_conf
+
+
+class SynthConfTests(unittest.TestCase):
+    def test_every_size_compiles_and_validates(self):
+        for size, (lights, reeds, chain, scenes) in SIZES.items():
+            cfg = compile_config(load_conf(synth_conf(lights, reeds, chain, scenes)))
+            self.assertEqual(len(cfg.light_names), lights, size)
+            self.assertEqual(len(cfg.reed_names), reeds, size)
+            self.assertEqual(len(cfg.scenes), scenes + 1, size)          # + all_off
+            self.assertEqual(len(cfg.ambient_lights), lights - reeds, size)
+            self.assertEqual(len(cfg.interlocks), reeds - -(-reeds // chain), size)
+
+    def test_interlocks_chain(self):
+        cfg = compile_config(load_conf(synth_conf(lights=8, reeds=6, interlock_chain=3)))
+        self.assertEqual(cfg.interlocks, {"reed_001": ["reed_000"], "reed_002": ["reed_001"],
+                                          "reed_004": ["reed_003"], "reed_005": ["reed_004"]})
+
+    def test_more_reeds_than_lights_is_refused(self):
+        with self.assertRaises(ValueError):
+            synth_conf(lights=2, reeds=3)
+
+
+class HarnessTests(unittest.TestCase):
+    def test_suite_runs_every_case(self):
+        results = run(sizes=("small",), min_time=0.001, repeat=1)
+        self.assertEqual(set(results), {
+            f"{name}/small" for name in ("compile_config", "config_cache_load", "resolve_light", "desired_outputs",
+                                         "world_snapshot", "explain_snapshot", "reconcile_steady",
+                                         "reconcile_phase_flip")
+        })
+        for m in results.values():
+            self.assertGreater(m["ns"], 0)
+            self.assertGreaterEqual(m["peak_b"], 0)
+
+    def test_baselines_round_trip_and_flag_regressions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "base.json")
+            harness.save({"a/small": {"ns": 100.0}, "b/small": {"ns": 100.0}}, path, meta={"commit": "x"})
+            baseline = harness.load(path)
+        rows = harness.compare({"a/small": {"ns": 110.0}, "b/small": {"ns": 200.0}, "c/small": {"ns": 1.0}},
+                               baseline, threshold=1.25)
+        self.assertEqual(rows, [("a/small", 100.0, 110.0, 1.1, False), ("b/small", 100.0, 200.0, 2.0, True)])
+
+
+if __name__ == "__main__":
+    unittest.main()
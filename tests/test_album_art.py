@@ -0,0 +1,149 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from modules.album_art import AlbumArtCache, AlbumArtError
+
+ART_URL = "http://10.10.10.20:1400/getaa?s=1&u=x-sonos-spotify%3atrack1"
+
+
+class _StubConfig:
+    def __init__(self, sonos: dict):
+        self._sonos = sonos
+
+    def get(self, section, key, fallback=None):
+        return self._sonos.get(key, fallback) if section == "sonos" else fallback
+
+    def getint(self, section, key, fallback=None):
+        val = self.get(section, key)
+        return int(val) if val is not None else fallback
+
+    def getfloat(self, section, key, fallback=None):
+        val = self.get(section, key)
+        return float(val) if val is not None else fallback
+
+
+class AlbumArtCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.fetches = []
+
+    def _cache(self, **overrides):
+        cfg = {"art_cache_dir": self._tmp.name, "art_sizes": "320, 640"}
+        cfg.update(overrides)
+        cache = AlbumArtCache(_StubConfig(cfg))
+
+        def fetch(url, key):
+            self.fetches.append(url)
+            time.sleep(0.05)
+            body = b"SRC" * 100
+            cache._write(f"{key}.src", body)
+            return body
+
+        cache._fetch_source = fetch
+        cache._encode = lambda source, size, ext: f"{ext}:{size}:".encode() + source[:size // 10]
+        return cache
+
+    def test_rejects_non_speaker_urls(self):
+        cache = self._cache()
+        for url in ("https://example.com/a.jpg", "http://10.10.10.20:8080/x", "file:///etc/passwd"):
+            with self.assertRaises(AlbumArtError) as ctx:
+                cache.get(url)
+            self.assertEqual(ctx.exception.status, 403)
+
+    def test_width_snaps_to_configured_sizes(self):
+        cache = self._cache()
+        self.assertEqual(cache.snap_width(200), 320)
+        self.assertEqual(cache.snap_width(321), 640)
+        self.assertEqual(cache.snap_width(2000), 640)
+        self.assertEqual(cache.snap_width(None), 640)
+
+    def test_variants_share_one_upstream_fetch_and_have_stable_etags(self):
+        cache = self._cache()
+        small = cache.get(ART_URL, 300, webp=True)
+        jpeg = cache.get(ART_URL, 300, webp=False)
+        again = cache.get(ART_URL, 300, webp=True)
+
+        self.assertEqual(len(self.fetches), 1)
+        self.assertEqual(small.mimetype, "image/webp")
+        self.assertEqual(jpeg.mimetype, "image/jpeg")
+        self.assertEqual(small.etag, again.etag)
+        self.assertNotEqual(small.etag, jpeg.etag)
+
+    def test_concurrent_requests_are_coalesced(self):
+        cache = self._cache()
+        results, errors = [], []
+
+        def worker():
+            try:
+                results.append(cache.get(ART_URL, 640).etag)
+            except Exception as e:  # pragma: no cover - surfaced below
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.fetches), 1)
+        self.assertEqual(len(set(results)), 1)
+
+    def test_upstream_failure_reaches_every_waiter(self):
+        cache = self._cache()
+
+        def failing(url, key):
+            time.sleep(0.05)
+            raise AlbumArtError("Failed", 404)
+
+        cache._fetch_source = failing
+        statuses = []
+
+        def worker():
+            try:
+                cache.get(ART_URL)
+            except AlbumArtError as e:
+                statuses.append(e.status)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(statuses, [404] * 4)
+
+    def test_lru_eviction_bounds_disk_usage(self):
+        cache = self._cache()
+        cache.max_bytes = 1000
+        for i in range(6):
+            cache._write(f"f{i}", b"x" * 300)
+            cache._read("f0")  # keep f0 hot
+
+        self.assertLessEqual(cache._total, 1000)
+        on_disk = sorted(os.listdir(self._tmp.name))
+        self.assertEqual(on_disk, sorted(cache._files))
+        self.assertIn("f0", on_disk)
+        self.assertNotIn("f1", on_disk)
+
+    def test_failed_write_is_served_but_not_cached(self):
+        cache = self._cache()
+        cache.cache_dir = os.path.join(self._tmp.name, "missing")
+        art = cache.get(ART_URL, 640)
+        self.assertTrue(art.body.startswith(b"webp:640:"))
+        self.assertEqual((cache._files, cache._etags, cache._total), ({}, {}, 0))
+
+    def test_cache_survives_restart(self):
+        first = self._cache().get(ART_URL, 640)
+        self.fetches.clear()
+        second = self._cache().get(ART_URL, 640)
+        self.assertEqual(self.fetches, [])
+        self.assertEqual(first.body, second.body)
+        self.assertEqual(first.etag, second.etag)
+
+
+if __name__ == "__main__":
+    unittest.main()
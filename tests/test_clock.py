@@ -0,0 +1,148 @@
+import datetime
+import threading
+import time
+import unittest
+import zoneinfo
+from types import SimpleNamespace
+
+from bridge.runtime import PCCSRuntime
+from engine.clock import MonotonicClock, VirtualClock
+from inputs.reeds import ReedInput
+from modules.config import config as pccs_config
+from modules.phases import PhaseManager
+from tests.test_journal import isolated_config
+
+MELBOURNE = zoneinfo.ZoneInfo("Australia/Melbourne")
+
+
+class _FakeGps:
+    def get_fallback_coords(self):
+        return -37.191, 145.711
+
+    def get_fallback_timezone(self):
+        return "Australia/Melbourne"
+
+    def get_state(self):
+        return {"fix_quality": 0}
+
+
+class _FakeSocketIO:
+    def emit(self, *args, **kwargs):
+        pass
+
+
+class _Recorder:
+    def __init__(self):
+        self.commands = []
+
+    def read_lights(self):
+        return {}, {}
+
+    def read_relays(self):
+        return {}
+
+    def set_light(self, light, brightness, mode, ramp_ms, source=None, trigger=None):
+        self.commands.append((light, brightness, trigger))
+
+    def set_relay(self, *args, **kwargs):
+        pass
+
+    def set_screen(self, *args, **kwargs):
+        pass
+
+
+class VirtualClockTests(unittest.TestCase):
+    def test_sleepers_wake_when_time_is_advanced(self):
+        clock = VirtualClock(1000.0)
+        woke = threading.Event()
+
+        def sleeper():
+            clock.sleep(3600)
+            woke.set()
+
+        threading.Thread(target=sleeper, daemon=True).start()
+        clock.advance(1800)
+        self.assertFalse(woke.wait(0.05))
+        clock.advance(1800)
+        self.assertTrue(woke.wait(1))
+        self.assertEqual((clock.time(), clock.monotonic()), (4600.0, 3600.0))
+
+    def test_wait_returns_early_when_the_event_is_set(self):
+        clock = VirtualClock()
+        event = threading.Event()
+        threading.Timer(0.05, event.set).start()
+        self.assertTrue(clock.wait(event, 3600))
+        self.assertEqual(clock.monotonic(), 0.0)
+
+    def test_auto_advance_and_now(self):
+        start = datetime.datetime(2026, 6, 21, 12, 0, tzinfo=MELBOURNE)
+        clock = VirtualClock(start, auto_advance=True)
+        clock.sleep(90)
+        self.assertEqual(clock.now(MELBOURNE), start + datetime.timedelta(seconds=90))
+        with self.assertRaises(ValueError):
+            clock.advance(-1)
+
+    def test_monotonic_clock_tracks_wall_time(self):
+        self.assertAlmostEqual(MonotonicClock().time(), time.time(), delta=0.5)
+
+
+class ReedDebounceTests(unittest.TestCase):
+    def test_changes_inside_the_debounce_window_wait(self):
+        button = SimpleNamespace(is_pressed=True)
+        gpio = SimpleNamespace(reeds={"drawer": button}, reed_states={"drawer": True})
+        updates = []
+        clock = VirtualClock()
+        reeds = ReedInput(gpio, ["drawer"], debounce_ms=50,
+                          on_update=lambda states, closed: updates.append((states, closed)), clock=clock)
+
+        button.is_pressed = False
+        reeds.poll()
+        button.is_pressed = True
+        clock.advance(0.02)
+        reeds.poll()
+        self.assertEqual(updates, [({"drawer": False}, [])])
+        clock.advance(0.05)
+        reeds.poll()
+        self.assertEqual(updates[-1], ({"drawer": True}, ["drawer"]))
+
+
+class SimulatedDayTests(unittest.TestCase):
+    def test_a_day_of_phases_runs_in_milliseconds(self):
+        start = datetime.datetime(2026, 6, 21, 0, 0, tzinfo=MELBOURNE)
+        clock = VirtualClock(start)
+        runtime = PCCSRuntime(isolated_config(), clock=clock)
+        recorder = _Recorder()
+        runtime.reconciler.arduino = recorder
+        runtime.reconciler.relays = recorder
+        runtime.reconciler.screens = recorder if runtime.screen_actuator else None
+
+        pm = PhaseManager(pccs_config, _FakeGps(), _FakeSocketIO(), clock=clock)
+        pm.on_phase_change = runtime.on_phase_change
+        runtime.phase_manager = pm
+        pm.bootstrap_initial_phase(use_fallback=True)
+        runtime.world.set_phase(pm.get_phase(), None)
+
+        phases = [pm.get_phase()]
+        expired_at = None
+        began = time.perf_counter()
+        for minute in range(1, 24 * 60 + 1):
+            clock.advance(60)
+            pm.tick()
+            if minute % 5 == 0:
+                runtime.reconcile("auto")
+            if pm.get_phase() != phases[-1]:
+                phases.append(pm.get_phase())
+            if minute == 12 * 60:
+                runtime.world.set_light_intent("kitchen_panel", 80, "white", expires="until_phase_change")
+            if expired_at is None and minute > 12 * 60 and "kitchen_panel" not in runtime.world.snapshot().light_intents:
+                expired_at = clock.now(MELBOURNE)
+        elapsed = time.perf_counter() - began
+
+        self.assertEqual(phases, ["Night", "Day", "Evening", "Night"])
+        self.assertEqual(expired_at.hour, 16)           # midwinter sunset minus the evening offset
+        self.assertIn("phase", {trigger for _, _, trigger in recorder.commands})
+        self.assertLess(elapsed, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import dataclasses
+import json
+import os
+import tempfile
+import unittest
+
+from engine.config_cache import config_key, dump_compiled, load_compiled, load_dumped
+from engine.config_compile import compile_config
+from engine.config_ir import frontend_controls, parse_lights, parse_reeds, parse_relays
+from tests.bench.synth import load_conf, synth_conf
+
+HARDWARE = """
+[lights]
+accent        = Accent        | pwm     | 8       | fa-star      | 5
+kitchen_panel = Kitchen Panel | rgb_bug | 2 | 3 | 4 | fa-utensils | 1
+broken        = Broken        | pwm     | x       | fa-bolt      | 2
+short         = Short | pwm | 9
+
+[gpio]
+floodlights = Floodlights | 17 | false | true | fa-sun | 3
+pump        = Pump        | 18
+
+[reeds]
+kitchen_panel = Kitchen Panel | 23 | true | 0.05 | fa-utensils | 10 |
+drawer        = Drawer        | 25 | false | 0.2 | fa-archive | 11 | accent
+entry         = Entry         | 26 | true | fast | fa-door-open | 12 | controls:accent, kitchen_panel
+tent          = Tent          | 27 | true | 0.05 | fa-tent | 13 | controls:
+"""
+
+
+class ConfigIrTests(unittest.TestCase):
+    def setUp(self):
+        self.raw = load_conf(HARDWARE)
+
+    def test_hardware_lines_parse_once_into_typed_definitions(self):
+        warnings = []
+        lights = parse_lights(self.raw, warnings)
+        relays = parse_relays(self.raw, warnings)
+        reeds = parse_reeds(self.raw, warnings)
+
+        self.assertEqual(list(lights), ["accent", "kitchen_panel"])
+        self.assertEqual(lights["kitchen_panel"].rgb_pins, {"white": 2, "red": 3, "green": 4})
+        self.assertEqual((lights["accent"].icon, lights["accent"].order), ("fa-star", 5))
+        self.assertTrue(relays["floodlights"].initial)
+        self.assertEqual((relays["pump"].icon, relays["pump"].order), ("fa-lightbulb", 999))
+        self.assertEqual({n: r.controls for n, r in reeds.items()}, {
+            "kitchen_panel": ("kitchen_panel",),
+            "drawer": ("accent",),
+            "entry": ("accent", "kitchen_panel"),
+            "tent": ("tent",),
+        })
+        self.assertEqual((reeds["drawer"].pull_up, reeds["drawer"].bounce_s), (False, 0.2))
+        self.assertEqual(reeds["entry"].bounce_s, 0.05)
+        self.assertEqual(len(warnings), 3)          # broken pin, short line, bad bounce_time
+
+    def test_frontend_controls_mix_dimmers_and_relays_in_user_order(self):
+        controls = frontend_controls(parse_lights(self.raw), parse_relays(self.raw))
+        self.assertEqual([(c["name"], c["type"], c["has_mode"]) for c in controls], [
+            ("kitchen_panel", "dimmer", True),
+            ("floodlights", "relay", False),
+            ("accent", "dimmer", False),
+            ("pump", "relay", False),
+        ])
+
+
+class ConfigCacheTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.cache = os.path.join(self._tmp.name, "cache", "compiled.json")
+
+    def _conf(self, ui_ramp_ms=1000):
+        text = synth_conf(lights=12, reeds=5, interlock_chain=2, scenes=3)
+        text = text.replace("ui_ramp_time_ms = 1000", f"ui_ramp_time_ms = {ui_ramp_ms}")
+        text += f"\n[config_cache]\nenabled = true\npath = {self.cache}\n"
+        return load_conf(text, self._tmp.name)
+
+    def test_round_trip_is_identical(self):
+        compiled = compile_config(self._conf())
+        loaded = load_dumped(json.loads(json.dumps(dump_compiled(compiled))))
+        self.assertEqual(dataclasses.replace(loaded, ids=None), dataclasses.replace(compiled, ids=None))
+        self.assertEqual(loaded.ids.light, compiled.ids.light)
+
+    def test_second_boot_loads_instead_of_compiling(self):
+        with self.assertLogs("pccs", level="INFO") as first:
+            compiled = load_compiled(self._conf())
+        self.assertTrue(os.path.exists(self.cache))
+        with self.assertLogs("pccs", level="INFO") as second:
+            cached = load_compiled(self._conf())
+        self.assertTrue(any("compiled and cached" in line for line in first.output))
+        self.assertTrue(any("loaded from cache" in line for line in second.output))
+        self.assertEqual(cached.light_tables, compiled.light_tables)
+
+    def test_key_follows_compiled_sections_only(self):
+        base = config_key(self._conf())
+        unrelated = self._conf()
+        unrelated.config.add_section("weather")
+        unrelated.config.set("weather", "api_key", "abc")
+        self.assertEqual(config_key(unrelated), base)
+        self.assertNotEqual(config_key(self._conf(ui_ramp_ms=1500)), base)
+
+    def test_corrupt_cache_is_rebuilt(self):
+        os.makedirs(os.path.dirname(self.cache))
+        with open(self.cache, "w") as f:
+            f.write('{"format": 1, "key": ')
+        with self.assertLogs("pccs", level="WARNING"):
+            compiled = load_compiled(self._conf())
+        self.assertEqual(len(compiled.light_names), 12)
+        with open(self.cache) as f:
+            self.assertEqual(json.load(f)["key"], config_key(self._conf()))
+
+
+if __name__ == "__main__":
+    unittest.main()
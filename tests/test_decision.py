@@ -0,0 +1,75 @@
+import itertools
+import unittest
+
+from engine.config_compile import compile_config
+from engine.decision import compile_decision_tables
+from engine.intent import LightIntent
+from engine.policy import desired_outputs
+from engine.precedence import WorldView, resolve_light, resolve_stack, resolve_screen
+from engine.world import WorldState
+from modules.config import config as pccs_config
+from tests.bench.synth import load_conf, synth_conf
+from tests.test_policy import dim_cfg, minimal_cfg
+
+# Per reed: (hardware closed, force) — covers open, closed and both forces
+REED_STATES = ((True, None), (False, None), (False, True), (True, False))
+PHASES = ((None, None), ("", None), ("Day", None), ("evening", None), ("NIGHT", None),
+          ("dusk", None), ("day", "night"))
+
+
+def _worlds(cfg):
+    scenes = (None, "no_such_scene") + tuple(cfg.scenes)
+    for states in itertools.product(REED_STATES, repeat=len(cfg.reed_names)):
+        reeds = {r: closed for r, (closed, _) in zip(cfg.reed_names, states)}
+        forces = {r: f for r, (_, f) in zip(cfg.reed_names, states) if f is not None}
+        for (phase, forced), scene in itertools.product(PHASES, scenes):
+            yield WorldState(reeds=reeds, reed_forces=forces, phase=phase or "",
+                             phase_forced=forced, active_scene=scene)
+
+
+class DecisionTableTests(unittest.TestCase):
+    def assert_tables_match_stack(self, cfg):
+        self.assertEqual(set(cfg.light_tables), set(cfg.light_names))
+        checked = 0
+        for world in _worlds(cfg):
+            view = WorldView(world, cfg)
+            for light in cfg.light_names:
+                expected = resolve_stack(light, None, world.active_scene, view, cfg)
+                self.assertEqual(resolve_light(light, world, cfg), expected, (light, world))
+                checked += 1
+        self.assertGreater(checked, 0)
+
+    def test_minimal_config(self):
+        self.assert_tables_match_stack(compile_decision_tables(minimal_cfg()))
+
+    def test_minimal_config_dims_when_all_closed(self):
+        self.assert_tables_match_stack(compile_decision_tables(dim_cfg()))
+
+    def test_shipped_config(self):
+        self.assert_tables_match_stack(compile_config(pccs_config))
+
+    def test_interlocked_synthetic_config(self):
+        cfg = compile_config(load_conf(synth_conf(lights=7, reeds=4, interlock_chain=2, scenes=3, rgb_every=2)))
+        self.assertTrue(cfg.interlocks)
+        self.assert_tables_match_stack(cfg)
+
+    def test_intent_bypasses_the_table(self):
+        cfg = compile_decision_tables(minimal_cfg())
+        world = WorldState(reeds={r: False for r in cfg.reed_names}, phase="evening",
+                           light_intents={"kitchen_panel": LightIntent(60, "red")})
+        got = resolve_light("kitchen_panel", world, cfg)
+        self.assertEqual((got.brightness, got.mode, got.source), (60, "red", "user_intent"))
+
+    def test_hand_edited_config_without_tables_still_resolves(self):
+        cfg = minimal_cfg()                         # tables never compiled
+        world = WorldState(reeds={r: False for r in cfg.reed_names}, phase="evening")
+        with_tables = compile_decision_tables(minimal_cfg())
+        walked, looked_up = desired_outputs(world, cfg), desired_outputs(world, with_tables)
+        self.assertEqual(walked.lights, looked_up.lights)
+        self.assertEqual(walked.light_sources, looked_up.light_sources)
+        self.assertEqual(resolve_screen("kitchen_panel", world, cfg),
+                         resolve_screen("kitchen_panel", world, with_tables))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import re
+import select
+import shutil
+import subprocess
+import tempfile
+import time
+import tty
+import unittest
+from pathlib import Path
+
+from modules.brightness import CIE_PWM, brightness_to_pwm, pwm_to_brightness
+from scripts.firmware_host import FirmwareHost, build
+
+ARDUINO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "arduino")
+HOST_DIR = os.path.join(ARDUINO_DIR, "host")
+CXX = os.environ.get("CXX") or shutil.which("g++") or shutil.which("clang++")
+
+
+class BrightnessCurveTest(unittest.TestCase):
+    def test_firmware_table_matches_python(self):
+        with open(os.path.join(ARDUINO_DIR, "arduino.ino"), encoding="utf-8") as f:
+            source = f.read()
+        body = re.search(r"CIE_PWM\[256\] PROGMEM = \{(.*?)\};", source, re.S).group(1)
+        self.assertEqual(tuple(int(v) for v in body.replace(",", " ").split()), CIE_PWM)
+
+    def test_round_trip_is_exact(self):
+        for curve in ("cie", "linear"):
+            for pct in range(101):
+                self.assertEqual(pwm_to_brightness(brightness_to_pwm(pct, curve), curve), pct, (curve, pct))
+            self.assertEqual(pwm_to_brightness(0, curve), 0)
+            self.assertTrue(all(pwm_to_brightness(pwm, curve) > 0 for pwm in range(1, 256)), curve)
+        self.assertEqual([brightness_to_pwm(p, "cie") for p in range(8)], [0, 1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual((brightness_to_pwm(0, "cie"), brightness_to_pwm(100, "cie")), (0, 255))
+        self.assertLess(brightness_to_pwm(50, "cie"), brightness_to_pwm(50))
+
+    def test_linear_is_unchanged(self):
+        self.assertEqual([brightness_to_pwm(p) for p in (0, 1, 50)], [0, 2, 127])
+        self.assertEqual(pwm_to_brightness(127), 50)
+
+
+@unittest.skipUnless(CXX, "no host C++ compiler")
+class FirmwareHostTest(unittest.TestCase):
+    """Builds arduino.ino against the stub core in arduino/host and runs its checks."""
+
+    def _build_and_run(self, source):
+        with tempfile.TemporaryDirectory() as tmp:
+            binary = os.path.join(tmp, os.path.splitext(source)[0])
+            build = subprocess.run(
+                [CXX, "-I.", "-std=gnu++11", "-O1", "-Wall", "-Wno-unused-function",
+                 "-o", binary, source, "host.cpp"],
+                cwd=HOST_DIR, capture_output=True, text=True, timeout=120,
+            )
+            self.assertEqual(build.returncode, 0, build.stderr)
+            run = subprocess.run([binary], cwd=HOST_DIR, capture_output=True, text=True, timeout=60)
+            self.assertEqual(run.returncode, 0, run.stdout + run.stderr)
+            return run.stdout
+
+    def test_ramp_jitter(self):
+        self.assertIn("OK", self._build_and_run("test_ramp_jitter.cpp"))
+
+
+@unittest.skipUnless(CXX, "no host C++ compiler")
+class FirmwarePtyTest(unittest.TestCase):
+    """The real-time harness, spoken to over its pseudo-terminal like a board."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        cls.binary = build(Path(cls._tmp.name) / "fwhost")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    def setUp(self):
+        self.link = os.path.join(self._tmp.name, f"tty-{self.id().rsplit('.', 1)[-1]}")
+        self.host = FirmwareHost(link=self.link, binary=self.binary)
+        self.host.start()
+        self.addCleanup(self.host.stop)
+        self.fd = os.open(self.link, os.O_RDWR | os.O_NOCTTY)
+        self.addCleanup(os.close, self.fd)
+        tty.setraw(self.fd)
+
+    def _ask(self, cmd, expect, timeout=2.0):
+        os.write(self.fd, cmd.encode() + b"\n")
+        buf = b""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if select.select([self.fd], [], [], 0.05)[0]:
+                buf += os.read(self.fd, 256)
+                for line in buf.decode().split("\r\n")[:-1]:
+                    if line.startswith(expect):
+                        return line
+        self.fail(f"no {expect} reply to {cmd!r} (got {buf!r})")
+
+    def test_setup_announces_ready(self):
+        # A fresh board, read before anything flushes its input (setUp's setraw does)
+        host = FirmwareHost(binary=self.binary)
+        path = host.start()
+        self.addCleanup(host.stop)
+        fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+        self.addCleanup(os.close, fd)
+        buf = b""
+        deadline = time.monotonic() + 2.0
+        while b"READY\r\n" not in buf and time.monotonic() < deadline:
+            if select.select([fd], [], [], 0.05)[0]:
+                buf += os.read(fd, 256)
+        self.assertIn(b"READY\r\n", buf)
+
+    def test_protocol_over_pty(self):
+        os.write(self.fd, b"SET 5 100\n")
+        self.assertEqual(self._ask("GET 5", "VALUE"), "VALUE 5 100")
+        self.assertEqual(self._ask("GETVCC", "VCC"), "VCC 5001")
+
+    def test_tracking_ramp_scales_with_distance(self):
+        os.write(self.fd, b"RAMP 6 51 1000 T\n")          # a fifth of a sweep: ~200 ms
+        time.sleep(0.4)
+        self.assertEqual(self._ask("GET 6", "VALUE"), "VALUE 6 51")
+
+    def test_stats_report_loop_commands_and_ramps(self):
+        os.write(self.fd, b"RAMP 6 200 100\nRAMP 7 255 150 C\n")
+        time.sleep(0.4)
+        stats = self.host.stats()
+        self.assertGreaterEqual(stats["commands"], 2)
+        self.assertGreater(stats["loops"], 100)
+        self.assertEqual(stats["ramps_done"], 2)
+        self.assertLess(stats["ramp_error_ms_max"], 20)  # 1 ms tick, generous for loaded CI
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+
+from bridge.runtime import PCCSRuntime
+from engine.intent import IntentBatchError, parse_intent_batch
+from engine.world import WorldStore
+from tests.test_journal import isolated_config
+from tests.test_policy import minimal_cfg
+
+
+class ParseIntentBatchTests(unittest.TestCase):
+    def test_defaults_and_last_item_wins(self):
+        batch = parse_intent_batch([
+            {"light": "accent", "brightness": 40},
+            {"light": "kitchen_panel", "brightness": 150, "mode": "RED", "expires": "manual"},
+            {"light": "accent", "brightness": "55", "expires": "until_phase_change"},
+            {"relay": "floodlights", "on": True},
+        ], minimal_cfg())
+        self.assertEqual(batch.lights, {
+            "accent": (55, None, "until_phase_change"),
+            "kitchen_panel": (100, "red", "manual"),
+        })
+        self.assertEqual(batch.relays, {"floodlights": (True, "manual")})
+
+    def test_one_bad_item_rejects_the_batch(self):
+        with self.assertRaises(IntentBatchError) as caught:
+            parse_intent_batch([
+                {"light": "accent", "brightness": 40},
+                {"light": "porch", "brightness": 40},
+                {"light": "awning", "brightness": 40, "mode": "blue"},
+                {"light": "accent", "brightness": None},
+                {"relay": "floodlights", "on": "yes"},
+                {"relay": "floodlights", "on": True, "expires": "until_reed_close"},
+                {"light": "accent", "relay": "floodlights"},
+            ], minimal_cfg())
+        self.assertEqual(len(caught.exception.errors), 6)
+        self.assertTrue(caught.exception.errors[0].startswith("intents[1]"))
+
+    def test_infinite_brightness_is_a_batch_error(self):
+        # JSON allows Infinity; int(inf) raises OverflowError, not ValueError
+        for value in (float("inf"), float("-inf"), float("nan")):
+            with self.assertRaises(IntentBatchError):
+                parse_intent_batch([{"light": "accent", "brightness": value}], minimal_cfg())
+
+    def test_empty_or_missing_list_is_an_error(self):
+        for items in (None, [], {"light": "accent"}):
+            with self.assertRaises(IntentBatchError):
+                parse_intent_batch(items, minimal_cfg())
+
+
+class WorldStoreBatchTests(unittest.TestCase):
+    def test_batch_is_one_version_step(self):
+        world = WorldStore([], ["accent", "awning"], ["floodlights"])
+        world.set_light_intent("accent", 10)
+        before = world.version
+        version = world.apply_intents(
+            {"accent": (30, None, "manual"), "awning": (50, "red", "until_phase_change")},
+            {"floodlights": (True, "until_scene_clear")},
+        )
+        self.assertEqual(version, before + 1)
+        snap = world.snapshot()
+        self.assertEqual(snap.version, version)
+        self.assertEqual(snap.light_intents["accent"].brightness, 30)
+        self.assertEqual(snap.light_intents["awning"].mode, "red")
+        self.assertTrue(snap.relay_intents["floodlights"].on)
+
+    def test_relay_intents_expire_like_light_intents(self):
+        world = WorldStore([], [], ["floodlights", "pump"])
+        world.apply_intents({}, {"floodlights": (True, "until_phase_change"), "pump": (True, "until_scene_clear")})
+        world.set_phase("night", invalidate=True)
+        self.assertEqual(list(world.snapshot().relay_intents), ["pump"])
+        world.set_active_scene("bedtime")
+        self.assertEqual(world.snapshot().relay_intents, {})
+
+    def test_hardware_read_back_does_not_bump_the_version(self):
+        world = WorldStore([], ["accent"], ["floodlights"])
+        world.update_observed_lights({"accent": 20})
+        world.update_observed_relays({"floodlights": True})
+        self.assertEqual(world.version, 0)
+
+
+class RuntimeBatchTests(unittest.TestCase):
+    def test_batch_costs_one_reconcile_and_one_emit(self):
+        runtime = PCCSRuntime(isolated_config())
+        emitted = []
+        runtime.reconciler.on_state_emit = emitted.append
+        before = runtime.scheduler.stats()["passes"]
+
+        batch = parse_intent_batch([
+            {"light": "accent", "brightness": 45},
+            {"light": "kitchen_panel", "brightness": 70, "mode": "green"},
+            {"relay": "floodlights", "on": True, "expires": "until_phase_change"},
+        ], runtime.compiled)
+        version, done = runtime.apply_intents(batch)
+        done.result(5)
+
+        self.assertEqual(version, runtime.world.version)
+        self.assertEqual(runtime.scheduler.stats()["passes"] - before, 1)
+        self.assertEqual(len(emitted), 1)
+        self.assertEqual((emitted[0]["accent"], emitted[0]["kitchen_panel"]), (45, 70))
+        self.assertEqual(emitted[0]["kitchen_panel_mode"], "green")
+        self.assertTrue(emitted[0]["floodlights"])
+
+
+if __name__ == "__main__":
+    unittest.main()
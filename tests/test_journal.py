@@ -0,0 +1,193 @@
+import os
+import tempfile
+import unittest
+
+from bridge.runtime import PCCSRuntime
+from engine.intent import parse_intent_batch
+from engine.journal import JournalWriter, journal_files, read_journal
+from engine.replay import ReplayDriver, replay_files
+from modules.config import PccsConfig
+
+
+def isolated_config() -> PccsConfig:
+    """The real pccs.conf with the journal, warm-start file and config cache off, so a test runtime never touches the tree."""
+    cfg = PccsConfig()
+    cfg.config.set("journal", "enabled", "false")
+    cfg.config.set("warm_start", "enabled", "false")
+    cfg.config.set("config_cache", "enabled", "false")
+    return cfg
+
+
+class _Clock:
+    """Monotonic ns clock the test moves by hand."""
+
+    def __init__(self):
+        self.ns = 1_000_000_000
+
+    def __call__(self):
+        return self.ns
+
+    def advance(self, seconds):
+        self.ns += int(seconds * 1e9)
+
+
+class _Recorder:
+    def __init__(self):
+        self.commands = []
+
+    def read_lights(self):
+        return {}, {}
+
+    def read_relays(self):
+        return {}
+
+    def set_light(self, light, brightness, mode, ramp_ms, source=None, trigger=None):
+        self.commands.append(("light", light, brightness, mode, ramp_ms, trigger or ""))
+
+    def set_relay(self, relay, on, source=None, trigger=None):
+        self.commands.append(("relay", relay, bool(on), None, 0, trigger or ""))
+
+    def set_screen(self, screen, awake):
+        self.commands.append(("screen", screen, bool(awake), None, 0, ""))
+
+
+class JournalFormatTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "journal.bin")
+        self.clock = _Clock()
+
+    def test_round_trip(self):
+        w = JournalWriter(self.path, clock=self.clock)
+        w.reeds({"kitchen_panel": False, "rear_drawer": True}, ["rear_drawer"])
+        self.clock.advance(1.5)
+        w.phase("evening", None, True)
+        w.light_intent("kitchen_panel", 40, "red")
+        w.relay_intent("floodlights", True)
+        w.scene("bedtime")
+        w.reed_force("all", None)
+        w.observed({"kitchen_panel": 40}, {"kitchen_panel": "red"}, {"floodlights": True})
+        w.observed({"kitchen_panel": 40}, {"kitchen_panel": "red"}, {"floodlights": True})   # unchanged: dropped
+        w.reconcile("auto")
+        w.intents({"accent": (45, None, "manual")}, {"floodlights": (False, "until_phase_change")})
+        w.close()
+
+        events = list(read_journal(self.path))
+        self.assertEqual([e.name for e in events],
+                         ["reeds", "phase", "light", "relay", "scene", "reed_force", "observed", "reconcile",
+                          "intents"])
+        self.assertEqual(events[0].data, {"reeds": {"kitchen_panel": False, "rear_drawer": True},
+                                          "closed_transitions": ["rear_drawer"]})
+        self.assertAlmostEqual(events[1].t - events[0].t, 1.5, places=5)
+        self.assertEqual(events[1].data, {"phase": "evening", "forced": None, "invalidate": True, "quiet": False})
+        self.assertEqual(events[2].data, {"light": "kitchen_panel", "brightness": 40, "mode": "red",
+                                          "expires": "until_reed_close"})
+        self.assertEqual(events[3].data, {"relay": "floodlights", "on": True, "expires": "manual"})
+        self.assertEqual(events[5].data, {"reed": "all", "closed": None})
+        self.assertEqual(events[6].data["relays"], {"floodlights": True})
+        self.assertEqual(events[8].data, {"lights": {"accent": (45, None, "manual")},
+                                          "relays": {"floodlights": (False, "until_phase_change")}})
+        self.assertLess(os.path.getsize(self.path), 200)
+
+    def test_truncated_tail_is_dropped(self):
+        w = JournalWriter(self.path, clock=self.clock)
+        w.relay_intent("floodlights", True)
+        w.relay_intent("floodlights", False)
+        w.close()
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        self.assertEqual([e.data["on"] for e in read_journal(self.path)], [True])
+
+    def test_rotation_bounds_disk_use(self):
+        w = JournalWriter(self.path, max_bytes=4096, backups=2, clock=self.clock)
+        for i in range(3000):
+            self.clock.advance(30)
+            w.light_intent("kitchen_panel", i % 100, None)
+        w.close()
+
+        files = journal_files(self.path)
+        self.assertEqual(files, [self.path + ".2", self.path + ".1", self.path])
+        self.assertLessEqual(sum(os.path.getsize(p) for p in files), 3 * (4096 + 64))
+        # Each file stands alone: names are redefined, the timeline continues
+        last = [e for e in read_journal(files[-1]) if not e.restore]
+        self.assertEqual(last[-1].data["brightness"], 2999 % 100)
+        first = [e for e in read_journal(files[0]) if not e.restore]
+        self.assertLess(first[-1].t, last[0].t)
+
+
+class ReplayTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "journal.bin")
+
+    def _runtime(self):
+        runtime = PCCSRuntime(isolated_config())
+        recorder = _Recorder()
+        runtime.reconciler.arduino = recorder
+        runtime.reconciler.relays = recorder
+        runtime.reconciler.screens = recorder if runtime.screen_actuator else None
+        runtime.journal = JournalWriter(self.path, snapshot=runtime.world.snapshot)
+        return runtime, recorder
+
+    def test_replay_reissues_the_runtime_commands(self):
+        runtime, recorder = self._runtime()
+        runtime.world.set_phase("evening", None)
+        runtime.read_hardware()
+        runtime.journal.reconcile("startup")
+        runtime.reconcile("startup")
+        runtime.on_reeds_updated({**runtime.effective_reed_states(), "kitchen_panel": False}, [])
+        runtime.set_light_intent("kitchen_panel", 60, "red")
+        runtime.set_light_intent("kitchen_panel", 35, "red", ramp_source="slider")
+        runtime.set_relay_intent("floodlights", True)
+        runtime.apply_intents(parse_intent_batch([
+            {"light": "accent", "brightness": 45, "expires": "manual"},
+            {"relay": "floodlights", "on": False, "expires": "until_phase_change"},
+        ], runtime.compiled))
+        runtime.on_phase_change("night", None, True)
+        runtime.force_reed("rear_drawer", False)
+        runtime.set_scene("bedtime")
+        runtime.on_reeds_updated({**runtime.effective_reed_states(), "kitchen_panel": True}, ["kitchen_panel"])
+        runtime.force_reed("all", None)
+        runtime.journal.close()
+
+        report = replay_files(journal_files(self.path), runtime.compiled)
+        self.assertEqual([c.as_tuple() for c in report.commands], recorder.commands)
+        self.assertEqual(report.events["scene"], 1)
+        self.assertEqual(report.events["slider"], 1)
+        self.assertEqual(report.events["intents"], 1)
+        self.assertIn(("light", "kitchen_panel", 35, "red", runtime.compiled.ui_ramp_ms, "slider"),
+                      recorder.commands)
+        self.assertEqual(len(report.latencies), 11)
+
+    def test_a_week_of_events_replays_quickly(self):
+        runtime, _ = self._runtime()
+        clock = _Clock()
+        runtime.journal.clock = clock
+        reeds = runtime.effective_reed_states()
+        runtime.read_hardware()
+        for tick in range(7 * 24 * 120):                    # a safety reconcile every 30 s
+            clock.advance(30)
+            runtime.journal.reconcile("auto")
+            if tick % 240 == 0:                             # a door opened and closed every 2 h
+                runtime.journal.reeds({**reeds, "kitchen_panel": False})
+                clock.advance(60)
+                runtime.journal.reeds(reeds, ["kitchen_panel"])
+            if tick % 2880 == 0:
+                runtime.journal.phase("night" if tick % 5760 else "evening", None, True)
+        runtime.journal.close()
+
+        driver = ReplayDriver(runtime.compiled)
+        report = driver.run(e for p in journal_files(self.path) for e in read_journal(p))
+        self.assertGreater(report.span_s, 7 * 86400)
+        self.assertEqual(report.events["reconcile"], 7 * 24 * 120)
+        self.assertLess(report.elapsed_s, 30)
+        # Commands carry journal time, not the time the replay ran
+        self.assertTrue(report.commands)
+        self.assertLessEqual(report.commands[-1].t, driver.clock.time())
+        self.assertGreater(report.commands[-1].t - report.commands[0].t, 6 * 86400)
+
+
+if __name__ == "__main__":
+    unittest.main()
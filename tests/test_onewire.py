@@ -0,0 +1,133 @@
+import os
+import tempfile
+import time
+import unittest
+
+from modules.onewire import OneWireBus
+
+OUTSIDE = "28-3ce1d4435d5a"
+FRIDGE = "28-0316a2797bff"
+
+
+class _FakeSysfs:
+    """Directory laid out like /sys/bus/w1/devices."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def probe(self, sensor_id, millideg=None, w1_slave=None):
+        path = os.path.join(self.root, sensor_id)
+        os.makedirs(path, exist_ok=True)
+        if millideg is not None:
+            with open(os.path.join(path, "temperature"), "w") as f:
+                f.write(f"{millideg}\n")
+        if w1_slave is not None:
+            with open(os.path.join(path, "w1_slave"), "w") as f:
+                f.write(w1_slave)
+        return path
+
+    def master(self, state="0"):
+        path = os.path.join(self.root, "w1_bus_master1")
+        os.makedirs(path, exist_ok=True)
+        bulk = os.path.join(path, "therm_bulk_read")
+        with open(bulk, "w") as f:
+            f.write(f"{state}\n")
+        return bulk
+
+
+class OneWireBusTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.sysfs = _FakeSysfs(self._tmp.name)
+        self.bus = OneWireBus(self._tmp.name, conversion_timeout=0.5)
+        self.addCleanup(self.bus.close)
+
+    def test_bulk_trigger_then_reads_every_probe(self):
+        bulk = self.sysfs.master()
+        self.sysfs.probe(OUTSIDE, 18375)
+        self.sysfs.probe(FRIDGE, 3125)
+
+        temps = self.bus.read_temperatures([OUTSIDE, FRIDGE])
+
+        self.assertEqual(temps, {OUTSIDE: 18.4, FRIDGE: 3.1})
+        with open(bulk) as f:
+            self.assertEqual(f.read().strip(), "trigger")
+
+    def test_waits_for_conversion_in_progress(self):
+        bulk = self.sysfs.master()
+        self.sysfs.probe(OUTSIDE, 21000)
+        polls = []
+        read_text = OneWireBus._read_text
+
+        def kernel_read(path):
+            # The kernel reports -1 while converting, then 1 once values are latched
+            if path == bulk:
+                polls.append(path)
+                return "-1" if len(polls) < 4 else "1"
+            return read_text(path)
+
+        self.bus._read_text = kernel_read
+        self.assertTrue(self.bus._bulk_convert())
+        self.assertEqual(len(polls), 4)
+        self.assertEqual(self.bus.read_temperatures([OUTSIDE]), {OUTSIDE: 21.0})
+
+    def test_conversion_timeout_is_reported(self):
+        self.sysfs.master()
+        self.bus.conversion_timeout = 0.1
+        self.bus._read_text = lambda path: "-1"
+        self.assertFalse(self.bus._bulk_convert())
+
+    def test_auto_detects_first_probe_and_caches_path(self):
+        self.sysfs.probe(FRIDGE, 4000)
+        self.sysfs.probe(OUTSIDE, 19000)
+        self.assertEqual(self.bus.read_temperatures([None]), {None: 4.0})
+
+        # A probe appearing later doesn't change the cached choice
+        self.sysfs.probe("28-000000000001", 25000)
+        self.assertEqual(self.bus.read_temperatures([None]), {None: 4.0})
+
+    def test_missing_probe_is_none_and_not_rescanned_every_cycle(self):
+        self.sysfs.probe(OUTSIDE, 18000)
+        self.assertEqual(self.bus.read_temperatures([OUTSIDE, FRIDGE]), {OUTSIDE: 18.0, FRIDGE: None})
+
+        self.sysfs.probe(FRIDGE, 5000)
+        self.assertIsNone(self.bus.read_temperatures([FRIDGE])[FRIDGE])
+        self.bus._last_scan[FRIDGE] -= self.bus.rescan_interval
+        self.assertEqual(self.bus.read_temperatures([FRIDGE]), {FRIDGE: 5.0})
+
+    def test_rescan_window_is_per_probe(self):
+        self.assertIsNone(self.bus.read_temperatures([FRIDGE])[FRIDGE])
+        self.bus._last_scan[FRIDGE] -= self.bus.rescan_interval
+        # Looking up another probe must not restart FRIDGE's window
+        self.sysfs.probe(OUTSIDE, 18000)
+        self.sysfs.probe(FRIDGE, 5000)
+        self.assertEqual(self.bus.read_temperatures([OUTSIDE, FRIDGE]), {OUTSIDE: 18.0, FRIDGE: 5.0})
+
+    def test_rejects_power_on_reset_value(self):
+        self.sysfs.probe(OUTSIDE, 85000)
+        self.assertEqual(self.bus.read_temperatures([OUTSIDE]), {OUTSIDE: None})
+
+    def test_falls_back_to_w1_slave(self):
+        self.sysfs.probe(OUTSIDE, w1_slave="72 01 4b 46 7f ff 0e 10 57 : crc=57 YES\n72 01 4b 46 7f ff 0e 10 57 t=23125\n")
+        self.sysfs.probe(FRIDGE, w1_slave="72 01 4b 46 7f ff 0e 10 57 : crc=00 NO\n72 01 4b 46 7f ff 0e 10 57 t=23125\n")
+        self.assertEqual(self.bus.read_temperatures([OUTSIDE, FRIDGE]), {OUTSIDE: 23.1, FRIDGE: None})
+
+    def test_reads_run_in_parallel(self):
+        self.sysfs.probe(OUTSIDE, 18000)
+        self.sysfs.probe(FRIDGE, 4000)
+        original = OneWireBus._read_device
+
+        def slow_read(bus, path):
+            time.sleep(0.3)  # a per-probe conversion without bulk support
+            return original(bus, path)
+
+        self.bus._read_device = lambda path: slow_read(self.bus, path)
+        start = time.monotonic()
+        temps = self.bus.read_temperatures([OUTSIDE, FRIDGE])
+        self.assertEqual(temps, {OUTSIDE: 18.0, FRIDGE: 4.0})
+        self.assertLess(time.monotonic() - start, 0.55)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -733,5 +733,65 @@ class SceneReconcileTests(unittest.TestCase):
         self.assertEqual(rec._last_desired.lights["kitchen_panel"][0], 5)
 
 
+class OutputVectorTests(unittest.TestCase):
+    def _reconciler(self, cfg):
+        from engine.reconcile import Reconciler
+
+        class Recorder:
+            def __init__(self):
+                self.lights, self.relays = [], []
+
+            def read_lights(self):
+                return {}, {}
+
+            def read_relays(self):
+                return {}
+
+            def set_light(self, name, brightness, mode, *args, **kwargs):
+                self.lights.append((name, brightness, mode))
+
+            def set_relay(self, name, on, **kwargs):
+                self.relays.append((name, on))
+
+        world = WorldStore(cfg.reed_names, cfg.light_names, cfg.relay_names)
+        world.set_light_to_reed_map(cfg.light_to_reed)
+        world.set_phase("Evening", invalidate=False)
+        world.update_reeds(_default_reeds(open_names=list(cfg.reed_names)))
+        hw = Recorder()
+        return world, hw, Reconciler(world=world, cfg=cfg, arduino_actuator=hw, relay_actuator=hw)
+
+    def test_ids_follow_config_order(self):
+        cfg = minimal_cfg()
+        out = desired_outputs(WorldState(), cfg)
+        self.assertEqual(out.ids.lights, tuple(cfg.light_names))
+        self.assertEqual([out.ids.lights[i] for i in out.ids.rgb_lights], ["kitchen_panel", "awning"])
+        self.assertEqual(list(out.lights), cfg.light_names)
+        self.assertEqual(set(out.light_modes), {"kitchen_panel", "awning"})
+        self.assertEqual(out.relays, {"floodlights": False})
+
+    def test_steady_reconcile_commands_nothing(self):
+        world, hw, rec = self._reconciler(minimal_cfg())
+        rec.reconcile("reed")
+        self.assertEqual(len(hw.lights), len(minimal_cfg().light_names))
+        self.assertEqual(hw.relays, [("floodlights", False)])
+        hw.lights.clear()
+        hw.relays.clear()
+        rec.reconcile("auto")
+        self.assertEqual((hw.lights, hw.relays), ([], []))
+
+    def test_only_changed_outputs_are_commanded(self):
+        world, hw, rec = self._reconciler(minimal_cfg())
+        rec.reconcile("reed")
+        hw.lights.clear()
+        hw.relays.clear()
+        world.set_light_intent("awning", 20, "green")     # same brightness as automation, new mode
+        world.set_relay_intent("floodlights", True)
+        rec.reconcile("ui")
+        self.assertEqual(hw.lights, [("awning", 20, "green")])
+        self.assertEqual(hw.relays, [("floodlights", True)])
+        self.assertEqual(rec.build_ui_state()["awning_mode"], "green")
+        self.assertIs(rec.build_ui_state()["floodlights"], True)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
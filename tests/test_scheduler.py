@@ -0,0 +1,85 @@
+import threading
+import unittest
+
+from bridge.scheduler import ReconcileScheduler
+
+
+class _Passes:
+    """run_pass stand-in: records sources; the first pass can be held open."""
+
+    def __init__(self, hold_first=False):
+        self.sources = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        if not hold_first:
+            self.release.set()
+
+    def __call__(self, source):
+        self.sources.append(source)
+        self.entered.set()
+        self.release.wait(5)
+        if source == "boom":
+            raise RuntimeError("actuator gone")
+        return 0.001, 0.002
+
+
+class ReconcileSchedulerTests(unittest.TestCase):
+    def test_runs_inline_until_started(self):
+        passes = _Passes()
+        scheduler = ReconcileScheduler(passes)
+        fut = scheduler.submit("reed")
+        self.assertTrue(fut.done())
+        self.assertEqual(fut.result(), (0.001, 0.002))
+        self.assertEqual(passes.sources, ["reed"])
+
+    def test_burst_is_coalesced_and_ui_goes_first(self):
+        passes = _Passes(hold_first=True)
+        scheduler = ReconcileScheduler(passes)
+        scheduler.start()
+        self.addCleanup(scheduler.stop)
+
+        first = scheduler.submit("phase")
+        self.assertTrue(passes.entered.wait(5))
+        queued = [scheduler.submit("reed") for _ in range(10)]
+        queued.append(scheduler.submit("auto"))
+        queued += [scheduler.submit("ui") for _ in range(5)]
+        self.assertEqual(scheduler.stats()["pending"], ["ui", "reed", "auto"])
+        passes.release.set()
+
+        for fut in [first] + queued:
+            fut.result(5)
+        self.assertEqual(passes.sources, ["phase", "ui", "reed"])     # the reed pass also answers auto
+        stats = scheduler.stats()
+        self.assertEqual((stats["requests"], stats["passes"], stats["coalesced"]), (17, 3, 14))
+        self.assertEqual(stats["by_source"], {"phase": 1, "ui": 1, "reed": 1})
+        self.assertAlmostEqual(stats["mean_compute_ms"], 1.0)
+        self.assertAlmostEqual(stats["mean_actuate_ms"], 2.0)
+        self.assertGreater(stats["max_wait_ms"], 0)
+
+    def test_failures_reach_every_waiter(self):
+        scheduler = ReconcileScheduler(_Passes())
+        scheduler.start()
+        self.addCleanup(scheduler.stop)
+        with self.assertLogs("pccs", level="ERROR"):
+            with self.assertRaises(RuntimeError):
+                scheduler.submit("boom").result(5)
+        self.assertEqual(scheduler.submit("auto").result(5), (0.001, 0.002))
+        self.assertEqual(scheduler.stats()["errors"], 1)
+
+    def test_stop_cancels_queued_requests(self):
+        passes = _Passes(hold_first=True)
+        scheduler = ReconcileScheduler(passes)
+        scheduler.start()
+        running = scheduler.submit("reed")
+        self.assertTrue(passes.entered.wait(5))
+        queued = scheduler.submit("auto")
+        threading.Timer(0.05, passes.release.set).start()
+        scheduler.stop()
+        self.assertTrue(queued.cancelled())
+        self.assertEqual(running.result(5), (0.001, 0.002))
+        scheduler.submit("ui")                          # inline again after stop
+        self.assertEqual(passes.sources, ["reed", "ui"])
+
+
+if __name__ == "__main__":
+    unittest.main()
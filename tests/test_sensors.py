@@ -0,0 +1,153 @@
+import unittest
+
+from modules.sampling import MedianEmaFilter, SensorChannel
+from modules.sensors import SensorManager
+
+OUTSIDE = "28-3ce1d4435d5a"
+
+
+class _StubConfig:
+    def __init__(self, sensors: dict):
+        self._sections = {
+            "sensors": {"water_resistance_empty": "240", "water_resistance_full": "33", **sensors},
+            "arduino analog": {"water_pin": "1"},
+        }
+
+    def get(self, section, key, fallback=None):
+        return self._sections.get(section, {}).get(key, fallback)
+
+    def getint(self, section, key, fallback=None):
+        val = self.get(section, key)
+        return int(val) if val is not None else fallback
+
+    def getfloat(self, section, key, fallback=None):
+        val = self.get(section, key)
+        return float(val) if val is not None else fallback
+
+
+class _FakeSocketIO:
+    def __init__(self):
+        self.emitted = []
+
+    def emit(self, event, data=None, **kwargs):
+        self.emitted.append((event, data))
+
+
+class _FakeOneWire:
+    def __init__(self):
+        self.temps = {}
+        self.reads = []
+
+    def read_temperatures(self, sensor_ids):
+        self.reads.append(list(sensor_ids))
+        return {sid: self.temps.get(sid) for sid in sensor_ids}
+
+    def close(self):
+        pass
+
+
+class FilterTest(unittest.TestCase):
+    def test_median_rejects_single_spike(self):
+        f = MedianEmaFilter(window=5, alpha=1.0)
+        for sample in (20.0, 20.1, 20.0):
+            f.update(sample)
+        self.assertAlmostEqual(f.update(85.0), 20.05)
+
+    def test_ema_smooths_steps(self):
+        f = MedianEmaFilter(window=1, alpha=0.5)
+        f.update(10.0)
+        self.assertEqual(f.update(20.0), 15.0)
+
+
+class ChannelTest(unittest.TestCase):
+    def _channel(self, **kwargs):
+        return SensorChannel("t", interval_min=10, interval_max=100, deadband=0.5, window=1, alpha=1.0, **kwargs)
+
+    def test_backs_off_while_stable_and_speeds_up_when_moving(self):
+        ch = self._channel()
+        now = 0.0
+        for _ in range(10):
+            ch.record(20.0, now)
+            now = ch.next_due
+        self.assertEqual(ch.interval, 100)
+
+        ch.record(22.0, now)
+        self.assertEqual(ch.interval, 10)
+        self.assertEqual(ch.next_due, now + 10)
+
+    def test_emits_only_outside_deadband(self):
+        ch = self._channel()
+        self.assertTrue(ch.record(20.0, 0))
+        ch.mark_emitted()
+        self.assertFalse(ch.record(20.3, 10))
+        self.assertTrue(ch.record(20.6, 20))
+
+    def test_validity_flip_emits(self):
+        ch = self._channel(max_failures=2)
+        ch.record(20.0, 0)
+        ch.mark_emitted()
+        self.assertFalse(ch.record(None, 10))   # one bad read keeps the last value
+        self.assertEqual(ch.value, 20.0)
+        self.assertTrue(ch.record(None, 20))
+        self.assertIsNone(ch.value)
+
+
+class SensorManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.commands = []
+        self.adc = 512
+        self.socketio = _FakeSocketIO()
+        self.manager = SensorManager(_StubConfig({
+            "outside_temp_sensor": OUTSIDE, "water_interval": "10", "outside_temp_interval": "20",
+            "filter_window": "1", "filter_alpha": "1", "heartbeat": "1000",
+        }), self._send, self.socketio)
+        self.manager.onewire = self.onewire = _FakeOneWire()
+        self.onewire.temps[OUTSIDE] = 18.0
+
+    def _send(self, cmd, expect=None):
+        self.commands.append(cmd)
+        if cmd == "GETVCC":
+            return "VCC 5000"
+        return f"ANALOG 1 {self.adc}"
+
+    def test_first_pass_reads_everything_and_emits(self):
+        self.manager.update_sensors(now=0, force=True)
+        self.assertEqual(self.commands, ["GETVCC", "ANALOG 1"])
+        event, data = self.socketio.emitted[-1]
+        self.assertEqual(event, "sensor_update")
+        self.assertEqual(set(data), {"water_percent", "temp_c", "outside_temp_c", "fridge_temp_c", "temp_valid"})
+        self.assertEqual(data["outside_temp_c"], 18.0)
+        self.assertTrue(data["temp_valid"])
+
+    def test_channels_run_on_their_own_intervals(self):
+        self.manager.update_sensors(now=0, force=True)
+        self.commands.clear()
+        self.onewire.reads.clear()
+
+        self.manager.update_sensors(now=10)
+        self.assertEqual(self.commands, ["ANALOG 1"])   # water due, vcc and temperature aren't
+        self.assertEqual(self.onewire.reads, [])
+
+        self.manager.update_sensors(now=20)
+        self.assertEqual(self.onewire.reads, [[OUTSIDE]])
+
+    def test_unchanged_readings_are_not_broadcast(self):
+        self.manager.update_sensors(now=0, force=True)
+        emitted = len(self.socketio.emitted)
+        self.manager.update_sensors(now=20)
+        self.assertEqual(len(self.socketio.emitted), emitted)
+
+        self.onewire.temps[OUTSIDE] = 19.0
+        self.manager.update_sensors(now=50)   # stable reading at 20 backed off to 30 s
+        self.assertEqual(len(self.socketio.emitted), emitted + 1)
+        self.assertEqual(self.socketio.emitted[-1][1]["outside_temp_c"], 19.0)
+
+    def test_heartbeat_sends_snapshot(self):
+        self.manager.update_sensors(now=0, force=True)
+        emitted = len(self.socketio.emitted)
+        self.manager.update_sensors(now=1000)
+        self.assertEqual(len(self.socketio.emitted), emitted + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,248 @@
+import os
+import queue
+import tempfile
+import time
+import tty
+import unittest
+
+from modules import sonos_state
+from modules.brightness import CIE_PWM
+from modules.onewire import OneWireBus
+from modules.sonos_registry import parse_ssdp
+from modules.victron import VictronManager
+from sim.arduino import ArduinoEmulator
+from sim.nmea import GpxTrack, NmeaFeeder, checksum
+from sim.onewire import FakeW1Bus
+from sim.serialport import PtyPort
+from sim.sonos import FakeSpeaker, notify
+from sim.victron import SIM_KEY, VictronSim
+
+try:
+    from gpiozero import Button, Device
+    from sim.gpio import GpioSim
+except ImportError:
+    GpioSim = None
+
+GPX = """<?xml version="1.0"?>
+<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1"><trk><trkseg>
+<trkpt lat="-37.1000" lon="145.6000"><ele>300</ele><time>2026-03-14T06:30:00Z</time></trkpt>
+<trkpt lat="-37.2000" lon="145.6000"><ele>200</ele><time>2026-03-14T06:40:00Z</time></trkpt>
+</trkseg></trk></gpx>
+"""
+
+
+class _StubConfig:
+    def __init__(self, sections: dict):
+        self._sections = sections
+
+    def get(self, section, key, fallback=None):
+        return self._sections.get(section, {}).get(key, fallback)
+
+    def getfloat(self, section, key, fallback=None):
+        val = self.get(section, key)
+        return float(val) if val is not None else fallback
+
+    def get_section(self, section):
+        return dict(self._sections.get(section, {}))
+
+    def has_section(self, section):
+        return section in self._sections
+
+    def items(self, section):
+        return list(self._sections.get(section, {}).items())
+
+
+class ArduinoEmulatorTest(unittest.TestCase):
+    def setUp(self):
+        self.board = ArduinoEmulator(port=None)
+
+    def test_set_get_and_getall(self):
+        self.assertIsNone(self.board.handle_line("SET 5 120", now=0))
+        self.assertEqual(self.board.handle_line("GET 5", now=0), "VALUE 5 120")
+        values = self.board.handle_line("GETALL", now=0)
+        self.assertTrue(values.startswith("VALUES 2:0 3:0 4:0 5:120 "))
+        self.assertTrue(values.endswith(" 13:0"))
+
+    def test_rejects_what_the_sketch_rejects(self):
+        for line in ("SET 1 10", "SET 5 300", "SETX 5 10", "RAMP 5 10 0", "GET 14", "ANALOG 6"):
+            self.assertIsNone(self.board.handle_line(line, now=0), line)
+        self.assertEqual(self.board.values[5], 0)
+
+    def test_linear_ramp_uses_one_ms_fixed_point_ticks(self):
+        self.board.handle_line("RAMP 3 200 100", now=10.0)
+        self.assertEqual(self.board.value(3, now=10.0), 0)
+        self.assertEqual(self.board.value(3, now=10.050), 100)
+        self.assertEqual(self.board.value(3, now=10.2), 200)
+
+    def test_cie_ramp_eases_through_the_table(self):
+        self.board.handle_line("RAMP 3 255 100 C", now=0)
+        self.assertEqual(self.board.value(3, now=0.050), CIE_PWM[127])
+        self.assertLess(self.board.value(3, now=0.050), 127)
+
+    def test_ramp_from_mid_ramp_starts_where_the_pin_is(self):
+        self.board.handle_line("RAMP 3 200 100", now=0)
+        self.board.handle_line("RAMP 3 0 100", now=0.050)
+        self.assertEqual(self.board.value(3, now=0.100), 50)
+
+    def test_tracking_ramp_keeps_its_rate_when_retargeted(self):
+        self.board.handle_line("RAMP 3 255 1000 T", now=0)           # 1000 ms per full sweep
+        self.assertEqual(self.board.value(3, now=0.100), 25)
+        self.board.handle_line("RAMP 3 51 1000 T", now=0.100)        # 26 steps to go, not another second
+        self.assertLess(self.board.value(3, now=0.150), 51)
+        self.assertEqual(self.board.value(3, now=0.201), 51)
+
+    def test_ramp_flags_in_either_order(self):
+        self.board.handle_line("RAMP 3 255 1000 T C", now=0)
+        self.assertEqual(self.board.value(3, now=0.500), CIE_PWM[127])
+
+    def test_analog_and_vcc(self):
+        self.board.adc_noise = 0
+        self.board.set_analog(1, 549.5)
+        self.assertEqual(self.board.handle_line("ANALOG 1", now=0), "ANALOG 1 549.500")
+        self.assertTrue(self.board.handle_line("GETVCC", now=0).startswith("VCC 50"))
+
+    def test_round_trip_over_pty_takes_wire_time(self):
+        port = PtyPort()
+        port.open()
+        self.addCleanup(port.close)
+        board = ArduinoEmulator(port, baud=9600)
+        board.start()
+        self.addCleanup(board.stop)
+
+        fd = os.open(port.path, os.O_RDWR | os.O_NOCTTY)
+        self.addCleanup(os.close, fd)
+        tty.setraw(fd)
+        start = time.monotonic()
+        os.write(fd, b"GET 7\n")
+        reply = b""
+        while not reply.endswith(b"\r\n") and time.monotonic() - start < 2:
+            reply += os.read(fd, 64)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(reply, b"VALUE 7 0\r\n")
+        self.assertGreaterEqual(elapsed, 17 * 10 / 9600)   # 6 bytes in, 11 bytes out
+
+
+class NmeaTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        path = os.path.join(self._tmp.name, "track.gpx")
+        with open(path, "w") as f:
+            f.write(GPX)
+        self.track = GpxTrack.load(path)
+
+    def test_interpolates_between_timed_points(self):
+        self.assertEqual(self.track.duration, 600)
+        fix = self.track.position(300)
+        self.assertAlmostEqual(fix["lat"], -37.15)
+        self.assertAlmostEqual(fix["ele"], 250)
+        self.assertAlmostEqual(fix["speed_ms"], 11118.0 / 600, delta=1)
+        self.assertAlmostEqual(fix["course"], 180, delta=0.1)
+
+    def test_sentences_are_well_formed(self):
+        feeder = NmeaFeeder(port=None, track=self.track)
+        gga, rmc = feeder.sentences(300)
+        for line in (gga, rmc):
+            body, _, check = line[1:].partition("*")
+            self.assertEqual(checksum(body), check)
+        self.assertIn(",3709.0000,S,14536.0000,E,1,", gga)
+        self.assertTrue(rmc.split(",")[2] == "A")
+
+    def test_lost_fix(self):
+        feeder = NmeaFeeder(port=None, track=self.track)
+        feeder.fix = False
+        gga, rmc = feeder.sentences(0)
+        self.assertEqual(gga.split(",")[6], "0")
+        self.assertEqual(rmc.split(",")[2], "V")
+
+
+class OneWireSimTest(unittest.TestCase):
+    def test_onewire_bus_reads_simulated_probes(self):
+        fake = FakeW1Bus({"28-000000000a01": 16.0, "28-000000000a02": 3.5})
+        fake.overrides["28-000000000a02"] = 4.25
+        fake.start()
+        self.addCleanup(fake.stop)
+        bus = OneWireBus(fake.root)
+        self.addCleanup(bus.close)
+
+        temps = bus.read_temperatures(["28-000000000a01", "28-000000000a02"])
+        self.assertAlmostEqual(temps["28-000000000a01"], 16.0, delta=3.5)
+        self.assertEqual(temps["28-000000000a02"], 4.2)
+
+
+class VictronSimTest(unittest.TestCase):
+    def _manager(self, sim):
+        cfg = _StubConfig({"victron": {"shunt_address": sim.shunt_address, "shunt_key": SIM_KEY,
+                                       "mppt_address": sim.mppt_address, "mppt_key": SIM_KEY}})
+        mgr = VictronManager(None, cfg)
+        sim.attach(mgr)
+        return mgr
+
+    def test_advertisements_decode_into_state(self):
+        sim = VictronSim()
+        mgr = self._manager(sim)
+        for address, raw in sim.advertisements(now=time.time()):
+            mgr._handle_advertisement(address, raw)
+        state = mgr.get_state()
+        self.assertEqual(state["soc"], 85.0)
+        self.assertGreater(state["voltage"], 12)
+        self.assertIsNotNone(state["current_a"])
+        self.assertEqual(mgr.stats["decoded"], 2)
+
+    def test_nonce_only_moves_with_the_values(self):
+        sim = VictronSim()
+        a = sim._frame(sim.shunt_address, 0xA389, 0x02, b"same")
+        b = sim._frame(sim.shunt_address, 0xA389, 0x02, b"same")
+        c = sim._frame(sim.shunt_address, 0xA389, 0x02, b"different")
+        self.assertEqual(a, b)
+        self.assertNotEqual(a[4:6], c[4:6])
+
+
+class SonosSimTest(unittest.TestCase):
+    def test_announcement_is_a_zoneplayer_notify(self):
+        info = parse_ssdp(notify("RINCON_5CAAFD00000101400", "127.0.0.2"))
+        self.assertEqual((info["kind"], info["uid"], info["ip"]), ("notify", "RINCON_5CAAFD00000101400", "127.0.0.2"))
+        self.assertFalse(parse_ssdp(notify("RINCON_5CAAFD00000101400", "127.0.0.2", alive=False))["alive"])
+
+    def test_subscriptions_push_foldable_events(self):
+        speaker = FakeSpeaker("Kitchen", "127.0.0.2", "RINCON_X", latency=0)
+        events = queue.Queue()
+        speaker.avTransport.subscribe(event_queue=events)
+        speaker.renderingControl.subscribe(event_queue=events)
+        state = sonos_state.new_speaker_state("Kitchen")
+
+        speaker.volume = 40
+        speaker.next()
+        speaker.play()
+        while not events.empty():
+            event = events.get()
+            self.assertIs(event.service.soco, speaker)
+            if event.service.service_type == "AVTransport":
+                sonos_state.fold_transport_event(state, event.variables, time.time())
+            else:
+                sonos_state.fold_rendering_event(state, event.variables)
+
+        self.assertEqual(state["volume"], 40)
+        self.assertTrue(state["is_playing"])
+        self.assertEqual((state["track"], state["artist"], state["duration"]), ("Down Under", "Men at Work", 222))
+        self.assertEqual(speaker.get_current_track_info()["title"], "Down Under")
+
+
+@unittest.skipIf(GpioSim is None, "gpiozero not installed")
+class GpioSimTest(unittest.TestCase):
+    def test_reeds_hold_their_level_through_button_setup(self):
+        cfg = _StubConfig({"reeds": {"drawer": "Drawer | 25 | true | 0.05 | fa-archive | 13 |"}})
+        gpio = GpioSim(cfg)
+        gpio.install()
+        self.addCleanup(Device.pin_factory.reset)
+
+        button = Button(25, pull_up=True, bounce_time=None)
+        self.addCleanup(button.close)
+        self.assertTrue(button.is_pressed)
+        gpio.set_reed("drawer", False)
+        self.assertFalse(button.is_pressed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import threading
+import unittest
+
+from actuators.arduino import ArduinoActuator
+from bridge.slider import LightChangeCoalescer
+from tests.test_policy import minimal_cfg
+
+
+class _Replies:
+    def __init__(self):
+        self.acks = []
+        self.done = threading.Event()
+
+    def __call__(self, reply_to, ack):
+        self.acks.append((reply_to, ack))
+        self.done.set()
+
+
+class LightChangeCoalescerTests(unittest.TestCase):
+    def test_latest_value_per_light_wins(self):
+        applied = []
+        replies = _Replies()
+        lights = LightChangeCoalescer(lambda c: applied.append(c) or {"name": c["name"], "brightness": c["b"]},
+                                      reply=replies, frame_s=60)
+        self.addCleanup(lights.stop)
+        for seq, b in enumerate((10, 20, 30), 1):
+            lights.push("accent", {"name": "accent", "b": b, "seq": seq}, reply_to="phone")
+        lights.push("accent", {"name": "accent", "b": 35, "seq": 7}, reply_to="tablet")
+        lights.push("awning", {"name": "awning", "b": 5, "seq": 4}, reply_to="phone")
+
+        self.assertEqual(lights.flush(), 2)
+        self.assertEqual([(c["name"], c["b"]) for c in applied], [("accent", 35), ("awning", 5)])
+        self.assertEqual(replies.acks, [
+            ("phone", {"name": "accent", "brightness": 35, "ok": True, "seq": 3, "coalesced": 4}),
+            ("tablet", {"name": "accent", "brightness": 35, "ok": True, "seq": 7, "coalesced": 4}),
+            ("phone", {"name": "awning", "brightness": 5, "ok": True, "seq": 4, "coalesced": 1}),
+        ])
+        self.assertEqual(lights.flush(), 0)
+
+    def test_frame_timer_applies_without_a_flush(self):
+        replies = _Replies()
+        lights = LightChangeCoalescer(lambda c: {"name": c["name"]}, reply=replies, frame_s=0.01)
+        self.addCleanup(lights.stop)
+        lights.push("accent", {"name": "accent"}, reply_to="phone")
+        self.assertTrue(replies.done.wait(2))
+        self.assertTrue(replies.acks[0][1]["ok"])
+
+    def test_refused_or_failed_changes_are_nacked(self):
+        def apply(change):
+            if change["name"] == "broken":
+                raise RuntimeError("serial gone")
+            return None
+
+        replies = _Replies()
+        lights = LightChangeCoalescer(apply, reply=replies, frame_s=60)
+        self.addCleanup(lights.stop)
+        lights.push("accent", {"name": "accent", "seq": 1}, reply_to="phone")
+        lights.push("broken", {"name": "broken", "seq": 2}, reply_to="phone")
+        with self.assertLogs("pccs", level="ERROR"):
+            lights.flush()
+        self.assertEqual([ack["ok"] for _, ack in replies.acks], [False, False])
+
+    def test_stop_drops_pending_and_later_events(self):
+        applied = []
+        lights = LightChangeCoalescer(applied.append, frame_s=60)
+        lights.push("accent", {"name": "accent"})
+        lights.stop()
+        lights.push("accent", {"name": "accent"})
+        self.assertEqual(lights.flush(), 0)
+        self.assertEqual(applied, [])
+
+
+class _FakeArduino:
+    BRIGHTNESS_CURVE = "cie"
+
+    def __init__(self):
+        self.calls = []
+
+    def ramp(self, pin, pwm, ramp_ms, tracking=False):
+        self.calls.append(("ramp", pin, ramp_ms, tracking))
+
+    def set_rgb_bug_light(self, name, brightness, mode, ramp_ms, tracking=False):
+        self.calls.append(("rgb", name, ramp_ms, tracking))
+
+
+class TrackingRampTests(unittest.TestCase):
+    def test_slider_trigger_asks_for_tracking_ramps(self):
+        arduino = _FakeArduino()
+        actuator = ArduinoActuator(arduino, minimal_cfg())
+        actuator.set_light("accent", 40, None, 1000, trigger="slider")
+        actuator.set_light("kitchen_panel", 40, "red", 1000, trigger="slider")
+        actuator.set_light("accent", 60, None, 1000, trigger="ui")
+        self.assertEqual(arduino.calls, [
+            ("ramp", 8, 1000, True),
+            ("rgb", "kitchen_panel", 1000, True),
+            ("ramp", 8, 1000, False),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from modules.sonos_registry import SpeakerRegistry, ZONE_PLAYER_ST, parse_ssdp
+
+KITCHEN = "RINCON_000E58AAAAAA01400"
+DECK = "RINCON_000E58BBBBBB01400"
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _announcement(start_line, uid, ip, nts="ssdp:alive", model="ZPS12"):
+    target = "NT" if start_line.startswith("NOTIFY") else "ST"
+    return (
+        f"{start_line}\r\n"
+        "CACHE-CONTROL: max-age = 1800\r\n"
+        f"LOCATION: http://{ip}:1400/xml/device_description.xml\r\n"
+        f"SERVER: Linux UPnP/1.0 Sonos/79.1-56030 ({model})\r\n"
+        f"{target}: {ZONE_PLAYER_ST}\r\n"
+        f"NTS: {nts}\r\n"
+        f"USN: uuid:{uid}::{ZONE_PLAYER_ST}\r\n"
+        "X-RINCON-HOUSEHOLD: Sonos_abc\r\n"
+        "\r\n"
+    ).encode()
+
+
+def notify(uid, ip, nts="ssdp:alive"):
+    return _announcement("NOTIFY * HTTP/1.1", uid, ip, nts)
+
+
+class _FakeResponder:
+    """Answers ZonePlayer M-SEARCHes on localhost like a set of speakers would."""
+
+    def __init__(self, port, speakers):
+        self.speakers = speakers
+        self.searches = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind(("127.0.0.1", port))
+        self._sock.settimeout(0.1)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while self._running:
+            try:
+                data, addr = self._sock.recvfrom(4096)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            if data.startswith(b"M-SEARCH") and ZONE_PLAYER_ST.encode() in data:
+                self.searches += 1
+                for uid, ip in self.speakers.items():
+                    self._sock.sendto(_announcement("HTTP/1.1 200 OK", uid, ip), addr)
+
+    def close(self):
+        self._running = False
+        self._sock.close()
+        self._thread.join(1)
+
+
+class _StubConfig:
+    def __init__(self, sonos: dict):
+        self._sonos = sonos
+
+    def get(self, section, key, fallback=None):
+        return self._sonos.get(key, fallback) if section == "sonos" else fallback
+
+    def getint(self, section, key, fallback=None):
+        val = self.get(section, key)
+        return int(val) if val is not None else fallback
+
+    def getfloat(self, section, key, fallback=None):
+        val = self.get(section, key)
+        return float(val) if val is not None else fallback
+
+
+class ParseTest(unittest.TestCase):
+    def test_parses_notify(self):
+        info = parse_ssdp(notify(KITCHEN, "10.10.10.20"))
+        self.assertEqual(info["kind"], "notify")
+        self.assertTrue(info["alive"])
+        self.assertEqual((info["uid"], info["ip"], info["model"]), (KITCHEN, "10.10.10.20", "ZPS12"))
+        self.assertEqual(info["max_age"], 1800)
+
+    def test_ignores_other_devices_and_embedded_services(self):
+        other = notify(KITCHEN, "10.10.10.20").replace(ZONE_PLAYER_ST.encode(), b"upnp:rootdevice")
+        self.assertIsNone(parse_ssdp(other))
+        self.assertIsNone(parse_ssdp(b"M-SEARCH * HTTP/1.1\r\n\r\n"))
+        self.assertIsNone(parse_ssdp(b"\xff\xfe garbage"))
+
+
+class RegistryTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.port = _free_port()
+        self.path = os.path.join(self._tmp.name, "speakers.json")
+        self.changes = []
+
+    def _registry(self, **overrides):
+        cfg = {
+            "ssdp_group": "127.0.0.1", "ssdp_port": str(self.port),
+            "discovery_timeout": "0.5", "discovery_interval": "0",
+            "registry_file": self.path,
+        }
+        cfg.update(overrides)
+        return SpeakerRegistry(_StubConfig(cfg), on_change=lambda s: self.changes.append(s))
+
+    def _responder(self, speakers):
+        responder = _FakeResponder(self.port, speakers)
+        self.addCleanup(responder.close)
+        return responder
+
+    def test_search_finds_speakers_and_persists_them(self):
+        self._responder({KITCHEN: "10.10.10.20", DECK: "10.10.10.21"})
+        reg = self._registry()
+        self.assertEqual(reg.search(), 2)
+
+        self.assertEqual({s["uid"] for s in reg.speakers()}, {KITCHEN, DECK})
+        with open(self.path) as f:
+            saved = json.load(f)["speakers"]
+        self.assertEqual({(s["uid"], s["ip"], s["model"]) for s in saved},
+                         {(KITCHEN, "10.10.10.20", "ZPS12"), (DECK, "10.10.10.21", "ZPS12")})
+        self.assertNotIn("last_seen", saved[0])
+
+    def test_warm_start_then_search_drops_missing(self):
+        responder = self._responder({KITCHEN: "10.10.10.20", DECK: "10.10.10.21"})
+        first = self._registry()
+        first.search()
+        first.annotate(KITCHEN, name="Kitchen", visible=True)
+
+        warm = self._registry()
+        by_uid = {s["uid"]: s for s in warm.speakers()}
+        self.assertEqual(set(by_uid), {KITCHEN, DECK})
+        self.assertEqual(by_uid[KITCHEN]["name"], "Kitchen")
+
+        # Deck is switched off: only the kitchen answers the next search
+        responder.speakers = {KITCHEN: "10.10.10.20"}
+        warm.search()
+        self.assertEqual([s["uid"] for s in warm.speakers()], [KITCHEN])
+
+    def test_notify_tracks_new_moved_and_departing_speakers(self):
+        reg = self._registry()
+        reg.handle_datagram(notify(KITCHEN, "10.10.10.20"))
+        self.assertEqual([s["ip"] for s in reg.speakers()], ["10.10.10.20"])
+
+        reg.annotate(KITCHEN, name="Kitchen", visible=True)
+        reg.handle_datagram(notify(KITCHEN, "10.10.10.40"))
+        self.assertEqual([(s["ip"], s["name"]) for s in reg.speakers()], [("10.10.10.40", "Kitchen")])
+
+        n = len(self.changes)
+        reg.handle_datagram(notify(KITCHEN, "10.10.10.40"))  # routine re-announcement
+        self.assertEqual(len(self.changes), n)
+
+        reg.handle_datagram(notify(KITCHEN, "10.10.10.40", nts="ssdp:byebye"))
+        self.assertEqual(reg.speakers(), [])
+        self.assertTrue(reg._search_wanted)
+
+    def test_lapsed_announcements_mark_speaker_vanished(self):
+        reg = self._registry(vanish_grace="0")
+        reg.handle_datagram(notify(KITCHEN, "10.10.10.20"))
+        reg._known[KITCHEN]["last_seen"] = time.time() - 1801
+        reg.check_vanished()
+        self.assertEqual(reg.speakers(), [])
+        self.assertTrue(reg._search_wanted)
+
+    def test_listener_loop_searches_at_startup_and_hears_notify(self):
+        responder = self._responder({KITCHEN: "10.10.10.20"})
+        listen_port = _free_port()
+        reg = self._registry(ssdp_port=str(listen_port))
+        reg.search_port = self.port  # responder and listener can't share a unicast port
+        reg.start()
+        self.addCleanup(reg.stop)
+
+        deadline = time.time() + 3
+        while time.time() < deadline and not reg.speakers():
+            time.sleep(0.05)
+        self.assertEqual(responder.searches, 1)
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.sendto(notify(DECK, "10.10.10.21"), ("127.0.0.1", listen_port))
+        while time.time() < deadline and len(reg.speakers()) < 2:
+            time.sleep(0.05)
+        self.assertEqual({s["uid"] for s in reg.speakers()}, {KITCHEN, DECK})
+        self.assertEqual(responder.searches, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
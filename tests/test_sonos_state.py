@@ -0,0 +1,101 @@
+import unittest
+from types import SimpleNamespace
+
+from modules import sonos_state as ss
+
+
+def _meta(title="Song", creator="Artist", album="Album", album_art_uri="/getaa?s=1&u=x"):
+    return SimpleNamespace(title=title, creator=creator, album=album, album_art_uri=album_art_uri)
+
+
+class TransportEventTest(unittest.TestCase):
+    def test_track_change_folds_metadata_and_resets_position(self):
+        state = ss.new_speaker_state("Kitchen")
+        state.update(position=120, position_ts=0.0)
+        changed = ss.fold_transport_event(state, {
+            "transport_state": "PLAYING",
+            "current_track_uri": "x-sonos-spotify:track2",
+            "current_track_duration": "0:03:45",
+            "current_track_meta_data": _meta(),
+        }, now=100.0, art_url=lambda raw: "/sonos-art?url=" + raw)
+
+        self.assertTrue(changed)
+        self.assertTrue(state["is_playing"])
+        self.assertEqual((state["position"], state["position_ts"]), (0, 100.0))
+        self.assertEqual(state["duration"], 225)
+        self.assertEqual((state["track"], state["artist"], state["album"]), ("Song", "Artist", "Album"))
+        self.assertEqual(state["album_art"], "/sonos-art?url=/getaa?s=1&u=x")
+
+    def test_pause_freezes_extrapolated_position(self):
+        state = ss.new_speaker_state("Kitchen")
+        state.update(is_playing=True, position=10, position_ts=100.0, duration=200)
+        ss.fold_transport_event(state, {"transport_state": "PAUSED_PLAYBACK"}, now=130.0)
+        self.assertFalse(state["is_playing"])
+        self.assertEqual(state["position"], 40)
+        self.assertEqual(ss.playback_position(state, 500.0), 40)
+
+    def test_repeated_event_is_not_a_change(self):
+        state = ss.new_speaker_state("Kitchen")
+        event = {"transport_state": "PLAYING", "current_track_meta_data": _meta(album_art_uri=None)}
+        self.assertTrue(ss.fold_transport_event(state, event, now=1.0))
+        self.assertFalse(ss.fold_transport_event(state, event, now=2.0))
+
+    def test_empty_metadata_means_nothing_playing(self):
+        state = ss.new_speaker_state("Kitchen")
+        state["track"] = "Old"
+        ss.fold_transport_event(state, {"current_track_meta_data": ""}, now=1.0)
+        self.assertEqual(state["track"], ss.NOTHING_PLAYING)
+        self.assertIsNone(state["album_art"])
+
+
+class RenderingEventTest(unittest.TestCase):
+    def test_master_channel_volume_and_mute(self):
+        state = ss.new_speaker_state("Kitchen")
+        changed = ss.fold_rendering_event(state, {
+            "volume": {"Master": "25", "LF": "100", "RF": "100"},
+            "mute": {"Master": "1"},
+        })
+        self.assertTrue(changed)
+        self.assertEqual((state["volume"], state["mute"]), (25, True))
+        self.assertFalse(ss.fold_rendering_event(state, {"volume": {"Master": "25"}}))
+
+
+class PollAndCommandTest(unittest.TestCase):
+    def test_poll_within_drift_is_not_a_change(self):
+        state = ss.new_speaker_state("Kitchen")
+        track = {"title": "Song", "artist": "A", "album": "B", "duration": "0:04:00", "position": "0:00:10"}
+        self.assertTrue(ss.fold_poll(state, 100.0, volume=20, mute=False,
+                                     transport={"current_transport_state": "PLAYING"}, track=track))
+        track["position"] = "0:00:41"
+        self.assertFalse(ss.fold_poll(state, 131.0, track=track))
+        track["position"] = "0:01:30"
+        self.assertTrue(ss.fold_poll(state, 132.0, track=track))
+
+    def test_optimistic_commands(self):
+        state = ss.new_speaker_state("Kitchen")
+        state.update(volume=20, position=30, position_ts=0.0, duration=300)
+        self.assertTrue(ss.apply_command(state, "volume", 150, 1.0))
+        self.assertEqual(state["volume"], 100)
+        self.assertTrue(ss.apply_command(state, "mute", None, 1.0))
+        self.assertTrue(state["mute"])
+        self.assertTrue(ss.apply_command(state, "play", None, 10.0))
+        self.assertEqual(ss.playback_position(state, 15.0), 35)
+        ss.apply_command(state, "seek", 120, 20.0)
+        self.assertEqual(ss.playback_position(state, 21.0), 121)
+        ss.apply_command(state, "next", None, 30.0)
+        self.assertEqual(state["position"], 0)
+
+    def test_public_state_is_stamped_and_hides_internal_keys(self):
+        state = ss.new_speaker_state("Kitchen")
+        out = ss.public_state(state, 42.0)
+        self.assertEqual(out["server_ts"], 42.0)
+        self.assertNotIn("track_uri", out)
+
+    def test_time_round_trip(self):
+        self.assertEqual(ss.time_to_seconds("1:02:03"), 3723)
+        self.assertEqual(ss.time_to_seconds("NOT_IMPLEMENTED"), 0)
+        self.assertEqual(ss.seconds_to_time(3723), "01:02:03")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import threading
+import time
+import unittest
+
+from bridge.startup import StartupPlan
+from modules.arduino import ArduinoManager
+from modules.config import config as pccs_config
+
+
+class StartupPlanTests(unittest.TestCase):
+    def test_steps_wait_for_their_needs_and_the_rest_overlap(self):
+        plan = StartupPlan()
+        order = []
+        both_running = threading.Barrier(2, timeout=2)
+
+        def slow(name):
+            def run():
+                both_running.wait()          # deadlocks unless the two run at once
+                order.append(name)
+            return run
+
+        plan.step("arduino", slow("arduino"))
+        plan.step("gps", slow("gps"))
+        plan.step("world", lambda: order.append("world"), after=("arduino",))
+        plan.step("engine", lambda: order.append("engine"), after=("world", "gps"))
+        report = plan.run()
+
+        self.assertEqual(set(order[:2]), {"arduino", "gps"})
+        self.assertEqual(order[2:], ["world", "engine"])
+        self.assertTrue(plan.finished and plan.ready("engine"))
+        self.assertEqual({r["name"]: r["status"] for r in report},
+                         {"arduino": "ok", "gps": "ok", "world": "ok", "engine": "ok"})
+        self.assertEqual(plan.critical_path()[-2:], ["world", "engine"])
+
+    def test_failure_skips_dependents_only(self):
+        plan = StartupPlan()
+
+        def broken():
+            raise OSError("no /dev/ttyUSB0")
+
+        plan.step("arduino", broken)
+        plan.step("sensors", lambda: None, after=("arduino",))
+        plan.step("sonos", lambda: None)
+        with self.assertLogs("pccs", level="INFO") as logs:
+            report = {r["name"]: r for r in plan.run()}
+
+        self.assertEqual(report["arduino"]["status"], "failed")
+        self.assertEqual(report["arduino"]["error"], "no /dev/ttyUSB0")
+        self.assertEqual(report["sensors"]["status"], "skipped")
+        self.assertEqual(report["sonos"]["status"], "ok")
+        self.assertFalse(plan.wait("sensors", timeout=0))
+        self.assertTrue(any("Startup took" in line for line in logs.output))
+
+    def test_recorded_phases_are_relative_to_the_origin(self):
+        origin = time.perf_counter()
+        plan = StartupPlan(origin=origin)
+        plan.record("imports", origin, origin + 0.25)
+        plan.step("gpio", lambda: None, after=("imports",))
+        with self.assertLogs("pccs", level="INFO"):
+            report = plan.run()
+        self.assertEqual(report[0], {"name": "imports", "status": "ok", "after": [],
+                                     "start_ms": 0.0, "end_ms": 250.0, "ms": 250.0})
+        self.assertGreaterEqual(report[1]["start_ms"], 0.0)
+
+    def test_unknown_dependency_is_rejected(self):
+        plan = StartupPlan()
+        plan.step("world", lambda: None, after=("arduino",))
+        with self.assertRaises(ValueError):
+            plan.run()
+
+    def test_cycle_is_rejected_before_anything_runs(self):
+        plan = StartupPlan()
+        ran = []
+        plan.step("gpio", lambda: ran.append("gpio"))
+        plan.step("world", lambda: ran.append("world"), after=("gpio", "engine"))
+        plan.step("engine", lambda: ran.append("engine"), after=("world",))
+        with self.assertRaises(ValueError) as caught:
+            plan.run()
+        self.assertIn("world", str(caught.exception))
+        self.assertEqual(ran, [])
+
+
+class _Port:
+    """Serial stand-in: replays `lines` (b"" = a readline timeout), records writes."""
+
+    def __init__(self, lines, reply_to_probe=None):
+        self.lines = list(lines)
+        self.reply_to_probe = reply_to_probe
+        self.written = []
+
+    def readline(self):
+        if self.lines:
+            return self.lines.pop(0)
+        time.sleep(0.01)
+        return b""
+
+    def write(self, data):
+        self.written.append(data)
+        if self.reply_to_probe:
+            self.lines.append(self.reply_to_probe)
+
+    def flush(self):
+        pass
+
+
+class ArduinoReadyTests(unittest.TestCase):
+    def _arduino(self, port):
+        arduino = ArduinoManager(pccs_config)
+        arduino.READY_PROBE_AFTER = 0.05
+        arduino.ser = port
+        return arduino
+
+    def test_ready_line_ends_the_wait(self):
+        port = _Port([b"\x00garbage\r\n", b"READY\r\n"])
+        started = time.monotonic()
+        self.assertTrue(self._arduino(port)._await_ready(5.0))
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(port.written, [])
+
+    def test_board_that_did_not_reset_is_probed(self):
+        port = _Port([], reply_to_probe=b"VCC 5012\r\n")
+        self.assertTrue(self._arduino(port)._await_ready(5.0))
+        self.assertEqual(port.written, [b"GETVCC\n"])
+
+    def test_silent_board_gives_up_after_the_timeout(self):
+        self.assertFalse(self._arduino(_Port([]))._await_ready(0.2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+import unittest
+
+from modules.victron import VictronManager, _ScanScheduler
+
+SHUNT = "aa:bb:cc:dd:ee:ff"
+MPPT = "11:22:33:44:55:66"
+
+
+class _StubConfig:
+    def __init__(self, victron: dict):
+        self._victron = victron
+
+    def get(self, section, key, fallback=None):
+        return self._victron.get(key, fallback) if section == "victron" else fallback
+
+    def getfloat(self, section, key, fallback=None):
+        val = self.get(section, key)
+        return float(val) if val is not None else fallback
+
+
+class _ShuntData:
+    def __init__(self, raw):
+        self.raw = raw
+
+    def get_soc(self):
+        return 87.5
+
+    def get_voltage(self):
+        return 13.21
+
+    def get_current(self):
+        return -2.4
+
+    def get_remaining_mins(self):
+        return 600
+
+
+class _MpptData:
+    def __init__(self, raw):
+        self.raw = raw
+
+    def get_battery_voltage(self):
+        return 13.4
+
+    def get_battery_current(self):
+        return 6.1
+
+    def get_yield_today(self):
+        return 420
+
+
+class _CountingParser:
+    def __init__(self, data_cls):
+        self.data_cls = data_cls
+        self.calls = 0
+
+    def parse(self, raw):
+        self.calls += 1
+        return self.data_cls(raw)
+
+
+def _manager(**overrides):
+    cfg = {
+        "shunt_address": SHUNT, "shunt_key": "00" * 16,
+        "mppt_address": MPPT, "mppt_key": "11" * 16,
+    }
+    cfg.update(overrides)
+    mgr = VictronManager(None, _StubConfig(cfg))
+    mgr._emit_if_needed = lambda force=False: None
+    mgr._parsers[SHUNT] = _CountingParser(_ShuntData)
+    mgr._parsers[MPPT] = _CountingParser(_MpptData)
+    return mgr
+
+
+class AdvertisementHandlingTest(unittest.TestCase):
+    def test_decodes_shunt_and_mppt(self):
+        mgr = _manager()
+        mgr._handle_advertisement(SHUNT, b"\x10\x01")
+        mgr._handle_advertisement(MPPT, b"\x10\x02")
+
+        state = mgr.get_state()
+        self.assertFalse(state["stale"])
+        self.assertEqual(state["soc"], 87.5)
+        self.assertEqual(state["voltage"], 13.21)
+        self.assertEqual(state["solar_current_a"], 6.1)
+        self.assertEqual(state["yield_today_kwh"], 0.42)
+
+    def test_identical_repeat_skips_parse_but_keeps_device_fresh(self):
+        mgr = _manager()
+        parser = mgr._parsers[SHUNT]
+        for _ in range(5):
+            mgr._handle_advertisement(SHUNT, b"\x10\x01")
+        self.assertEqual(parser.calls, 1)
+        stats = mgr.get_stats()
+        self.assertEqual((stats["seen"], stats["deduped"], stats["decoded"]), (5, 4, 1))
+
+        mgr._last_data_ts -= 1000
+        mgr._handle_advertisement(SHUNT, b"\x10\x01")
+        self.assertFalse(mgr.get_state()["stale"])
+
+    def test_changed_payload_is_decoded(self):
+        mgr = _manager()
+        mgr._handle_advertisement(SHUNT, b"\x10\x01")
+        mgr._handle_advertisement(SHUNT, b"\x10\x02")
+        self.assertEqual(mgr._parsers[SHUNT].calls, 2)
+
+    def test_dedupe_window_expiry(self):
+        mgr = _manager(dedupe_window="0")
+        mgr._handle_advertisement(SHUNT, b"\x10\x01")
+        mgr._handle_advertisement(SHUNT, b"\x10\x01")
+        self.assertEqual(mgr._parsers[SHUNT].calls, 2)
+        self.assertEqual(mgr.get_stats()["deduped"], 0)
+
+    def test_unknown_address_is_ignored(self):
+        mgr = _manager()
+        mgr._handle_advertisement("de:ad:be:ef:00:00", b"\x10\x01")
+        self.assertEqual(mgr.get_stats()["seen"], 0)
+        self.assertTrue(mgr.get_state()["stale"])
+
+    def test_accessor_plan_resolved_once_per_class(self):
+        mgr = _manager()
+        mgr._handle_advertisement(MPPT, b"\x10\x01")
+        mgr._handle_advertisement(MPPT, b"\x10\x02")
+        self.assertEqual(list(mgr._accessor_plans), [_MpptData])
+        self.assertEqual(mgr._accessor_plans[_MpptData]["solar_current"], ("get_battery_current",))
+
+    def test_getter_returning_none_falls_through_to_the_next(self):
+        class _PvOnlyMppt(_MpptData):
+            def get_battery_current(self):
+                return None
+
+            def get_pv_current(self):
+                return 3.2
+
+        mgr = _manager()
+        mgr._parsers[MPPT] = _CountingParser(_PvOnlyMppt)
+        mgr._handle_advertisement(MPPT, b"\x10\x01")
+        self.assertEqual(mgr.get_state()["solar_current_a"], 3.2)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ScanSchedulerTest(unittest.TestCase):
+    def _scheduler(self, clock=None):
+        return _ScanScheduler(window=4, window_max=20, idle=30, viewing_idle=2,
+                              viewer_lease=45, clock=clock or _Clock())
+
+    def test_missed_devices_widen_window_until_complete(self):
+        sched = self._scheduler()
+        sched.end_window(complete=False, stale=False)
+        self.assertEqual(sched.window, 8)
+        sched.end_window(complete=False, stale=False)
+        sched.end_window(complete=False, stale=False)
+        self.assertEqual(sched.window, 20)
+        sched.end_window(complete=True, stale=False)
+        self.assertEqual(sched.window, 4)
+        self.assertEqual((sched.cycles, sched.incomplete), (4, 3))
+
+    def test_stale_data_jumps_to_widest_window(self):
+        sched = self._scheduler()
+        sched.end_window(complete=True, stale=True)
+        self.assertEqual(sched.window, 20)
+
+    def test_viewer_lease_shortens_idle_then_expires(self):
+        clock = _Clock()
+        sched = self._scheduler(clock)
+        self.assertEqual(sched.idle_interval(), 30)
+        self.assertTrue(sched.note_viewer())
+        self.assertFalse(sched.note_viewer())
+        self.assertEqual(sched.idle_interval(), 2)
+        clock.now += 46
+        self.assertEqual(sched.idle_interval(), 30)
+
+    def test_stale_after_covers_a_full_idle_cycle(self):
+        sched = self._scheduler()
+        self.assertEqual(sched.stale_after(45), 80)
+        self.assertEqual(sched.stale_after(300), 300)
+
+
+class ScanWindowTest(unittest.TestCase):
+    def test_window_done_once_every_device_heard(self):
+        import asyncio
+
+        mgr = _manager()
+        mgr._window_done = asyncio.Event()
+        mgr._handle_advertisement(SHUNT, b"\x10\x01")
+        self.assertFalse(mgr._window_done.is_set())
+        mgr._handle_advertisement(MPPT, b"\x10\x01")
+        self.assertTrue(mgr._window_done.is_set())
+
+    def test_changes_are_held_for_window_end(self):
+        mgr = _manager()
+        mgr._handle_advertisement(SHUNT, b"\x10\x01")
+        self.assertTrue(mgr._dirty)
+
+    def test_idle_gap_does_not_read_as_stale(self):
+        mgr = _manager()
+        mgr._handle_advertisement(SHUNT, b"\x10\x01")
+        mgr._last_data_ts -= 60  # longer than stale_timeout, shorter than a cycle
+        self.assertFalse(mgr.get_state()["stale"])
+        mgr._last_data_ts -= 60
+        self.assertTrue(mgr.get_state()["stale"])
+
+
+if __name__ == "__main__":
+    unittest.main()
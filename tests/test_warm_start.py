@@ -0,0 +1,146 @@
+import json
+import os
+import tempfile
+import unittest
+
+from bridge.runtime import PCCSRuntime
+from bridge.state_file import StateFile
+from modules.arduino import ArduinoManager
+from modules.config import config as pccs_config
+from sim.arduino import ArduinoEmulator
+from tests.test_journal import _Recorder, isolated_config
+
+
+class StateFileTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "state", "warm.json")
+
+    def test_writes_atomically_and_only_on_change(self):
+        payload = {"light_intents": {"accent": [40, None, "manual"]}}
+        state = StateFile(self.path, collect=lambda: payload, debounce_s=60)
+        self.assertTrue(state.flush())
+        self.assertFalse(state.flush())                 # unchanged: no write
+        payload["light_intents"]["accent"][0] = 50
+        state.mark_dirty()
+        state.close()
+        self.assertEqual(state.writes, 2)
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+        self.assertEqual(state.load()["light_intents"], {"accent": [50, None, "manual"]})
+
+    def test_debounced_burst_is_one_write(self):
+        state = StateFile(self.path, collect=lambda: {"n": state.writes}, debounce_s=0.05)
+        for _ in range(20):
+            state.mark_dirty()
+        state._timer.join(2)
+        self.assertEqual(state.writes, 1)
+
+    def test_corrupt_or_foreign_file_is_ignored(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write('{"format": 1, "light_int')
+        with self.assertLogs("pccs", level="WARNING"):
+            self.assertIsNone(StateFile(self.path).load())
+        with open(self.path, "w") as f:
+            json.dump({"format": 99}, f)
+        with self.assertLogs("pccs", level="WARNING"):
+            self.assertIsNone(StateFile(self.path).load())
+
+
+class WarmStartTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "warm.json")
+
+    def _runtime(self):
+        cfg = isolated_config()
+        cfg.config.set("warm_start", "enabled", "true")
+        cfg.config.set("warm_start", "path", self.path)
+        cfg.config.set("warm_start", "debounce_ms", "60000")
+        runtime = PCCSRuntime(cfg)
+        self.addCleanup(runtime.state_file.close)
+        recorder = _Recorder()
+        runtime.reconciler.arduino = recorder
+        runtime.reconciler.relays = recorder
+        runtime.reconciler.screens = recorder if runtime.screen_actuator else None
+        return runtime, recorder
+
+    def _reeds(self, runtime, **states):
+        return {**{n: True for n in runtime.compiled.reed_names}, **states}
+
+    def test_restart_restores_intents_and_skips_outputs_that_still_match(self):
+        before, _ = self._runtime()
+        before.world.update_reeds(self._reeds(before, kitchen_panel=False))
+        before.world.set_phase("Evening")
+        before.set_light_intent("kitchen_panel", 60, "red")
+        before.set_light_intent("accent", 30)
+        before.set_relay_intent("floodlights", True)
+        before.force_reed("rear_drawer", False)
+        before.state_file.close()
+        commanded = before.reconciler.commanded_outputs()
+
+        after, recorder = self._runtime()
+        self.assertIsNotNone(after._warm)
+        after._restore_world(self._reeds(after, kitchen_panel=False))
+        # The Arduino kept its levels across the restart, except accent (power-cycled)
+        lights = {n: b for n, (b, _) in commanded["lights"].items()}
+        after.world.update_observed_lights({**lights, "accent": 0}, {"kitchen_panel": "red"})
+        after.world.update_observed_relays(commanded["relays"])
+        after._restore_commanded()
+        after.world.set_phase("Evening")
+        after.reconcile("startup")
+
+        snap = after.world.snapshot()
+        self.assertEqual(snap.light_intents["kitchen_panel"].brightness, 60)
+        self.assertTrue(snap.relay_intents["floodlights"].on)
+        self.assertEqual(snap.reed_forces, {"rear_drawer": False})
+        self.assertEqual([c[:3] for c in recorder.commands if c[0] != "screen"], [("light", "accent", 30)])
+
+    def test_reed_closed_while_down_expires_its_intents(self):
+        before, _ = self._runtime()
+        before.world.update_reeds(self._reeds(before, kitchen_panel=False))
+        before.set_light_intent("kitchen_panel", 60, "red")
+        before.state_file.close()
+
+        after, _ = self._runtime()
+        after._restore_world(self._reeds(after, kitchen_panel=True))
+        self.assertNotIn("kitchen_panel", after.world.snapshot().light_intents)
+
+
+class GetAllTests(unittest.TestCase):
+    def _arduino(self, board, getall=True):
+        arduino = ArduinoManager(pccs_config)
+        sent = []
+
+        def send_command(cmd, expect=None):
+            sent.append(cmd)
+            if cmd == "GETALL" and not getall:
+                return None
+            return board.handle_line(cmd, now=0)
+
+        arduino.ser = type("Port", (), {"is_open": True})()
+        arduino.send_command = send_command
+        return arduino, sent
+
+    def test_one_round_trip_reads_every_light(self):
+        board = ArduinoEmulator(port=None)
+        pin = next(iter(ArduinoManager(pccs_config).LIGHT_MAP.values()))
+        board.handle_line(f"SET {pin} 255", now=0)
+        arduino, sent = self._arduino(board)
+        arduino.read_all_states()
+        self.assertEqual(sent, ["GETALL"])
+        self.assertIn(100, arduino.state.values())
+
+    def test_falls_back_to_per_pin_reads(self):
+        arduino, sent = self._arduino(ArduinoEmulator(port=None), getall=False)
+        with self.assertLogs("pccs", level="INFO"):
+            arduino.read_all_states()
+        arduino.read_all_states()
+        self.assertEqual(sent.count("GETALL"), 1)
+        self.assertGreater(len(sent), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
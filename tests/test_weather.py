@@ -0,0 +1,187 @@
+import configparser
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from modules.weather import WeatherManager
+
+HAS_REQUESTS = importlib.util.find_spec("requests") is not None
+
+FORECAST = {
+    "daily": {"temperature_2m_max": [24.4], "temperature_2m_min": [10.6], "weathercode": [1]},
+    "current_weather": {"weathercode": 1, "is_day": 1},
+}
+
+
+class _StubConfig:
+    """Minimal pccs.conf stand-in with per-test [weather] overrides."""
+
+    def __init__(self, weather: dict):
+        self._sections = {
+            "weather": weather,
+            "gps": {"fallback_latitude": "-37.191", "fallback_longitude": "145.711"},
+        }
+
+    def get(self, section, key, fallback=None):
+        return self._sections.get(section, {}).get(key, fallback)
+
+    def getint(self, section, key, fallback=None):
+        val = self.get(section, key)
+        return int(val) if val is not None else fallback
+
+    def getfloat(self, section, key, fallback=None):
+        val = self.get(section, key)
+        return float(val) if val is not None else fallback
+
+    def getboolean(self, section, key, fallback=None):
+        val = self.get(section, key)
+        return str(val).lower() == "true" if val is not None else fallback
+
+
+class _FakeGPS:
+    def __init__(self, lat=None, lon=None):
+        self.lat, self.lon = lat, lon
+
+    def get_state(self):
+        fix = 1 if self.lat is not None else 0
+        return {"fix_quality": fix, "latitude": self.lat, "longitude": self.lon}
+
+    def get_fallback_coords(self):
+        return -37.191, 145.711
+
+
+class _FakeSocketIO:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, payload=None, **kwargs):
+        self.events.append((event, payload))
+
+
+class _OpenMeteoStub(BaseHTTPRequestHandler):
+    requests_seen = []
+    status = 200
+
+    def do_GET(self):
+        type(self).requests_seen.append(self.path)
+        body = json.dumps(FORECAST).encode()
+        self.send_response(type(self).status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipUnless(HAS_REQUESTS, "requests not installed")
+class WeatherManagerTests(unittest.TestCase):
+    def setUp(self):
+        _OpenMeteoStub.requests_seen = []
+        _OpenMeteoStub.status = 200
+        self.server = HTTPServer(("127.0.0.1", 0), _OpenMeteoStub)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tmp.name, "weather_cache.json")
+        self.socketio = _FakeSocketIO()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def _manager(self, gps=None, **overrides):
+        weather = {
+            "base_url": f"http://127.0.0.1:{self.server.server_port}/v1/forecast",
+            "cache_file": self.cache_file,
+            "refresh_interval": "3600",
+            "retry_interval": "300",
+        }
+        weather.update(overrides)
+        return WeatherManager(_StubConfig(weather), self.socketio, gps or _FakeGPS(-37.1912, 145.7134))
+
+    def test_fetches_once_per_cell_and_interval(self):
+        wm = self._manager()
+        self.assertTrue(wm.refresh())
+        self.assertFalse(wm.refresh())
+        self.assertEqual(len(_OpenMeteoStub.requests_seen), 1)
+        self.assertIn("latitude=-37.2", _OpenMeteoStub.requests_seen[0])
+        self.assertEqual(self.socketio.events[-1][0], "weather_update")
+        self.assertEqual(self.socketio.events[-1][1]["data"], FORECAST)
+
+    def test_small_gps_wander_stays_in_cell(self):
+        gps = _FakeGPS(-37.1912, 145.7134)
+        wm = self._manager(gps=gps)
+        wm.refresh()
+        gps.lat, gps.lon = -37.1951, 145.7088
+        self.assertFalse(wm.refresh())
+        gps.lat, gps.lon = -36.5, 146.0
+        self.assertTrue(wm.refresh())
+        self.assertEqual(len(_OpenMeteoStub.requests_seen), 2)
+
+    def test_no_position_skips_the_fetch(self):
+        # No GPS and no [gps] fallback in pccs.conf: nothing to fetch for, no error
+        cfg = configparser.ConfigParser()
+        cfg.read_dict({"weather": {"base_url": f"http://127.0.0.1:{self.server.server_port}/v1/forecast",
+                                   "cache_file": self.cache_file}})
+        wm = WeatherManager(cfg, self.socketio)
+        self.assertFalse(wm.refresh())
+        self.assertEqual(_OpenMeteoStub.requests_seen, [])
+
+    def test_persisted_forecast_survives_restart_offline(self):
+        self._manager().refresh()
+        self.server.shutdown()
+        warm = self._manager(base_url="http://127.0.0.1:9/unreachable", timeout="0.5")
+        payload = warm.get_payload()
+        self.assertEqual(payload["data"], FORECAST)
+        self.assertFalse(payload["stale"])
+
+    def test_etag_stable_until_new_forecast(self):
+        wm = self._manager()
+        wm.refresh()
+        body, etag, cache_control = wm.http_response()
+        self.assertEqual(json.loads(body)["data"], FORECAST)
+        self.assertEqual(wm.http_response()[1], etag)
+        self.assertIn("stale-while-revalidate=", cache_control)
+        self.assertNotIn("max-age=0,", cache_control)
+
+    def test_body_has_one_shape_with_or_without_a_forecast(self):
+        _OpenMeteoStub.status = 500
+        empty, _etag, cache_control = self._manager().http_response()
+        self.assertEqual(json.loads(empty), {"data": None, "cell": None, "fetched_at": None})
+        self.assertIn("max-age=0,", cache_control)
+
+        _OpenMeteoStub.status = 200
+        wm = self._manager()
+        wm.refresh()
+        self.assertEqual(set(json.loads(wm.http_response()[0])), {"data", "cell", "fetched_at"})
+
+    def test_stale_entry_served_while_revalidating(self):
+        wm = self._manager()
+        wm.refresh()
+        with wm._lock:
+            wm._entry["fetched_at"] -= 7200
+        body, _etag, cache_control = wm.http_response()
+        self.assertEqual(json.loads(body)["data"], FORECAST)
+        self.assertIn("max-age=0,", cache_control)
+        deadline = time.time() + 5
+        while len(_OpenMeteoStub.requests_seen) < 2 and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(len(_OpenMeteoStub.requests_seen), 2)
+
+    def test_failed_fetch_backs_off(self):
+        _OpenMeteoStub.status = 500
+        wm = self._manager()
+        self.assertFalse(wm.refresh())
+        self.assertFalse(wm.refresh())
+        self.assertEqual(len(_OpenMeteoStub.requests_seen), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import threading
+import unittest
+
+from engine.world import WorldStore, WorldTransactionError
+
+
+def _store():
+    world = WorldStore(["kitchen_panel", "rear_drawer"], ["kitchen_panel", "accent"], ["floodlights"])
+    world.set_light_to_reed_map({"kitchen_panel": "kitchen_panel"})
+    return world
+
+
+class WorldTransactionTests(unittest.TestCase):
+    def test_mutations_publish_as_one_version_with_a_change_set(self):
+        world = _store()
+        world.set_light_intent("kitchen_panel", 40)
+        world.set_light_intent("accent", 20, expires="until_scene_clear")
+        before = world.version
+
+        with world.transaction() as tx:
+            tx.update_reeds({"kitchen_panel": True, "rear_drawer": False}, transition_closed=["kitchen_panel"])
+            tx.set_phase("night", invalidate=True)
+            tx.set_active_scene("bedtime")
+            tx.set_relay_intent("floodlights", True)
+            self.assertEqual(world.version, before)     # nothing visible inside the block
+
+        changes = tx.changes
+        self.assertEqual(changes.version, before + 1)
+        self.assertEqual(world.version, before + 1)
+        self.assertEqual(changes.reeds, {"rear_drawer"})
+        self.assertEqual(changes.closed_reeds, ["kitchen_panel"])
+        self.assertEqual(changes.lights, {"kitchen_panel", "accent"})
+        self.assertEqual(changes.relays, {"floodlights"})
+        self.assertTrue(changes.phase and changes.scene)
+        snap = world.snapshot()
+        self.assertEqual(snap.light_intents, {})
+        self.assertEqual(snap.active_scene, "bedtime")
+
+    def test_no_op_leaves_the_version_alone(self):
+        world = _store()
+        world.set_reed_force("rear_drawer", True)
+        version = world.version
+        self.assertFalse(world.set_reed_force("rear_drawer", True))
+        self.assertFalse(world.update_reeds({"kitchen_panel": True, "rear_drawer": True}))
+        self.assertFalse(world.clear_light_intent("accent"))
+        self.assertEqual(world.version, version)
+        self.assertEqual(world.set_reed_force("rear_drawer", None).reeds, {"rear_drawer"})
+
+    def test_invalid_mutation_applies_nothing(self):
+        world = _store()
+        with self.assertRaises(WorldTransactionError) as caught:
+            with world.transaction() as tx:
+                tx.set_light_intent("accent", 50)
+                tx.set_light_intent("porch", 50)
+                tx.set_relay_intent("floodlights", True, expires="until_reed_close")
+        self.assertEqual(len(caught.exception.errors), 2)
+        self.assertEqual(world.snapshot().light_intents, {})
+        self.assertEqual(world.version, 0)
+
+    def test_infinite_brightness_is_a_transaction_error(self):
+        world = _store()
+        for value in (float("inf"), float("nan"), None):
+            with self.assertRaises(WorldTransactionError):
+                world.set_light_intent("accent", value)
+        self.assertEqual(world.version, 0)
+
+    def test_exception_in_block_discards_mutations(self):
+        world = _store()
+        with self.assertRaises(RuntimeError):
+            with world.transaction() as tx:
+                tx.set_light_intent("accent", 50)
+                raise RuntimeError("caller changed its mind")
+        self.assertEqual(world.snapshot().light_intents, {})
+
+    def test_readers_never_see_half_a_transaction(self):
+        world = _store()
+        seen = []
+        stop = threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                snap = world.snapshot()
+                seen.append((snap.active_scene is None, bool(snap.light_intents)))
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        for _ in range(200):
+            with world.transaction() as tx:
+                tx.clear_all_light_intents()
+                tx.set_active_scene("bedtime")
+            with world.transaction() as tx:
+                tx.clear_active_scene()
+                tx.set_light_intent("accent", 10)
+        stop.set()
+        thread.join()
+        # The scene and the intents it clears always change together
+        self.assertNotIn((False, True), seen)
+
+
+if __name__ == "__main__":
+    unittest.main()